@@ -12,6 +12,8 @@ from src.core.root.config import service_config
 
 # <Models for correct migration work>:
 from src.handlers.videos.models import Videos, VideoSnapshots  # noqa
+from src.handlers.sso.models import IngestCheckpoints, IngestLog  # noqa
+from src.core.llms.models import IntentCacheEntries  # noqa
 
 config = context.config
 config.set_main_option("sqlalchemy.url", service_config.main_database.DSN + "?async_fallback=True")
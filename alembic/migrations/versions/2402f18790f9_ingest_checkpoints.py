@@ -0,0 +1,24 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '2402f18790f9'
+down_revision: Union[str, Sequence[str], None] = '863ab608621e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('ingest_checkpoints',
+                    sa.Column('upload_key', sa.String(length=128), nullable=False, comment='Telegram file_unique_id'),
+                    sa.Column('batches_committed', sa.Integer(), nullable=False),
+                    sa.Column('videos_committed', sa.Integer(), nullable=False),
+                    sa.Column('snapshots_committed', sa.Integer(), nullable=False),
+                    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+                    sa.PrimaryKeyConstraint('upload_key')
+                    )
+
+
+def downgrade() -> None:
+    op.drop_table('ingest_checkpoints')
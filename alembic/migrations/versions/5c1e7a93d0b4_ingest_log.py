@@ -0,0 +1,28 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '5c1e7a93d0b4'
+down_revision: Union[str, Sequence[str], None] = '2402f18790f9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('ingest_log',
+                    sa.Column('file_unique_id', sa.String(length=128), nullable=False, comment='Telegram file_unique_id'),
+                    sa.Column('content_hash', sa.String(length=64), nullable=False, comment='SHA-256 of the file content'),
+                    sa.Column('file_name', sa.String(length=255), nullable=False),
+                    sa.Column('videos_created', sa.Integer(), nullable=False),
+                    sa.Column('videos_updated', sa.Integer(), nullable=False),
+                    sa.Column('snapshots_created', sa.Integer(), nullable=False),
+                    sa.Column('imported_at', sa.DateTime(timezone=True), nullable=False),
+                    sa.PrimaryKeyConstraint('file_unique_id')
+                    )
+    op.create_index('ingest_log_content_hash', 'ingest_log', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ingest_log_content_hash', table_name='ingest_log')
+    op.drop_table('ingest_log')
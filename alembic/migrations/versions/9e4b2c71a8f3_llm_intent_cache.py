@@ -0,0 +1,33 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '9e4b2c71a8f3'
+down_revision: Union[str, Sequence[str], None] = '5c1e7a93d0b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('llm_intent_cache',
+                    sa.Column('query_key', sa.String(length=64), nullable=False,
+                              comment='sha256(QueryCache.normalize(user_query))'),
+                    sa.Column('query_text', sa.Text(), nullable=False, comment='QueryCache.normalize(user_query)'),
+                    sa.Column('key_context', sa.String(length=128), nullable=True),
+                    sa.Column('context', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+                    sa.Column('hits', sa.Integer(), nullable=False),
+                    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+                    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+                    sa.Column('last_hit_at', sa.DateTime(timezone=True), nullable=True),
+                    sa.PrimaryKeyConstraint('query_key')
+                    )
+    op.create_index('llm_intent_cache_expires_at', 'llm_intent_cache', ['expires_at'], unique=False)
+    op.create_index('llm_intent_cache_hits', 'llm_intent_cache', ['hits'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('llm_intent_cache_hits', table_name='llm_intent_cache')
+    op.drop_index('llm_intent_cache_expires_at', table_name='llm_intent_cache')
+    op.drop_table('llm_intent_cache')
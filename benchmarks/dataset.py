@@ -0,0 +1,125 @@
+"""
+Синтетические загрузки, совместимые с UploadJsonSchema.
+
+Запись файла (видео пишутся по одному, весь набор в памяти не держится):
+    python -m benchmarks.dataset --videos 10000 --snapshots 50 --creators 100 --output videos.json
+"""
+from argparse import ArgumentParser, Namespace
+from datetime import datetime, timedelta, timezone
+from json import dumps as jsondumps
+from pathlib import Path
+from random import Random
+from typing import List, Dict, Any, Iterator, Optional
+from uuid import UUID
+
+
+def iter_videos(
+        videos_count: int,
+        snapshots_per_video: int,
+        creators_count: Optional[int] = None,
+        seed: int = 0
+) -> Iterator[Dict[str, Any]]:
+    """
+    Генерирует элементы массива 'videos'. creators_count - сколько разных creator_id встречается в наборе,
+    None - у каждого видео свой креатор
+    """
+    random: Random = Random(seed)
+    started_at: datetime = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    creators: List[str] = [f"{random.getrandbits(128):032x}" for _ in range(creators_count or 0)]
+
+    for _ in range(videos_count):
+        video_id: str = str(UUID(int=random.getrandbits(128), version=4))
+        created_at: datetime = started_at + timedelta(seconds=random.randint(0, 180 * 24 * 3600))
+
+        snapshots: List[Dict[str, Any]] = []
+        views: int = 0
+        for hour in range(snapshots_per_video):
+            delta_views: int = random.randint(0, 500)
+            views += delta_views
+            snapshot_at: str = (created_at + timedelta(hours=hour)).isoformat()
+            snapshots.append({
+                "id": str(UUID(int=random.getrandbits(128), version=4)),
+                "video_id": video_id,
+                "views_count": views,
+                "likes_count": views // 10,
+                "comments_count": views // 100,
+                "reports_count": 0,
+                "delta_views_count": delta_views,
+                "delta_likes_count": delta_views // 10,
+                "delta_comments_count": delta_views // 100,
+                "delta_reports_count": 0,
+                "created_at": snapshot_at,
+                "updated_at": snapshot_at
+            })
+
+        creator_id: str = random.choice(creators) if creators else f"{random.getrandbits(128):032x}"
+        yield {
+            "id": video_id,
+            "creator_id": creator_id,
+            "video_created_at": created_at.isoformat(),
+            "views_count": views,
+            "likes_count": views // 10,
+            "comments_count": views // 100,
+            "reports_count": 0,
+            "created_at": created_at.isoformat(),
+            "updated_at": created_at.isoformat(),
+            "snapshots": snapshots
+        }
+
+
+def generate_videos(
+        videos_count: int,
+        snapshots_per_video: int,
+        creators_count: Optional[int] = None,
+        seed: int = 0
+) -> List[Dict[str, Any]]:
+    """Генерирует элементы массива 'videos', совместимые с UploadJsonSchema"""
+    return list(iter_videos(
+        videos_count=videos_count,
+        snapshots_per_video=snapshots_per_video,
+        creators_count=creators_count,
+        seed=seed
+    ))
+
+
+def write_dataset(
+        file_path: str | Path,
+        videos_count: int,
+        snapshots_per_video: int,
+        creators_count: Optional[int] = None,
+        seed: int = 0
+) -> int:
+    """Пишет файл загрузки вида {"videos": [...]} и возвращает его размер в байтах"""
+    path: Path = Path(file_path)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write('{"videos": [')
+        for index, video in enumerate(iter_videos(
+                videos_count=videos_count,
+                snapshots_per_video=snapshots_per_video,
+                creators_count=creators_count,
+                seed=seed
+        )):
+            if index:
+                file.write(", ")
+            file.write(jsondumps(video))
+        file.write("]}")
+    return path.stat().st_size
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="Синтетический файл загрузки для бенчмарков")
+    parser.add_argument("--videos", type=int, default=10000)
+    parser.add_argument("--snapshots", type=int, default=50, help="Снапшотов на одно видео")
+    parser.add_argument("--creators", type=int, default=None, help="Разных creator_id, по умолчанию - по числу видео")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, required=True)
+    arguments: Namespace = parser.parse_args()
+
+    size: int = write_dataset(
+        file_path=arguments.output,
+        videos_count=arguments.videos,
+        snapshots_per_video=arguments.snapshots,
+        creators_count=arguments.creators,
+        seed=arguments.seed
+    )
+    print({"file": str(arguments.output), "videos": arguments.videos, "mb": round(size / 1024 / 1024, 1)})
@@ -0,0 +1,120 @@
+"""
+Стадии загрузки файла по отдельности: чтение JSON (FileValidator.validate_json_file), валидация
+(UploadJsonSchema.model_validate) и запись в БД (UploadRepository.save_upload_data).
+Для каждой стадии - время, строк в секунду и пиковый RSS процесса после стадии. Отчет печатается
+одним JSON-объектом, чтобы его можно было сохранять и сравнивать между коммитами.
+
+Запуск (нужен PostgreSQL из .env с накатанными миграциями; --skip-db - без записи в БД):
+    python -m benchmarks.ingest --videos 10000 --snapshots 50 --creators 100 --report report.json
+Загруженные бенчмарком строки удаляются после прогона
+"""
+from argparse import ArgumentParser, Namespace
+from asyncio import run as run_async
+from json import dumps as jsondumps
+from pathlib import Path
+from resource import getrusage, RUSAGE_SELF
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Dict, Any, List
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from benchmarks.dataset import write_dataset
+from src.core.root.config import service_config
+from src.handlers.sso.processor import UploadRepository
+from src.handlers.sso.schemas import UploadJsonSchema
+from src.handlers.sso.utils import FileValidator
+from src.handlers.videos.models import Videos
+
+
+def peak_rss_mb() -> float:
+    """Пиковый RSS процесса с момента запуска (ru_maxrss в Linux - в килобайтах)"""
+    return round(getrusage(RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def stage_report(stage: str, rows: int, elapsed: float) -> Dict[str, Any]:
+    return {
+        "stage": stage,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed) if elapsed > 0 else None,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+async def save_and_cleanup(
+        session_factory: async_sessionmaker[AsyncSession],
+        upload_data: UploadJsonSchema,
+        rows: int
+) -> Dict[str, Any]:
+    async with session_factory() as session:
+        started_at: float = perf_counter()
+        await UploadRepository.save_upload_data(session=session, upload_data=upload_data)
+        report: Dict[str, Any] = stage_report(stage="save_upload_data", rows=rows, elapsed=perf_counter() - started_at)
+
+        await session.execute(delete(Videos).where(Videos.id.in_([video.id for video in upload_data.videos])))
+        await session.commit()
+    return report
+
+
+async def main(arguments: Namespace) -> None:
+    stages: List[Dict[str, Any]] = []
+    with TemporaryDirectory() as directory:
+        file_path: Path = Path(directory) / "videos.json"
+        file_size: int = write_dataset(
+            file_path=file_path,
+            videos_count=arguments.videos,
+            snapshots_per_video=arguments.snapshots,
+            creators_count=arguments.creators,
+            seed=arguments.seed
+        )
+        rows: int = arguments.videos * (1 + arguments.snapshots)
+
+        started_at: float = perf_counter()
+        data: Dict[str, Any] = FileValidator.validate_json_file(file_path=file_path)
+        stages.append(stage_report(stage="validate_json_file", rows=rows, elapsed=perf_counter() - started_at))
+
+    started_at = perf_counter()
+    upload_data: UploadJsonSchema = UploadJsonSchema.model_validate(data)
+    stages.append(stage_report(stage="model_validate", rows=rows, elapsed=perf_counter() - started_at))
+    del data
+
+    if not arguments.skip_db:
+        session_factory: async_sessionmaker[AsyncSession] = service_config.create_session_factory()
+        stages.append(await save_and_cleanup(session_factory=session_factory, upload_data=upload_data, rows=rows))
+
+    total_seconds: float = sum(stage["seconds"] for stage in stages)
+    report: Dict[str, Any] = {
+        "dataset": {
+            "videos": arguments.videos,
+            "snapshots_per_video": arguments.snapshots,
+            "creators": arguments.creators,
+            "seed": arguments.seed,
+            "rows": rows,
+            "file_mb": round(file_size / 1024 / 1024, 1)
+        },
+        "stages": stages,
+        "total": {
+            "seconds": round(total_seconds, 3),
+            "rows_per_sec": round(rows / total_seconds) if total_seconds > 0 else None,
+            "peak_rss_mb": peak_rss_mb()
+        }
+    }
+
+    output: str = jsondumps(report, indent=2)
+    print(output)
+    if arguments.report is not None:
+        arguments.report.write_text(output, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="Стадии загрузки файла: время, строк в секунду, пиковый RSS")
+    parser.add_argument("--videos", type=int, default=10000)
+    parser.add_argument("--snapshots", type=int, default=50, help="Снапшотов на одно видео")
+    parser.add_argument("--creators", type=int, default=None, help="Разных creator_id, по умолчанию - по числу видео")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-db", action="store_true", help="Не запускать стадию записи в БД")
+    parser.add_argument("--report", type=Path, default=None, help="Куда дополнительно сохранить JSON-отчет")
+
+    run_async(main(arguments=parser.parse_args()))
@@ -0,0 +1,105 @@
+"""
+Разбор ответа LLM в схему запроса на записанных ответах модели, в том числе с пояснением после JSON
+со своими скобками, на котором жадное регулярное выражение ошибается:
+    legacy_regex - прежний путь: ручное снятие ```json, жадный r"\\{.*\\}", json.loads, затем LLMResponse
+        и схема отдельными проходами;
+    extract_two_pass - тот же путь с extract_json;
+    extract_type_adapter - extract_json и один проход валидации _INTENT_ADAPTER (ContextProcessor).
+Режимы с extract_json замеряются с бэкендами json и orjson (если он установлен).
+
+Запуск:
+    python -m benchmarks.json_extraction --repeat 20000
+"""
+from argparse import ArgumentParser, Namespace
+from json import loads
+from re import search, DOTALL
+from timeit import timeit
+from typing import Dict, Any, List, Callable, Optional
+
+import src.handlers.videos  # noqa - загружает обработчики до ContextProcessor (циклический импорт)
+from src.core.llms import json_stream
+from src.core.llms.context_processor import ContextProcessor
+from src.core.llms.json_stream import JSON_BACKEND, extract_json
+from src.core.llms.schemas import LLMResponse, BaseResponse
+
+COMPLETIONS: List[str] = [
+    '```json\n{"key_context": "CountVideosPerMoreViews", "context": {"views": 100000}}\n```',
+    '{"key_context": "TotalCountVideos", "context": null}',
+    '```\n{"key_context": "CountViewsGrewUPPerDate", "context": {"date": "2025-11-28"}}\n```',
+    '{"key_context": "CountDifferentVideosForNewViewsPerDate", "context": {"date": "2025-11-27"}}\n'
+    'Пояснение: запрос о количестве разных видео, получивших новые просмотры за дату.',
+    '```json\n{\n  "key_context": "CountVideosPerCreatorAboveViews",\n  "context": {\n'
+    '    "creator_id": "aca1061a9d324ecf8c3fa2bb32d7be63",\n    "views": 10000\n  }\n}\n```\n'
+    'Параметры взяты из запроса: {creator_id} и порог {views}.',
+    '{"key_context": "CountVideosPerMoreViews", "context": {"views": 50000}} '
+    '(формат ответа: {"key_context": ..., "context": ...})',
+    '{"key_context": null, "context": "Запрос не относится к статистике видео"}',
+]
+
+
+def legacy_regex(text: str) -> BaseResponse:
+    """Прежний разбор: снятие обертки вручную, жадное регулярное выражение и два прохода валидации"""
+    text = text.strip()
+    if text.startswith("```json"):
+        text = text[7:].strip()
+    elif text.startswith("```"):
+        text = text[3:].strip()
+    if text.endswith("```"):
+        text = text[:-3].strip()
+
+    match = search(r"\{.*\}", text, DOTALL)
+    if match is None:
+        raise ValueError("JSON не найден")
+    return ContextProcessor._create_request_schema(llm_response=LLMResponse(**loads(match.group())))
+
+
+def extract_two_pass(text: str) -> BaseResponse:
+    data: Dict[str, Any] = extract_json(text=text)
+    return ContextProcessor._create_request_schema(llm_response=LLMResponse(**data))
+
+
+def extract_type_adapter(text: str) -> BaseResponse:
+    return ContextProcessor._parse_llm_response(text=text)
+
+
+def run_mode(mode: str, parse: Callable[[str], BaseResponse], repeat: int) -> Dict[str, Any]:
+    expected: List[BaseResponse] = [ContextProcessor._parse_llm_response(text=text) for text in COMPLETIONS]
+    results: List[Optional[BaseResponse]] = [_safe(parse=parse, text=text) for text in COMPLETIONS]
+
+    seconds: float = timeit(lambda: [_safe(parse=parse, text=text) for text in COMPLETIONS], number=repeat)
+    return {
+        "mode": mode,
+        "us_per_completion": round(seconds / (repeat * len(COMPLETIONS)) * 10 ** 6, 2),
+        "correct": f"{sum(1 for result, schema in zip(results, expected) if result == schema)}/{len(COMPLETIONS)}"
+    }
+
+
+def main(arguments: Namespace) -> None:
+    backends: Dict[str, Callable[..., Any]] = {"json": loads}
+    if JSON_BACKEND == "orjson":
+        backends["orjson"] = json_stream._backend_loads
+
+    reports: List[Dict[str, Any]] = [run_mode(mode="legacy_regex", parse=legacy_regex, repeat=arguments.repeat)]
+    for backend, backend_loads in backends.items():
+        # Бэкенд extract_json подменяется на время замера - как если бы orjson был или не был установлен
+        json_stream._backend_loads = backend_loads
+        for mode, parse in (("extract_two_pass", extract_two_pass), ("extract_type_adapter", extract_type_adapter)):
+            reports.append(run_mode(mode=f"{mode}[{backend}]", parse=parse, repeat=arguments.repeat))
+
+    baseline: float = reports[0]["us_per_completion"]
+    for report in reports:
+        print({**report, "speedup": round(baseline / report["us_per_completion"], 2)})
+
+
+def _safe(parse: Callable[[str], BaseResponse], text: str) -> Optional[BaseResponse]:
+    try:
+        return parse(text)
+    except Exception:
+        return None
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="Разбор ответа LLM: регулярка, extract_json и TypeAdapter")
+    parser.add_argument("--repeat", type=int, default=20000, help="Сколько раз разобрать весь набор ответов")
+
+    main(arguments=parser.parse_args())
@@ -0,0 +1,108 @@
+"""
+Хвост задержек LLM с одним бэкендом и с LLMRouter (дублирование запроса после p95).
+Поднимаются два локальных mock-сервера: в формате YandexGPT и OpenAI-совместимый. Задержка каждого -
+--base-ms с разбросом, а в доле --slow-share ответов она в --slow-factor раз больше (медленный хвост).
+
+Запуск:
+    python -m benchmarks.llm_router --requests 500 --concurrency 4 --slow-share 0.05 --slow-factor 20
+"""
+from argparse import ArgumentParser, Namespace
+from asyncio import run as run_async, sleep, gather, Semaphore
+from random import Random
+from statistics import quantiles, mean
+from time import perf_counter
+from typing import Dict, Any, List
+
+from aiohttp import web
+
+from benchmarks.llm_session import AUTH, COMPLETION
+from src.core.llms.interface import LLMInterface
+from src.core.llms.router import LLMRouter
+from src.core.llms.schemas import OpenAICompatibleAuth
+from src.core.llms.setups.openai_compatible import OpenAICompatible
+from src.core.llms.setups.yandexgpt import YandexGPT
+
+ANSWER: str = COMPLETION["result"]["alternatives"][0]["message"]["text"]
+OPENAI_COMPLETION: Dict[str, Any] = {
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": ANSWER}}]
+}
+
+
+async def start_mock_server(path: str, body: Dict[str, Any], arguments: Namespace, seed: int) -> web.AppRunner:
+    random: Random = Random(seed)
+
+    async def completion(_: web.Request) -> web.Response:
+        delay: float = arguments.base_ms / 1000 * random.uniform(0.8, 1.2)
+        if random.random() < arguments.slow_share:
+            delay *= arguments.slow_factor
+        await sleep(delay)
+        return web.json_response(body)
+
+    application: web.Application = web.Application()
+    application.router.add_post(path, completion)
+    runner: web.AppRunner = web.AppRunner(application)
+    await runner.setup()
+    await web.TCPSite(runner, host="127.0.0.1", port=0).start()
+    return runner
+
+
+async def run_mode(mode: str, client: LLMInterface, arguments: Namespace) -> Dict[str, Any]:
+    semaphore: Semaphore = Semaphore(arguments.concurrency)
+    latencies: List[float] = []
+
+    async def timed() -> None:
+        async with semaphore:
+            started_at: float = perf_counter()
+            await client.ask(system="system", question="question")
+            latencies.append(perf_counter() - started_at)
+
+    # Прогрев: роутеру нужно LLM_HEDGE_MIN_SAMPLES замеров, чтобы дублировать по p95, а не по порогу по умолчанию
+    await gather(*(timed() for _ in range(arguments.warmup)))
+    latencies.clear()
+    await gather(*(timed() for _ in range(arguments.requests)))
+    percentiles: List[float] = quantiles(latencies, n=100)
+    return {
+        "mode": mode,
+        "mean_ms": round(mean(latencies) * 1000, 1),
+        "p50_ms": round(percentiles[49] * 1000, 1),
+        "p95_ms": round(percentiles[94] * 1000, 1),
+        "p99_ms": round(percentiles[98] * 1000, 1)
+    }
+
+
+async def main(arguments: Namespace) -> None:
+    yandex_runner: web.AppRunner = await start_mock_server(
+        path="/completion", body=COMPLETION, arguments=arguments, seed=1
+    )
+    openai_runner: web.AppRunner = await start_mock_server(
+        path="/v1/chat/completions", body=OPENAI_COMPLETION, arguments=arguments, seed=2
+    )
+    yandex_url: str = f"http://127.0.0.1:{yandex_runner.addresses[0][1]}/completion"
+    openai_url: str = f"http://127.0.0.1:{openai_runner.addresses[0][1]}/v1"
+
+    single: YandexGPT = YandexGPT(auth_config=AUTH, base_url=yandex_url, stream=False)
+    router: LLMRouter = LLMRouter(backends={
+        "yandexgpt": YandexGPT(auth_config=AUTH, base_url=yandex_url, stream=False),
+        "openai": OpenAICompatible(auth_config=OpenAICompatibleAuth(base_url=openai_url, model="mock"))
+    })
+    try:
+        print(await run_mode(mode="single_backend", client=single, arguments=arguments))
+        print(await run_mode(mode="router_hedged", client=router, arguments=arguments))
+        print(router.metrics())
+    finally:
+        await single.aclose()
+        await router.aclose()
+        await yandex_runner.cleanup()
+        await openai_runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="Хвост задержек LLM: один бэкенд против LLMRouter")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=50, help="Запросов до замеров")
+    parser.add_argument("--base-ms", type=float, default=20.0, help="Обычная задержка ответа mock-сервера")
+    parser.add_argument("--slow-share", type=float, default=0.05, help="Доля медленных ответов")
+    parser.add_argument("--slow-factor", type=float, default=20.0, help="Во сколько раз медленный ответ дольше")
+
+    run_async(main(arguments=parser.parse_args()))
@@ -0,0 +1,126 @@
+"""
+Задержка запросов к LLM с новой HTTP-сессией на каждый запрос (как было раньше) и с одной
+долгоживущей сессией YandexGPT (пул keep-alive соединений). Вместо API YandexGPT поднимается
+локальный mock-сервер на aiohttp.web с ответом того же формата и настраиваемой задержкой,
+поэтому ключ API не нужен.
+
+На localhost экономится только установка TCP-соединения: без TLS-рукопожатия и DNS-запроса
+реальная разница с API в облаке будет больше.
+
+Запуск:
+    python -m benchmarks.llm_session --requests 200 --concurrency 1 4 --delay-ms 5
+"""
+from argparse import ArgumentParser, Namespace
+from asyncio import run as run_async, sleep, gather, Semaphore
+from statistics import mean, quantiles
+from time import perf_counter
+from typing import Dict, Any, List, Callable, Awaitable
+
+from aiohttp import web
+
+from src.core.llms.schemas import YandexGPTAuth
+from src.core.llms.setups.yandexgpt import YandexGPT
+
+AUTH: YandexGPTAuth = YandexGPTAuth(api_key="benchmark", folder_id="benchmark")
+COMPLETION: Dict[str, Any] = {
+    "result": {
+        "alternatives": [
+            {
+                "message": {"role": "assistant", "text": '{"key_context": "TotalCountVideos", "context": null}'},
+                "status": "ALTERNATIVE_STATUS_FINAL"
+            }
+        ]
+    }
+}
+
+
+async def start_mock_server(delay: float) -> web.AppRunner:
+    async def completion(_: web.Request) -> web.Response:
+        if delay:
+            await sleep(delay)
+        return web.json_response(COMPLETION)
+
+    application: web.Application = web.Application()
+    application.router.add_post("/completion", completion)
+    runner: web.AppRunner = web.AppRunner(application)
+    await runner.setup()
+    await web.TCPSite(runner, host="127.0.0.1", port=0).start()
+    return runner
+
+
+async def ask_fresh(base_url: str) -> None:
+    """Новая сессия и новое соединение на каждый запрос"""
+    client: YandexGPT = YandexGPT(auth_config=AUTH, base_url=base_url)
+    try:
+        await client.ask(system="system", question="question")
+    finally:
+        await client.aclose()
+
+
+async def run_mode(
+        requests: int,
+        concurrency: int,
+        ask: Callable[[], Awaitable[Any]]
+) -> Dict[str, Any]:
+    semaphore: Semaphore = Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def timed() -> None:
+        async with semaphore:
+            started_at: float = perf_counter()
+            await ask()
+            latencies.append(perf_counter() - started_at)
+
+    started_at: float = perf_counter()
+    await gather(*(timed() for _ in range(requests)))
+    elapsed: float = perf_counter() - started_at
+
+    percentiles: List[float] = quantiles(latencies, n=100)
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "mean_ms": round(mean(latencies) * 1000, 2),
+        "p50_ms": round(percentiles[49] * 1000, 2),
+        "p95_ms": round(percentiles[94] * 1000, 2),
+        "requests_per_sec": round(requests / elapsed)
+    }
+
+
+async def main(arguments: Namespace) -> None:
+    runner: web.AppRunner = await start_mock_server(delay=arguments.delay_ms / 1000)
+    try:
+        port: int = runner.addresses[0][1]
+        base_url: str = f"http://127.0.0.1:{port}/completion"
+
+        for concurrency in arguments.concurrency:
+            fresh: Dict[str, Any] = await run_mode(
+                requests=arguments.requests,
+                concurrency=concurrency,
+                ask=lambda: ask_fresh(base_url=base_url)
+            )
+            print({"mode": "session_per_request", **fresh})
+
+            client: YandexGPT = YandexGPT(auth_config=AUTH, base_url=base_url)
+            try:
+                # Прогрев: первое соединение открывается в любом режиме
+                await client.ask(system="system", question="question")
+                pooled: Dict[str, Any] = await run_mode(
+                    requests=arguments.requests,
+                    concurrency=concurrency,
+                    ask=lambda: client.ask(system="system", question="question")
+                )
+            finally:
+                await client.aclose()
+            pooled["saved_ms_per_request"] = round(fresh["mean_ms"] - pooled["mean_ms"], 2)
+            print({"mode": "pooled_session", **pooled})
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="Задержка запросов к LLM: новая сессия против пула соединений")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--delay-ms", type=float, default=5.0, help="Задержка ответа mock-сервера")
+
+    run_async(main(arguments=parser.parse_args()))
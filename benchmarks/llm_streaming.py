@@ -0,0 +1,120 @@
+"""
+Время до ответа LLM в обычном и потоковом режимах YandexGPT (stream). Локальный mock-сервер
+"генерирует" ответ по токену за --token-ms миллисекунд: сначала JSON, затем пояснение модели
+из --commentary-tokens токенов. В обычном режиме ответ приходит целиком после генерации всего текста,
+в потоковом - клиент возвращает ответ, как только закрылся JSON-объект, а остаток дочитывает в фоне.
+
+Запуск:
+    python -m benchmarks.llm_streaming --requests 20 --token-ms 20 --commentary-tokens 0 40 120
+"""
+from argparse import ArgumentParser, Namespace
+from asyncio import run as run_async, sleep
+from json import dumps as jsondumps
+from statistics import mean
+from time import perf_counter
+from typing import Dict, Any, List
+
+from aiohttp import web
+
+from benchmarks.llm_session import AUTH
+from src.core.llms.setups.yandexgpt import YandexGPT
+
+ANSWER: str = '```json\n{"key_context": "CountVideosPerMoreViews", "context": {"views": 100000}}\n```'
+COMMENTARY: str = " Пояснение: пользователь спрашивает о количестве видео с просмотрами выше порога."
+
+
+def completion_chunk(text: str, final: bool) -> Dict[str, Any]:
+    return {
+        "result": {
+            "alternatives": [
+                {
+                    "message": {"role": "assistant", "text": text},
+                    "status": "ALTERNATIVE_STATUS_FINAL" if final else "ALTERNATIVE_STATUS_PARTIAL"
+                }
+            ]
+        }
+    }
+
+
+def generated_tokens(commentary_tokens: int) -> List[str]:
+    """Ответ модели по токенам (по 4 символа): JSON, затем commentary_tokens токенов пояснения"""
+    commentary: str = (COMMENTARY * (commentary_tokens * 4 // len(COMMENTARY) + 1))[:commentary_tokens * 4]
+    text: str = ANSWER + commentary
+    return [text[index:index + 4] for index in range(0, len(text), 4)]
+
+
+async def start_mock_server(token_delay: float, commentary_tokens: int) -> web.AppRunner:
+    tokens: List[str] = generated_tokens(commentary_tokens=commentary_tokens)
+
+    async def completion(request: web.Request) -> web.StreamResponse:
+        payload: Dict[str, Any] = await request.json()
+        if not payload["completionOptions"]["stream"]:
+            await sleep(token_delay * len(tokens))
+            return web.json_response(completion_chunk(text="".join(tokens), final=True))
+
+        response: web.StreamResponse = web.StreamResponse()
+        await response.prepare(request)
+        text: str = ""
+        try:
+            for index, token in enumerate(tokens):
+                await sleep(token_delay)
+                text += token
+                chunk: Dict[str, Any] = completion_chunk(text=text, final=index == len(tokens) - 1)
+                await response.write((jsondumps(chunk, ensure_ascii=False) + "\n").encode())
+            await response.write_eof()
+        except ConnectionResetError:
+            # Клиент закрыл соединение (aclose() до конца генерации) - генерация прерывается
+            pass
+        return response
+
+    application: web.Application = web.Application()
+    application.router.add_post("/completion", completion)
+    runner: web.AppRunner = web.AppRunner(application)
+    await runner.setup()
+    await web.TCPSite(runner, host="127.0.0.1", port=0).start()
+    return runner
+
+
+async def run_mode(base_url: str, stream: bool, requests: int) -> Dict[str, Any]:
+    client: YandexGPT = YandexGPT(auth_config=AUTH, base_url=base_url, stream=stream)
+    latencies: List[float] = []
+    try:
+        for _ in range(requests):
+            started_at: float = perf_counter()
+            text: str = await client.ask(system="system", question="question")
+            latencies.append(perf_counter() - started_at)
+            YandexGPT.extract_json_from_text(text=text)
+    finally:
+        await client.aclose()
+    return {"stream": stream, "mean_ms": round(mean(latencies) * 1000, 1)}
+
+
+async def main(arguments: Namespace) -> None:
+    for commentary_tokens in arguments.commentary_tokens:
+        runner: web.AppRunner = await start_mock_server(
+            token_delay=arguments.token_ms / 1000,
+            commentary_tokens=commentary_tokens
+        )
+        try:
+            base_url: str = f"http://127.0.0.1:{runner.addresses[0][1]}/completion"
+            full: Dict[str, Any] = await run_mode(base_url=base_url, stream=False, requests=arguments.requests)
+            streamed: Dict[str, Any] = await run_mode(base_url=base_url, stream=True, requests=arguments.requests)
+        finally:
+            await runner.cleanup()
+
+        print({
+            "commentary_tokens": commentary_tokens,
+            "full_mean_ms": full["mean_ms"],
+            "stream_mean_ms": streamed["mean_ms"],
+            "saved_ms": round(full["mean_ms"] - streamed["mean_ms"], 1)
+        })
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="Время до ответа LLM: обычный режим против потокового")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--token-ms", type=float, default=20.0, help="Задержка генерации одного токена")
+    parser.add_argument("--commentary-tokens", type=int, nargs="+", default=[0, 40, 120],
+                        help="Токенов пояснения после JSON")
+
+    run_async(main(arguments=parser.parse_args()))
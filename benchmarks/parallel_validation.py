@@ -0,0 +1,87 @@
+"""
+Масштабирование разбора и валидации загрузки по ядрам: FileValidator.aiter_videos с пулом
+из 1/2/4/8 процессов против валидации в event loop (workers=0). БД не нужна.
+main_cpu_seconds - процессорное время основного процесса (поиск границ видео и прием результатов):
+оно не распараллеливается, поэтому rows / main_cpu_seconds - потолок скорости при любом числе ядер.
+
+Запуск:
+    python -m benchmarks.parallel_validation --videos 5000 --snapshots 50 --workers 1 2 4 8
+"""
+from argparse import ArgumentParser, Namespace
+from asyncio import run as run_async
+from concurrent.futures import ProcessPoolExecutor
+from json import dump as jsondump
+from os import cpu_count
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter, process_time
+from typing import Dict, Any, Optional, List
+
+from benchmarks.dataset import generate_videos
+from src.handlers.sso.enums import ValidationMode
+from src.handlers.sso.utils import FileValidator
+
+
+async def run_workers(file_path: Path, workers: int, validation: ValidationMode) -> Dict[str, Any]:
+    executor: Optional[ProcessPoolExecutor] = ProcessPoolExecutor(max_workers=workers) if workers else None
+    try:
+        if executor is not None:
+            # Процессы пула стартуют лениво - прогрев, чтобы не мерить запуск интерпретаторов
+            list(executor.map(abs, range(workers)))
+
+        rows: int = 0
+        started_at: float = perf_counter()
+        cpu_started_at: float = process_time()
+        async for _, snapshots in FileValidator.aiter_videos(
+                chunks=FileValidator.aread_file(file_path=file_path),
+                executor=executor,
+                validation=validation,
+                shards_in_flight=2 * max(workers, 1)
+        ):
+            rows += 1 + len(snapshots)
+        elapsed: float = perf_counter() - started_at
+        main_cpu: float = process_time() - cpu_started_at
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return {
+        "workers": workers,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "main_cpu_seconds": round(main_cpu, 3),
+        "rows_per_sec": round(rows / elapsed)
+    }
+
+
+async def main(arguments: Namespace) -> None:
+    with TemporaryDirectory() as directory:
+        file_path: Path = Path(directory) / "videos.json"
+        with open(file_path, "w", encoding="utf-8") as file:
+            videos: List[Dict[str, Any]] = generate_videos(
+                videos_count=arguments.videos,
+                snapshots_per_video=arguments.snapshots
+            )
+            jsondump({"videos": videos}, file)
+
+        print({"cpu_count": cpu_count(), "file_mb": round(file_path.stat().st_size / 1024 / 1024, 1)})
+        baseline: Optional[float] = None
+        for workers in arguments.workers:
+            result: Dict[str, Any] = await run_workers(
+                file_path=file_path,
+                workers=workers,
+                validation=arguments.validation
+            )
+            baseline = baseline or result["rows_per_sec"]
+            result["speedup"] = round(result["rows_per_sec"] / baseline, 2)
+            print(result)
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="Разбор и валидация загрузки: строк в секунду по числу процессов")
+    parser.add_argument("--videos", type=int, default=5000)
+    parser.add_argument("--snapshots", type=int, default=50, help="Снапшотов на одно видео")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4, 8], help="0 - без пула процессов")
+    parser.add_argument("--validation", type=ValidationMode, default=ValidationMode.pydantic)
+
+    run_async(main(arguments=parser.parse_args()))
@@ -0,0 +1,95 @@
+"""
+Размер системного промпта в полном и компактном режимах (PROMPT_MODE) для набора запросов:
+токены, символы и попал ли ожидаемый тип запроса в отобранные IntentRetriever кандидаты.
+По умолчанию запросы - примеры из LLMPrompter.CONTEXT_DESCRIPTIONS, свои можно передать через --query.
+
+Токены по умолчанию оцениваются локально (слова и знаки препинания, длинные слова - по 4 символа на токен),
+с --api считаются токенизатором YandexGPT (нужны YANDEX_GPT_* из .env).
+
+Запуск:
+    python -m benchmarks.prompt_tokens
+    python -m benchmarks.prompt_tokens --api --query "Сколько роликов набрали больше 100к просмотров?"
+"""
+from argparse import ArgumentParser, Namespace
+from asyncio import run as run_async
+from math import ceil
+from re import compile as re_compile, Pattern
+from statistics import mean
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
+
+import src.handlers.videos  # noqa: F401 - порядок импорта: schemas видео до ContextProcessor
+from src.core.llms.context_processor import ContextProcessor
+from src.core.llms.enums import PromptMode
+from src.core.llms.prompter import LLMPrompter
+
+_TOKEN_PIECES: Pattern = re_compile(r"\w+|[^\w\s]|\s{2,}")
+
+
+def estimate_tokens(text: str) -> int:
+    """Грубая оценка без токенизатора: слово до 4 символов - один токен, длиннее - по токену на 4 символа"""
+    return sum(max(1, ceil(len(piece) / 4)) for piece in _TOKEN_PIECES.findall(text))
+
+
+def default_queries() -> List[Tuple[str, Optional[str]]]:
+    return [
+        (" ".join(example.split()), key)
+        for key, info in LLMPrompter.CONTEXT_DESCRIPTIONS.items()
+        for example in info["examples"]
+    ]
+
+
+async def main(arguments: Namespace) -> None:
+    queries: List[Tuple[str, Optional[str]]] = [(query, None) for query in arguments.query] or default_queries()
+    processor: ContextProcessor = ContextProcessor(llm_client=None, prompt_mode=PromptMode.compact)  # type: ignore
+    count_tokens: Callable[[str], Awaitable[int]]
+
+    client: Optional[Any] = None
+    if arguments.api:
+        from src.core.llms.setups.yandexgpt import YandexGPT
+        from src.core.root.config import service_config
+        client = YandexGPT(auth_config=service_config.yandex_gpt_auth)
+        count_tokens = client.count_tokens
+    else:
+        async def count_tokens(text: str) -> int:
+            return estimate_tokens(text=text)
+
+    try:
+        full_tokens: int = await count_tokens(processor.system_prompt)
+        rows: List[Dict[str, Any]] = []
+        for query, expected in queries:
+            compact: str = processor.create_system_prompt(user_query=query)
+            row: Dict[str, Any] = {
+                "query": query[:60],
+                "full_tokens": full_tokens,
+                "compact_tokens": await count_tokens(compact),
+                "compact_chars": len(compact),
+                "fallback_to_full": compact == processor.system_prompt
+            }
+            if expected is not None:
+                row["expected_in_candidates"] = f"{expected}:" in compact
+            rows.append(row)
+            print(row)
+    finally:
+        if client is not None:
+            await client.aclose()
+
+    mean_compact: float = mean(row["compact_tokens"] for row in rows)
+    summary: Dict[str, Any] = {
+        "tokenizer": "yandexgpt" if arguments.api else "estimate",
+        "full_tokens": full_tokens,
+        "full_chars": len(processor.system_prompt),
+        "mean_compact_tokens": round(mean_compact, 1),
+        "reduction": round(1 - mean_compact / full_tokens, 3),
+        "fallbacks": sum(row["fallback_to_full"] for row in rows)
+    }
+    if any("expected_in_candidates" in row for row in rows):
+        summary["candidates_recall"] = round(mean(row["expected_in_candidates"] for row in rows), 3)
+    print(summary)
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="Токены системного промпта: полный против компактного")
+    parser.add_argument("--query", action="append", default=[], help="Запрос пользователя, можно несколько раз")
+    parser.add_argument("--api", action="store_true", help="Считать токены токенизатором YandexGPT")
+
+    run_async(main(arguments=parser.parse_args()))
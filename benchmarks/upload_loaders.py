@@ -0,0 +1,73 @@
+"""
+Сравнение скорости записи загрузки в БД через COPY и через ORM.
+
+Запуск (нужен PostgreSQL из .env с накатанными миграциями):
+    python -m benchmarks.upload_loaders --videos 2000 --snapshots 50
+Загруженные бенчмарком строки удаляются после каждого прогона
+"""
+from argparse import ArgumentParser, Namespace
+from asyncio import run as run_async
+from time import perf_counter
+from typing import List, Dict, Any
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from benchmarks.dataset import generate_videos
+from src.core.root.config import service_config
+from src.handlers.sso.enums import UploadLoader
+from src.handlers.sso.processor import UploadRepository
+from src.handlers.sso.records import VideoRecord, video_record
+from src.handlers.sso.schemas import VideoSchema
+from src.handlers.videos.models import Videos
+
+
+async def run_loader(
+        session_factory: async_sessionmaker[AsyncSession],
+        loader: UploadLoader,
+        videos: List[VideoRecord]
+) -> Dict[str, Any]:
+    async with session_factory() as session:
+        started_at: float = perf_counter()
+        stats: Dict[str, Any] = await UploadRepository.save_upload_stream(
+            session=session,
+            videos=videos,
+            loader=loader
+        )
+        elapsed: float = perf_counter() - started_at
+
+        await session.execute(delete(Videos).where(Videos.id.in_([video[0] for video, _ in videos])))
+        await session.commit()
+
+    rows: int = stats['videos_created'] + stats['snapshots_created']
+    return {
+        "loader": loader.value,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed)
+    }
+
+
+async def main(arguments: Namespace) -> None:
+    session_factory: async_sessionmaker[AsyncSession] = service_config.create_session_factory()
+
+    for loader in (UploadLoader.orm, UploadLoader.copy):
+        for attempt in range(arguments.repeat):
+            videos: List[VideoRecord] = [
+                video_record(video=VideoSchema.model_validate(item))
+                for item in generate_videos(
+                    videos_count=arguments.videos,
+                    snapshots_per_video=arguments.snapshots,
+                    seed=attempt
+                )
+            ]
+            print(await run_loader(session_factory=session_factory, loader=loader, videos=videos))
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="COPY vs ORM: строк в секунду")
+    parser.add_argument("--videos", type=int, default=2000)
+    parser.add_argument("--snapshots", type=int, default=50, help="Снапшотов на одно видео")
+    parser.add_argument("--repeat", type=int, default=3)
+
+    run_async(main(arguments=parser.parse_args()))
@@ -0,0 +1,57 @@
+"""
+Сравнение скорости построчной валидации VideoSchema и колоночной валидации NumPy.
+Заодно проверяется, что оба режима выдают одинаковые строки для записи в БД - VideoSchema остается эталоном.
+
+Запуск (БД не нужна):
+    python -m benchmarks.validation_modes --videos 2000 --snapshots 50 --chunk 200
+"""
+from argparse import ArgumentParser, Namespace
+from time import perf_counter
+from typing import List, Dict, Any, Callable
+
+from benchmarks.dataset import generate_videos
+from src.handlers.sso.columnar import ColumnarValidator
+from src.handlers.sso.records import VideoRecord
+
+Validator = Callable[[List[Dict[str, Any]], int], List[VideoRecord]]
+
+
+def run_validator(name: str, validator: Validator, items: List[Dict[str, Any]], chunk: int) -> List[VideoRecord]:
+    records: List[VideoRecord] = []
+    started_at: float = perf_counter()
+    for start in range(0, len(items), chunk):
+        records.extend(validator(items[start:start + chunk], start))
+    elapsed: float = perf_counter() - started_at
+
+    rows: int = sum(1 + len(snapshots) for _, snapshots in records)
+    print({"validation": name, "rows": rows, "seconds": round(elapsed, 3), "rows_per_sec": round(rows / elapsed)})
+    return records
+
+
+def main(arguments: Namespace) -> None:
+    items: List[Dict[str, Any]] = generate_videos(videos_count=arguments.videos, snapshots_per_video=arguments.snapshots)
+
+    reference: List[VideoRecord] = run_validator(
+        name="pydantic",
+        validator=ColumnarValidator.validate_reference,
+        items=items,
+        chunk=arguments.chunk
+    )
+    columnar: List[VideoRecord] = run_validator(
+        name="columnar",
+        validator=ColumnarValidator.validate_records,
+        items=items,
+        chunk=arguments.chunk
+    )
+
+    if columnar != reference:
+        raise SystemExit("Результаты колоночной валидации расходятся с VideoSchema")
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="VideoSchema vs NumPy: строк в секунду")
+    parser.add_argument("--videos", type=int, default=2000)
+    parser.add_argument("--snapshots", type=int, default=50, help="Снапшотов на одно видео")
+    parser.add_argument("--chunk", type=int, default=200, help="Видео в одной пачке валидации")
+
+    main(arguments=parser.parse_args())
@@ -0,0 +1,75 @@
+from asyncio import Future, Task, create_task, get_running_loop, sleep
+from typing import List, Tuple, Callable, Coroutine, Any, Optional
+
+from src.core.llms.constants import QUERY_BATCH_WINDOW_SECONDS, QUERY_BATCH_MAX_SIZE
+from src.core.llms.schemas import BaseResponse
+
+# Пакет запросов пользователя -> схемы в том же порядке
+BatchHandler = Callable[[List[str]], Coroutine[Any, Any, List[BaseResponse]]]
+
+
+class QueryBatcher:
+    """
+    Копит запросы в течение window_seconds (или пока их не наберется max_size) и передает их
+    handler одним пакетом; каждый вызывающий получает схему для своего запроса
+    """
+
+    def __init__(
+            self,
+            handler: BatchHandler,
+            window_seconds: float = QUERY_BATCH_WINDOW_SECONDS,
+            max_size: int = QUERY_BATCH_MAX_SIZE
+    ) -> None:
+        self.handler: BatchHandler = handler
+        self.window_seconds: float = window_seconds
+        self.max_size: int = max_size
+        # Сколько пакетов отправлено и сколько запросов в них было
+        self.batches: int = 0
+        self.queries: int = 0
+
+        self._pending: List[Tuple[str, Future[BaseResponse]]] = []
+        self._timer: Optional[Task] = None
+        self._flushes: List[Task] = []
+
+    async def submit(self, user_query: str) -> BaseResponse:
+        future: Future[BaseResponse] = get_running_loop().create_future()
+        self._pending.append((user_query, future))
+
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = create_task(self._flush_after_window())
+        return await future
+
+    async def _flush_after_window(self) -> None:
+        await sleep(self.window_seconds)
+        self._timer = None
+        self._flush()
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch: List[Tuple[str, Future[BaseResponse]]] = self._pending
+        self._pending = []
+        if batch:
+            task: Task = create_task(self._run(batch=batch))
+            self._flushes.append(task)
+            task.add_done_callback(self._flushes.remove)
+
+    async def _run(self, batch: List[Tuple[str, Future[BaseResponse]]]) -> None:
+        self.batches += 1
+        self.queries += len(batch)
+        try:
+            results: List[BaseResponse] = await self.handler([user_query for user_query, _ in batch])
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for (_, future), result in zip(batch, results):
+            # Вызывающий мог уйти (отмена) - его результат просто не нужен
+            if not future.done():
+                future.set_result(result)
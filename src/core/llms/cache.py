@@ -0,0 +1,70 @@
+from collections import OrderedDict
+from re import compile as re_compile, Pattern
+from time import monotonic
+from typing import Optional, Tuple, Callable
+
+from src.core.llms.constants import QUERY_CACHE_SIZE, QUERY_CACHE_TTL_SECONDS
+from src.core.llms.schemas import BaseResponse
+
+# Все, что не буква и не цифра (пробелы, пунктуация, подчеркивания), схлопывается в один пробел
+_SEPARATORS: Pattern = re_compile(r"[\W_]+")
+
+
+class QueryCache:
+    """
+    Кеш распознанных запросов пользователя: нормализованный текст запроса -> провалидированная схема.
+    Вытесняется давно не использованная запись (LRU), запись старше ttl_seconds считается промахом
+    """
+
+    def __init__(
+            self,
+            max_size: int = QUERY_CACHE_SIZE,
+            ttl_seconds: float = QUERY_CACHE_TTL_SECONDS,
+            clock: Callable[[], float] = monotonic
+    ) -> None:
+        self.max_size: int = max_size
+        self.ttl_seconds: float = ttl_seconds
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self._clock: Callable[[], float] = clock
+        self._entries: OrderedDict[str, Tuple[float, BaseResponse]] = OrderedDict()
+
+    @staticmethod
+    def normalize(user_query: str) -> str:
+        """Ключ кеша: регистр, ё/е, пробелы и пунктуация не различаются"""
+        return _SEPARATORS.sub(" ", user_query.casefold().replace("ё", "е")).strip()
+
+    def get(self, user_query: str) -> Optional[BaseResponse]:
+        key: str = QueryCache.normalize(user_query=user_query)
+        entry: Optional[Tuple[float, BaseResponse]] = self._entries.get(key)
+
+        if entry is None or entry[0] <= self._clock():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Копия, чтобы изменения схемы вызывающим кодом не попали в кеш
+        return entry[1].model_copy()
+
+    def put(self, user_query: str, schema: BaseResponse) -> None:
+        key: str = QueryCache.normalize(user_query=user_query)
+        self._entries[key] = (self._clock() + self.ttl_seconds, schema.model_copy())
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        requests: int = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
@@ -0,0 +1,71 @@
+from src.core.llms.enums import PromptMode
+
+# Кеш распознанных запросов: сколько разных запросов хранится и сколько секунд живет запись.
+# TTL ограничивает и запросы с относительными датами ("вчера"), которые LLM переводит в конкретную дату
+QUERY_CACHE_SIZE: int = 1024
+QUERY_CACHE_TTL_SECONDS: float = 15 * 60
+
+# Минимальная уверенность локального разбора запроса (доля найденных ключевых слов), ниже - запрос уходит в LLM
+LOCAL_INTENT_MIN_CONFIDENCE: float = 0.75
+
+# HTTP-клиент YandexGPT: одна долгоживущая сессия на клиента вместо новой на каждый запрос
+YANDEX_GPT_COMPLETION_URL: str = "https://llm.api.cloud.yandex.net/foundationModels/v1/completion"
+YANDEX_GPT_MODEL: str = "yandexgpt/latest"
+YANDEX_GPT_TOKENIZE_URL: str = "https://llm.api.cloud.yandex.net/foundationModels/v1/tokenize"
+LLM_REQUEST_TIMEOUT_SECONDS: int = 30
+# Потоковая генерация: ответ возвращается, как только закрылся первый JSON-объект; остаток потока дочитывается
+# в фоне, и соединение остается в пуле keep-alive
+LLM_STREAM: bool = True
+# Одновременных соединений с API (запросы сверх лимита ждут свободное соединение)
+LLM_CONNECTIONS_PER_HOST: int = 20
+# Сколько секунд держать простаивающее соединение открытым для следующего запроса
+LLM_KEEPALIVE_SECONDS: float = 60.0
+# Сколько секунд кешировать DNS-ответ
+LLM_DNS_CACHE_SECONDS: int = 300
+
+# Планировщик запросов к LLM: квота YandexGPT на синхронные запросы (запросов в секунду) и допустимый всплеск
+LLM_RATE_LIMIT_PER_SECOND: float = 10.0
+LLM_RATE_LIMIT_BURST: int = 10
+# Повторы при 429, 5xx и сетевых ошибках: число попыток и границы экспоненциальной задержки (с jitter)
+LLM_RETRY_ATTEMPTS: int = 4
+LLM_RETRY_BASE_DELAY_SECONDS: float = 0.5
+LLM_RETRY_MAX_DELAY_SECONDS: float = 8.0
+# Сколько секунд запрос может ждать в очереди и повторяться, прежде чем пользователь получит ошибку
+LLM_REQUEST_DEADLINE_SECONDS: float = 60.0
+
+# Компактный промпт: сколько ближайших к запросу типов отправлять в LLM и минимальное сходство лучшего из них.
+# Если на запрос ничего не похоже, отправляется полный промпт - пусть LLM решает по всем типам
+PROMPT_MODE: PromptMode = PromptMode.compact
+PROMPT_TOP_K: int = 3
+PROMPT_MIN_SCORE: float = 0.3
+
+# Роутер по нескольким LLM-бэкендам: сглаживание EWMA задержки, окно задержек для p95 и сколько замеров нужно,
+# чтобы доверять p95. До этого дублирующий (hedged) запрос отправляется через LLM_HEDGE_DEFAULT_DELAY_SECONDS
+LLM_ROUTER_EWMA_ALPHA: float = 0.2
+LLM_ROUTER_LATENCY_WINDOW: int = 200
+LLM_HEDGE_MIN_SAMPLES: int = 20
+LLM_HEDGE_DEFAULT_DELAY_SECONDS: float = 3.0
+LLM_HEDGE_QUANTILE: float = 0.95
+
+# Пакетное распознавание: запросы, пришедшие в течение окна (или набравшие QUERY_BATCH_MAX_SIZE), уходят в LLM
+# одним запросом с нумерованным списком. Одиночный запрос за окно отправляется как обычно, но ждет окно целиком,
+# поэтому по умолчанию выключено - включать при нагрузке, когда экономия квоты LLM важнее задержки
+QUERY_BATCHING: bool = False
+QUERY_BATCH_WINDOW_SECONDS: float = 0.05
+QUERY_BATCH_MAX_SIZE: int = 8
+# Ответ на один запрос - около сотни токенов JSON
+QUERY_BATCH_MAX_TOKENS_PER_QUERY: int = 200
+
+# Кеш шаблонов для перефразированных запросов: сколько шаблонов (запросов без параметров) хранится и минимальное
+# косинусное сходство триграмм, при котором новый запрос получает key_context уже распознанного шаблона
+TEMPLATE_CACHE_SIZE: int = 512
+TEMPLATE_CACHE_MIN_SIMILARITY: float = 0.7
+
+# Общий кеш ответов LLM в PostgreSQL (llm_intent_cache) для всех реплик бота; перед ним - QueryCache в памяти.
+# Запись живет INTENT_CACHE_TTL_SECONDS; попадания копятся в памяти и раз в INTENT_CACHE_FLUSH_SECONDS
+# записываются в таблицу вместе с удалением просроченных записей. При старте в память загружаются
+# INTENT_CACHE_WARMUP_SIZE самых частых запросов
+SHARED_INTENT_CACHE: bool = True
+INTENT_CACHE_TTL_SECONDS: float = 7 * 24 * 60 * 60
+INTENT_CACHE_FLUSH_SECONDS: float = 30.0
+INTENT_CACHE_WARMUP_SIZE: int = 256
@@ -1,48 +1,346 @@
-from typing import Dict, Any, Optional
-from pydantic import ValidationError
+from asyncio import gather
+from typing import Dict, Any, Optional, List, Tuple, Literal, Union, Annotated
+from pydantic import ValidationError, TypeAdapter, Field, BeforeValidator, create_model
 
+from src.core.llms.batcher import QueryBatcher
+from src.core.llms.cache import QueryCache
+from src.core.llms.constants import (
+    LOCAL_INTENT_MIN_CONFIDENCE,
+    PROMPT_MODE,
+    PROMPT_TOP_K,
+    PROMPT_MIN_SCORE,
+    QUERY_BATCHING,
+    QUERY_BATCH_MAX_TOKENS_PER_QUERY,
+    INTENT_CACHE_WARMUP_SIZE
+)
+from src.core.llms.enums import PromptMode
+from src.core.llms.exceptions import LLMError, JSONParseError
 from src.core.llms.interface import LLMInterface
+from src.core.llms.json_stream import extract_json
+from src.core.llms.local_parser import LocalIntentParser, LocalMatch
 
 from src.core.llms.prompter import LLMPrompter
+from src.core.llms.retriever import IntentRetriever
+from src.core.llms.scheduler import LLMScheduler
 from src.core.llms.schemas import LLMResponse, BaseResponse
+from src.core.llms.shared_cache import SharedIntentCache
+from src.core.llms.singleflight import SingleFlight
+from src.core.llms.template_cache import TemplateCache
 from src.handlers.videos.schemas import SCHEMA_MAP
 
 
+def _create_intent_adapter() -> TypeAdapter:
+    """
+    Один скомпилированный валидатор ответа LLM: размеченное объединение {"key_context": <имя>, "context": <схема>}
+    по всем схемам SCHEMA_MAP. По key_context сразу выбирается схема, и context валидируется ею за один проход.
+    Пустой context, как и в _create_request_schema, означает схему без параметров
+    """
+    intents: List[Any] = [
+        create_model(
+            f"{key_context}Intent",
+            key_context=(Literal[key_context], ...),
+            context=(
+                Annotated[schema_class, BeforeValidator(lambda context: {} if context is None else context)],
+                Field(default=None, validate_default=True)
+            )
+        )
+        for key_context, schema_class in SCHEMA_MAP.items()
+    ]
+    return TypeAdapter(Annotated[Union[tuple(intents)], Field(discriminator="key_context")])
+
+
+_INTENT_ADAPTER: TypeAdapter = _create_intent_adapter()
+
+
 class ContextProcessor:
     """Обрабатывает запросы пользователя через LLM и преобразует в схемы"""
 
-    def __init__(self, llm_client: LLMInterface):
+    def __init__(
+            self,
+            llm_client: LLMInterface,
+            cache: Optional[QueryCache] = None,
+            local_parser: Optional[LocalIntentParser] = None,
+            local_min_confidence: float = LOCAL_INTENT_MIN_CONFIDENCE,
+            single_flight: Optional[SingleFlight] = None,
+            scheduler: Optional[LLMScheduler] = None,
+            prompt_mode: PromptMode = PROMPT_MODE,
+            batching: bool = QUERY_BATCHING,
+            template_cache: Optional[TemplateCache] = None,
+            shared_cache: Optional[SharedIntentCache] = None
+    ):
         self.llm_client = llm_client
+        # Все запросы к LLM идут через планировщик: очередь под квоту API, повторы и срок ожидания
+        self.scheduler: LLMScheduler = scheduler if scheduler is not None else LLMScheduler(llm_client=llm_client)
         self.prompter: LLMPrompter = LLMPrompter()
         self.system_prompt: str = self.prompter.create_system_prompt()
+        self.prompt_mode: PromptMode = prompt_mode
+        self.retriever: IntentRetriever = IntentRetriever(descriptions=self.prompter.CONTEXT_DESCRIPTIONS)
+        # Одновременные запросы к LLM собираются в пакеты: один вызов LLM на несколько запросов
+        self.batcher: Optional[QueryBatcher] = QueryBatcher(handler=self._ask_llm_batch) if batching else None
+        # Сколько пакетных ответов оказались некорректными и были повторены по одному запросу
+        self.batch_fallbacks: int = 0
+        self.cache: QueryCache = cache if cache is not None else QueryCache()
+        self.local_parser: LocalIntentParser = local_parser if local_parser is not None else LocalIntentParser()
+        self.local_min_confidence: float = local_min_confidence
+        self.single_flight: SingleFlight = single_flight if single_flight is not None else SingleFlight()
+        # Шаблоны запросов, уже распознанных LLM: перефразированный запрос с другими параметрами обходится без LLM
+        self.template_cache: TemplateCache = template_cache if template_cache is not None else TemplateCache()
+        # Общий для реплик кеш ответов LLM в БД (L2 после self.cache); подключается при старте бота
+        self.shared_cache: Optional[SharedIntentCache] = shared_cache
+        # Сколько запросов распознано локально, сколько - по шаблону из кеша и сколько отправлено в LLM
+        self.local_hits: int = 0
+        self.template_hits: int = 0
+        self.shared_hits: int = 0
+        self.llm_calls: int = 0
 
     async def process_query(self, user_query: str) -> BaseResponse:
         """
         Обрабатывает запрос пользователя:
-        1. Отправляет в LLM
-        2. Парсит ответ
-        3. Валидирует через Pydantic
-        4. Возвращает соответствующую схему
+        1. Ищет уже распознанный такой же запрос в кеше
+        2. Пробует распознать запрос локально, без LLM
+        3. Ищет похожий запрос, уже распознанный LLM, и подставляет в его тип параметры нового запроса
+        4. Ищет такой же запрос в общем кеше в БД (его могла распознать другая реплика)
+        5. Иначе отправляет в LLM; одинаковые одновременные запросы ждут один общий ответ
+        6. Парсит ответ
+        7. Валидирует через Pydantic
+        8. Возвращает соответствующую схему
+
+        В кеш попадают только успешно распознанные запросы: ошибки LLM могут быть временными
+        """
+        cached_schema: Optional[BaseResponse] = self.cache.get(user_query=user_query)
+        if cached_schema is not None:
+            if self.shared_cache is not None:
+                self.shared_cache.touch(user_query=user_query)
+            return cached_schema
+
+        query_schema: Optional[BaseResponse] = self._parse_locally(user_query=user_query)
+        if query_schema is not None:
+            self.local_hits += 1
+            self.cache.put(user_query=user_query, schema=query_schema)
+            return query_schema
+
+        query_schema = self._parse_by_template(user_query=user_query)
+        if query_schema is not None:
+            self.template_hits += 1
+            self.cache.put(user_query=user_query, schema=query_schema)
+            return query_schema
+
+        return await self.single_flight.run(
+            key=QueryCache.normalize(user_query=user_query),
+            call=lambda: self._ask_shared_cache_or_llm(user_query=user_query)
+        )
+
+    async def attach_shared_cache(
+            self,
+            shared_cache: SharedIntentCache,
+            warm_up_size: int = INTENT_CACHE_WARMUP_SIZE
+    ) -> None:
+        """Подключает общий кеш в БД и загружает в кеш в памяти warm_up_size самых частых запросов"""
+        self.shared_cache = shared_cache
+        await shared_cache.start()
+
+        for query_text, llm_response in await shared_cache.warm_up(limit=warm_up_size):
+            query_schema: BaseResponse = ContextProcessor._create_request_schema(llm_response=llm_response)
+            if not query_schema.error:
+                self.cache.put(user_query=query_text, schema=query_schema)
+
+    async def aclose(self) -> None:
+        """Освобождает ресурсы LLM-клиента (HTTP-соединения) и записывает попадания общего кеша при остановке бота"""
+        if self.shared_cache is not None:
+            await self.shared_cache.stop()
+        await self.scheduler.aclose()
+
+    def _parse_locally(self, user_query: str) -> Optional[BaseResponse]:
+        """Схема запроса по правилам LocalIntentParser; None - если уверенности не хватает или параметры невалидны"""
+        local_match: Optional[LocalMatch] = self.local_parser.parse(user_query=user_query)
+        if local_match is None or local_match.confidence < self.local_min_confidence:
+            return None
+
+        query_schema: BaseResponse = ContextProcessor._create_request_schema(llm_response=local_match.response)
+        return None if query_schema.error else query_schema
+
+    def _parse_by_template(self, user_query: str) -> Optional[BaseResponse]:
+        """Схема запроса по похожему шаблону из TemplateCache; None - если шаблона нет или параметры невалидны"""
+        llm_response: Optional[LLMResponse] = self.template_cache.get(user_query=user_query)
+        if llm_response is None:
+            return None
+
+        query_schema: BaseResponse = ContextProcessor._create_request_schema(llm_response=llm_response)
+        return None if query_schema.error else query_schema
+
+    def _remember_template(self, user_query: str, query_schema: BaseResponse) -> None:
+        """
+        Запоминает шаблон запроса, распознанного LLM, - только если параметры, извлеченные локально,
+        дают ту же схему: иначе подстановка параметров в перефразированный запрос была бы ненадежной
+        """
+        key_context: str = type(query_schema).__name__
+        llm_response: Optional[LLMResponse] = self.template_cache.response_for(
+            user_query=user_query,
+            key_context=key_context
+        )
+        if llm_response is None:
+            return
+        if ContextProcessor._create_request_schema(llm_response=llm_response) == query_schema:
+            self.template_cache.put(user_query=user_query, key_context=key_context)
+
+    async def _ask_shared_cache_or_llm(self, user_query: str) -> BaseResponse:
+        """Общий для одинаковых одновременных запросов поиск в кеше в БД и, при промахе, вызов LLM"""
+        if self.shared_cache is not None:
+            llm_response: Optional[LLMResponse] = await self.shared_cache.get(user_query=user_query)
+            if llm_response is not None:
+                query_schema: BaseResponse = ContextProcessor._create_request_schema(llm_response=llm_response)
+                if not query_schema.error:
+                    self.shared_hits += 1
+                    self.cache.put(user_query=user_query, schema=query_schema)
+                    return query_schema
+
+        return await self._ask_llm_and_cache(user_query=user_query)
+
+    async def _ask_llm_and_cache(self, user_query: str) -> BaseResponse:
+        """
+        Общий для одинаковых одновременных запросов вызов LLM. Результат кладется в кеш здесь же,
+        чтобы запрос, пришедший сразу после завершения, уже нашел его в кеше
+        """
+        self.llm_calls += 1
+        query_schema: BaseResponse = await (
+            self.batcher.submit(user_query=user_query) if self.batcher is not None
+            else self._ask_llm(user_query=user_query)
+        )
+        if not query_schema.error:
+            self.cache.put(user_query=user_query, schema=query_schema)
+            self._remember_template(user_query=user_query, query_schema=query_schema)
+            if self.shared_cache is not None:
+                await self.shared_cache.put(
+                    user_query=user_query,
+                    llm_response=ContextProcessor._to_llm_response(query_schema=query_schema)
+                )
+        return query_schema
+
+    def create_system_prompt(self, user_query: str) -> str:
+        """
+        Системный промпт для запроса: в компактном режиме - только PROMPT_TOP_K ближайших типов,
+        полный - если режим полный или на запрос не похож ни один тип
+        """
+        intent_keys: Optional[List[str]] = self._prompt_intents(user_query=user_query)
+        if intent_keys is None:
+            return self.system_prompt
+        return self.prompter.create_compact_system_prompt(intent_keys=intent_keys)
+
+    def create_batch_system_prompt(self, user_queries: List[str]) -> str:
+        """Системный промпт пакета: в компактном режиме - объединение кандидатов всех запросов"""
+        intent_keys: List[str] = []
+        for user_query in user_queries:
+            query_intents: Optional[List[str]] = self._prompt_intents(user_query=user_query)
+            if query_intents is None:
+                return self.prompter.create_batch_system_prompt(
+                    system_prompt=self.system_prompt,
+                    queries_count=len(user_queries)
+                )
+            intent_keys.extend(key for key in query_intents if key not in intent_keys)
+
+        return self.prompter.create_batch_system_prompt(
+            system_prompt=self.prompter.create_compact_system_prompt(intent_keys=intent_keys),
+            queries_count=len(user_queries)
+        )
+
+    def _prompt_intents(self, user_query: str) -> Optional[List[str]]:
+        """Типы запросов для компактного промпта; None - нужен полный промпт"""
+        if self.prompt_mode == PromptMode.full:
+            return None
+
+        ranked: List[Tuple[str, float]] = self.retriever.rank(user_query=user_query)
+        if ranked[0][1] < PROMPT_MIN_SCORE:
+            return None
+        return [key for key, _ in ranked[:PROMPT_TOP_K]]
+
+    async def _ask_llm_batch(self, user_queries: List[str]) -> List[BaseResponse]:
         """
+        Распознает пакет запросов одним вызовом LLM: нумерованный список в запросе, JSON-массив в ответе.
+        Если ответ некорректен (не массив, не та длина), запросы повторяются по одному; если некорректен
+        только отдельный элемент - повторяется только его запрос
+        """
+        if len(user_queries) == 1:
+            return [await self._ask_llm(user_query=user_queries[0])]
+
+        try:
+            llm_response_text: str = await self.scheduler.ask(
+                system=self.create_batch_system_prompt(user_queries=user_queries),
+                question=self.prompter.create_batch_user_prompt(user_queries=user_queries),
+                temperature=0.1,
+                max_tokens=QUERY_BATCH_MAX_TOKENS_PER_QUERY * len(user_queries)
+            )
+        except LLMError as e:
+            return [BaseResponse(error=f"Ошибка обработки запроса: {e}") for _ in user_queries]
+
+        items: Optional[List[Any]] = ContextProcessor._parse_batch_response(text=llm_response_text)
+        if items is None or len(items) != len(user_queries):
+            self.batch_fallbacks += 1
+            return list(await gather(*(self._ask_llm(user_query=user_query) for user_query in user_queries)))
+
+        results: List[Optional[BaseResponse]] = []
+        for item in items:
+            try:
+                results.append(ContextProcessor._schema_from_json(data=item))
+            except (ValidationError, TypeError):
+                results.append(None)
+
+        retried: List[BaseResponse] = list(await gather(*(
+            self._ask_llm(user_query=user_query)
+            for user_query, result in zip(user_queries, results) if result is None
+        )))
+        return [result if result is not None else retried.pop(0) for result in results]
+
+    @staticmethod
+    def _parse_batch_response(text: str) -> Optional[List[Any]]:
+        """Первый JSON-массив в ответе LLM; None - если массива нет или он не разбирается"""
+        try:
+            items: Any = extract_json(text=text, brackets="[]")
+        except JSONParseError:
+            return None
+        return items if isinstance(items, list) else None
+
+    async def _ask_llm(self, user_query: str) -> BaseResponse:
         try:
             user_prompt: str = self.prompter.create_user_prompt(user_query=user_query)
-            llm_response_text: str = await self.llm_client.ask(
-                system=self.system_prompt,
+            llm_response_text: str = await self.scheduler.ask(
+                system=self.create_system_prompt(user_query=user_query),
                 question=user_prompt,
                 temperature=0.1,
                 max_tokens=500
             )
-
-            validation_json_data: Dict[str, Any] = self.llm_client.extract_json_from_text(text=llm_response_text)
-            llm_response: LLMResponse = LLMResponse(**validation_json_data)
-
-            return ContextProcessor._create_request_schema(llm_response=llm_response)
+            return ContextProcessor._parse_llm_response(text=llm_response_text)
 
         except ValidationError as e:
             return BaseResponse(error=f"Ошибка валидации данных: {e}")
         except Exception as e:
             return BaseResponse(error=f"Ошибка обработки запроса: {e}")
 
+    @staticmethod
+    def _parse_llm_response(text: str) -> BaseResponse:
+        """
+        Схема запроса из текста ответа LLM: первый JSON-объект валидируется _INTENT_ADAPTER за один проход.
+        Если это не удалось (key_context пустой или неизвестный, параметры невалидны), ответ разбирается
+        по шагам в _create_request_schema - ради того же текста ошибки для пользователя
+        """
+        return ContextProcessor._schema_from_json(data=extract_json(text=text))
+
+    @staticmethod
+    def _schema_from_json(data: Any) -> BaseResponse:
+        """
+        Схема запроса из разобранного JSON ответа LLM (одиночного или элемента пакета). ValidationError
+        или TypeError - если это не объект ответа
+        """
+        try:
+            return _INTENT_ADAPTER.validate_python(data).context
+        except ValidationError:
+            return ContextProcessor._create_request_schema(llm_response=LLMResponse(**data))
+
+    @staticmethod
+    def _to_llm_response(query_schema: BaseResponse) -> LLMResponse:
+        """Обратное преобразование схемы в ответ LLM (для хранения в БД): имена схем совпадают с key_context"""
+        context: Dict[str, Any] = query_schema.model_dump(mode="json", exclude={"error"})
+        return LLMResponse(key_context=type(query_schema).__name__, context=context or None)
+
     @staticmethod
     def _create_request_schema(llm_response: LLMResponse) -> BaseResponse:
         """Создает схему запроса на основе ответа LLM"""
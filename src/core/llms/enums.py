@@ -0,0 +1,12 @@
+from enum import IntEnum, StrEnum
+
+
+class RequestPriority(IntEnum):
+    # Меньшее значение - раньше получает токен планировщика
+    retry = 0  # Повтор после 429/5xx: запрос уже ждал и его срок истекает раньше, чем у новых
+    interactive = 10  # Первая попытка запроса пользователя, который ждет ответа в чате
+
+
+class PromptMode(StrEnum):
+    full = "full"  # В системном промпте все типы запросов с примерами
+    compact = "compact"  # Только несколько типов, ближайших к запросу по IntentRetriever
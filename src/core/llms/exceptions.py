@@ -29,3 +29,8 @@ class LLMConnectionError(LLMError):
 class JSONParseError(LLMError):
     """Ошибка парсинга JSON"""
     pass
+
+
+class LLMDeadlineError(LLMError):
+    """Запрос не выполнен до истечения срока (ожидание в очереди и повторы)"""
+    pass
@@ -14,6 +14,9 @@ class LLMInterface(Protocol):
     ) -> str:
         raise NotImplementedError()
 
+    async def aclose(self) -> None:
+        raise NotImplementedError()
+
     @staticmethod
     async def _analyze_errors(response: ClientResponse) -> None:
         raise NotImplementedError()
@@ -0,0 +1,109 @@
+from json import JSONDecoder, JSONDecodeError
+from re import compile as re_compile, Pattern
+from typing import List, Optional, Any
+
+from src.core.llms.exceptions import JSONParseError
+
+# orjson - необязательный бэкенд разбора JSON (в несколько раз быстрее json); без него используется стандартный
+try:
+    from orjson import loads as _backend_loads
+    JSON_BACKEND: str = "orjson"
+except ImportError:
+    from json import loads as _backend_loads  # type: ignore[assignment]
+    JSON_BACKEND = "json"
+
+# Разбирает первое JSON-значение с заданной позиции и останавливается на его конце (C-сканер json)
+_DECODER: JSONDecoder = JSONDecoder()
+# Символы, меняющие состояние разбора; текст между ними пропускается регулярным выражением, а не циклом Python
+_STRUCTURAL: Pattern = re_compile(r'["\\{}\[\]]')
+
+
+class FirstJsonValue:
+    """
+    Инкрементальный поиск первого JSON-объекта или массива верхнего уровня в потоке текста. Текст до первой
+    открывающей скобки из openers (например, ```json) пропускается, скобки внутри строк не считаются.
+    Как только глубина вложенности возвращается к нулю, feed отдает текст значения - остаток генерации
+    можно не ждать
+    """
+
+    def __init__(self, openers: str = "{[") -> None:
+        self.openers: str = openers
+        self.text: str = ""
+
+        self._parts: List[str] = []
+        self._depth: int = 0
+        self._in_string: bool = False
+        self._escaped: bool = False
+
+    @property
+    def started(self) -> bool:
+        return self._depth > 0 or bool(self._parts)
+
+    def feed(self, delta: str) -> Optional[str]:
+        """Добавляет очередной фрагмент; возвращает значение целиком, если оно уже закрыто"""
+        if self.text:
+            return self.text
+
+        start: int = 0
+        if not self.started:
+            positions: List[int] = [position for position in map(delta.find, self.openers) if position >= 0]
+            if not positions:
+                return None
+            start = min(positions)
+
+        # Позиция символа, экранированного обратной косой чертой (в том числе из конца предыдущего фрагмента)
+        escaped_at: int = 0 if self._escaped else -1
+        for match in _STRUCTURAL.finditer(delta, start):
+            index: int = match.start()
+            if index == escaped_at:
+                continue
+
+            char: str = delta[index]
+            if self._in_string:
+                if char == "\\":
+                    escaped_at = index + 1
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if not self._depth:
+                    self._parts.append(delta[start:index + 1])
+                    self.text = "".join(self._parts)
+                    return self.text
+
+        self._escaped = escaped_at == len(delta)
+        self._parts.append(delta[start:])
+        return None
+
+
+def extract_json(text: str, brackets: str = "{}") -> Any:
+    """
+    Первый JSON-объект (brackets="[]" - массив) в полном ответе LLM. Обычно кроме него в ответе только обертка
+    ```json, поэтому сначала разбирается срез от первой открывающей до последней закрывающей скобки. Если срез
+    не JSON (после значения есть пояснение со своими скобками), первое значение разбирает JSONDecoder.raw_decode:
+    он останавливается на конце значения, и посимвольный обход в Python не нужен
+    """
+    start: int = text.find(brackets[0])
+    if start < 0:
+        raise JSONParseError(f"JSON не найден в тексте. Начало текста: {text.strip()[:100]}...")
+
+    try:
+        return parse_json(text=text[start:text.rfind(brackets[1]) + 1])
+    except JSONParseError:
+        pass
+    try:
+        return _DECODER.raw_decode(text, start)[0]
+    except JSONDecodeError as e:
+        raise JSONParseError(f"Ошибка парсинга JSON: {e}")
+
+
+def parse_json(text: str) -> Any:
+    """Разбирает JSON бэкендом JSON_BACKEND; JSONParseError - если текст не JSON"""
+    try:
+        return _backend_loads(text)
+    except ValueError as e:  # JSONDecodeError и json, и orjson - подкласс ValueError
+        raise JSONParseError(f"Ошибка парсинга JSON: {e}")
@@ -0,0 +1,296 @@
+from dataclasses import dataclass, field
+from datetime import date
+from re import compile as re_compile, Pattern, Match, IGNORECASE
+from typing import Optional, List, Tuple, Dict, Any
+
+from src.core.llms.schemas import LLMResponse
+
+# ID креатора в загружаемых данных - 32 hex-символа
+_CREATOR_ID: Pattern = re_compile(r"(?<![0-9a-z])[0-9a-f]{32}(?![0-9a-z])", IGNORECASE)
+_CREATOR_MENTION: Pattern = re_compile(r"креатор|автор|блогер|канал")
+# Метрики видео: в запросе, привязанном к метрике, должна упоминаться только она
+_METRICS: Pattern = re_compile(r"просмотр|лайк|коммент|жалоб")
+
+_MONTHS: Dict[str, int] = {
+    "январ": 1, "феврал": 2, "март": 3, "апрел": 4, "ма": 5, "июн": 6,
+    "июл": 7, "август": 8, "сентябр": 9, "октябр": 10, "ноябр": 11, "декабр": 12
+}
+_ISO_DATE: Pattern = re_compile(r"(?<!\d)(\d{4})-(\d{1,2})-(\d{1,2})(?!\d)")
+_DOTTED_DATE: Pattern = re_compile(r"(?<![\d.])(\d{1,2})\.(\d{1,2})\.(\d{4})(?![\d.])")
+_TEXT_DATE: Pattern = re_compile(
+    r"(?<!\d)(\d{1,2})\s+(январ|феврал|март|апрел|ма|июн|июл|август|сентябр|октябр|ноябр|декабр)[а-я]*"
+    r"\s+(\d{4})(?:\s*(?:года|год|г\.?)(?![а-я]))?"
+)
+# Даты, которые без LLM не перевести в конкретный день: относительные или без года
+_UNRESOLVED_DATE: Pattern = re_compile(
+    r"вчера|сегодн|завтра|недел|месяц|(?<![а-я])год|квартал|январ|феврал|март|апрел|(?<![а-я])ма[йяе](?![а-я])|июн"
+    r"|июл|август|сентябр|октябр|ноябр|декабр|понедельник|вторник|сред[уа]|четверг|пятниц|суббот|воскресень"
+)
+
+# Число с разделителями разрядов ("10 000") или дробное ("1,5") и необязательный множитель ("млн", "тыс", "к")
+_NUMBER: Pattern = re_compile(
+    r"(?<![\w.,])(\d{1,3}(?:[ \u00a0]\d{3})+(?!\d)|\d+(?:[.,]\d+)?)"
+    r"(?:\s*(млрд|миллиард[а-я]*|млн|миллион[а-я]*|тыс[а-я]*)\.?|(к|k)(?![а-яa-z]))?"
+)
+_MULTIPLIERS: Dict[str, int] = {"млрд": 10 ** 9, "миллиард": 10 ** 9, "млн": 10 ** 6, "миллион": 10 ** 6, "тыс": 1000}
+
+# Формулировки, смысл которых не укладывается ни в один из типов запросов: отрицания, другие сравнения, агрегаты,
+# окна времени от публикации ("в первые сутки", "за первые 3 часа", "через неделю после публикации")
+_UNSUPPORTED: Pattern = re_compile(
+    r"(?<![а-я])(?:не|ни|нет|без|кроме|или|топ)(?![а-я])|меньше|менее|ниже|средн|максим|миним|процент|%"
+    r"|(?<![а-я])(?:перв[а-я]*|за|через|в течение)\s+(?:[\d\s]+)?(?:сут|час|минут|дн|ден|недел|месяц)"
+    r"|после (?:публикац|выход|загрузк)"
+)
+
+
+@dataclass
+class QueryEntities:
+    """Параметры, извлеченные из текста запроса"""
+    creator_id: Optional[str] = None
+    creator_mentioned: bool = False
+    dates: List[date] = field(default_factory=list)
+    numbers: List[int] = field(default_factory=list)
+    # В тексте есть даты или числа, которые не удалось разобрать однозначно
+    unresolved: bool = False
+
+
+@dataclass(frozen=True)
+class IntentRule:
+    """
+    Тип запроса: группы ключевых слов (каждая группа - альтернативы) и набор параметров,
+    который должен быть извлечен из запроса ровно таким. metric - метрика из _METRICS, по которой
+    считается запрос: она обязана быть в тексте, другие метрики - нет
+    """
+    key_context: str
+    keywords: Tuple[Pattern, ...]
+    forbidden: Optional[Pattern] = None
+    metric: Optional[str] = None
+    creator: bool = False
+    dates: int = 0
+    views: bool = False
+
+
+@dataclass(frozen=True)
+class LocalMatch:
+    response: LLMResponse
+    confidence: float
+
+
+INTENT_RULES: Tuple[IntentRule, ...] = (
+    IntentRule(
+        key_context="TotalCountVideos",
+        keywords=(re_compile(r"видео|ролик"), re_compile(r"сколько|количеств|число|всего")),
+        forbidden=re_compile(r"просмотр|лайк|коммент|жалоб"),
+    ),
+    IntentRule(
+        key_context="CountVideosPerCreatorByDate",
+        keywords=(
+            re_compile(r"видео|ролик"),
+            re_compile(r"сколько|количеств|число"),
+            re_compile(r"(?<![а-я])(?:с|от|в период|за период)(?![а-я])"),
+        ),
+        forbidden=re_compile(r"просмотр|лайк|коммент|жалоб"),
+        creator=True,
+        dates=2,
+    ),
+    IntentRule(
+        key_context="CountVideosPerMoreViews",
+        keywords=(
+            re_compile(r"видео|ролик"),
+            re_compile(r"просмотр"),
+            re_compile(r"больше|более|выше|свыше|превыш"),
+        ),
+        metric="просмотр",
+        views=True,
+    ),
+    IntentRule(
+        key_context="CountViewsGrewUPPerDate",
+        keywords=(
+            re_compile(r"просмотр"),
+            re_compile(r"вырос|прирост|увеличил|прибавил"),
+        ),
+        forbidden=re_compile(r"нов[а-я]* просмотр|получ|разн[а-я]* видео|уникальн"),
+        metric="просмотр",
+        dates=1,
+    ),
+    IntentRule(
+        key_context="CountDifferentVideosForNewViewsPerDate",
+        keywords=(
+            re_compile(r"видео|ролик"),
+            re_compile(r"нов[а-я]* просмотр"),
+            re_compile(r"сколько|количеств|число"),
+        ),
+        forbidden=re_compile(r"вырос|прирост|увеличил|прибавил"),
+        metric="просмотр",
+        dates=1,
+    ),
+    IntentRule(
+        key_context="CountVideosPerCreatorAboveViews",
+        keywords=(
+            re_compile(r"видео|ролик"),
+            re_compile(r"просмотр"),
+            re_compile(r"больше|более|выше|свыше|превыш"),
+            re_compile(r"сколько|количеств|число"),
+        ),
+        metric="просмотр",
+        creator=True,
+        views=True,
+    ),
+)
+
+
+class LocalIntentParser:
+    """
+    Детерминированное распознавание запроса без LLM. Параметры (ID креатора, даты, число просмотров)
+    извлекаются регулярными выражениями, тип запроса выбирается по ключевым словам среди тех правил,
+    которым в точности соответствует набор извлеченных параметров. Если в запросе остались
+    неразобранные даты или числа, либо подходят несколько типов, запрос отдается LLM
+    """
+
+    def __init__(self, rules: Tuple[IntentRule, ...] = INTENT_RULES) -> None:
+        self.rules: Tuple[IntentRule, ...] = rules
+
+    def parse(self, user_query: str) -> Optional[LocalMatch]:
+        """Лучшее совпадение с уверенностью от 0 до 1; None - если запрос нельзя разобрать локально"""
+        parametrized: Optional[Tuple[QueryEntities, str]] = LocalIntentParser.parametrize(user_query=user_query)
+        if parametrized is None:
+            return None
+        entities, rest = parametrized
+
+        scored: List[Tuple[float, IntentRule]] = sorted(
+            ((LocalIntentParser._score(rule=rule, text=rest, entities=entities), rule) for rule in self.rules),
+            key=lambda item: item[0],
+            reverse=True
+        )
+        confidence, rule = scored[0]
+        if not confidence:
+            return None
+        if len(scored) > 1 and scored[1][0] == confidence:
+            # Одинаково подходят два типа - пусть решает LLM
+            return None
+
+        return LocalMatch(
+            response=LLMResponse(
+                key_context=rule.key_context,
+                context=LocalIntentParser.context(rule=rule, entities=entities)
+            ),
+            confidence=confidence
+        )
+
+    @staticmethod
+    def parametrize(user_query: str) -> Optional[Tuple[QueryEntities, str]]:
+        """
+        Параметры запроса и его шаблон - текст без параметров. None - если в запросе есть неподдерживаемые
+        формулировки или параметры, которые не удалось разобрать однозначно
+        """
+        text: str = user_query.casefold().replace("ё", "е")
+        if _UNSUPPORTED.search(text):
+            return None
+
+        entities, rest = LocalIntentParser.extract_entities(text=text)
+        if entities.unresolved:
+            return None
+        return entities, rest
+
+    @staticmethod
+    def extract_entities(text: str) -> Tuple[QueryEntities, str]:
+        """Извлекает параметры и возвращает текст без них - по остатку проверяются ключевые слова"""
+        entities: QueryEntities = QueryEntities()
+
+        creator_ids: List[str] = _CREATOR_ID.findall(text)
+        if len(creator_ids) > 1:
+            entities.unresolved = True
+        elif creator_ids:
+            entities.creator_id = creator_ids[0].lower()
+        text = _CREATOR_ID.sub(" ", text)
+
+        dated: List[Tuple[int, date]] = []
+        for pattern in (_ISO_DATE, _DOTTED_DATE, _TEXT_DATE):
+            for match in pattern.finditer(text):
+                parsed: Optional[date] = LocalIntentParser._parse_date(match=match, pattern=pattern)
+                if parsed is None:
+                    entities.unresolved = True
+                else:
+                    dated.append((match.start(), parsed))
+            text = pattern.sub(" ", text)
+        entities.dates = [parsed for _, parsed in sorted(dated, key=lambda item: item[0])]
+
+        if _UNRESOLVED_DATE.search(text):
+            entities.unresolved = True
+
+        for match in _NUMBER.finditer(text):
+            number: Optional[int] = LocalIntentParser._parse_number(match=match)
+            if number is None:
+                entities.unresolved = True
+            else:
+                entities.numbers.append(number)
+        text = _NUMBER.sub(" ", text)
+
+        entities.creator_mentioned = bool(_CREATOR_MENTION.search(text))
+        if any(char.isdigit() for char in text):
+            entities.unresolved = True
+        return entities, text
+
+    @staticmethod
+    def fits(rule: IntentRule, text: str, entities: QueryEntities) -> bool:
+        """
+        Извлеченные параметры в точности те, что нужны правилу, в тексте упомянута метрика правила
+        и нет других метрик и запрещенных правилом слов. Проверяется и для похожих запросов из TemplateCache,
+        где ключевые слова правила не ищутся
+        """
+        if rule.creator != (entities.creator_id is not None) or rule.creator != entities.creator_mentioned:
+            return False
+        if rule.dates != len(entities.dates) or rule.views != bool(entities.numbers) or len(entities.numbers) > 1:
+            return False
+        if rule.metric is not None and set(_METRICS.findall(text)) != {rule.metric}:
+            return False
+        return rule.forbidden is None or not rule.forbidden.search(text)
+
+    @staticmethod
+    def _score(rule: IntentRule, text: str, entities: QueryEntities) -> float:
+        """Доля групп ключевых слов, найденных в запросе; 0 - если параметры запроса не подходят правилу"""
+        if not LocalIntentParser.fits(rule=rule, text=text, entities=entities):
+            return 0.0
+
+        return sum(1 for keyword in rule.keywords if keyword.search(text)) / len(rule.keywords)
+
+    @staticmethod
+    def context(rule: IntentRule, entities: QueryEntities) -> Optional[Dict[str, Any]]:
+        """context ответа для правила из извлеченных параметров (в формате ответа LLM)"""
+        context: Dict[str, Any] = {}
+        if rule.creator:
+            context["creator_id"] = entities.creator_id
+        if rule.dates == 1:
+            context["date"] = entities.dates[0].isoformat()
+        elif rule.dates == 2:
+            context["date_from"] = entities.dates[0].isoformat()
+            context["date_to"] = entities.dates[1].isoformat()
+        if rule.views:
+            context["views"] = entities.numbers[0]
+        return context or None
+
+    @staticmethod
+    def _parse_date(match: Match, pattern: Pattern) -> Optional[date]:
+        try:
+            if pattern is _ISO_DATE:
+                return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+            if pattern is _DOTTED_DATE:
+                return date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+            return date(int(match.group(3)), _MONTHS[match.group(2)], int(match.group(1)))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _parse_number(match: Match) -> Optional[int]:
+        digits: str = match.group(1).replace(" ", "").replace("\u00a0", "").replace(",", ".")
+        multiplier: int = 1
+        if match.group(2):
+            multiplier = next(value for prefix, value in _MULTIPLIERS.items() if match.group(2).startswith(prefix))
+        elif match.group(3):
+            multiplier = 1000
+
+        value: float = float(digits) * multiplier
+        # Дробное число просмотров ("1,5" без множителя) - скорее всего не то, что кажется
+        if value != int(value):
+            return None
+        return int(value)
@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from sqlalchemy import DateTime, Integer, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.types import String, Text
+
+from src.core.databases.relational.basemeta import BaseMeta
+
+
+class IntentCacheEntries(BaseMeta):
+    """
+    Ответы LLM, общие для всех реплик бота: нормализованный запрос -> key_context и context.
+    Ключ - sha256 нормализованного запроса: длина запроса не ограничена, а ключ индекса - фиксированной длины
+    """
+    __tablename__ = 'llm_intent_cache'
+    __table_args__ = (
+        Index("llm_intent_cache_expires_at", "expires_at"),
+        Index("llm_intent_cache_hits", "hits"),
+    )
+
+    query_key: Mapped[str] = mapped_column(
+        String(64),
+        primary_key=True,
+        comment="sha256(QueryCache.normalize(user_query))"
+    )
+    query_text: Mapped[str] = mapped_column(Text, nullable=False, comment="QueryCache.normalize(user_query)")
+    key_context: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    context: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
+    hits: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_hit_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
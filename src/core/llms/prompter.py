@@ -144,6 +144,49 @@ class LLMPrompter:
         )
         return "\n".join(prompt_parts)
 
+    @classmethod
+    def create_compact_system_prompt(cls, intent_keys: List[str], examples_per_intent: int = 1) -> str:
+        """
+        Минимальный системный промпт: только переданные типы запросов, по одному примеру на тип
+        и сжатые правила без отступов
+        """
+        prompt_parts: List = [
+            "Ты - аналитический ассистент. Определи тип запроса пользователя о статистике видео.",
+            "Типы запросов:"
+        ]
+        for key in intent_keys:
+            info: Dict = cls.CONTEXT_DESCRIPTIONS[key]
+            examples: str = ", ".join(
+                f'"{" ".join(example.split())}"' for example in info["examples"][:examples_per_intent]
+            )
+            prompt_parts.append(
+                f"{key}: {info['description']}. Пример: {examples}. "
+                f"Ответ: {json_dumps(info['response_format'], ensure_ascii=False)}"
+            )
+        prompt_parts.append(
+            "Извлеки параметры в context: даты - в формате YYYY-MM-DD, числа - целыми числами. "
+            'Если запрос не подходит ни к одному типу, верни {"key_context": null, "context": "Запрос не распознан"}. '
+            "Отвечай только JSON, без пояснений."
+        )
+        return "\n".join(prompt_parts)
+
+    @classmethod
+    def create_batch_system_prompt(cls, system_prompt: str, queries_count: int) -> str:
+        """Дополняет системный промпт правилами пакетного ответа: JSON-массив по одному объекту на запрос"""
+        return (
+            f"{system_prompt}\n"
+            f"Придет нумерованный список из {queries_count} запросов. Верни JSON-массив ровно из {queries_count} "
+            "объектов в том же порядке, каждый объект - ответ на свой запрос в формате выше. "
+            "Отвечай только JSON-массивом, без пояснений."
+        )
+
+    @classmethod
+    def create_batch_user_prompt(cls, user_queries: List[str]) -> str:
+        numbered: str = "\n".join(
+            f"{number}. {' '.join(user_query.split())}" for number, user_query in enumerate(user_queries, start=1)
+        )
+        return f"Запросы пользователей:\n{numbered}"
+
     @classmethod
     def create_user_prompt(cls, user_query: str) -> str:
         """Создает промпт с запросом пользователя"""
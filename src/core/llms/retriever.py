@@ -0,0 +1,86 @@
+from collections import Counter
+from math import log, sqrt
+from re import compile as re_compile, Pattern
+from typing import Dict, List, Tuple, Any, Optional
+
+from src.core.llms.cache import QueryCache
+from src.core.llms.local_parser import IntentRule, INTENT_RULES
+
+# Цифры не различаются: конкретные ID, даты и числа в примерах не должны влиять на сходство
+_DIGITS: Pattern = re_compile(r"\d+")
+
+
+def char_ngrams(text: str, size: int = 3) -> Counter[str]:
+    """Символьные n-граммы слов текста (с пробелами по краям слова); регистр, ё/е и пунктуация не различаются"""
+    normalized: str = _DIGITS.sub("0", QueryCache.normalize(user_query=text))
+    ngrams: Counter[str] = Counter()
+    for word in normalized.split():
+        padded: str = f" {word} "
+        ngrams.update(padded[i:i + size] for i in range(max(1, len(padded) - size + 1)))
+    return ngrams
+
+
+class IntentRetriever:
+    """
+    Дешевый локальный отбор кандидатов для компактного промпта. Каждый тип запроса описывается
+    символьными триграммами своего описания и примеров, запрос пользователя сравнивается с ними
+    косинусной мерой с весами IDF: триграммы, которые есть во всех типах ("видео", "сколько"),
+    не влияют на выбор. К сходству добавляется доля совпавших ключевых слов правила из INTENT_RULES
+    """
+
+    def __init__(
+            self,
+            descriptions: Dict[str, Dict[str, Any]],
+            rules: Tuple[IntentRule, ...] = INTENT_RULES,
+            ngram_size: int = 3,
+            keyword_weight: float = 0.5
+    ) -> None:
+        self.ngram_size: int = ngram_size
+        self.keyword_weight: float = keyword_weight
+        self._rules: Dict[str, IntentRule] = {rule.key_context: rule for rule in rules}
+
+        profiles: Dict[str, Counter[str]] = {
+            key: self._ngrams(text=" ".join([info["description"], *info["examples"]]))
+            for key, info in descriptions.items()
+        }
+        document_frequency: Counter[str] = Counter(ngram for profile in profiles.values() for ngram in profile)
+        self._idf: Dict[str, float] = {
+            ngram: log(len(profiles) / frequency) for ngram, frequency in document_frequency.items()
+        }
+        self._profiles: Dict[str, Tuple[Dict[str, float], float]] = {
+            key: self._weigh(ngrams=profile) for key, profile in profiles.items()
+        }
+
+    def rank(self, user_query: str) -> List[Tuple[str, float]]:
+        """Типы запросов по убыванию сходства с запросом пользователя"""
+        query_weights, query_norm = self._weigh(ngrams=self._ngrams(text=user_query))
+        text: str = user_query.casefold().replace("ё", "е")
+
+        scores: List[Tuple[str, float]] = []
+        for key, (weights, norm) in self._profiles.items():
+            dot: float = sum(weight * weights.get(ngram, 0.0) for ngram, weight in query_weights.items())
+            similarity: float = dot / (query_norm * norm) if query_norm and norm else 0.0
+            scores.append((key, similarity + self.keyword_weight * self._keyword_overlap(key=key, text=text)))
+        return sorted(scores, key=lambda item: item[1], reverse=True)
+
+    def top_k(self, user_query: str, k: int) -> List[str]:
+        return [key for key, _ in self.rank(user_query=user_query)[:k]]
+
+    def _keyword_overlap(self, key: str, text: str) -> float:
+        """Доля групп ключевых слов правила LocalIntentParser, найденных в запросе (синонимы, которых нет в примерах)"""
+        rule: Optional[IntentRule] = self._rules.get(key)
+        if rule is None or (rule.forbidden is not None and rule.forbidden.search(text)):
+            return 0.0
+        return sum(1 for keyword in rule.keywords if keyword.search(text)) / len(rule.keywords)
+
+    def _ngrams(self, text: str) -> Counter[str]:
+        return char_ngrams(text=text, size=self.ngram_size)
+
+    def _weigh(self, ngrams: Counter[str]) -> Tuple[Dict[str, float], float]:
+        """TF-IDF веса триграмм и норма вектора; незнакомые триграммы не учитываются"""
+        weights: Dict[str, float] = {
+            ngram: (1 + log(count)) * self._idf[ngram]
+            for ngram, count in ngrams.items()
+            if self._idf.get(ngram)
+        }
+        return weights, sqrt(sum(weight * weight for weight in weights.values()))
@@ -0,0 +1,208 @@
+from asyncio import Task, FIRST_COMPLETED, CancelledError, create_task, wait, sleep
+from collections import deque
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Dict, Any, List, Optional, Deque, Set, Callable, Tuple
+
+from aiohttp import ClientResponse
+
+from src.core.llms.constants import (
+    LLM_ROUTER_EWMA_ALPHA,
+    LLM_ROUTER_LATENCY_WINDOW,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS,
+    LLM_HEDGE_QUANTILE
+)
+from src.core.llms.interface import LLMInterface
+from src.core.llms.scheduler import TokenBucket
+from src.core.llms.setups.yandexgpt import YandexGPT
+
+
+@dataclass
+class BackendStats:
+    """Задержки бэкенда: EWMA для выбора основного бэкенда и окно последних замеров для p95"""
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=LLM_ROUTER_LATENCY_WINDOW))
+    ewma: Optional[float] = None
+    requests: int = 0
+    wins: int = 0
+    errors: int = 0
+    consecutive_errors: int = 0
+
+    def observe(self, latency: float, alpha: float) -> None:
+        self.latencies.append(latency)
+        self.ewma = latency if self.ewma is None else alpha * latency + (1 - alpha) * self.ewma
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.latencies) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        ordered: List[float] = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LLMRouter:
+    """
+    LLMInterface поверх нескольких бэкендов (разные модели/каталоги YandexGPT, OpenAI-совместимые серверы).
+    Запрос уходит в бэкенд с наименьшей EWMA задержкой; если ответа нет дольше p95 этого бэкенда,
+    тот же запрос дублируется в следующий по скорости (hedged request) и берется первый ответ,
+    второй запрос отменяется. Если бэкенд ответил ошибкой, запрос сразу переходит к следующему.
+    Бэкенды с ошибками подряд опускаются в конец очереди.
+    Первую попытку оплачивает токеном LLMScheduler, а каждый дополнительный запрос - токеном из bucket
+    (того же, что у планировщика): переход после ошибки ждет токен, а дубль отправляется, только если токен
+    есть сразу, - иначе он лишь добавит 429. Задержка учитывается только у завершившихся запросов:
+    время отмененного - это время обрыва, а не ответа
+    """
+
+    def __init__(
+            self,
+            backends: Dict[str, LLMInterface],
+            ewma_alpha: float = LLM_ROUTER_EWMA_ALPHA,
+            hedge_quantile: float = LLM_HEDGE_QUANTILE,
+            default_hedge_delay: float = LLM_HEDGE_DEFAULT_DELAY_SECONDS,
+            bucket: Optional[TokenBucket] = None,
+            clock: Callable[[], float] = monotonic
+    ) -> None:
+        if not backends:
+            raise ValueError("Нужен хотя бы один LLM-бэкенд")
+
+        self.backends: Dict[str, LLMInterface] = backends
+        self.ewma_alpha: float = ewma_alpha
+        self.hedge_quantile: float = hedge_quantile
+        self.default_hedge_delay: float = default_hedge_delay
+        self.bucket: Optional[TokenBucket] = bucket
+        self.stats: Dict[str, BackendStats] = {name: BackendStats() for name in backends}
+        self.hedged: int = 0
+        # Дубли, не отправленные из-за исчерпанной квоты
+        self.hedges_skipped: int = 0
+
+        self._clock: Callable[[], float] = clock
+
+    async def ask(
+            self,
+            system: str,
+            question: str,
+            temperature: float = 0.1,
+            max_tokens: int = 500
+    ) -> str:
+        candidates: List[str] = self.ranked()
+        running: Dict[Task[str], str] = {}
+        started_at: Dict[str, float] = {}
+        last_error: Optional[BaseException] = None
+        hedging: bool = True
+
+        def launch() -> None:
+            name: str = candidates.pop(0)
+            started_at[name] = self._clock()
+            self.stats[name].requests += 1
+            running[create_task(self.backends[name].ask(
+                system=system,
+                question=question,
+                temperature=temperature,
+                max_tokens=max_tokens
+            ))] = name
+
+        launch()
+        try:
+            while running:
+                # Пока есть кого подключить, ждем до p95 самого раннего из запущенных запросов
+                timeout: Optional[float] = None
+                if candidates and hedging:
+                    now: float = self._clock()
+                    timeout = max(0.0, min(started_at[name] + self.hedge_delay(name=name) - now
+                                           for name in running.values()))
+                done: Set[Task[str]]
+                done, _ = await wait(running.keys(), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                if not done:
+                    if self.bucket is not None and self.bucket.take():
+                        # Токена нет - дубль не отправляется, ждем уже запущенные запросы
+                        self.hedges_skipped += 1
+                        hedging = False
+                        continue
+                    self.hedged += 1
+                    launch()
+                    continue
+
+                for task in done:
+                    name: str = running.pop(task)
+                    stats: BackendStats = self.stats[name]
+                    if task.exception() is None:
+                        stats.observe(latency=self._clock() - started_at[name], alpha=self.ewma_alpha)
+                        stats.wins += 1
+                        stats.consecutive_errors = 0
+                        return task.result()
+
+                    stats.errors += 1
+                    stats.consecutive_errors += 1
+                    last_error = task.exception()
+
+                # Бэкенд ответил ошибкой - запрос уходит в следующий, не дожидаясь порога, но за свой токен
+                if candidates and not running:
+                    await self._acquire_token()
+                    launch()
+
+            raise last_error if last_error is not None else RuntimeError("Нет доступных LLM-бэкендов")
+
+        finally:
+            # Проигравшие запросы отменяются без замера задержки
+            for task in running:
+                task.cancel()
+            for task in running:
+                try:
+                    await task
+                except (CancelledError, Exception):
+                    pass
+
+    def ranked(self) -> List[str]:
+        """Бэкенды в порядке выбора: сначала без ошибок подряд, затем по EWMA; без замеров - как самые быстрые"""
+        return sorted(self.backends, key=self._rank_key)
+
+    def hedge_delay(self, name: str) -> float:
+        """Сколько ждать ответа бэкенда перед дублированием запроса: p95 его задержки"""
+        quantile: Optional[float] = self.stats[name].quantile(q=self.hedge_quantile)
+        return quantile if quantile is not None else self.default_hedge_delay
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "hedged": self.hedged,
+            "hedges_skipped": self.hedges_skipped,
+            "backends": {
+                name: {
+                    "requests": stats.requests,
+                    "wins": stats.wins,
+                    "errors": stats.errors,
+                    "ewma_ms": round(stats.ewma * 1000, 1) if stats.ewma is not None else None,
+                    "hedge_delay_ms": round(self.hedge_delay(name=name) * 1000, 1)
+                }
+                for name, stats in self.stats.items()
+            }
+        }
+
+    async def aclose(self) -> None:
+        for backend in self.backends.values():
+            await backend.aclose()
+
+    async def _acquire_token(self) -> None:
+        """Ждет токен квоты для дополнительного запроса"""
+        if self.bucket is None:
+            return
+        delay: float = self.bucket.take()
+        while delay:
+            await sleep(delay)
+            delay = self.bucket.take()
+
+    def _rank_key(self, name: str) -> Tuple[int, float]:
+        stats: BackendStats = self.stats[name]
+        return stats.consecutive_errors, stats.ewma if stats.ewma is not None else 0.0
+
+    # Ответы разбирают сами бэкенды; методы ниже нужны для совместимости с LLMInterface
+    @staticmethod
+    async def _analyze_errors(response: ClientResponse) -> None:
+        await YandexGPT._analyze_errors(response=response)
+
+    @staticmethod
+    def _validate_response(data: Dict[str, Any]) -> str:
+        return YandexGPT._validate_response(data=data)
+
+    @staticmethod
+    def extract_json_from_text(text: str) -> Dict[str, Any]:
+        return YandexGPT.extract_json_from_text(text=text)
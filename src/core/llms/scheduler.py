@@ -0,0 +1,201 @@
+from asyncio import Future, Task, create_task, get_running_loop, sleep, wait_for
+from heapq import heappush, heappop
+from itertools import count
+from random import random
+from time import monotonic
+from typing import List, Tuple, Dict, Any, Optional, Callable, Iterator
+
+from src.core.llms.constants import (
+    LLM_RATE_LIMIT_PER_SECOND,
+    LLM_RATE_LIMIT_BURST,
+    LLM_RETRY_ATTEMPTS,
+    LLM_RETRY_BASE_DELAY_SECONDS,
+    LLM_RETRY_MAX_DELAY_SECONDS,
+    LLM_REQUEST_DEADLINE_SECONDS
+)
+from src.core.llms.enums import RequestPriority
+from src.core.llms.exceptions import LLMRateLimitError, LLMConnectionError, LLMDeadlineError
+from src.core.llms.interface import LLMInterface
+
+
+class TokenBucket:
+    """Токены пополняются со скоростью rate в секунду, но копится не больше capacity (допустимый всплеск)"""
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = monotonic) -> None:
+        self.rate: float = rate
+        self.capacity: int = capacity
+        self.tokens: float = float(capacity)
+
+        self._clock: Callable[[], float] = clock
+        self._updated_at: float = clock()
+
+    def take(self) -> float:
+        """Забирает токен и возвращает 0, а если токенов нет - сколько секунд ждать до следующего"""
+        now: float = self._clock()
+        self.tokens = min(float(self.capacity), self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def drain(self) -> None:
+        """Сбрасывает накопленные токены - после 429 всплеск только усугубит ситуацию"""
+        self.tokens = min(self.tokens, 0.0)
+
+
+class LLMScheduler:
+    """
+    Планировщик запросов к LLM. Запросы ждут токен в очереди с приоритетами (токены выдаются со скоростью
+    квоты API), при 429, 5xx и сетевых ошибках повторяются с экспоненциальной задержкой со случайным
+    разбросом. Повтор встает в очередь перед новыми запросами: иначе при всплеске он не успеет до своего срока.
+    У каждого запроса есть срок: если он истек в очереди или между повторами, запрос завершается
+    ошибкой. Глубина очереди и время ожидания токена доступны через metrics()
+    """
+
+    def __init__(
+            self,
+            llm_client: LLMInterface,
+            rate_per_second: float = LLM_RATE_LIMIT_PER_SECOND,
+            burst: int = LLM_RATE_LIMIT_BURST,
+            retry_attempts: int = LLM_RETRY_ATTEMPTS,
+            retry_base_delay: float = LLM_RETRY_BASE_DELAY_SECONDS,
+            retry_max_delay: float = LLM_RETRY_MAX_DELAY_SECONDS,
+            deadline_seconds: float = LLM_REQUEST_DEADLINE_SECONDS,
+            bucket: Optional[TokenBucket] = None,
+            clock: Callable[[], float] = monotonic
+    ) -> None:
+        self.llm_client: LLMInterface = llm_client
+        # bucket передается, если квоту делят с планировщиком дополнительные запросы LLMRouter
+        self.bucket: TokenBucket = bucket if bucket is not None else TokenBucket(
+            rate=rate_per_second,
+            capacity=burst,
+            clock=clock
+        )
+        self.retry_attempts: int = retry_attempts
+        self.retry_base_delay: float = retry_base_delay
+        self.retry_max_delay: float = retry_max_delay
+        self.deadline_seconds: float = deadline_seconds
+
+        self.requests: int = 0
+        self.retries: int = 0
+        self.failures: int = 0
+        self.deadline_exceeded: int = 0
+        self.waits: int = 0
+        self.total_wait_seconds: float = 0.0
+        self.max_wait_seconds: float = 0.0
+
+        self._clock: Callable[[], float] = clock
+        # (приоритет, порядковый номер, future ожидающего) - при равном приоритете первым идет пришедший раньше
+        self._waiters: List[Tuple[int, int, Future[None]]] = []
+        self._sequence: Iterator[int] = count()
+        self._dispatcher: Optional[Task] = None
+
+    async def ask(
+            self,
+            system: str,
+            question: str,
+            temperature: float = 0.1,
+            max_tokens: int = 500,
+            deadline_seconds: Optional[float] = None
+    ) -> str:
+        deadline_at: float = self._clock() + (deadline_seconds if deadline_seconds is not None else self.deadline_seconds)
+        self.requests += 1
+
+        attempt: int = 0
+        while True:
+            await self._acquire(
+                priority=RequestPriority.retry if attempt else RequestPriority.interactive,
+                deadline_at=deadline_at
+            )
+            try:
+                return await wait_for(
+                    self.llm_client.ask(system=system, question=question, temperature=temperature, max_tokens=max_tokens),
+                    timeout=deadline_at - self._clock()
+                )
+            except TimeoutError:
+                self.deadline_exceeded += 1
+                raise LLMDeadlineError("Истек срок ожидания ответа LLM")
+            except (LLMRateLimitError, LLMConnectionError) as error:
+                attempt += 1
+                if isinstance(error, LLMRateLimitError):
+                    self.bucket.drain()
+
+                delay: float = self._retry_delay(attempt=attempt)
+                if attempt >= self.retry_attempts:
+                    self.failures += 1
+                    raise
+                if self._clock() + delay >= deadline_at:
+                    self.deadline_exceeded += 1
+                    raise
+
+                self.retries += 1
+                await sleep(delay)
+
+    async def aclose(self) -> None:
+        """Отменяет ожидающие в очереди запросы и закрывает LLM-клиент"""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        while self._waiters:
+            heappop(self._waiters)[2].cancel()
+        await self.llm_client.aclose()
+
+    @property
+    def queue_depth(self) -> int:
+        """Сколько запросов сейчас ждут токен"""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth,
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "deadline_exceeded": self.deadline_exceeded,
+            "mean_wait_seconds": round(self.total_wait_seconds / self.waits, 3) if self.waits else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 3)
+        }
+
+    def _retry_delay(self, attempt: int) -> float:
+        """Экспоненциальная задержка с полным разбросом, чтобы повторы разных запросов не совпадали"""
+        return random() * min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempt - 1))
+
+    async def _acquire(self, priority: RequestPriority, deadline_at: float) -> None:
+        future: Future[None] = get_running_loop().create_future()
+        heappush(self._waiters, (int(priority), next(self._sequence), future))
+        if self._dispatcher is None:
+            self._dispatcher = create_task(self._dispatch())
+
+        started_at: float = self._clock()
+        try:
+            await wait_for(future, timeout=deadline_at - started_at)
+        except TimeoutError:
+            self.deadline_exceeded += 1
+            raise LLMDeadlineError("Истек срок ожидания в очереди запросов к LLM")
+        finally:
+            waited: float = self._clock() - started_at
+            self.waits += 1
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    async def _dispatch(self) -> None:
+        """Выдает токены ожидающим по приоритету; завершается, когда очередь пуста"""
+        try:
+            while self._waiters:
+                future: Future[None] = self._waiters[0][2]
+                if future.done():
+                    # Ожидающий ушел по сроку или был отменен
+                    heappop(self._waiters)
+                    continue
+
+                delay: float = self.bucket.take()
+                if delay:
+                    await sleep(delay)
+                    continue
+
+                heappop(self._waiters)
+                future.set_result(None)
+        finally:
+            self._dispatcher = None
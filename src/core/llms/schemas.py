@@ -17,3 +17,9 @@ class BaseResponse(BaseModel):
 class YandexGPTAuth(BaseModel):
     api_key: str
     folder_id: str
+
+
+class OpenAICompatibleAuth(BaseModel):
+    base_url: str  # Например, http://localhost:8000/v1 - запросы идут в {base_url}/chat/completions
+    model: str
+    api_key: Optional[str] = None
@@ -0,0 +1,114 @@
+from json import JSONDecodeError
+from typing import Dict, Any, Optional
+
+from aiohttp import ClientSession, ClientError, ClientResponse
+
+from src.core.llms.constants import LLM_REQUEST_TIMEOUT_SECONDS
+from src.core.llms.exceptions import (
+    LLMAuthenticationError,
+    LLMRateLimitError,
+    LLMContentError,
+    LLMConnectionError
+)
+from src.core.llms.schemas import OpenAICompatibleAuth
+from src.core.llms.setups.session import create_pooled_session
+from src.core.llms.setups.yandexgpt import YandexGPT
+
+
+class OpenAICompatible:
+    """
+    Клиент для любого сервера с OpenAI-совместимым Chat Completions API (vLLM, llama.cpp, Ollama и т.п.).
+    Как и YandexGPT, держит одну HTTP-сессию с пулом соединений
+    """
+
+    def __init__(self, auth_config: OpenAICompatibleAuth):
+        self._auth_config = auth_config
+        self.base_url = f"{auth_config.base_url.rstrip('/')}/chat/completions"
+        self._session: Optional[ClientSession] = None
+
+    def _get_session(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = create_pooled_session()
+        return self._session
+
+    async def aclose(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def ask(
+            self,
+            system: str,
+            question: str,
+            temperature: float = 0.6,
+            max_tokens: int = 1000
+    ) -> str:
+        headers: Dict[str, Any] = {"Content-Type": "application/json"}
+        if self._auth_config.api_key:
+            headers["Authorization"] = f"Bearer {self._auth_config.api_key}"
+        payload: Dict[str, Any] = {
+            "model": self._auth_config.model,
+            "temperature": max(0.0, min(1.0, temperature)),
+            "max_tokens": max_tokens,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": question}
+            ]
+        }
+
+        try:
+            async with self._get_session().post(self.base_url, headers=headers, json=payload) as response:
+                if response.status >= 400:
+                    await self._analyze_errors(response=response)
+
+                data: Dict[str, Any] = await response.json()
+                return self._validate_response(data=data)
+
+        except ClientError as e:
+            raise LLMConnectionError(f"Сетевая ошибка: {e}")
+        except TimeoutError:
+            raise LLMConnectionError(f"Таймаут запроса ({LLM_REQUEST_TIMEOUT_SECONDS} секунд)")
+        except JSONDecodeError as e:
+            raise LLMContentError(f"Некорректный JSON в ответе: {e}")
+
+    @staticmethod
+    async def _analyze_errors(response: ClientResponse) -> None:
+        status_code = response.status
+
+        try:
+            error_data: Any = await response.json()
+            error: Any = error_data.get("error", error_data) if isinstance(error_data, dict) else error_data
+            error_msg: str = str(error.get("message", error) if isinstance(error, dict) else error)
+        except (JSONDecodeError, ClientError):
+            error_msg = await response.text()
+
+        if len(error_msg) > 200:
+            error_msg = error_msg[:197] + "..."
+
+        if status_code == 401:
+            raise LLMAuthenticationError(f"Неверный API ключ: {error_msg}")
+        elif status_code == 429:
+            raise LLMRateLimitError(f"Превышен лимит запросов: {error_msg}")
+        elif 400 <= status_code < 500:
+            raise LLMContentError(f"Ошибка клиента ({status_code}): {error_msg}")
+        elif status_code >= 500:
+            raise LLMConnectionError(f"Ошибка сервера ({status_code}): {error_msg}")
+
+    @staticmethod
+    def _validate_response(data: Dict[str, Any]) -> str:
+        choices: Any = data.get("choices")
+        if not choices or not isinstance(choices, list):
+            raise LLMContentError("Ответ API не содержит 'choices'")
+
+        message: Any = choices[0].get("message") if isinstance(choices[0], dict) else None
+        if not isinstance(message, dict) or not isinstance(message.get("content"), str):
+            raise LLMContentError("Choice не содержит 'message.content'")
+
+        text: str = message["content"]
+        if not text.strip():
+            raise LLMContentError("Получен пустой ответ от модели")
+        return text
+
+    @staticmethod
+    def extract_json_from_text(text: str) -> Dict[str, Any]:
+        return YandexGPT.extract_json_from_text(text=text)
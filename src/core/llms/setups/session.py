@@ -0,0 +1,21 @@
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+from src.core.llms.constants import (
+    LLM_REQUEST_TIMEOUT_SECONDS,
+    LLM_CONNECTIONS_PER_HOST,
+    LLM_KEEPALIVE_SECONDS,
+    LLM_DNS_CACHE_SECONDS
+)
+
+
+def create_pooled_session() -> ClientSession:
+    """HTTP-сессия LLM-клиента: пул keep-alive соединений, кеш DNS и общий таймаут запроса"""
+    return ClientSession(
+        connector=TCPConnector(
+            limit_per_host=LLM_CONNECTIONS_PER_HOST,
+            keepalive_timeout=LLM_KEEPALIVE_SECONDS,
+            use_dns_cache=True,
+            ttl_dns_cache=LLM_DNS_CACHE_SECONDS
+        ),
+        timeout=ClientTimeout(total=LLM_REQUEST_TIMEOUT_SECONDS)
+    )
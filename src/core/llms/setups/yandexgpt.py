@@ -1,22 +1,93 @@
+from asyncio import Task, create_task, gather
 from json import loads, JSONDecodeError
-from re import DOTALL, search as re_search, Match
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
 from aiohttp import ClientSession, ClientError, ClientResponse
 
+from src.core.llms.constants import (
+    YANDEX_GPT_COMPLETION_URL,
+    YANDEX_GPT_TOKENIZE_URL,
+    YANDEX_GPT_MODEL,
+    LLM_REQUEST_TIMEOUT_SECONDS,
+    LLM_STREAM
+)
 from src.core.llms.exceptions import (
     LLMAuthenticationError,
     LLMRateLimitError,
     LLMContentError,
-    LLMConnectionError,
-    JSONParseError
+    LLMConnectionError
 )
+from src.core.llms.json_stream import FirstJsonValue, extract_json
 from src.core.llms.schemas import YandexGPTAuth
+from src.core.llms.setups.session import create_pooled_session
 
 
 class YandexGPT:
-    def __init__(self, auth_config: YandexGPTAuth):
+    """
+    Клиент YandexGPT. Держит одну HTTP-сессию с пулом keep-alive соединений и кешем DNS,
+    поэтому TCP/TLS-рукопожатие не повторяется на каждый запрос. Сессия создается при первом
+    запросе (нужен запущенный event loop) и закрывается через aclose() при остановке бота.
+    С stream=True ответ возвращается на первом закрытом JSON-объекте (или массиве), а остаток потока
+    дочитывается в фоне, чтобы соединение вернулось в пул, а не закрывалось
+    """
+
+    def __init__(
+            self,
+            auth_config: YandexGPTAuth,
+            base_url: str = YANDEX_GPT_COMPLETION_URL,
+            stream: bool = LLM_STREAM,
+            model: str = YANDEX_GPT_MODEL
+    ):
         self._auth_config = auth_config
-        self.base_url = "https://llm.api.cloud.yandex.net/foundationModels/v1/completion"
+        self.base_url = base_url
+        self.stream = stream
+        self.model = model
+        self._session: Optional[ClientSession] = None
+        self._drains: Set[Task[None]] = set()
+
+    def _get_session(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = create_pooled_session()
+        return self._session
+
+    async def aclose(self) -> None:
+        """Закрывает HTTP-сессию и ее соединения; следующий запрос откроет новую"""
+        for task in self._drains:
+            task.cancel()
+        await gather(*self._drains, return_exceptions=True)
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def _headers(self) -> Dict[str, Any]:
+        return {
+            "Authorization": f"Api-Key {self._auth_config.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    @property
+    def _model_uri(self) -> str:
+        return f"gpt://{self._auth_config.folder_id}/{self.model}"
+
+    async def count_tokens(self, text: str, tokenize_url: str = YANDEX_GPT_TOKENIZE_URL) -> int:
+        """Число токенов текста по токенизатору модели (эндпоинт tokenize API)"""
+        try:
+            async with self._get_session().post(
+                    tokenize_url,
+                    headers=self._headers,
+                    json={"modelUri": self._model_uri, "text": text}
+            ) as response:
+                if response.status >= 400:
+                    await self._analyze_errors(response=response)
+
+                data: Dict[str, Any] = await response.json()
+        except ClientError as e:
+            raise LLMConnectionError(f"Сетевая ошибка: {e}")
+
+        if not isinstance(data.get("tokens"), list):
+            raise LLMContentError("Ответ API не содержит 'tokens'")
+        return len(data["tokens"])
 
     async def ask(
             self,
@@ -25,14 +96,10 @@ class YandexGPT:
             temperature: float = 0.6,
             max_tokens: int = 1000
     ) -> str:
-        headers: Dict[str, Any] = {
-            "Authorization": f"Api-Key {self._auth_config.api_key}",
-            "Content-Type": "application/json"
-        }
         payload: Dict[str, Any] = {
-            "modelUri": f"gpt://{self._auth_config.folder_id}/yandexgpt/latest",
+            "modelUri": self._model_uri,
             "completionOptions": {
-                "stream": False,
+                "stream": self.stream,
                 "temperature": max(0.0, min(1.0, temperature)),
                 "maxTokens": max_tokens
             },
@@ -49,26 +116,91 @@ class YandexGPT:
         }
 
         try:
-            async with ClientSession() as session:
-                async with session.post(
-                        self.base_url,
-                        headers=headers,
-                        json=payload,
-                        timeout=30  # type: ignore
-                ) as response:
-                    if response.status >= 400:
-                        await self._analyze_errors(response=response)
-
-                    data: Dict[str, Any] = await response.json()
-                    return self._validate_response(data=data)
+            # Без async with: потоковый ответ после раннего возврата еще дочитывается в фоне
+            response: ClientResponse = await self._get_session().post(
+                self.base_url,
+                headers=self._headers,
+                json=payload
+            )
+            draining: bool = False
+            try:
+                if response.status >= 400:
+                    await self._analyze_errors(response=response)
+
+                if self.stream:
+                    text: str = await self._read_stream(response=response)
+                    draining = not response.content.at_eof()
+                    if draining:
+                        self._drain_later(response=response)
+                    return text
+
+                data: Dict[str, Any] = await response.json()
+                return self._validate_response(data=data)
+            finally:
+                if not draining:
+                    response.release()
 
         except ClientError as e:
             raise LLMConnectionError(f"Сетевая ошибка: {e}")
         except TimeoutError:
-            raise LLMConnectionError("Таймаут запроса (30 секунд)")
+            raise LLMConnectionError(f"Таймаут запроса ({LLM_REQUEST_TIMEOUT_SECONDS} секунд)")
         except JSONDecodeError as e:
             raise LLMContentError(f"Некорректный JSON в ответе: {e}")
 
+    @staticmethod
+    async def _read_stream(response: ClientResponse) -> str:
+        """
+        Читает потоковый ответ: по JSON-объекту на строку, в каждом - весь сгенерированный к этому моменту текст.
+        Как только в тексте закрылся первый JSON-объект или массив, он возвращается - генерация пояснений
+        после него не дожидается, остаток потока остается непрочитанным. Если объект так и не закрылся,
+        возвращается весь текст
+        """
+        json_value: FirstJsonValue = FirstJsonValue()
+        received: str = ""
+
+        async for line in response.content:
+            if not line.strip():
+                continue
+
+            data: Dict[str, Any] = loads(line)
+            if "error" in data:
+                raise LLMConnectionError(f"Ошибка в потоке ответа: {data['error']}")
+            try:
+                text: str = data["result"]["alternatives"][0]["message"].get("text", "")
+            except (KeyError, IndexError, TypeError, AttributeError):
+                raise LLMContentError(f"Неожиданный фрагмент потокового ответа: {line[:200]!r}")
+
+            # Фрагменты накопительные; если фрагмент не продолжает уже полученный текст, он дописывается целиком
+            delta: str = text[len(received):] if text.startswith(received) else text
+            received += delta
+
+            completed: Optional[str] = json_value.feed(delta=delta)
+            if completed is not None:
+                return completed
+
+        if not received.strip():
+            raise LLMContentError("Получен пустой ответ от модели")
+        return received
+
+    def _drain_later(self, response: ClientResponse) -> None:
+        task: Task[None] = create_task(self._drain(response=response))
+        self._drains.add(task)
+        task.add_done_callback(self._drains.discard)
+        # Не в finally самой задачи: задача, отмененная в aclose() до первого шага, не выполнится вовсе
+        task.add_done_callback(lambda _: response.release())
+
+    @staticmethod
+    async def _drain(response: ClientResponse) -> None:
+        """
+        Дочитывает потоковый ответ после возврата JSON. Затем соединение отпускается: дочитанное возвращается
+        в пул keep-alive, а оборванное ошибкой, общим таймаутом сессии или aclose() закрывается
+        """
+        try:
+            async for _ in response.content.iter_any():
+                pass
+        except (ClientError, TimeoutError):
+            pass
+
     @staticmethod
     async def _analyze_errors(response: ClientResponse) -> None:
         status_code = response.status
@@ -125,21 +257,6 @@ class YandexGPT:
 
     @staticmethod
     def extract_json_from_text(text: str) -> Dict[str, Any]:
-        text = text.strip()
-
-        if text.startswith("```json"):
-            text = text[7:].strip()
-        elif text.startswith("```"):
-            text = text[3:].strip()
-
-        if text.endswith("```"):
-            text = text[:-3].strip()
-
-        match: Match = re_search(pattern=r'\{.*\}', string=text, flags=DOTALL)  # type: ignore
-        if not match:
-            raise JSONParseError(f"JSON не найден в тексте. Начало текста: {text[:100]}...")
-
-        try:
-            return loads(match.group(0))
-        except JSONDecodeError as e:
-            raise JSONParseError(f"Ошибка парсинга JSON: {e}")
+        # Первый JSON-объект, а не жадное совпадение до последней '}': обертка ```json пропускается,
+        # а пояснение модели после JSON со своими скобками не ломает разбор
+        return extract_json(text=text)
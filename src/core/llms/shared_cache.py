@@ -0,0 +1,194 @@
+from asyncio import Task, CancelledError, create_task, sleep
+from datetime import datetime, timezone, timedelta
+from hashlib import sha256
+from logging import getLogger, Logger
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+from sqlalchemy import select, update, delete, func, bindparam, String, Integer, Executable, TableValuedAlias
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.llms.cache import QueryCache
+from src.core.llms.constants import INTENT_CACHE_TTL_SECONDS, INTENT_CACHE_FLUSH_SECONDS
+from src.core.llms.local_parser import LocalIntentParser
+from src.core.llms.models import IntentCacheEntries
+from src.core.llms.schemas import LLMResponse
+
+logger: Logger = getLogger(__name__)
+
+
+class SharedIntentCache:
+    """
+    Кеш ответов LLM в PostgreSQL (llm_intent_cache), общий для всех реплик бота и переживающий перезапуски:
+    нормализованный запрос (ключ - его sha256) -> LLMResponse. Перед ним в каждой реплике стоит QueryCache в памяти (L1).
+    Попадания (в том числе в L1) копятся в памяти и раз в flush_seconds записываются в таблицу одним запросом,
+    там же удаляются просроченные записи. Ошибки БД не доходят до пользователя: кеш считается промахом
+    """
+
+    def __init__(
+            self,
+            session_factory: async_sessionmaker[AsyncSession],
+            ttl_seconds: float = INTENT_CACHE_TTL_SECONDS,
+            flush_seconds: float = INTENT_CACHE_FLUSH_SECONDS,
+            clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)
+    ) -> None:
+        self.session_factory: async_sessionmaker[AsyncSession] = session_factory
+        self.ttl_seconds: float = ttl_seconds
+        self.flush_seconds: float = flush_seconds
+        self.hits: int = 0
+        self.misses: int = 0
+        self.errors: int = 0
+
+        self._clock: Callable[[], datetime] = clock
+        # Попадания, еще не записанные в таблицу: ключ -> количество
+        self._pending_hits: Dict[str, int] = {}
+        self._task: Optional[Task] = None
+
+    async def start(self) -> None:
+        self._task = create_task(self._maintain())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    @staticmethod
+    def cacheable(user_query: str) -> bool:
+        """
+        Ответ можно хранить долго, только если он не зависит от текущей даты: в запросе нет относительных
+        дат ("вчера", "на прошлой неделе") и дат без года, которые LLM переводит в конкретный день
+        """
+        entities, _ = LocalIntentParser.extract_entities(text=user_query.casefold().replace("ё", "е"))
+        return not entities.unresolved
+
+    @staticmethod
+    def query_key(user_query: str) -> str:
+        """Ключ записи: sha256 нормализованного запроса (hex, 64 символа) - не зависит от длины запроса"""
+        return sha256(QueryCache.normalize(user_query=user_query).encode()).hexdigest()
+
+    async def get(self, user_query: str) -> Optional[LLMResponse]:
+        key: str = SharedIntentCache.query_key(user_query=user_query)
+        try:
+            async with self.session_factory() as session:
+                entry: Optional[IntentCacheEntries] = await session.get(IntentCacheEntries, key)
+        except SQLAlchemyError:
+            self.errors += 1
+            return None
+
+        if entry is None or entry.expires_at <= self._clock():
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.touch(user_query=user_query)
+        return LLMResponse.model_validate(entry)
+
+    async def put(self, user_query: str, llm_response: LLMResponse) -> None:
+        if not SharedIntentCache.cacheable(user_query=user_query):
+            return
+
+        now: datetime = self._clock()
+        values: Dict[str, Any] = {
+            "key_context": llm_response.key_context,
+            "context": llm_response.context,
+            "expires_at": now + timedelta(seconds=self.ttl_seconds)
+        }
+        # При повторной записи (другая реплика распознала тот же запрос) счетчик попаданий сохраняется
+        await self._execute(
+            statement=insert(IntentCacheEntries)
+            .values(
+                query_key=SharedIntentCache.query_key(user_query=user_query),
+                query_text=QueryCache.normalize(user_query=user_query),
+                hits=0,
+                created_at=now,
+                **values
+            )
+            .on_conflict_do_update(index_elements=[IntentCacheEntries.query_key], set_=values)
+        )
+
+    def touch(self, user_query: str) -> None:
+        """Учитывает попадание в запрос; в таблицу попадания записываются пачкой в flush"""
+        key: str = SharedIntentCache.query_key(user_query=user_query)
+        self._pending_hits[key] = self._pending_hits.get(key, 0) + 1
+
+    async def warm_up(self, limit: int) -> List[Tuple[str, LLMResponse]]:
+        """
+        limit непросроченных записей с наибольшим числом попаданий (нормализованный запрос и ответ) -
+        для загрузки в L1 при старте
+        """
+        try:
+            async with self.session_factory() as session:
+                entries: List[IntentCacheEntries] = list((await session.execute(
+                    select(IntentCacheEntries)
+                    .where(IntentCacheEntries.expires_at > self._clock())
+                    .order_by(IntentCacheEntries.hits.desc())
+                    .limit(limit)
+                )).scalars())
+        except SQLAlchemyError:
+            self.errors += 1
+            return []
+
+        return [(entry.query_text, LLMResponse.model_validate(entry)) for entry in entries]
+
+    async def flush(self) -> None:
+        """Записывает накопленные попадания одним UPDATE; при ошибке БД они вернутся в очередь"""
+        if not self._pending_hits:
+            return
+        pending: Dict[str, int] = self._pending_hits
+        self._pending_hits = {}
+
+        incoming: TableValuedAlias = func.unnest(
+            bindparam("keys", value=list(pending), type_=ARRAY(String)),
+            bindparam("counts", value=list(pending.values()), type_=ARRAY(Integer))
+        ).table_valued("query_key", "hits").render_derived(name="incoming")
+
+        if not await self._execute(
+                statement=update(IntentCacheEntries)
+                .where(IntentCacheEntries.query_key == incoming.c.query_key)
+                .values(hits=IntentCacheEntries.hits + incoming.c.hits, last_hit_at=self._clock())
+        ):
+            for key, count in pending.items():
+                self._pending_hits[key] = self._pending_hits.get(key, 0) + count
+
+    async def purge(self) -> None:
+        """Удаляет просроченные записи"""
+        await self._execute(statement=delete(IntentCacheEntries).where(IntentCacheEntries.expires_at <= self._clock()))
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "pending_hits": sum(self._pending_hits.values())
+        }
+
+    async def _maintain(self) -> None:
+        """
+        Периодическая запись попаданий и удаление просроченных записей. Любая ошибка итерации только
+        логируется: иначе фоновая задача завершится молча и попадания перестанут записываться
+        """
+        while True:
+            await sleep(self.flush_seconds)
+            try:
+                await self.flush()
+                await self.purge()
+            except Exception:
+                self.errors += 1
+                logger.exception("Ошибка обслуживания общего кеша запросов")
+
+    async def _execute(self, statement: Executable) -> bool:
+        """Выполняет запрос на запись в отдельной сессии; False - если БД недоступна"""
+        try:
+            async with self.session_factory() as session:
+                await session.execute(statement=statement)
+                await session.commit()
+        except SQLAlchemyError:
+            self.errors += 1
+            return False
+        return True
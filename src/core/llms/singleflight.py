@@ -0,0 +1,37 @@
+from asyncio import Task, create_task, shield
+from typing import Dict, Callable, Coroutine, Any, Optional
+
+from src.core.llms.schemas import BaseResponse
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные одинаковые запросы: пока по ключу выполняется запрос, следующие вызовы
+    с тем же ключом не запускают свой, а ждут результат уже запущенного. После завершения ключ
+    освобождается, поэтому повторные запросы (если результата нет в кеше) снова идут в LLM.
+    Отмена одного из ожидающих (например, пользователь ушел) не отменяет общий запрос для остальных
+    """
+
+    def __init__(self) -> None:
+        # Сколько запросов выполнено и сколько вызовов получили результат чужого запроса
+        self.calls: int = 0
+        self.coalesced: int = 0
+
+        self._in_flight: Dict[str, Task[BaseResponse]] = {}
+
+    async def run(self, key: str, call: Callable[[], Coroutine[Any, Any, BaseResponse]]) -> BaseResponse:
+        task: Optional[Task[BaseResponse]] = self._in_flight.get(key)
+        if task is None:
+            self.calls += 1
+            task = create_task(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        result: BaseResponse = await shield(task)
+        # Каждый вызывающий получает свою копию схемы
+        return result.model_copy()
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
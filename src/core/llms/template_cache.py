@@ -0,0 +1,121 @@
+from collections import OrderedDict
+from math import sqrt
+from typing import Dict, Set, List, Tuple, Optional
+
+from src.core.llms.constants import TEMPLATE_CACHE_SIZE, TEMPLATE_CACHE_MIN_SIMILARITY
+from src.core.llms.local_parser import LocalIntentParser, IntentRule, QueryEntities, INTENT_RULES
+from src.core.llms.retriever import char_ngrams
+from src.core.llms.schemas import LLMResponse
+
+
+class TemplateCache:
+    """
+    Кеш шаблонов запросов для перефразированных вопросов. Шаблон - текст запроса без параметров
+    (ID креатора, даты, числа), индексируется символьными триграммами. Если новый запрос похож на
+    уже распознанный шаблон не меньше чем на min_similarity (косинусная мера), берется его key_context,
+    а context собирается из параметров нового запроса - LLM не нужна.
+    Шаблон подставляется, только если параметры нового запроса в точности те, что нужны типу запроса,
+    и в нем упомянута та же метрика (просмотры) без других
+    """
+
+    def __init__(
+            self,
+            max_size: int = TEMPLATE_CACHE_SIZE,
+            min_similarity: float = TEMPLATE_CACHE_MIN_SIMILARITY,
+            rules: Tuple[IntentRule, ...] = INTENT_RULES
+    ) -> None:
+        self.max_size: int = max_size
+        self.min_similarity: float = min_similarity
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self._rules: Dict[str, IntentRule] = {rule.key_context: rule for rule in rules}
+        # Шаблон -> (key_context, нормированный вектор триграмм); порядок - от давно использованных к недавним
+        self._entries: OrderedDict[str, Tuple[str, Dict[str, float]]] = OrderedDict()
+        # Обратный индекс: триграмма -> шаблоны, где она есть
+        self._index: Dict[str, Set[str]] = {}
+
+    def get(self, user_query: str) -> Optional[LLMResponse]:
+        """Ответ в формате LLM по ближайшему похожему шаблону; None - если такого нет"""
+        parametrized: Optional[Tuple[QueryEntities, str]] = LocalIntentParser.parametrize(user_query=user_query)
+        if parametrized is None or not self._entries:
+            self.misses += 1
+            return None
+        entities, template = parametrized
+
+        for similarity, known_template in self._similar(template=template):
+            if similarity < self.min_similarity:
+                break
+
+            response: Optional[LLMResponse] = self._response(
+                key_context=self._entries[known_template][0],
+                template=template,
+                entities=entities
+            )
+            if response is not None:
+                self._entries.move_to_end(known_template)
+                self.hits += 1
+                return response
+
+        self.misses += 1
+        return None
+
+    def response_for(self, user_query: str, key_context: str) -> Optional[LLMResponse]:
+        """Ответ, который кеш собрал бы для запроса с этим key_context; None - если параметры не подходят"""
+        parametrized: Optional[Tuple[QueryEntities, str]] = LocalIntentParser.parametrize(user_query=user_query)
+        if parametrized is None:
+            return None
+        entities, template = parametrized
+        return self._response(key_context=key_context, template=template, entities=entities)
+
+    def put(self, user_query: str, key_context: str) -> None:
+        parametrized: Optional[Tuple[QueryEntities, str]] = LocalIntentParser.parametrize(user_query=user_query)
+        if parametrized is None or key_context not in self._rules:
+            return
+        template: str = " ".join(parametrized[1].split())
+
+        if template in self._entries:
+            self._remove(template=template)
+        vector: Dict[str, float] = TemplateCache._vector(template=template)
+        if not vector:
+            return
+
+        self._entries[template] = (key_context, vector)
+        for ngram in vector:
+            self._index.setdefault(ngram, set()).add(template)
+
+        while len(self._entries) > self.max_size:
+            self._remove(template=next(iter(self._entries)))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _similar(self, template: str) -> List[Tuple[float, str]]:
+        """Известные шаблоны с общими триграммами по убыванию сходства"""
+        vector: Dict[str, float] = TemplateCache._vector(template=template)
+        scores: Dict[str, float] = {}
+        for ngram, weight in vector.items():
+            for known_template in self._index.get(ngram, ()):
+                known_weight: float = self._entries[known_template][1][ngram]
+                scores[known_template] = scores.get(known_template, 0.0) + weight * known_weight
+        return sorted(((score, known) for known, score in scores.items()), reverse=True)
+
+    def _response(self, key_context: str, template: str, entities: QueryEntities) -> Optional[LLMResponse]:
+        rule: Optional[IntentRule] = self._rules.get(key_context)
+        if rule is None or not LocalIntentParser.fits(rule=rule, text=template, entities=entities):
+            return None
+        return LLMResponse(key_context=key_context, context=LocalIntentParser.context(rule=rule, entities=entities))
+
+    def _remove(self, template: str) -> None:
+        _, vector = self._entries.pop(template)
+        for ngram in vector:
+            templates: Set[str] = self._index[ngram]
+            templates.discard(template)
+            if not templates:
+                del self._index[ngram]
+
+    @staticmethod
+    def _vector(template: str) -> Dict[str, float]:
+        counts: Dict[str, int] = char_ngrams(text=template)
+        norm: float = sqrt(sum(count * count for count in counts.values()))
+        return {ngram: count / norm for ngram, count in counts.items()} if norm else {}
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from os import getenv
-from typing import Optional
+from typing import Optional, Tuple
 
 from dotenv import load_dotenv, find_dotenv
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, AsyncEngine, create_async_engine
@@ -8,7 +8,8 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, AsyncEngine
 from src.core.databases.relational.connection import RelationalDatabase
 from src.core.databases.relational.enums import DatabaseDriver, DatabaseType
 from src.core.databases.relational.schemas import DatabaseSchema, PoolSettings
-from src.core.llms.schemas import YandexGPTAuth
+from src.core.llms.constants import YANDEX_GPT_MODEL
+from src.core.llms.schemas import YandexGPTAuth, OpenAICompatibleAuth
 
 load_dotenv(find_dotenv(".env"))
 
@@ -18,6 +19,9 @@ class Config:
     telegram_bot_token: str
     yandex_gpt_auth: YandexGPTAuth
     main_database: RelationalDatabase
+    # Модели YandexGPT и необязательный OpenAI-совместимый сервер; больше одного бэкенда - запросы идут через LLMRouter
+    yandex_gpt_models: Tuple[str, ...] = (YANDEX_GPT_MODEL,)
+    openai_compatible: Optional[OpenAICompatibleAuth] = None
 
     def create_session_factory(
             self,
@@ -61,5 +65,13 @@ service_config: Config = Config(
     yandex_gpt_auth=YandexGPTAuth(
         api_key=getenv("YANDEX_GPT_API_KEY"),  # type: ignore
         folder_id=getenv("YANDEX_GPT_FOLDER_ID")  # type: ignore
-    )
+    ),
+    yandex_gpt_models=tuple(
+        model.strip() for model in getenv("YANDEX_GPT_MODELS", YANDEX_GPT_MODEL).split(",") if model.strip()
+    ),
+    openai_compatible=OpenAICompatibleAuth(
+        base_url=getenv("OPENAI_COMPATIBLE_BASE_URL"),  # type: ignore
+        model=getenv("OPENAI_COMPATIBLE_MODEL", ""),
+        api_key=getenv("OPENAI_COMPATIBLE_API_KEY")
+    ) if getenv("OPENAI_COMPATIBLE_BASE_URL") else None
 )
@@ -13,6 +13,8 @@ from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 from src.core.root.config import service_config
 from src.core.root.middlewares import DBSessionMiddleware
 from src.handlers.sso import SSO_ROUTER
+from src.handlers.sso.jobs import IngestionQueue
+from src.handlers.sso.text_handler import text_query_handler
 from src.handlers.videos import VIDEOS_ROUTER
 
 
@@ -22,7 +24,12 @@ async def run(
         storage: BaseStorage | MemoryStorage
 ):
     bot: Bot = Bot(token=telegram_token)
-    dispatcher: Dispatcher = Dispatcher(storage=storage)
+    ingest_queue: IngestionQueue = IngestionQueue(session_factory=db_sessions_factory)
+    dispatcher: Dispatcher = Dispatcher(
+        storage=storage,
+        ingest_queue=ingest_queue,
+        llm_scheduler=text_query_handler.context_processor.scheduler
+    )
 
     # Middlewares:
     dispatcher.update.outer_middleware(
@@ -34,9 +41,13 @@ async def run(
     dispatcher.include_router(VIDEOS_ROUTER)
 
     try:
+        await ingest_queue.start()
+        await text_query_handler.start(session_factory=db_sessions_factory)
         await dispatcher.start_polling(bot)
 
     finally:
+        await ingest_queue.stop()
+        await text_query_handler.aclose()
         await bot.session.close()
         await dispatcher.storage.close()
 
@@ -0,0 +1,169 @@
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import chain, islice
+from operator import itemgetter
+from re import compile as re_compile, Pattern
+from typing import List, Dict, Any, Tuple, Set
+
+import numpy as np
+from pydantic import ValidationError
+
+from src.handlers.sso.records import VideoRecord, VideoRow, SnapshotRow, VIDEO_COLUMNS, SNAPSHOT_COLUMNS, video_record
+from src.handlers.sso.schemas import VideoSchema
+
+VIDEO_COUNTERS: Tuple[str, ...] = ("views_count", "likes_count", "comments_count", "reports_count")
+SNAPSHOT_DELTAS: Tuple[str, ...] = (
+    "delta_views_count",
+    "delta_likes_count",
+    "delta_comments_count",
+    "delta_reports_count",
+)
+DATE_COLUMNS: Tuple[str, ...] = ("video_created_at", "created_at", "updated_at")
+CREATOR_ID_LENGTH: int = 32
+# Сколько ошибок перечислять в тексте исключения
+MAX_REPORTED_ERRORS: int = 20
+
+# Формат дат, который datetime.fromisoformat и VideoSchema разбирают одинаково; прочие даты проверяет VideoSchema
+_ISO_DATETIME: Pattern = re_compile(
+    r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?(?:Z|[+-]\d{2}:\d{2})?)?"
+)
+
+
+class ColumnarFallback(Exception):
+    """Данные нельзя разложить в колонки (значения, которые понимает только Pydantic) - нужна эталонная валидация"""
+
+
+@dataclass
+class VideoColumns:
+    """
+    Пачка видео в виде колонок в порядке records.VIDEO_COLUMNS / SNAPSHOT_COLUMNS.
+    Счетчики дополнительно собраны в массивы int64 для векторных проверок
+    """
+    videos: Dict[str, List[Any]]
+    snapshots: Dict[str, List[Any]]
+    video_counters: np.ndarray  # (видео, VIDEO_COUNTERS)
+    snapshot_counters: np.ndarray  # (снапшоты, VIDEO_COUNTERS)
+    snapshot_offsets: np.ndarray  # снапшоты i-го видео: [offsets[i], offsets[i + 1])
+
+    def to_records(self) -> List[VideoRecord]:
+        """Собирает строки для записи в БД из колонок"""
+        video_rows: List[VideoRow] = list(zip(*(self.videos[column] for column in VIDEO_COLUMNS)))
+        snapshot_rows: List[SnapshotRow] = list(zip(*(self.snapshots[column] for column in SNAPSHOT_COLUMNS)))
+        offsets: List[int] = self.snapshot_offsets.tolist()
+
+        return list(zip(
+            video_rows,
+            [snapshot_rows[start:end] for start, end in zip(offsets, islice(offsets, 1, None))]
+        ))
+
+
+class ColumnarValidator:
+    """
+    Быстрая валидация пачки видео целыми колонками вместо построчного создания моделей Pydantic.
+    Проверяет те же правила, что и VideoSchema: обязательные поля и их типы, счетчики >= 0,
+    creator_id длиной 32 символа, снапшот ссылается на видео, в которое он вложен.
+    Если в пачке встречаются значения, которые колоночный путь не разбирает (например, даты числом
+    или числа строкой), пачка целиком валидируется через VideoSchema - он остается эталоном
+    """
+
+    @staticmethod
+    def validate_records(items: List[Dict[str, Any]], first_index: int = 0) -> List[VideoRecord]:
+        """Валидирует пачку видео, first_index - позиция первого видео пачки в файле для текста ошибок"""
+        try:
+            columns: VideoColumns = ColumnarValidator.to_columns(items=items)
+        except ColumnarFallback:
+            return ColumnarValidator.validate_reference(items=items, first_index=first_index)
+
+        errors: List[str] = ColumnarValidator.check(columns=columns, first_index=first_index)
+        if errors:
+            raise ValueError(
+                f"Ошибки валидации ({len(errors)}):\n" + "\n".join(errors[:MAX_REPORTED_ERRORS])
+            )
+        return columns.to_records()
+
+    @staticmethod
+    def validate_reference(items: List[Dict[str, Any]], first_index: int = 0) -> List[VideoRecord]:
+        """Эталонная построчная валидация через VideoSchema"""
+        records: List[VideoRecord] = []
+        for offset, item in enumerate(items):
+            try:
+                records.append(video_record(video=VideoSchema.model_validate(item)))
+            except ValidationError as e:
+                raise ValueError(f"videos[{first_index + offset}]: {e}")
+        return records
+
+    @staticmethod
+    def to_columns(items: List[Dict[str, Any]]) -> VideoColumns:
+        """Раскладывает видео и вложенные снапшоты по колонкам, проверяя типы значений"""
+        try:
+            snapshots_by_video: List[List[Dict[str, Any]]] = [item.get("snapshots", []) for item in items]
+            snapshots: List[Dict[str, Any]] = list(chain.from_iterable(snapshots_by_video))
+
+            video_columns: Dict[str, List[Any]] = _columns(rows=items, names=VIDEO_COLUMNS)
+            snapshot_columns: Dict[str, List[Any]] = _columns(rows=snapshots, names=SNAPSHOT_COLUMNS)
+
+            return VideoColumns(
+                videos=video_columns,
+                snapshots=snapshot_columns,
+                video_counters=_counters(columns=video_columns),
+                snapshot_counters=_counters(columns=snapshot_columns),
+                snapshot_offsets=np.concatenate(([0], np.cumsum(list(map(len, snapshots_by_video)), dtype=np.int64)))
+            )
+        except (KeyError, TypeError, AttributeError, ValueError, OverflowError) as e:
+            raise ColumnarFallback(str(e))
+
+    @staticmethod
+    def check(columns: VideoColumns, first_index: int = 0) -> List[str]:
+        """Проверяет ограничения пачки векторно и возвращает ошибки с позициями строк в файле"""
+        errors: List[str] = []
+        offsets: np.ndarray = columns.snapshot_offsets
+
+        def snapshot_path(position: int) -> str:
+            video_index: int = int(np.searchsorted(offsets, position, side="right")) - 1
+            return f"videos[{first_index + video_index}].snapshots[{position - int(offsets[video_index])}]"
+
+        for row, column in np.argwhere(columns.video_counters < 0).tolist():
+            errors.append(f"videos[{first_index + row}].{VIDEO_COUNTERS[column]}: значение должно быть >= 0")
+
+        creator_ids: List[str] = columns.videos["creator_id"]
+        creator_lengths: np.ndarray = np.fromiter(map(len, creator_ids), dtype=np.int64, count=len(creator_ids))
+        for row in np.flatnonzero(creator_lengths != CREATOR_ID_LENGTH).tolist():
+            errors.append(f"videos[{first_index + row}].creator_id: длина должна быть {CREATOR_ID_LENGTH} символа")
+
+        for position, column in np.argwhere(columns.snapshot_counters < 0).tolist():
+            errors.append(f"{snapshot_path(position)}.{VIDEO_COUNTERS[column]}: значение должно быть >= 0")
+
+        # id родительского видео для каждого снапшота, сравнение одной операцией по всей пачке
+        parent_ids: np.ndarray = np.repeat(np.array(columns.videos["id"], dtype=object), np.diff(offsets))
+        foreign: np.ndarray = np.array(columns.snapshots["video_id"], dtype=object) != parent_ids
+        for position in np.flatnonzero(foreign).tolist():
+            errors.append(f"{snapshot_path(position)}.video_id: не совпадает с id видео, в которое вложен снапшот")
+
+        return errors
+
+
+def _columns(rows: List[Dict[str, Any]], names: Tuple[str, ...]) -> Dict[str, List[Any]]:
+    """Достает колонки из строк: даты разбираются в datetime, у остальных значений проверяется тип"""
+    columns: Dict[str, List[Any]] = {}
+    for name in names:
+        values: List[Any] = list(map(itemgetter(name), rows))
+        types: Set[type] = set(map(type, values))
+
+        if name in DATE_COLUMNS:
+            if types - {str} or not all(map(_ISO_DATETIME.fullmatch, values)):
+                raise TypeError(f"'{name}' должен быть датой в формате ISO 8601")
+            values = list(map(datetime.fromisoformat, values))
+        elif name in VIDEO_COUNTERS or name in SNAPSHOT_DELTAS:
+            # bool, float и строки с числом VideoSchema приводит к int сам
+            if types - {int}:
+                raise TypeError(f"'{name}' должен быть целым числом")
+        elif types - {str}:
+            raise TypeError(f"'{name}' должен быть строкой")
+
+        columns[name] = values
+    return columns
+
+
+def _counters(columns: Dict[str, List[Any]]) -> np.ndarray:
+    """Счетчики с ограничением >= 0 в виде массива (строки, VIDEO_COUNTERS); числа вне int64 - OverflowError"""
+    return np.array([columns[name] for name in VIDEO_COUNTERS], dtype=np.int64).T
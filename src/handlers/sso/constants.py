@@ -1 +1,56 @@
-MAX_FILE_SIZE_MB: int = 20
+from os import cpu_count
+from typing import Dict, Tuple
+
+from src.handlers.sso.enums import UploadLoader, DownloadMode, ValidationMode, DocumentFormat, Compression
+
+# Лимит на размер присланного файла (для сжатых файлов - на сжатый размер)
+MAX_FILE_SIZE_MB: int = 500
+# Лимит на размер распакованных данных сжатого файла
+MAX_DECOMPRESSED_SIZE_MB: int = 5 * 1024
+
+# Поддерживаемые расширения файлов: формат документа и сжатие
+UPLOAD_FORMATS: Dict[str, Tuple[DocumentFormat, Compression]] = {
+    ".json": (DocumentFormat.json, Compression.none),
+    ".json.gz": (DocumentFormat.json, Compression.gzip),
+    ".json.zst": (DocumentFormat.json, Compression.zstd),
+    ".ndjson": (DocumentFormat.ndjson, Compression.none),
+    ".ndjson.gz": (DocumentFormat.ndjson, Compression.gzip),
+    ".ndjson.zst": (DocumentFormat.ndjson, Compression.zstd),
+}
+
+# Размер чанка, которым файл подается в потоковый парсер
+READ_CHUNK_SIZE: int = 1024 * 1024
+# Количество видео (вместе со снапшотами), накапливаемых перед записью в БД
+UPLOAD_BATCH_SIZE: int = 500
+
+# Способ валидации видео из загружаемого файла. Колоночный режим быстрее на уже разобранных объектах
+# с большим числом снапшотов; для сырого JSON в пуле процессов быстрее VideoSchema.model_validate_json
+VALIDATION_MODE: ValidationMode = ValidationMode.pydantic
+
+# Способ записи в БД по умолчанию
+UPLOAD_LOADER: UploadLoader = UploadLoader.copy
+
+# Минимальный интервал между редактированиями сообщения с прогрессом загрузки
+PROGRESS_EDIT_INTERVAL_SECONDS: float = 3.0
+
+# Подпись к файлу, включающая режим IngestMode.upsert для этой загрузки
+UPSERT_CAPTION: str = "upsert"
+# Подпись к файлу, отключающая проверку по ingest_log: файл загружается, даже если уже был загружен
+FORCE_CAPTION: str = "force"
+
+# Способ получения файла из Telegram
+DOWNLOAD_MODE: DownloadMode = DownloadMode.stream
+# Общий таймаут скачивания: в режиме stream соединение открыто все время, пока идет загрузка в БД
+DOWNLOAD_TIMEOUT_SECONDS: int = 30 * 60
+
+# Фоновая загрузка файлов: число одновременно загружаемых файлов и размер очереди ожидающих
+INGEST_WORKERS: int = 2
+INGEST_QUEUE_SIZE: int = 20
+# Процессы для разбора и валидации JSON, чтобы не блокировать event loop бота
+INGEST_PROCESS_WORKERS: int = cpu_count() or 2
+# Видео отправляются в пул шардами примерно такого размера (в символах исходного JSON)
+INGEST_SHARD_SIZE: int = 1024 * 1024
+# Сколько шардов одной загрузки может валидироваться одновременно
+INGEST_SHARDS_IN_FLIGHT: int = 2 * INGEST_PROCESS_WORKERS
+# Сколько завершенных задач хранится для команды /status
+INGEST_JOBS_HISTORY: int = 1000
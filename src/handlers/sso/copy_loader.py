@@ -0,0 +1,140 @@
+from typing import List, Tuple, Optional
+
+from psycopg import AsyncConnection, AsyncCursor, sql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.handlers.sso.records import VIDEO_COLUMNS, SNAPSHOT_COLUMNS, VideoRecord
+from src.handlers.videos.models import Videos, VideoSnapshots
+
+VIDEOS_STAGE: str = "videos_stage"
+SNAPSHOTS_STAGE: str = "video_snapshots_stage"
+
+# Счетчики видео, которые обновляются в режиме upsert, если в файле более свежий updated_at
+VIDEO_UPSERT_COLUMNS: Tuple[str, ...] = (
+    "views_count",
+    "likes_count",
+    "comments_count",
+    "reports_count",
+    "updated_at",
+)
+
+
+class CopyBulkLoader:
+    """
+    Загрузка видео и снапшотов через COPY FROM STDIN. Строки пишутся в соединение сессии напрямую,
+    минуя ORM, поэтому загрузка идет в той же транзакции, что и остальные запросы сессии
+    """
+
+    @staticmethod
+    async def get_driver_connection(session: AsyncSession) -> Optional[AsyncConnection]:
+        """Возвращает psycopg-соединение сессии или None, если драйвер не поддерживает COPY"""
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+
+        if not isinstance(driver_connection, AsyncConnection):
+            return None
+        return driver_connection
+
+    @staticmethod
+    async def copy_batch(connection: AsyncConnection, batch: List[VideoRecord]) -> Tuple[int, int]:
+        """Записывает пачку видео и их снапшоты, возвращает количество записанных видео и снапшотов"""
+        snapshots_count: int = 0
+
+        async with connection.cursor() as cursor:
+            async with cursor.copy(CopyBulkLoader._copy_statement(Videos.__tablename__, VIDEO_COLUMNS)) as copy:
+                for video, _ in batch:
+                    await copy.write_row(video)
+
+            async with cursor.copy(
+                    CopyBulkLoader._copy_statement(VideoSnapshots.__tablename__, SNAPSHOT_COLUMNS)
+            ) as copy:
+                for _, snapshots in batch:
+                    for snapshot in snapshots:
+                        await copy.write_row(snapshot)
+                    snapshots_count += len(snapshots)
+
+        return len(batch), snapshots_count
+
+    @staticmethod
+    async def upsert_batch(connection: AsyncConnection, batch: List[VideoRecord]) -> Tuple[int, int, int]:
+        """
+        Записывает пачку в режиме upsert: строки копируются через COPY во временные staging-таблицы,
+        затем одним INSERT ... SELECT ... ON CONFLICT переносятся в основные таблицы.
+        Возвращает количество созданных видео, обновленных видео и созданных снапшотов
+        """
+        async with connection.cursor() as cursor:
+            await CopyBulkLoader._prepare_staging(cursor=cursor)
+
+            async with cursor.copy(CopyBulkLoader._copy_statement(VIDEOS_STAGE, VIDEO_COLUMNS)) as copy:
+                for video, _ in batch:
+                    await copy.write_row(video)
+
+            async with cursor.copy(CopyBulkLoader._copy_statement(SNAPSHOTS_STAGE, SNAPSHOT_COLUMNS)) as copy:
+                for _, snapshots in batch:
+                    for snapshot in snapshots:
+                        await copy.write_row(snapshot)
+
+            await cursor.execute(CopyBulkLoader._upsert_videos_statement())
+            inserted_flags: List[Tuple[bool]] = await cursor.fetchall()
+            videos_created: int = sum(1 for (inserted,) in inserted_flags if inserted)
+
+            await cursor.execute(CopyBulkLoader._insert_new_snapshots_statement())
+            snapshots_created: int = cursor.rowcount
+
+        return videos_created, len(inserted_flags) - videos_created, snapshots_created
+
+    @staticmethod
+    async def _prepare_staging(cursor: AsyncCursor) -> None:
+        """Создает (один раз на соединение) и очищает временные staging-таблицы"""
+        for stage, table in ((VIDEOS_STAGE, Videos.__tablename__), (SNAPSHOTS_STAGE, VideoSnapshots.__tablename__)):
+            await cursor.execute(
+                sql.SQL(
+                    "CREATE TEMP TABLE IF NOT EXISTS {stage} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+                ).format(stage=sql.Identifier(stage), table=sql.Identifier(table))
+            )
+            await cursor.execute(sql.SQL("TRUNCATE {stage}").format(stage=sql.Identifier(stage)))
+
+    @staticmethod
+    def _upsert_videos_statement() -> sql.Composed:
+        """
+        Новые видео вставляются, у существующих обновляются счетчики, но только если в файле более свежий
+        updated_at. Неизмененные строки не переписываются. (xmax = 0) отличает вставку от обновления
+        """
+        columns: sql.Composable = sql.SQL(", ").join(map(sql.Identifier, VIDEO_COLUMNS))
+        return sql.SQL(
+            "INSERT INTO {table} ({columns}) "
+            "SELECT DISTINCT ON (id) {columns} FROM {stage} ORDER BY id, updated_at DESC "
+            "ON CONFLICT (id) DO UPDATE SET {updates} "
+            "WHERE {table}.updated_at < EXCLUDED.updated_at "
+            "RETURNING (xmax = 0)"
+        ).format(
+            table=sql.Identifier(Videos.__tablename__),
+            stage=sql.Identifier(VIDEOS_STAGE),
+            columns=columns,
+            updates=sql.SQL(", ").join(
+                sql.SQL("{column} = EXCLUDED.{column}").format(column=sql.Identifier(column))
+                for column in VIDEO_UPSERT_COLUMNS
+            )
+        )
+
+    @staticmethod
+    def _insert_new_snapshots_statement() -> sql.Composed:
+        """Снапшоты неизменяемы: вставляются только новые, существующие пропускаются"""
+        columns: sql.Composable = sql.SQL(", ").join(map(sql.Identifier, SNAPSHOT_COLUMNS))
+        return sql.SQL(
+            "INSERT INTO {table} ({columns}) "
+            "SELECT {columns} FROM {stage} "
+            "ON CONFLICT (id) DO NOTHING"
+        ).format(
+            table=sql.Identifier(VideoSnapshots.__tablename__),
+            stage=sql.Identifier(SNAPSHOTS_STAGE),
+            columns=columns
+        )
+
+    @staticmethod
+    def _copy_statement(table: str, columns: Tuple[str, ...]) -> sql.Composed:
+        return sql.SQL("COPY {table} ({columns}) FROM STDIN").format(
+            table=sql.Identifier(table),
+            columns=sql.SQL(", ").join(map(sql.Identifier, columns))
+        )
@@ -0,0 +1,83 @@
+from typing import Iterator, Any
+from zlib import decompressobj, MAX_WBITS, error as ZlibError
+
+from zstandard import ZstdDecompressor, ZstdError
+
+from src.handlers.sso.constants import MAX_DECOMPRESSED_SIZE_MB, READ_CHUNK_SIZE
+from src.handlers.sso.enums import Compression
+
+# zstd не умеет ограничивать размер вывода за вызов, поэтому сжатые данные подаются ему небольшими порциями
+ZSTD_INPUT_SLICE: int = 64 * 1024
+
+
+class StreamDecompressor:
+    """
+    Потоковая распаковка gzip и zstd: сжатые чанки подаются по мере скачивания, распакованные данные
+    отдаются частями не больше READ_CHUNK_SIZE, поэтому файл не распаковывается в память целиком.
+    Поддерживаются архивы из нескольких фреймов (gzip members, zstd frames), например склеенные через cat
+    """
+
+    def __init__(
+            self,
+            compression: Compression,
+            max_output_size: int = MAX_DECOMPRESSED_SIZE_MB * 1024 * 1024,
+            chunk_size: int = READ_CHUNK_SIZE
+    ) -> None:
+        if compression == Compression.none:
+            raise ValueError("Файл без сжатия не требует распаковки")
+
+        self.compression: Compression = compression
+        self.max_output_size: int = max_output_size
+        self.chunk_size: int = chunk_size
+        self.output_size: int = 0
+        self._decompressor: Any = self._new_frame()
+
+    def decompress(self, chunk: bytes) -> Iterator[bytes]:
+        """Распаковывает очередной сжатый чанк"""
+        try:
+            if self.compression == Compression.gzip:
+                yield from self._check_size(self._decompress_gzip(data=chunk))
+            else:
+                yield from self._check_size(self._decompress_zstd(data=chunk))
+        except (ZlibError, ZstdError) as e:
+            raise ValueError(f"Ошибка распаковки файла: {str(e)}")
+
+    def close(self) -> None:
+        """Проверяет, что архив не обрезан"""
+        if not self._decompressor.eof:
+            raise ValueError("Ошибка распаковки файла: архив поврежден или обрезан")
+
+    def _decompress_gzip(self, data: bytes) -> Iterator[bytes]:
+        while data:
+            self._start_next_frame()
+            output: bytes = self._decompressor.decompress(data, self.chunk_size)
+            data = self._decompressor.unconsumed_tail or self._decompressor.unused_data
+            yield output
+
+    def _decompress_zstd(self, data: bytes) -> Iterator[bytes]:
+        while data:
+            self._start_next_frame()
+            output: bytes = self._decompressor.decompress(data[:ZSTD_INPUT_SLICE])
+            data = self._decompressor.unused_data + data[ZSTD_INPUT_SLICE:]
+            yield output
+
+    def _start_next_frame(self) -> None:
+        """Данные после конца фрейма - начало следующего фрейма"""
+        if self._decompressor.eof:
+            self._decompressor = self._new_frame()
+
+    def _new_frame(self) -> Any:
+        if self.compression == Compression.gzip:
+            return decompressobj(wbits=16 + MAX_WBITS)
+        return ZstdDecompressor().decompressobj()
+
+    def _check_size(self, outputs: Iterator[bytes]) -> Iterator[bytes]:
+        for output in outputs:
+            self.output_size += len(output)
+            if self.output_size > self.max_output_size:
+                raise ValueError(
+                    f"Распакованный файл слишком большой. Максимальный размер: "
+                    f"{self.max_output_size // 1024 // 1024}MB"
+                )
+            if output:
+                yield output
@@ -0,0 +1,34 @@
+from typing import AsyncIterator
+
+from aiofiles import open as aiofiles_open  # type: ignore
+from aiogram import Bot
+
+from src.handlers.sso.constants import READ_CHUNK_SIZE, DOWNLOAD_TIMEOUT_SECONDS
+
+
+class TelegramFileStream:
+
+    @staticmethod
+    async def iter_chunks(
+            bot: Bot,
+            file_path: str,
+            chunk_size: int = READ_CHUNK_SIZE,
+            timeout: int = DOWNLOAD_TIMEOUT_SECONDS
+    ) -> AsyncIterator[bytes]:
+        """
+        Отдает тело файла из Telegram чанками по мере скачивания.
+        В памяти одновременно находится не больше одного чанка, на диск ничего не пишется
+        """
+        if bot.session.api.is_local:
+            async with aiofiles_open(bot.session.api.wrap_local_file.to_local(file_path), 'rb') as file:
+                while chunk := await file.read(chunk_size):
+                    yield chunk
+            return
+
+        async for chunk in bot.session.stream_content(
+                url=bot.session.api.file_url(bot.token, file_path),
+                timeout=timeout,
+                chunk_size=chunk_size,
+                raise_for_status=True
+        ):
+            yield chunk
@@ -0,0 +1,39 @@
+from enum import StrEnum
+
+
+class UploadLoader(StrEnum):
+    copy = "copy"  # Потоковая загрузка через COPY-протокол PostgreSQL (psycopg 3)
+    orm = "orm"  # Создание ORM-объектов и INSERT через unit-of-work (fallback)
+
+
+class IngestMode(StrEnum):
+    strict = "strict"  # Файл отклоняется, если хотя бы одно видео или снапшот уже есть в базе
+    upsert = "upsert"  # Новые строки добавляются, уже существующие пропускаются или обновляются
+
+
+class DownloadMode(StrEnum):
+    stream = "stream"  # Тело файла подается в парсер по мере скачивания, без временного файла
+    temp_file = "temp_file"  # Файл сначала целиком скачивается во временный файл на диске
+
+
+class JobStatus(StrEnum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class ValidationMode(StrEnum):
+    pydantic = "pydantic"  # Построчная валидация моделями VideoSchema (эталон)
+    columnar = "columnar"  # Валидация колонками NumPy, с откатом на VideoSchema для нестандартных значений
+
+
+class DocumentFormat(StrEnum):
+    json = "json"  # Один документ {"videos": [...]}
+    ndjson = "ndjson"  # Одно видео на строку
+
+
+class Compression(StrEnum):
+    none = "none"
+    gzip = "gzip"
+    zstd = "zstd"
@@ -0,0 +1,113 @@
+from asyncio import Queue, QueueFull, Task, create_task, CancelledError
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Awaitable, Dict, Any, Optional, List
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.handlers.sso.constants import (
+    INGEST_WORKERS,
+    INGEST_QUEUE_SIZE,
+    INGEST_PROCESS_WORKERS,
+    INGEST_JOBS_HISTORY
+)
+from src.handlers.sso.enums import JobStatus
+from src.handlers.sso.progress import UploadProgress
+
+
+@dataclass
+class IngestJob:
+    run: Callable[["IngestJob", AsyncSession, ProcessPoolExecutor], Awaitable[Dict[str, Any]]]
+    chat_id: int
+    file_name: str
+    id: str = field(default_factory=lambda: uuid4().hex[:8])
+    status: JobStatus = JobStatus.queued
+    progress: UploadProgress = field(default_factory=UploadProgress)
+    stats: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class IngestionQueue:
+    """
+    Очередь фоновой загрузки файлов. Хендлер только ставит задачу в очередь и сразу отвечает пользователю,
+    а загрузку выполняют workers воркеров, каждый со своей сессией БД. Разбор и валидация JSON
+    выполняются в отдельном пуле процессов
+    """
+
+    def __init__(
+            self,
+            session_factory: async_sessionmaker[AsyncSession],
+            workers: int = INGEST_WORKERS,
+            max_queued: int = INGEST_QUEUE_SIZE,
+            process_workers: int = INGEST_PROCESS_WORKERS
+    ) -> None:
+        self.session_factory: async_sessionmaker[AsyncSession] = session_factory
+        self.workers: int = workers
+        self.process_workers: int = process_workers
+
+        self._queue: Queue[IngestJob] = Queue(maxsize=max_queued)
+        self._jobs: OrderedDict[str, IngestJob] = OrderedDict()
+        self._tasks: List[Task] = []
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+    async def start(self) -> None:
+        self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+        self._tasks = [create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except CancelledError:
+                pass
+        self._tasks = []
+
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    def submit(self, job: IngestJob) -> None:
+        """Ставит задачу в очередь; ValueError - если очередь заполнена"""
+        try:
+            self._queue.put_nowait(job)
+        except QueueFull:
+            raise ValueError("Очередь загрузки заполнена, попробуйте отправить файл позже")
+
+        self._jobs[job.id] = job
+        while len(self._jobs) > INGEST_JOBS_HISTORY:
+            self._jobs.popitem(last=False)
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    async def _worker(self) -> None:
+        while True:
+            job: IngestJob = await self._queue.get()
+            job.status = JobStatus.running
+            job.progress = UploadProgress(total_bytes=job.progress.total_bytes)
+
+            try:
+                async with self.session_factory() as session:
+                    job.stats = await job.run(job, session, self._process_pool)  # type: ignore
+                job.status = JobStatus.done
+
+            except CancelledError:
+                job.status = JobStatus.failed
+                job.error = "Загрузка прервана остановкой бота"
+                raise
+            except Exception as error:
+                job.status = JobStatus.failed
+                job.error = str(error)
+
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.types import String
+
+from src.core.databases.relational.basemeta import BaseMeta
+
+
+class IngestCheckpoints(BaseMeta):
+    __tablename__ = 'ingest_checkpoints'
+
+    upload_key: Mapped[str] = mapped_column(String(128), primary_key=True, comment="Telegram file_unique_id")
+    batches_committed: Mapped[int] = mapped_column(Integer, nullable=False)
+    videos_committed: Mapped[int] = mapped_column(Integer, nullable=False)
+    snapshots_committed: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class IngestLog(BaseMeta):
+    """Успешно загруженные файлы: повторно присланный файл не скачивается и не разбирается заново"""
+    __tablename__ = 'ingest_log'
+    __table_args__ = (
+        Index("ingest_log_content_hash", "content_hash"),
+    )
+
+    file_unique_id: Mapped[str] = mapped_column(String(128), primary_key=True, comment="Telegram file_unique_id")
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False, comment="SHA-256 of the file content")
+    file_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    videos_created: Mapped[int] = mapped_column(Integer, nullable=False)
+    videos_updated: Mapped[int] = mapped_column(Integer, nullable=False)
+    snapshots_created: Mapped[int] = mapped_column(Integer, nullable=False)
+    imported_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
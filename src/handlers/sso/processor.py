@@ -1,9 +1,29 @@
-from typing import List, Set, Dict, Any
+from datetime import datetime, timezone
+from typing import List, Set, Dict, Any, Iterable, AsyncIterable, Optional, Callable, Awaitable
+
+from psycopg import AsyncConnection, IntegrityError as DriverIntegrityError
+from sqlalchemy.dialects.postgresql import insert, Insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, literal_column, select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql.dml import ReturningInsert
 
+from src.handlers.sso.constants import UPLOAD_BATCH_SIZE, UPLOAD_LOADER
+from src.handlers.sso.copy_loader import CopyBulkLoader, VIDEO_UPSERT_COLUMNS
+from src.handlers.sso.enums import UploadLoader, IngestMode
+from src.handlers.sso.models import IngestCheckpoints, IngestLog
+from src.handlers.sso.queries.select import select_existing_video_ids, select_existing_snapshot_ids
+from src.handlers.sso.records import (
+    VIDEO_COLUMNS,
+    SNAPSHOT_COLUMNS,
+    VIDEO_UPDATED_AT,
+    VideoRecord,
+    VideoRow,
+    video_record
+)
 from src.handlers.sso.schemas import UploadJsonSchema
+from src.handlers.sso.utils import aiter_batches
+from src.handlers.videos.cache import analytics_cache
 from src.handlers.videos.models import Videos, VideoSnapshots
 
 
@@ -12,88 +32,311 @@ class UploadRepository:
     @staticmethod
     async def save_upload_data(session: AsyncSession, upload_data: UploadJsonSchema) -> Dict[str, Any]:
         """Сохраняет данные из JSON в базу и возвращает статистику"""
+        return await UploadRepository.save_upload_stream(
+            session=session,
+            videos=(video_record(video=video) for video in upload_data.videos)
+        )
+
+    @staticmethod
+    async def save_upload_stream(
+            session: AsyncSession,
+            videos: Iterable[VideoRecord] | AsyncIterable[VideoRecord],
+            batch_size: int = UPLOAD_BATCH_SIZE,
+            loader: UploadLoader = UPLOAD_LOADER,
+            upload_key: Optional[str] = None,
+            mode: IngestMode = IngestMode.strict,
+            on_batch_committed: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Сохраняет поток видео (строки records.VideoRecord) в базу пачками по batch_size и возвращает статистику.
+        По умолчанию пачки пишутся через COPY; если драйвер сессии его не поддерживает - через ORM.
+
+        В режиме IngestMode.strict файл отклоняется при любом пересечении с базой. В режиме IngestMode.upsert
+        проверки пропускаются: добавляются только новые снапшоты и видео, а счетчики существующих видео
+        обновляются, если в файле более свежий updated_at
+
+        Каждая пачка коммитится отдельно. Если передан upload_key, вместе с пачкой в ingest_checkpoints
+        фиксируется количество прочитанных из файла видео (в режиме upsert - включая обновленные и пропущенные),
+        и повторная отправка того же файла продолжает загрузку с места остановки. После успешной загрузки
+        контрольная точка удаляется
+        """
         stats: Dict[str, Any] = {
             'videos_processed': 0,
             'videos_created': 0,
+            'videos_updated': 0,
             'snapshots_created': 0,
+            'videos_skipped': 0,
             'errors': []
         }
 
-        video_ids: List[str] = [video.id for video in upload_data.videos]
-        snapshot_ids: List[str] = []
+        checkpoint: Optional[IngestCheckpoints] = None
+        if upload_key is not None:
+            checkpoint = await UploadRepository.get_checkpoint(session=session, upload_key=upload_key)
 
-        for video in upload_data.videos:
-            snapshot_ids.extend([snapshot.id for snapshot in video.snapshots])  # noqa
+        batches_committed: int = 0
+        snapshots_committed: int = 0
+        if checkpoint is not None:
+            batches_committed = checkpoint.batches_committed
+            snapshots_committed = checkpoint.snapshots_committed
+            stats['videos_skipped'] = checkpoint.videos_committed
 
         try:
-            existing_videos: Set[str] = await UploadRepository.check_existing_videos(
-                session=session,
-                video_ids=video_ids
-            )
-            existing_snapshots: Set[str] = await UploadRepository.check_existing_snapshots(
-                session=session,
-                snapshot_ids=snapshot_ids
-            )
+            async for batch in aiter_batches(items=videos, batch_size=batch_size, skip=stats['videos_skipped']):
+                # Коммит пачки возвращает соединение в пул: psycopg-соединение берется заново для каждой пачки,
+                # чтобы COPY шел в той же транзакции, что и контрольная точка
+                copy_connection: Optional[AsyncConnection] = None
+                if loader == UploadLoader.copy:
+                    copy_connection = await CopyBulkLoader.get_driver_connection(session=session)
+
+                if mode == IngestMode.upsert:
+                    await UploadRepository._upsert_batch(
+                        session=session,
+                        copy_connection=copy_connection,
+                        batch=batch,
+                        stats=stats
+                    )
+                else:
+                    await UploadRepository._insert_batch(
+                        session=session,
+                        copy_connection=copy_connection,
+                        batch=batch,
+                        stats=stats
+                    )
 
-            if existing_videos:
-                raise ValueError(
-                    f"Видео с ID {', '.join(list(existing_videos)[:5])} уже существуют в базе"
-                )
-            if existing_snapshots:
-                raise ValueError(
-                    f"Снапшоты с ID {', '.join(list(existing_snapshots)[:5])} уже существуют в базе"
-                )
-
-            videos_to_add = []
-            for video_data in upload_data.videos:
-                video: Videos = Videos(  # type: ignore
-                    id=video_data.id,
-                    creator_id=video_data.creator_id,
-                    video_created_at=video_data.video_created_at,
-                    views_count=video_data.views_count,
-                    likes_count=video_data.likes_count,
-                    comments_count=video_data.comments_count,
-                    reports_count=video_data.reports_count,
-                    created_at=video_data.created_at,
-                    updated_at=video_data.updated_at
-                )
-                videos_to_add.append(video)
-                stats['videos_created'] += 1
-
-            session.add_all(videos_to_add)
-            await session.flush()
-
-            snapshots_to_add = []
-            for video_data in upload_data.videos:
-                for snapshot_data in video_data.snapshots:
-                    snapshot: VideoSnapshots = VideoSnapshots(
-                        id=snapshot_data.id,
-                        video_id=snapshot_data.video_id,
-                        views_count=snapshot_data.views_count,
-                        likes_count=snapshot_data.likes_count,
-                        comments_count=snapshot_data.comments_count,
-                        reports_count=snapshot_data.reports_count,
-                        delta_views_count=snapshot_data.delta_views_count,
-                        delta_likes_count=snapshot_data.delta_likes_count,
-                        delta_comments_count=snapshot_data.delta_comments_count,
-                        delta_reports_count=snapshot_data.delta_reports_count,
-                        created_at=snapshot_data.created_at,
-                        updated_at=snapshot_data.updated_at
+                batches_committed += 1
+                if upload_key is not None:
+                    await UploadRepository._save_checkpoint(
+                        session=session,
+                        upload_key=upload_key,
+                        batches_committed=batches_committed,
+                        videos_committed=stats['videos_skipped'] + stats['videos_processed'],
+                        snapshots_committed=snapshots_committed + stats['snapshots_created']
                     )
-                    snapshots_to_add.append(snapshot)
-                    stats['snapshots_created'] += 1
 
-                stats['videos_processed'] += 1
+                await session.commit()
+                session.expunge_all()
+                # Данные изменились - закешированные результаты аналитических запросов устарели
+                analytics_cache.bump()
 
-            session.add_all(snapshots_to_add)
+                if on_batch_committed is not None:
+                    await on_batch_committed(stats)
+
+            if upload_key is not None:
+                await UploadRepository._delete_checkpoint(session=session, upload_key=upload_key)
+                await session.commit()
 
-            await session.commit()
             return stats
 
-        except IntegrityError as e:
+        except (IntegrityError, DriverIntegrityError) as e:
             await session.rollback()
             raise ValueError(f"Ошибка целостности данных: {str(e)}")
 
+    @staticmethod
+    async def get_checkpoint(session: AsyncSession, upload_key: str) -> Optional[IngestCheckpoints]:
+        """Возвращает контрольную точку незавершенной загрузки файла"""
+        return await session.get(IngestCheckpoints, upload_key)
+
+    @staticmethod
+    async def _save_checkpoint(
+            session: AsyncSession,
+            upload_key: str,
+            batches_committed: int,
+            videos_committed: int,
+            snapshots_committed: int
+    ) -> None:
+        """Фиксирует прогресс загрузки в той же транзакции, что и пачка данных"""
+        values: Dict[str, Any] = {
+            'batches_committed': batches_committed,
+            'videos_committed': videos_committed,
+            'snapshots_committed': snapshots_committed,
+            'updated_at': datetime.now(timezone.utc)
+        }
+        await session.execute(
+            statement=insert(IngestCheckpoints)
+            .values(upload_key=upload_key, **values)
+            .on_conflict_do_update(index_elements=[IngestCheckpoints.upload_key], set_=values)
+        )
+
+    @staticmethod
+    async def _delete_checkpoint(session: AsyncSession, upload_key: str) -> None:
+        await session.execute(
+            statement=delete(IngestCheckpoints).where(IngestCheckpoints.upload_key == upload_key)
+        )
+
+    @staticmethod
+    async def find_ingest_log(
+            session: AsyncSession,
+            file_unique_id: Optional[str] = None,
+            content_hash: Optional[str] = None
+    ) -> Optional[IngestLog]:
+        """Ищет успешно загруженный ранее файл по Telegram file_unique_id или по хешу содержимого"""
+        if file_unique_id is not None:
+            entry: Optional[IngestLog] = await session.get(IngestLog, file_unique_id)
+            if entry is not None or content_hash is None:
+                return entry
+
+        return (await session.execute(
+            statement=select(IngestLog)
+            .where(IngestLog.content_hash == content_hash)
+            .order_by(IngestLog.imported_at)
+            .limit(1)
+        )).scalar_one_or_none()
+
+    @staticmethod
+    async def save_ingest_log(
+            session: AsyncSession,
+            file_unique_id: str,
+            content_hash: str,
+            file_name: str,
+            stats: Dict[str, Any],
+            imported_at: Optional[datetime] = None
+    ) -> None:
+        """
+        Записывает успешно загруженный файл. Для копии уже загруженного файла (тот же хеш, другой
+        file_unique_id) передаются статистика и время исходной загрузки
+        """
+        values: Dict[str, Any] = {
+            'content_hash': content_hash,
+            'file_name': file_name[:255],
+            'videos_created': stats['videos_created'],
+            'videos_updated': stats['videos_updated'],
+            'snapshots_created': stats['snapshots_created'],
+            'imported_at': imported_at or datetime.now(timezone.utc)
+        }
+        await session.execute(
+            statement=insert(IngestLog)
+            .values(file_unique_id=file_unique_id, **values)
+            .on_conflict_do_update(index_elements=[IngestLog.file_unique_id], set_=values)
+        )
+        await session.commit()
+
+    @staticmethod
+    async def _insert_batch(
+            session: AsyncSession,
+            copy_connection: Optional[AsyncConnection],
+            batch: List[VideoRecord],
+            stats: Dict[str, Any]
+    ) -> None:
+        """Строгий режим: пачка проверяется на пересечение с базой и записывается целиком"""
+        await UploadRepository._check_batch(session=session, batch=batch)
+
+        if copy_connection is None:
+            await UploadRepository._save_batch_orm(session=session, batch=batch, stats=stats)
+            return
+
+        videos_created, snapshots_created = await CopyBulkLoader.copy_batch(connection=copy_connection, batch=batch)
+        stats['videos_created'] += videos_created
+        stats['snapshots_created'] += snapshots_created
+        stats['videos_processed'] += len(batch)
+
+    @staticmethod
+    async def _upsert_batch(
+            session: AsyncSession,
+            copy_connection: Optional[AsyncConnection],
+            batch: List[VideoRecord],
+            stats: Dict[str, Any]
+    ) -> None:
+        """Режим upsert: пишутся только новые строки, существующие видео обновляются по updated_at"""
+        if copy_connection is None:
+            await UploadRepository._upsert_batch_orm(session=session, batch=batch, stats=stats)
+            return
+
+        videos_created, videos_updated, snapshots_created = await CopyBulkLoader.upsert_batch(
+            connection=copy_connection,
+            batch=batch
+        )
+        stats['videos_created'] += videos_created
+        stats['videos_updated'] += videos_updated
+        stats['snapshots_created'] += snapshots_created
+        stats['videos_processed'] += len(batch)
+
+    @staticmethod
+    async def _upsert_batch_orm(session: AsyncSession, batch: List[VideoRecord], stats: Dict[str, Any]) -> None:
+        """Upsert пачки без COPY: INSERT ... ON CONFLICT через executemany"""
+        video_insert: Insert = insert(Videos.__table__)  # type: ignore
+        video_statement: ReturningInsert = video_insert.on_conflict_do_update(
+            index_elements=[Videos.id],
+            set_={column: video_insert.excluded[column] for column in VIDEO_UPSERT_COLUMNS},
+            where=Videos.updated_at < video_insert.excluded.updated_at
+        ).returning(literal_column("(xmax = 0)"))
+        # Один ON CONFLICT DO UPDATE не может затронуть строку дважды - из дублей оставляется самый свежий
+        latest_videos: Dict[str, VideoRow] = {}
+        for video, _ in batch:
+            latest: Optional[VideoRow] = latest_videos.get(video[0])
+            if latest is None or latest[VIDEO_UPDATED_AT] < video[VIDEO_UPDATED_AT]:
+                latest_videos[video[0]] = video
+
+        result = await session.execute(
+            statement=video_statement,
+            params=[dict(zip(VIDEO_COLUMNS, video)) for video in latest_videos.values()]
+        )
+        inserted_flags: List[bool] = list(result.scalars())
+        videos_created: int = sum(1 for inserted in inserted_flags if inserted)
+
+        snapshot_rows: List[Dict[str, Any]] = [
+            dict(zip(SNAPSHOT_COLUMNS, snapshot))
+            for _, snapshots in batch
+            for snapshot in snapshots
+        ]
+        snapshots_created: int = 0
+        if snapshot_rows:
+            result = await session.execute(
+                statement=insert(VideoSnapshots.__table__).on_conflict_do_nothing(  # type: ignore
+                    index_elements=[VideoSnapshots.id]
+                ).returning(VideoSnapshots.id),
+                params=snapshot_rows
+            )
+            snapshots_created = len(result.all())
+
+        stats['videos_created'] += videos_created
+        stats['videos_updated'] += len(inserted_flags) - videos_created
+        stats['snapshots_created'] += snapshots_created
+        stats['videos_processed'] += len(batch)
+
+    @staticmethod
+    async def _check_batch(session: AsyncSession, batch: List[VideoRecord]) -> None:
+        """Проверяет, что видео и снапшоты пачки еще не загружены в базу"""
+        video_ids: List[str] = [video[0] for video, _ in batch]
+        snapshot_ids: List[str] = []
+
+        for _, snapshots in batch:
+            snapshot_ids.extend([snapshot[0] for snapshot in snapshots])
+
+        existing_videos: Set[str] = await UploadRepository.check_existing_videos(
+            session=session,
+            video_ids=video_ids
+        )
+        existing_snapshots: Set[str] = await UploadRepository.check_existing_snapshots(
+            session=session,
+            snapshot_ids=snapshot_ids
+        )
+
+        if existing_videos:
+            raise ValueError(
+                f"Видео с ID {', '.join(list(existing_videos)[:5])} уже существуют в базе"
+            )
+        if existing_snapshots:
+            raise ValueError(
+                f"Снапшоты с ID {', '.join(list(existing_snapshots)[:5])} уже существуют в базе"
+            )
+
+    @staticmethod
+    async def _save_batch_orm(session: AsyncSession, batch: List[VideoRecord], stats: Dict[str, Any]) -> None:
+        """Записывает пачку в текущую транзакцию через ORM-объекты"""
+        session.add_all([Videos(**dict(zip(VIDEO_COLUMNS, video))) for video, _ in batch])  # type: ignore
+        await session.flush()
+
+        snapshots_to_add: List[VideoSnapshots] = []
+        for _, snapshots in batch:
+            snapshots_to_add.extend(VideoSnapshots(**dict(zip(SNAPSHOT_COLUMNS, snapshot))) for snapshot in snapshots)
+
+        session.add_all(snapshots_to_add)
+        await session.flush()
+
+        stats['videos_created'] += len(batch)
+        stats['snapshots_created'] += len(snapshots_to_add)
+        stats['videos_processed'] += len(batch)
+
     @staticmethod
     async def check_existing_videos(session: AsyncSession, video_ids: List[str]) -> Set[str]:
         """Проверяет, какие видео уже существуют в базе"""
@@ -101,7 +344,7 @@ class UploadRepository:
             return set()
 
         result = await session.execute(
-            statement=select(Videos.id).where(Videos.id.in_(video_ids))
+            statement=select_existing_video_ids(video_ids=video_ids)
         )
         return {row[0] for row in result.fetchall()}
 
@@ -112,6 +355,6 @@ class UploadRepository:
             return set()
 
         result = await session.execute(
-            statement=select(VideoSnapshots.id).where(VideoSnapshots.id.in_(snapshot_ids))
+            statement=select_existing_snapshot_ids(snapshot_ids=snapshot_ids)
         )
         return {row[0] for row in result.fetchall()}
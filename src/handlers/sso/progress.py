@@ -0,0 +1,70 @@
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Dict, Any
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import Message
+
+from src.handlers.sso.constants import PROGRESS_EDIT_INTERVAL_SECONDS
+
+
+@dataclass
+class UploadProgress:
+    """Прогресс загрузки файла: прочитанные байты обновляет читатель файла, строки - репозиторий"""
+    total_bytes: int = 0
+    bytes_read: int = 0
+    rows_committed: int = 0
+    started_at: float = field(default_factory=monotonic)
+
+    @property
+    def percent(self) -> float:
+        if not self.total_bytes:
+            return 0.0
+        return min(100.0, self.bytes_read * 100 / self.total_bytes)
+
+    @property
+    def rows_per_sec(self) -> float:
+        elapsed: float = monotonic() - self.started_at
+        return self.rows_committed / elapsed if elapsed > 0 else 0.0
+
+
+class ProgressMessage:
+    """
+    Редактирует сообщение о ходе загрузки не чаще, чем раз в min_interval секунд,
+    чтобы не упираться в лимиты Telegram на редактирование сообщений
+    """
+
+    def __init__(
+            self,
+            message: Message,
+            progress: UploadProgress,
+            min_interval: float = PROGRESS_EDIT_INTERVAL_SECONDS
+    ) -> None:
+        self.message: Message = message
+        self.progress: UploadProgress = progress
+        self.min_interval: float = min_interval
+        self._next_edit_at: float = 0.0
+
+    async def update(self, stats: Dict[str, Any]) -> None:
+        """Колбэк для UploadRepository.save_upload_stream, вызывается после коммита каждой пачки"""
+        # Обработанные видео, а не только созданные: в режиме upsert существующие видео обновляются или пропускаются
+        self.progress.rows_committed = stats['videos_processed'] + stats['snapshots_created']
+
+        now: float = monotonic()
+        if now < self._next_edit_at:
+            return
+        self._next_edit_at = now + self.min_interval
+
+        try:
+            await self.message.edit_text(
+                "🔄 Загрузка в базу данных...\n\n"
+                f"• Прочитано: {self.progress.percent:.1f}%\n"
+                f"• Видео: {stats['videos_processed']}\n"
+                f"• Снапшотов: {stats['snapshots_created']}\n"
+                f"• Скорость: {self.progress.rows_per_sec:.0f} строк/сек"
+            )
+        except TelegramRetryAfter as error:
+            self._next_edit_at = monotonic() + error.retry_after
+        except TelegramBadRequest:
+            # Например, "message is not modified" - прогресс не критичен для загрузки
+            pass
@@ -0,0 +1,26 @@
+from typing import List
+
+from sqlalchemy import select, func, bindparam, String, Executable, TableValuedAlias
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from src.handlers.videos.models import Videos, VideoSnapshots
+
+
+def _unnest_ids(ids: List[str]) -> TableValuedAlias:
+    """
+    Передает все ID одним параметром-массивом и разворачивает его на стороне БД.
+    В отличие от IN (...), размер запроса и число bind-параметров не зависят от количества ID
+    """
+    return func.unnest(bindparam("ids", value=ids, type_=ARRAY(String))).table_valued("id").alias("incoming")
+
+
+def select_existing_video_ids(video_ids: List[str]) -> Executable:
+    """Запрос ID видео из списка, которые уже есть в базе"""
+    incoming: TableValuedAlias = _unnest_ids(ids=video_ids)
+    return select(Videos.id).join(incoming, Videos.id == incoming.c.id)
+
+
+def select_existing_snapshot_ids(snapshot_ids: List[str]) -> Executable:
+    """Запрос ID снапшотов из списка, которые уже есть в базе"""
+    incoming: TableValuedAlias = _unnest_ids(ids=snapshot_ids)
+    return select(VideoSnapshots.id).join(incoming, VideoSnapshots.id == incoming.c.id)
@@ -0,0 +1,72 @@
+from typing import Tuple, Any, List
+
+from src.handlers.sso.schemas import VideoSchema, VideoSnapshotSchema
+
+VIDEO_COLUMNS: Tuple[str, ...] = (
+    "id",
+    "creator_id",
+    "video_created_at",
+    "views_count",
+    "likes_count",
+    "comments_count",
+    "reports_count",
+    "created_at",
+    "updated_at",
+)
+SNAPSHOT_COLUMNS: Tuple[str, ...] = (
+    "id",
+    "video_id",
+    "views_count",
+    "likes_count",
+    "comments_count",
+    "reports_count",
+    "delta_views_count",
+    "delta_likes_count",
+    "delta_comments_count",
+    "delta_reports_count",
+    "created_at",
+    "updated_at",
+)
+
+# Строки таблиц в порядке VIDEO_COLUMNS / SNAPSHOT_COLUMNS: готовы для COPY и executemany
+VideoRow = Tuple[Any, ...]
+SnapshotRow = Tuple[Any, ...]
+# Провалидированное видео вместе со снапшотами - единица потока загрузки
+VideoRecord = Tuple[VideoRow, List[SnapshotRow]]
+
+VIDEO_UPDATED_AT: int = VIDEO_COLUMNS.index("updated_at")
+
+
+def video_row(video: VideoSchema) -> VideoRow:
+    return (
+        video.id,
+        video.creator_id,
+        video.video_created_at,
+        video.views_count,
+        video.likes_count,
+        video.comments_count,
+        video.reports_count,
+        video.created_at,
+        video.updated_at,
+    )
+
+
+def snapshot_row(snapshot: VideoSnapshotSchema) -> SnapshotRow:
+    return (
+        snapshot.id,
+        snapshot.video_id,
+        snapshot.views_count,
+        snapshot.likes_count,
+        snapshot.comments_count,
+        snapshot.reports_count,
+        snapshot.delta_views_count,
+        snapshot.delta_likes_count,
+        snapshot.delta_comments_count,
+        snapshot.delta_reports_count,
+        snapshot.created_at,
+        snapshot.updated_at,
+    )
+
+
+def video_record(video: VideoSchema) -> VideoRecord:
+    return video_row(video=video), [snapshot_row(snapshot=snapshot) for snapshot in video.snapshots]
@@ -1,83 +1,355 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 from tempfile import NamedTemporaryFile
-from typing import Dict, Any
+from typing import Dict, Any, Optional, AsyncIterator, Tuple
 
 from aiogram import Router, F
-from aiogram.types import Message
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message, Document
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.llms.scheduler import LLMScheduler
+from src.handlers.sso.constants import (
+    MAX_FILE_SIZE_MB,
+    UPSERT_CAPTION,
+    FORCE_CAPTION,
+    DOWNLOAD_MODE,
+    UPLOAD_FORMATS
+)
+from src.handlers.sso.downloader import TelegramFileStream
+from src.handlers.sso.enums import IngestMode, DownloadMode, JobStatus, DocumentFormat, Compression
+from src.handlers.sso.jobs import IngestJob, IngestionQueue
+from src.handlers.sso.models import IngestLog
 from src.handlers.sso.processor import UploadRepository
-from src.handlers.sso.schemas import UploadJsonSchema
-from src.handlers.sso.utils import FileValidator
+from src.handlers.sso.progress import UploadProgress, ProgressMessage
+from src.handlers.sso.utils import FileValidator, ContentHasher
+from src.handlers.videos.cache import analytics_cache
 
 router: Router = Router(name="upload")
 
+JOB_STATUS_TITLES: Dict[JobStatus, str] = {
+    JobStatus.queued: "🕓 в очереди",
+    JobStatus.running: "🔄 загружается",
+    JobStatus.done: "✅ загружена",
+    JobStatus.failed: "❌ завершилась с ошибкой"
+}
+
 
 @router.message(F.document & ~F.command)
 async def handle_document(
         message: Message,
+        ingest_queue: IngestionQueue,
         db_session: AsyncSession
 ):
-    """Обработчик json-документов"""
+    """
+    Обработчик json-документов: проверяет файл и ставит его загрузку в фоновую очередь.
+    Уже загруженный ранее файл не скачивается: сразу отправляется статистика исходной загрузки
+    """
     document = message.document
 
-    if not document or not document.file_name or not document.file_name.lower().endswith('.json'):
+    upload_format: Optional[Tuple[DocumentFormat, Compression]] = None
+    if document and document.file_name:
+        upload_format = FileValidator.detect_format(file_name=document.file_name)
+
+    if not document or not document.file_name or upload_format is None:
         await message.answer(
-            "❌ Я поддерживаю только JSON-файлы для анализа данных.\n"
+            "❌ Я поддерживаю только JSON-файлы для анализа данных: "
+            f"{', '.join(UPLOAD_FORMATS)}.\n"
             "Используйте команду /uploadjson для загрузки данных."
         )
         return
 
+    if document.file_size and document.file_size > MAX_FILE_SIZE_MB * 1024 * 1024:
+        await message.answer(f"❌ Файл слишком большой. Максимальный размер: {MAX_FILE_SIZE_MB}MB")
+        return
+
+    deduplicate: bool = FORCE_CAPTION not in (message.caption or "").lower()
+    if deduplicate:
+        entry: Optional[IngestLog] = await UploadRepository.find_ingest_log(
+            session=db_session,
+            file_unique_id=document.file_unique_id
+        )
+        if entry is not None:
+            await message.answer(_duplicate_report(entry=entry))
+            return
+
     processing_msg = await message.answer("🔄 Начинаю обработку файла...")
 
+    job: IngestJob = IngestJob(
+        run=partial(
+            _ingest_document,
+            message=message,
+            processing_msg=processing_msg,
+            document_format=upload_format[0],
+            compression=upload_format[1],
+            deduplicate=deduplicate
+        ),
+        chat_id=message.chat.id,
+        file_name=document.file_name,
+        progress=UploadProgress(total_bytes=document.file_size or 0)
+    )
+    try:
+        ingest_queue.submit(job=job)
+    except ValueError as error:
+        await processing_msg.edit_text(f"❌ {error}")
+        return
+
+    await processing_msg.edit_text(
+        f"🕓 Файл поставлен в очередь загрузки (впереди: {ingest_queue.queued - 1}).\n"
+        f"ID задачи: {job.id}, статус: /status {job.id}"
+    )
+
+
+@router.message(Command("status"))
+async def handle_job_status(
+        message: Message,
+        command: CommandObject,
+        ingest_queue: IngestionQueue,
+        llm_scheduler: LLMScheduler
+):
+    """Статус фоновой загрузки файла по ID задачи; без ID - очередь загрузок, запросов к LLM и кеш аналитики"""
+    job_id: str = (command.args or "").strip()
+    if not job_id:
+        await message.answer(_service_status(ingest_queue=ingest_queue, llm_scheduler=llm_scheduler))
+        return
+
+    job: Optional[IngestJob] = ingest_queue.get(job_id=job_id)
+    if job is None or job.chat_id != message.chat.id:
+        await message.answer("❌ Задача не найдена. Использование: /status <ID задачи>")
+        return
+
+    report: str = f"📄 {job.file_name}\nЗадача {job.id}: {JOB_STATUS_TITLES[job.status]}"
+    if job.status == JobStatus.running:
+        report += f"\n• Прочитано: {job.progress.percent:.1f}%"
+        report += f"\n• Скорость: {job.progress.rows_per_sec:.0f} строк/сек"
+    if job.stats:
+        report += f"\n• Видео: {job.stats['videos_created']} создано, {job.stats['videos_updated']} обновлено"
+        report += f"\n• Снапшотов: {job.stats['snapshots_created']} создано"
+    if job.error:
+        report += f"\n❌ {job.error[:1000]}"
+
+    await message.answer(report)
+
+
+async def _ingest_document(
+        job: IngestJob,
+        session: AsyncSession,
+        executor: ProcessPoolExecutor,
+        message: Message,
+        processing_msg: Message,
+        document_format: DocumentFormat,
+        compression: Compression,
+        deduplicate: bool = True
+) -> Dict[str, Any]:
+    """
+    Загрузка файла в БД, выполняется воркером IngestionQueue. После успешной загрузки файл
+    записывается в ingest_log по file_unique_id и хешу содержимого. С deduplicate=True повторно
+    присланный файл не загружается: по file_unique_id он отсекается до скачивания, а по хешу
+    содержимого (копия того же файла) - до разбора, если файл скачивается во временный файл
+    """
+    document: Document = message.document  # type: ignore
+    progress: UploadProgress = job.progress
+    hasher: ContentHasher = ContentHasher()
+
+    if deduplicate:
+        # Тот же файл мог встать в очередь повторно, пока загружался первый
+        duplicate_stats: Optional[Dict[str, Any]] = await _reply_if_duplicate(
+            session=session,
+            document=document,
+            processing_msg=processing_msg
+        )
+        if duplicate_stats is not None:
+            return duplicate_stats
+
+    tmp_path: Optional[str] = None
     try:
         file_info = await message.bot.get_file(document.file_id)  # type: ignore
-        downloaded_file = await message.bot.download_file(file_info.file_path)  # type: ignore
-
-        with NamedTemporaryFile(mode='wb', suffix='.json', delete=False) as tmp:
-            tmp.write(downloaded_file.read())  # type: ignore
-            tmp_path = tmp.name
-
-        try:
-            json_data: Dict[str, Any] = FileValidator.validate_json_file(file_path=tmp_path)
-            upload_data = UploadJsonSchema.model_validate(json_data)
-
-            await processing_msg.edit_text(
-                f"📊 Найдено {len(upload_data.videos)} видео и "
-                f"{sum(len(v.snapshots) for v in upload_data.videos)} снапшотов\n"
-                "🔄 Начинаю загрузку в базу данных..."
-            )
-
-            stats: Dict[str, Any] = await UploadRepository.save_upload_data(
-                session=db_session,
-                upload_data=upload_data
-            )
-            report: str = (
-                "✅ Данные успешно загружены!\n\n"
-                f"📊 Статистика:\n"
-                f"• Видео: {stats['videos_created']} создано\n"
-                f"• Снапшотов: {stats['snapshots_created']} создано\n\n"
-            )
-
-            await processing_msg.edit_text(report)
-
-        except ValueError as error:
-            error_text = str(error)
-            if len(error_text) > 1000:
-                error_text = error_text[:1000] + "..."
-            await processing_msg.edit_text(f"❌ Ошибка валидации: {error_text}")
-
-        except Exception as error:
-            error_text = str(error)
-            if len(error_text) > 1000:
-                error_text = error_text[:1000] + "..."
-            await processing_msg.edit_text(f"❌ Ошибка при обработке: {error_text}")
-
-        finally:
-            Path(tmp_path).unlink(missing_ok=True)
+
+        chunks: AsyncIterator[bytes]
+        if DOWNLOAD_MODE == DownloadMode.temp_file:
+            with NamedTemporaryFile(mode='wb', delete=False) as tmp:
+                tmp_path = tmp.name
+                await message.bot.download_file(file_info.file_path, destination=tmp)  # type: ignore
+
+            if deduplicate:
+                duplicate_stats = await _reply_if_duplicate(
+                    session=session,
+                    document=document,
+                    processing_msg=processing_msg,
+                    content_hash=await ContentHasher.hash_file(file_path=tmp_path)
+                )
+                if duplicate_stats is not None:
+                    Path(tmp_path).unlink(missing_ok=True)
+                    return duplicate_stats
+
+            chunks = FileValidator.aread_file(file_path=tmp_path)
+        else:
+            chunks = TelegramFileStream.iter_chunks(bot=message.bot, file_path=file_info.file_path)  # type: ignore
 
     except Exception as e:
-        error_text = str(e)
-        if len(error_text) > 1000:
-            error_text = error_text[:1000] + "..."
+        if tmp_path is not None:
+            Path(tmp_path).unlink(missing_ok=True)
+
+        error_text = _error_text(error=e)
         await processing_msg.edit_text(f"❌ Ошибка при скачивании файла: {error_text}")
+        raise
+
+    try:
+        await processing_msg.edit_text(f"🔄 Задача {job.id}: начинаю потоковую загрузку в базу данных...")
+
+        progress_message: ProgressMessage = ProgressMessage(message=processing_msg, progress=progress)
+
+        async def on_batch_committed(batch_stats: Dict[str, Any]) -> None:
+            # Копия: статистика после коммита, следующая пачка может не закоммититься
+            job.stats = dict(batch_stats)
+            await progress_message.update(stats=batch_stats)
+
+        stats: Dict[str, Any] = await UploadRepository.save_upload_stream(
+            session=session,
+            videos=FileValidator.aiter_videos(
+                chunks=hasher.wrap(chunks=chunks),
+                progress=progress,
+                executor=executor,
+                document_format=document_format,
+                compression=compression
+            ),
+            upload_key=document.file_unique_id,
+            mode=IngestMode.upsert if UPSERT_CAPTION in (message.caption or "").lower() else IngestMode.strict,
+            on_batch_committed=on_batch_committed
+        )
+        await UploadRepository.save_ingest_log(
+            session=session,
+            file_unique_id=document.file_unique_id,
+            content_hash=hasher.hexdigest(),
+            file_name=document.file_name or "",
+            stats=stats
+        )
+        report: str = (
+            "✅ Данные успешно загружены!\n\n"
+            f"📊 Статистика:\n"
+            f"• Видео: {stats['videos_created']} создано, {stats['videos_updated']} обновлено\n"
+            f"• Снапшотов: {stats['snapshots_created']} создано\n"
+            f"• Скорость: {progress.rows_per_sec:.0f} строк/сек\n\n"
+        )
+        if stats['videos_skipped']:
+            report += f"♻️ Загрузка продолжена с места остановки, пропущено видео: {stats['videos_skipped']}\n"
+
+        await processing_msg.edit_text(report)
+        return stats
+
+    except ValueError as error:
+        error_text = _error_text(error=error)
+        await processing_msg.edit_text(f"❌ Ошибка валидации: {error_text}" + _committed_note(stats=job.stats))
+        raise
+
+    except Exception as error:
+        error_text = _error_text(error=error)
+        await processing_msg.edit_text(
+            f"❌ Ошибка при обработке: {error_text}\n\n"
+            "ℹ️ Уже загруженные пачки сохранены: повторная отправка этого же файла продолжит загрузку"
+        )
+        raise
+
+    finally:
+        if tmp_path is not None:
+            Path(tmp_path).unlink(missing_ok=True)
+
+
+async def _reply_if_duplicate(
+        session: AsyncSession,
+        document: Document,
+        processing_msg: Message,
+        content_hash: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Если файл уже загружен (тот же file_unique_id или хеш содержимого), отвечает статистикой исходной
+    загрузки и возвращает ее. Копия с другим file_unique_id тоже записывается в ingest_log -
+    в следующий раз она отсечется еще до скачивания
+    """
+    entry: Optional[IngestLog] = await UploadRepository.find_ingest_log(
+        session=session,
+        file_unique_id=document.file_unique_id,
+        content_hash=content_hash
+    )
+    if entry is None:
+        return None
+
+    stats: Dict[str, Any] = _ingest_log_stats(entry=entry)
+    if entry.file_unique_id != document.file_unique_id:
+        await UploadRepository.save_ingest_log(
+            session=session,
+            file_unique_id=document.file_unique_id,
+            content_hash=entry.content_hash,
+            file_name=document.file_name or entry.file_name,
+            stats=stats,
+            imported_at=entry.imported_at
+        )
+
+    await processing_msg.edit_text(_duplicate_report(entry=entry))
+    return stats
+
+
+def _service_status(ingest_queue: IngestionQueue, llm_scheduler: LLMScheduler) -> str:
+    metrics: Dict[str, Any] = llm_scheduler.metrics()
+    cache_metrics: Dict[str, Any] = analytics_cache.metrics()
+    return (
+        f"📥 Загрузок в очереди: {ingest_queue.queued}\n\n"
+        f"🤖 Запросы к LLM:\n"
+        f"• В очереди: {metrics['queue_depth']}\n"
+        f"• Всего: {metrics['requests']}, повторов: {metrics['retries']}, ошибок: {metrics['failures']}\n"
+        f"• Истек срок: {metrics['deadline_exceeded']}\n"
+        f"• Ожидание в очереди: {metrics['mean_wait_seconds']} сек в среднем, {metrics['max_wait_seconds']} сек макс.\n\n"
+        f"🗄 Кеш аналитики:\n"
+        f"• Версия данных: {cache_metrics['version']}, записей: {cache_metrics['size']}\n"
+        f"• Попаданий: {cache_metrics['hits']}, промахов: {cache_metrics['misses']} "
+        f"(доля попаданий {cache_metrics['hit_rate']})\n\n"
+        f"ℹ️ Статус загрузки файла: /status <ID задачи>"
+    )
+
+
+def _committed_note(stats: Optional[Dict[str, Any]]) -> str:
+    """
+    Что делать после ошибки в данных, если часть пачек уже закоммичена. Повторная отправка того же файла
+    продолжит загрузку с контрольной точки и остановится на той же ошибке, а исправленный файл в строгом
+    режиме отклонится уже на первой пачке - ее видео теперь есть в базе
+    """
+    if not stats:
+        return ""
+
+    committed: int = stats['videos_skipped'] + stats['videos_processed']
+    return (
+        f"\n\nℹ️ До ошибки сохранено видео: {committed}. Повторная отправка этого же файла остановится "
+        f"на той же ошибке. Исправьте файл и отправьте его с подписью {UPSERT_CAPTION}: уже загруженные "
+        f"видео обновятся, а не будут отклонены как дубликаты"
+    )
+
+
+def _error_text(error: Exception, limit: int = 1000) -> str:
+    """Текст ошибки, обрезанный под сообщение Telegram"""
+    error_text: str = str(error)
+    if len(error_text) > limit:
+        error_text = error_text[:limit] + "..."
+    return error_text
+
+
+def _ingest_log_stats(entry: IngestLog) -> Dict[str, Any]:
+    """Статистика исходной загрузки в формате UploadRepository.save_upload_stream"""
+    return {
+        'videos_processed': 0,
+        'videos_created': entry.videos_created,
+        'videos_updated': entry.videos_updated,
+        'snapshots_created': entry.snapshots_created,
+        'videos_skipped': 0,
+        'errors': []
+    }
+
+
+def _duplicate_report(entry: IngestLog) -> str:
+    return (
+        f"♻️ Этот файл уже загружен {entry.imported_at:%d.%m.%Y %H:%M} UTC, повторная загрузка не нужна.\n\n"
+        f"📊 Статистика исходной загрузки:\n"
+        f"• Видео: {entry.videos_created} создано, {entry.videos_updated} обновлено\n"
+        f"• Снапшотов: {entry.snapshots_created} создано\n\n"
+        f"ℹ️ Чтобы загрузить файл заново, отправьте его с подписью «{FORCE_CAPTION}»"
+    )
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import List
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class VideoSnapshotSchema(BaseModel):
@@ -37,6 +37,16 @@ class VideoSchema(BaseModel):
             raise ValueError('creator_id must be exactly 32 characters')
         return v
 
+    @model_validator(mode="after")
+    def validate_snapshots_video_id(self) -> "VideoSchema":
+        for index, snapshot in enumerate(self.snapshots):
+            if snapshot.video_id != self.id:
+                raise ValueError(
+                    f'snapshots[{index}].video_id: snapshot {snapshot.id} belongs to video {snapshot.video_id}, '
+                    f'not {self.id}'
+                )
+        return self
+
 
 class UploadJsonSchema(BaseModel):
     videos: List[VideoSchema] = Field(..., description="List of videos with snapshots")
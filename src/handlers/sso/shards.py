@@ -0,0 +1,79 @@
+from asyncio import Future, get_running_loop
+from collections import deque
+from concurrent.futures import Executor
+from typing import Deque, List, AsyncIterator, Callable
+
+from src.handlers.sso.constants import VALIDATION_MODE, INGEST_SHARD_SIZE, INGEST_SHARDS_IN_FLIGHT
+from src.handlers.sso.enums import ValidationMode
+from src.handlers.sso.records import VideoRecord
+
+# (исходные JSON-тексты видео, позиция первого видео в файле, режим валидации) -> строки для записи в БД
+ShardValidator = Callable[[List[str], int, ValidationMode], List[VideoRecord]]
+
+
+class ShardPipeline:
+    """
+    Упорядоченный конвейер валидации в пуле процессов. Исходные JSON-тексты видео копятся в шарды
+    по shard_size символов, одновременно в пуле выполняется до max_in_flight шардов, поэтому
+    пока основной процесс ищет границы следующих видео и пишет в БД готовые, остальные ядра валидируют.
+    Результаты отдаются в порядке файла. validator выполняется в пуле, поэтому должен быть picklable
+    """
+
+    def __init__(
+            self,
+            executor: Executor,
+            validator: ShardValidator,
+            validation: ValidationMode = VALIDATION_MODE,
+            shard_size: int = INGEST_SHARD_SIZE,
+            max_in_flight: int = INGEST_SHARDS_IN_FLIGHT
+    ) -> None:
+        self.executor: Executor = executor
+        self.validator: ShardValidator = validator
+        self.validation: ValidationMode = validation
+        self.shard_size: int = shard_size
+        self.max_in_flight: int = max_in_flight
+
+        self._pending: Deque[Future[List[VideoRecord]]] = deque()
+        self._shard: List[str] = []
+        self._shard_chars: int = 0
+        self._items_submitted: int = 0
+
+    def add(self, raw_items: List[str]) -> None:
+        """Добавляет видео в текущий шард и отправляет его в пул, когда он наберет shard_size символов"""
+        self._shard.extend(raw_items)
+        self._shard_chars += sum(map(len, raw_items))
+        if self._shard_chars >= self.shard_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Отправляет в пул недобранный шард"""
+        if not self._shard:
+            return
+
+        self._pending.append(get_running_loop().run_in_executor(
+            self.executor,
+            self.validator,
+            self._shard,
+            self._items_submitted,
+            self.validation
+        ))
+        self._items_submitted += len(self._shard)
+        self._shard = []
+        self._shard_chars = 0
+
+    async def completed(self, wait_all: bool = False) -> AsyncIterator[List[VideoRecord]]:
+        """
+        Отдает результаты шардов по порядку: уже готовые, а также самые старые, если в пуле больше
+        max_in_flight шардов. С wait_all=True дожидается всех отправленных шардов
+        """
+        while self._pending and (
+                wait_all or len(self._pending) > self.max_in_flight or self._pending[0].done()
+        ):
+            yield await self._pending.popleft()
+
+    def cancel(self) -> None:
+        """Отменяет еще не начатые шарды, например если загрузка прервалась ошибкой"""
+        while self._pending:
+            self._pending.popleft().cancel()
+        self._shard = []
+        self._shard_chars = 0
@@ -0,0 +1,435 @@
+from codecs import getincrementaldecoder, IncrementalDecoder
+from collections import deque
+from enum import IntEnum
+from json import loads as jsonloads, JSONDecodeError, JSONDecoder
+from re import compile as re_compile, Pattern
+from typing import List, Any, Optional, Tuple, Deque
+
+import numpy as np
+
+_WHITESPACE: str = " \t\n\r"
+_CONTAINER_TOKENS: Pattern = re_compile(r'["{}\[\]]')
+_STRING_TOKENS: Pattern = re_compile(r'["\\]')
+_SCALAR_END: Pattern = re_compile(r'[\s,}\]]')
+_DECODER: JSONDecoder = JSONDecoder()
+
+_QUOTE: int = ord('"')
+_BACKSLASH: int = ord("\\")
+_OPEN_BRACE: int = ord("{")
+_CLOSE_BRACE: int = ord("}")
+
+
+class _ParserState(IntEnum):
+    ROOT_START = 0
+    ROOT_FIRST_KEY = 1
+    ROOT_KEY = 2
+    ROOT_COLON = 3
+    ROOT_VALUE = 4
+    ROOT_NEXT = 5
+    ARRAY_FIRST_ITEM = 6
+    ARRAY_ITEM = 7
+    ARRAY_NEXT = 8
+    DONE = 9
+
+
+class _ValueScanner:
+    """
+    Ищет границу одного JSON-значения в буфере. Состояние сохраняется между вызовами, поэтому
+    значение, пришедшее несколькими чанками, не сканируется повторно с начала
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.position: int = 0
+        self.depth: int = 0
+        self.in_string: bool = False
+        self.started: bool = False
+
+    def scan(self, buffer: str, start: int) -> Optional[int]:
+        """Возвращает индекс за концом значения, начинающегося в start, или None, если данных пока недостаточно"""
+        if not self.started:
+            self.started = True
+            self.position = start
+            first: str = buffer[start]
+
+            if first not in '{["':
+                match = _SCALAR_END.search(buffer, start)
+                if not match:
+                    self.started = False
+                    return None
+                return match.start()
+
+            self.position = start + 1
+            if first == '"':
+                self.in_string = True
+            else:
+                self.depth = 1
+
+        while True:
+            if self.in_string:
+                if not self._skip_string(buffer=buffer):
+                    return None
+                if self.depth == 0:
+                    return self.position
+                continue
+
+            match = _CONTAINER_TOKENS.search(buffer, self.position)
+            if not match:
+                self.position = len(buffer)
+                return None
+
+            token: str = match.group()
+            self.position = match.end()
+            if token == '"':
+                self.in_string = True
+            elif token in "{[":
+                self.depth += 1
+            else:
+                self.depth -= 1
+                if self.depth == 0:
+                    return self.position
+
+    def _skip_string(self, buffer: str) -> bool:
+        """Сдвигает позицию за закрывающую кавычку строки; False - если строка еще не пришла целиком"""
+        while True:
+            match = _STRING_TOKENS.search(buffer, self.position)
+            if not match:
+                self.position = len(buffer)
+                return False
+
+            if match.group() == '\\':
+                if match.end() >= len(buffer):
+                    self.position = match.start()
+                    return False
+                self.position = match.end() + 1
+                continue
+
+            self.in_string = False
+            self.position = match.end()
+            return True
+
+
+class VideosStreamParser:
+    """
+    Инкрементальный (событийный) парсер JSON-документа вида {"videos": [...]}.
+    Данные подаются чанками через feed(), парсер возвращает элементы массива 'videos' по мере их готовности.
+    В памяти одновременно находится только текущий незавершенный элемент, а не весь документ.
+    С raw_items=True элементы возвращаются исходным JSON-текстом - его дешево передать в другой процесс
+    """
+
+    def __init__(self, key: str = "videos", raw_items: bool = False) -> None:
+        self.key: str = key
+        self.raw_items: bool = raw_items
+        self.items_parsed: int = 0
+        self.key_found: bool = False
+
+        self._buffer: str = ""
+        self._decoder: IncrementalDecoder = getincrementaldecoder("utf-8")()
+        self._state: _ParserState = _ParserState.ROOT_START
+        self._current_key: Optional[str] = None
+        self._scanner: _ValueScanner = _ValueScanner()
+        # Границы уже найденных в буфере объектов для raw_items, см. _object_spans()
+        self._spans: Deque[Tuple[int, int]] = deque()
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Принимает очередной чанк текста и возвращает полностью разобранные элементы массива"""
+        self._buffer += chunk
+        items: List[Any] = []
+
+        position: int = self._parse(items=items)
+        self._spans.clear()
+        if position:
+            self._buffer = self._buffer[position:]
+            if self._scanner.started:
+                self._scanner.position -= position
+
+        return items
+
+    def feed_bytes(self, chunk: bytes) -> List[Any]:
+        """То же, что feed(), но для байтов в UTF-8; символ, разрезанный границей чанка, дочитывается со следующим"""
+        try:
+            return self.feed(self._decoder.decode(chunk))
+        except UnicodeDecodeError as e:
+            raise ValueError(f"Ошибка кодировки файла: {str(e)}")
+
+    def close(self) -> List[Any]:
+        """Проверяет, что документ завершен корректно; возвращает элементы, оставшиеся в буфере"""
+        try:
+            items: List[Any] = self.feed(self._decoder.decode(b"", final=True))
+        except UnicodeDecodeError as e:
+            raise ValueError(f"Ошибка кодировки файла: {str(e)}")
+
+        if self._buffer.strip(_WHITESPACE) and self._state == _ParserState.DONE:
+            raise ValueError("Некорректный JSON в файле: лишние данные после корневого объекта")
+        if self._state == _ParserState.ROOT_START:
+            raise ValueError("Некорректный JSON в файле: файл пуст")
+        if self._state != _ParserState.DONE:
+            raise ValueError("Некорректный JSON в файле: неожиданный конец файла")
+        if not self.key_found:
+            raise ValueError(f"Отсутствует обязательный ключ '{self.key}' в JSON")
+        return items
+
+    def _parse(self, items: List[Any]) -> int:
+        """Продвигает автомат по буферу и возвращает позицию, до которой буфер можно отбросить"""
+        buffer: str = self._buffer
+        position: int = 0
+        length: int = len(buffer)
+
+        while True:
+            if self._state == _ParserState.DONE:
+                if buffer[position:].strip(_WHITESPACE):
+                    raise ValueError("Некорректный JSON в файле: лишние данные после корневого объекта")
+                return length
+
+            while position < length and buffer[position] in _WHITESPACE:
+                position += 1
+            if position >= length:
+                return position
+
+            if self._state in (_ParserState.ARRAY_FIRST_ITEM, _ParserState.ARRAY_ITEM, _ParserState.ARRAY_NEXT):
+                next_position: Optional[int] = self._parse_array(buffer=buffer, position=position, items=items)
+            else:
+                next_position = self._parse_root(buffer=buffer, position=position)
+
+            if next_position is None:
+                return position
+            position = next_position
+
+    def _parse_root(self, buffer: str, position: int) -> Optional[int]:
+        """Обрабатывает токен корневого объекта; None - если значение еще не пришло целиком"""
+        char: str = buffer[position]
+
+        if self._state == _ParserState.ROOT_START:
+            if char != "{":
+                raise ValueError("Корневой элемент JSON должен быть объектом")
+            self._state = _ParserState.ROOT_FIRST_KEY
+            return position + 1
+
+        if self._state in (_ParserState.ROOT_FIRST_KEY, _ParserState.ROOT_KEY):
+            return self._parse_root_key(buffer=buffer, position=position)
+
+        if self._state == _ParserState.ROOT_COLON:
+            if char != ":":
+                raise ValueError("Некорректный JSON в файле: ожидалось ':' после ключа")
+            self._state = _ParserState.ROOT_VALUE
+            return position + 1
+
+        if self._state == _ParserState.ROOT_VALUE:
+            return self._parse_root_value(buffer=buffer, position=position)
+
+        self._current_key = None
+        if char == ",":
+            self._state = _ParserState.ROOT_KEY
+        elif char == "}":
+            self._state = _ParserState.DONE
+        else:
+            raise ValueError("Некорректный JSON в файле: ожидалось ',' или '}'")
+        return position + 1
+
+    def _parse_root_key(self, buffer: str, position: int) -> Optional[int]:
+        char: str = buffer[position]
+        if char == "}" and self._state == _ParserState.ROOT_FIRST_KEY:
+            self._state = _ParserState.DONE
+            return position + 1
+        if char != '"':
+            raise ValueError(f"Некорректный JSON в файле: ожидался ключ объекта, получено '{char}'")
+
+        value: Optional[Tuple[Any, int]] = self._read_value(buffer=buffer, start=position)
+        if value is None:
+            return None
+        self._current_key, position = value
+        self._state = _ParserState.ROOT_COLON
+        return position
+
+    def _parse_root_value(self, buffer: str, position: int) -> Optional[int]:
+        if self._current_key == self.key:
+            if buffer[position] != "[":
+                raise ValueError(f"'{self.key}' должен быть списком")
+            self.key_found = True
+            self._state = _ParserState.ARRAY_FIRST_ITEM
+            return position + 1
+
+        # Прочие ключи корневого объекта пропускаются
+        value: Optional[Tuple[Any, int]] = self._read_value(buffer=buffer, start=position)
+        if value is None:
+            return None
+        self._state = _ParserState.ROOT_NEXT
+        return value[1]
+
+    def _parse_array(self, buffer: str, position: int, items: List[Any]) -> Optional[int]:
+        """Обрабатывает токен массива 'videos'; None - если элемент еще не пришел целиком"""
+        char: str = buffer[position]
+
+        if char == "]" and self._state != _ParserState.ARRAY_ITEM:
+            self._state = _ParserState.ROOT_NEXT
+            self._spans.clear()
+            return position + 1
+
+        if self._state == _ParserState.ARRAY_NEXT:
+            if char != ",":
+                raise ValueError(f"Некорректный JSON в файле: ожидалось ',' или ']' в '{self.key}'")
+            self._state = _ParserState.ARRAY_ITEM
+            return position + 1
+
+        if self.raw_items and char == "{":
+            return self._read_raw_object(buffer=buffer, position=position, items=items)
+
+        value: Optional[Tuple[Any, int]] = self._read_value(buffer=buffer, start=position)
+        if value is None:
+            return None
+
+        item, end = value
+        if not isinstance(item, dict):
+            raise ValueError(f"Элемент {self.key}[{self.items_parsed}] должен быть объектом")
+
+        items.append(buffer[position:end] if self.raw_items else item)
+        self.items_parsed += 1
+        self._state = _ParserState.ARRAY_NEXT
+        return end
+
+    def _read_raw_object(self, buffer: str, position: int, items: List[Any]) -> Optional[int]:
+        """
+        Отдает объект исходным текстом без декодирования: границы всех пришедших целиком объектов
+        находятся одним векторным проходом по буферу, корректность JSON внутри объекта проверит валидатор
+        """
+        if not self._spans:
+            self._spans.extend(_object_spans(buffer=buffer, start=position))
+            if not self._spans:
+                return None
+
+        start, end = self._spans.popleft()
+        items.append(buffer[start:end])
+        self.items_parsed += 1
+        self._state = _ParserState.ARRAY_NEXT
+        return end
+
+    def _read_value(self, buffer: str, start: int) -> Optional[Tuple[Any, int]]:
+        """
+        Читает JSON-значение, начинающееся в start. Полностью пришедшие объекты и строки декодируются
+        сразу на C-уровне; посимвольный сканер нужен только для значения, разрезанного границей чанка
+        """
+        if not self._scanner.started and buffer[start] in '{["':
+            try:
+                return _DECODER.raw_decode(buffer, start)
+            except JSONDecodeError:
+                pass
+
+        end: Optional[int] = self._scanner.scan(buffer=buffer, start=start)
+        if end is None:
+            return None
+
+        self._scanner.reset()
+        return self._decode(buffer[start:end]), end
+
+    @staticmethod
+    def _decode(raw: str) -> Any:
+        try:
+            return jsonloads(raw)
+        except JSONDecodeError as e:
+            raise ValueError(f"Некорректный JSON в файле: {str(e)}")
+
+
+def _object_spans(buffer: str, start: int) -> List[Tuple[int, int]]:
+    """
+    Границы [start, end) подряд идущих объектов, пришедших целиком, начиная с объекта в позиции start.
+    Скобки и кавычки однобайтовые, поэтому ищутся векторно по кодам символов: скобка вне строки -
+    та, перед которой четное число неэкранированных кавычек, объект заканчивается, когда глубина
+    вложенности фигурных скобок возвращается к нулю. Скобки вне объектов (конец массива) не учитываются
+    """
+    text: str = buffer[start:]
+    if text.isascii():
+        codes: np.ndarray = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+    else:
+        # В UTF-32 позиции кодов совпадают с позициями символов в строке
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+    # '{' (0x7B) и '}' (0x7D) отличаются от 0x7F только битами 0x06; лишние 'y' и DEL отбрасываются следом
+    braces: np.ndarray = np.flatnonzero((codes | 6) == 0x7F)
+    braces = braces[(codes[braces] == _OPEN_BRACE) | (codes[braces] == _CLOSE_BRACE)]
+    if not braces.size:
+        return []
+
+    # Четность числа кавычек перед каждой скобкой: XOR по отрезкам между скобками и накопленный XOR
+    quotes: np.ndarray = (codes == _QUOTE).view(np.uint8)
+    for position in _escaped_quotes(text=text, codes=codes):
+        quotes[position] = 0
+    parity: np.ndarray = np.bitwise_xor.accumulate(np.bitwise_xor.reduceat(quotes, np.concatenate(([0], braces))))
+    braces = braces[parity[:-1] == 0]
+
+    depth: np.ndarray = np.cumsum(np.where(codes[braces] == _OPEN_BRACE, 1, -1))
+    # Все, что после первой непарной '}', к массиву уже не относится
+    unmatched: np.ndarray = np.flatnonzero(depth < 0)
+    if unmatched.size:
+        depth = depth[:unmatched[0]]
+
+    ends: np.ndarray = np.flatnonzero(depth == 0)
+    starts: np.ndarray = np.concatenate(([0], ends[:-1] + 1))
+    return list(zip((braces[starts] + start).tolist(), (braces[ends] + start + 1).tolist()))
+
+
+def _escaped_quotes(text: str, codes: np.ndarray) -> List[int]:
+    """Позиции экранированных кавычек: перед ними нечетное число обратных слешей. В реальных данных редки"""
+    if '\\"' not in text:
+        return []
+
+    escaped: List[int] = []
+    for position in (np.flatnonzero((codes[1:] == _QUOTE) & (codes[:-1] == _BACKSLASH)) + 1).tolist():
+        first_backslash: int = position - 1
+        while first_backslash > 0 and text[first_backslash - 1] == "\\":
+            first_backslash -= 1
+        if (position - first_backslash) % 2:
+            escaped.append(position)
+    return escaped
+
+
+class VideosLinesParser:
+    """
+    Потоковый парсер NDJSON: одно видео на строку, пустые строки пропускаются.
+    Интерфейс тот же, что у VideosStreamParser. Границы элементов ищутся по переводам строк без разбора JSON,
+    поэтому с raw_items=True разбор и валидация строк целиком выполняются там, куда они переданы
+    """
+
+    def __init__(self, key: str = "videos", raw_items: bool = False) -> None:
+        self.key: str = key
+        self.raw_items: bool = raw_items
+        self.items_parsed: int = 0
+
+        self._tail: bytes = b""
+
+    def feed_bytes(self, chunk: bytes) -> List[Any]:
+        """Принимает очередной чанк байтов и возвращает элементы из полностью пришедших строк"""
+        lines: List[bytes] = (self._tail + chunk).split(b"\n")
+        self._tail = lines.pop()
+        return self._parse_lines(lines=lines)
+
+    def close(self) -> List[Any]:
+        """Возвращает элемент из последней строки, если файл не заканчивается переводом строки"""
+        lines: List[bytes] = [self._tail]
+        self._tail = b""
+        return self._parse_lines(lines=lines)
+
+    def _parse_lines(self, lines: List[bytes]) -> List[Any]:
+        items: List[Any] = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if not line.startswith(b"{"):
+                raise ValueError(f"Элемент {self.key}[{self.items_parsed}] должен быть объектом")
+
+            try:
+                text: str = line.decode("utf-8")
+            except UnicodeDecodeError as e:
+                raise ValueError(f"Ошибка кодировки файла: {str(e)}")
+
+            items.append(text if self.raw_items else self._decode(text))
+            self.items_parsed += 1
+        return items
+
+    def _decode(self, raw: str) -> Any:
+        try:
+            return jsonloads(raw)
+        except JSONDecodeError as e:
+            raise ValueError(f"Некорректный JSON в {self.key}[{self.items_parsed}]: {str(e)}")
@@ -1,9 +1,16 @@
-from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict
 
-from src.core.llms.context_processor import ContextProcessor
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from src.core.llms.constants import SHARED_INTENT_CACHE, LLM_RATE_LIMIT_PER_SECOND, LLM_RATE_LIMIT_BURST
+from src.core.llms.context_processor import ContextProcessor
+from src.core.llms.interface import LLMInterface
+from src.core.llms.router import LLMRouter
+from src.core.llms.scheduler import LLMScheduler, TokenBucket
 from src.core.llms.schemas import BaseResponse
+from src.core.llms.setups.openai_compatible import OpenAICompatible
 from src.core.llms.setups.yandexgpt import YandexGPT
+from src.core.llms.shared_cache import SharedIntentCache
 from src.core.root.config import service_config
 from src.handlers.videos.repository import AnalyticRepository
 from src.handlers.videos.schemas import (
@@ -19,6 +26,16 @@ class TextQueryHandler:
     def __init__(self, context_processor: ContextProcessor) -> None:
         self.context_processor: ContextProcessor = context_processor
 
+    async def start(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        """Подключает общий для реплик кеш ответов LLM в БД и прогревает кеш в памяти"""
+        if SHARED_INTENT_CACHE:
+            await self.context_processor.attach_shared_cache(
+                shared_cache=SharedIntentCache(session_factory=session_factory)
+            )
+
+    async def aclose(self) -> None:
+        await self.context_processor.aclose()
+
     async def process_text_query(self, user_query: str, session: AsyncSession) -> QueryResponse:
         """
         Упрощенный вариант получения данных в зависимости от контекста, в идеале для полной лаконичности исп-ть не
@@ -86,6 +103,29 @@ class TextQueryHandler:
         return result
 
 
-text_query_handler: TextQueryHandler = TextQueryHandler(
-    context_processor=ContextProcessor(llm_client=YandexGPT(auth_config=service_config.yandex_gpt_auth))
-)
+def create_llm_client(bucket: TokenBucket) -> LLMInterface:
+    """
+    Один бэкенд - клиент напрямую, несколько - LLMRouter с дублированием медленных запросов.
+    bucket - квота API, общая с LLMScheduler: из нее оплачиваются дубли и переходы между бэкендами
+    """
+    backends: Dict[str, LLMInterface] = {
+        f"yandexgpt:{model}": YandexGPT(auth_config=service_config.yandex_gpt_auth, model=model)
+        for model in service_config.yandex_gpt_models
+    }
+    if service_config.openai_compatible is not None:
+        backends[f"openai:{service_config.openai_compatible.model}"] = OpenAICompatible(
+            auth_config=service_config.openai_compatible
+        )
+
+    if len(backends) == 1:
+        return next(iter(backends.values()))
+    return LLMRouter(backends=backends, bucket=bucket)
+
+
+def create_context_processor() -> ContextProcessor:
+    bucket: TokenBucket = TokenBucket(rate=LLM_RATE_LIMIT_PER_SECOND, capacity=LLM_RATE_LIMIT_BURST)
+    llm_client: LLMInterface = create_llm_client(bucket=bucket)
+    return ContextProcessor(llm_client=llm_client, scheduler=LLMScheduler(llm_client=llm_client, bucket=bucket))
+
+
+text_query_handler: TextQueryHandler = TextQueryHandler(context_processor=create_context_processor())
@@ -1,8 +1,34 @@
+from asyncio import get_running_loop
+from concurrent.futures import Executor
+from hashlib import sha256
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Iterator, List, TypeVar, Optional, AsyncIterable, AsyncIterator, Tuple
 from json import load as jsonload, JSONDecodeError
 
-from src.handlers.sso.constants import MAX_FILE_SIZE_MB
+from aiofiles import open as aiofiles_open  # type: ignore
+from pydantic import ValidationError
+from pydantic_core import from_json
+
+from src.handlers.sso.columnar import ColumnarValidator
+from src.handlers.sso.constants import (
+    MAX_FILE_SIZE_MB,
+    READ_CHUNK_SIZE,
+    VALIDATION_MODE,
+    UPLOAD_FORMATS,
+    INGEST_SHARDS_IN_FLIGHT
+)
+from src.handlers.sso.decompress import StreamDecompressor
+from src.handlers.sso.enums import ValidationMode, DocumentFormat, Compression
+from src.handlers.sso.progress import UploadProgress
+from src.handlers.sso.records import VideoRecord, video_record
+from src.handlers.sso.schemas import VideoSchema
+from src.handlers.sso.shards import ShardPipeline
+from src.handlers.sso.stream_parser import VideosStreamParser, VideosLinesParser
+
+T = TypeVar("T")
+VideosParser = VideosStreamParser | VideosLinesParser
+
+DEFAULT_UPLOAD_FORMAT: Tuple[DocumentFormat, Compression] = (DocumentFormat.json, Compression.none)
 
 
 class FileValidator:
@@ -10,19 +36,7 @@ class FileValidator:
     @staticmethod
     def validate_json_file(file_path: str | Path) -> Dict[str, Any]:
         """Валидирует JSON файл и возвращает его содержимое"""
-        path: Path = Path(file_path)
-        if not path.exists():
-            raise FileNotFoundError(f"Файл не найден: {file_path}")
-
-        max_size: int = MAX_FILE_SIZE_MB * 1024 * 1024
-        if path.stat().st_size > max_size:
-            raise ValueError(
-                f"Файл слишком большой. Максимальный размер: {MAX_FILE_SIZE_MB}MB, "
-                f"текущий: {path.stat().st_size / 1024 / 1024:.2f}MB"
-            )
-
-        if not path.is_file():
-            raise ValueError(f"Указанный путь не является файлом: {file_path}")
+        path: Path = FileValidator.validate_file_path(file_path=file_path)
 
         try:
             with open(path, 'r', encoding='utf-8') as file:
@@ -40,3 +54,286 @@ class FileValidator:
             raise ValueError("'videos' должен быть списком")
 
         return data
+
+    @staticmethod
+    def iter_videos(
+            file_path: str | Path,
+            chunk_size: int = READ_CHUNK_SIZE,
+            progress: Optional[UploadProgress] = None,
+            validation: ValidationMode = VALIDATION_MODE
+    ) -> Iterator[VideoRecord]:
+        """
+        Потоково читает файл и по одному отдает провалидированные видео в виде строк для записи в БД
+        (records.VideoRecord). Формат и сжатие определяются по расширению, файл без известного
+        расширения читается как JSON. Потребление памяти не зависит от размера файла
+        """
+        path: Path = FileValidator.validate_file_path(file_path=file_path)
+        document_format, compression = FileValidator.detect_format(file_name=path.name) or DEFAULT_UPLOAD_FORMAT
+        parser: VideosParser = FileValidator.create_parser(document_format=document_format)
+        decompressor: Optional[StreamDecompressor] = FileValidator.create_decompressor(compression=compression)
+
+        if progress is not None:
+            progress.total_bytes = path.stat().st_size
+
+        with open(path, 'rb') as file:
+            while chunk := file.read(chunk_size):
+                if progress is not None:
+                    progress.bytes_read += len(chunk)
+
+                for block in FileValidator._decompress(chunk=chunk, decompressor=decompressor):
+                    yield from FileValidator._validate_items(
+                        parser=parser,
+                        items=parser.feed_bytes(block),
+                        validation=validation
+                    )
+
+        if decompressor is not None:
+            decompressor.close()
+        yield from FileValidator._validate_items(parser=parser, items=parser.close(), validation=validation)
+
+    @staticmethod
+    async def aiter_videos(
+            chunks: AsyncIterable[bytes],
+            progress: Optional[UploadProgress] = None,
+            executor: Optional[Executor] = None,
+            validation: ValidationMode = VALIDATION_MODE,
+            document_format: DocumentFormat = DocumentFormat.json,
+            compression: Compression = Compression.none,
+            shards_in_flight: int = INGEST_SHARDS_IN_FLIGHT
+    ) -> AsyncIterator[VideoRecord]:
+        """
+        То же, что iter_videos, но для потока байтов (например, тела ответа при скачивании файла):
+        файл не сохраняется на диск и не буферизуется целиком. Лимит размера проверяется по мере чтения:
+        MAX_FILE_SIZE_MB - по присланным (сжатым) байтам, MAX_DECOMPRESSED_SIZE_MB - по распакованным.
+        Если передан executor (пул процессов), видео валидируются в нем шардами, до shards_in_flight
+        шардов параллельно, а в текущем потоке остаются только распаковка и поиск границ видео
+        """
+        parser: VideosParser = FileValidator.create_parser(
+            document_format=document_format,
+            raw_items=executor is not None
+        )
+        decompressor: Optional[StreamDecompressor] = FileValidator.create_decompressor(compression=compression)
+        pipeline: Optional[ShardPipeline] = None
+        if executor is not None:
+            pipeline = ShardPipeline(
+                executor=executor,
+                validator=FileValidator.validate_raw_videos,
+                validation=validation,
+                max_in_flight=shards_in_flight
+            )
+        max_size: int = MAX_FILE_SIZE_MB * 1024 * 1024
+        bytes_read: int = 0
+
+        try:
+            async for chunk in chunks:
+                bytes_read += len(chunk)
+                if bytes_read > max_size:
+                    raise ValueError(f"Файл слишком большой. Максимальный размер: {MAX_FILE_SIZE_MB}MB")
+                if progress is not None:
+                    progress.bytes_read = bytes_read
+
+                for block in FileValidator._decompress(chunk=chunk, decompressor=decompressor):
+                    async for video in FileValidator._avalidate_items(
+                            parser=parser,
+                            items=parser.feed_bytes(block),
+                            pipeline=pipeline,
+                            validation=validation
+                    ):
+                        yield video
+
+            if decompressor is not None:
+                decompressor.close()
+            async for video in FileValidator._avalidate_items(
+                    parser=parser,
+                    items=parser.close(),
+                    pipeline=pipeline,
+                    validation=validation,
+                    last=True
+            ):
+                yield video
+        finally:
+            if pipeline is not None:
+                pipeline.cancel()
+
+    @staticmethod
+    def detect_format(file_name: str) -> Optional[Tuple[DocumentFormat, Compression]]:
+        """Определяет формат документа и сжатие по расширению файла; None - если формат не поддерживается"""
+        name: str = file_name.lower()
+        for extension, upload_format in UPLOAD_FORMATS.items():
+            if name.endswith(extension):
+                return upload_format
+        return None
+
+    @staticmethod
+    def create_parser(document_format: DocumentFormat, raw_items: bool = False) -> VideosParser:
+        if document_format == DocumentFormat.ndjson:
+            return VideosLinesParser(raw_items=raw_items)
+        return VideosStreamParser(raw_items=raw_items)
+
+    @staticmethod
+    def create_decompressor(compression: Compression) -> Optional[StreamDecompressor]:
+        if compression == Compression.none:
+            return None
+        return StreamDecompressor(compression=compression)
+
+    @staticmethod
+    async def aread_file(file_path: str | Path, chunk_size: int = READ_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Читает файл чанками для aiter_videos, не блокируя event loop"""
+        path: Path = FileValidator.validate_file_path(file_path=file_path)
+        async with aiofiles_open(path, 'rb') as file:
+            while chunk := await file.read(chunk_size):
+                yield chunk
+
+    @staticmethod
+    def validate_raw_videos(
+            raw_items: List[str],
+            first_index: int,
+            validation: ValidationMode = VALIDATION_MODE
+    ) -> List[VideoRecord]:
+        """
+        Валидирует видео из исходного JSON-текста; выполняется в пуле процессов.
+        Результат - кортежи строк, которые передаются обратно дешевле моделей Pydantic
+        """
+        if validation == ValidationMode.columnar:
+            items: List[Dict[str, Any]] = []
+            for offset, raw_item in enumerate(raw_items):
+                try:
+                    items.append(from_json(raw_item))
+                except ValueError as e:
+                    raise ValueError(f"Некорректный JSON в videos[{first_index + offset}]: {str(e)}")
+            return ColumnarValidator.validate_records(items=items, first_index=first_index)
+
+        videos: List[VideoRecord] = []
+        for offset, raw_item in enumerate(raw_items):
+            try:
+                videos.append(video_record(video=VideoSchema.model_validate_json(raw_item)))
+            except ValidationError as e:
+                raise ValueError(f"videos[{first_index + offset}]: {e}")
+        return videos
+
+    @staticmethod
+    def _decompress(chunk: bytes, decompressor: Optional[StreamDecompressor]) -> Iterable[bytes]:
+        return (chunk,) if decompressor is None else decompressor.decompress(chunk)
+
+    @staticmethod
+    def _validate_items(
+            parser: VideosParser,
+            items: List[Dict[str, Any]],
+            validation: ValidationMode = VALIDATION_MODE
+    ) -> List[VideoRecord]:
+        """Валидирует видео, только что полученные из парсера"""
+        first_index: int = parser.items_parsed - len(items)
+
+        if validation == ValidationMode.columnar:
+            return ColumnarValidator.validate_records(items=items, first_index=first_index)
+        return ColumnarValidator.validate_reference(items=items, first_index=first_index)
+
+    @staticmethod
+    async def _avalidate_items(
+            parser: VideosParser,
+            items: List[Any],
+            pipeline: Optional[ShardPipeline],
+            validation: ValidationMode = VALIDATION_MODE,
+            last: bool = False
+    ) -> AsyncIterator[VideoRecord]:
+        """
+        То же, что _validate_items; с pipeline элементы - исходный JSON-текст, они валидируются в пуле
+        процессов, а отдаются видео из уже готовых шардов. last=True - дождаться всех шардов
+        """
+        if pipeline is None:
+            for video in FileValidator._validate_items(parser=parser, items=items, validation=validation):
+                yield video
+            return
+
+        pipeline.add(raw_items=items)
+        if last:
+            pipeline.flush()
+        async for videos in pipeline.completed(wait_all=last):
+            for video in videos:
+                yield video
+
+    @staticmethod
+    def validate_file_path(file_path: str | Path) -> Path:
+        """Проверяет существование и размер файла"""
+        path: Path = Path(file_path)
+        if not path.exists():
+            raise FileNotFoundError(f"Файл не найден: {file_path}")
+
+        max_size: int = MAX_FILE_SIZE_MB * 1024 * 1024
+        if path.stat().st_size > max_size:
+            raise ValueError(
+                f"Файл слишком большой. Максимальный размер: {MAX_FILE_SIZE_MB}MB, "
+                f"текущий: {path.stat().st_size / 1024 / 1024:.2f}MB"
+            )
+
+        if not path.is_file():
+            raise ValueError(f"Указанный путь не является файлом: {file_path}")
+
+        return path
+
+
+class ContentHasher:
+    """
+    SHA-256 содержимого присланного файла (в том виде, в каком он пришел, в том числе сжатого).
+    Считается по тем же чанкам, что идут в парсер, поэтому файл не читается второй раз
+    """
+
+    def __init__(self) -> None:
+        self._hash = sha256()
+
+    async def wrap(self, chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+        """Отдает чанки без изменений, попутно добавляя их в хеш"""
+        async for chunk in chunks:
+            self._hash.update(chunk)
+            yield chunk
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+    @staticmethod
+    async def hash_file(file_path: str | Path) -> str:
+        """
+        Хеш файла на диске, например скачанного во временный файл до разбора. Чтение и хеширование
+        целиком выполняются в пуле потоков, чтобы большой файл не блокировал event loop
+        """
+        path: Path = FileValidator.validate_file_path(file_path=file_path)
+        return await get_running_loop().run_in_executor(None, ContentHasher._hash_path, path)
+
+    @staticmethod
+    def _hash_path(path: Path, chunk_size: int = READ_CHUNK_SIZE) -> str:
+        hasher: ContentHasher = ContentHasher()
+        with open(path, 'rb') as file:
+            while chunk := file.read(chunk_size):
+                hasher._hash.update(chunk)
+        return hasher.hexdigest()
+
+
+async def aiter_batches(
+        items: Iterable[T] | AsyncIterable[T],
+        batch_size: int,
+        skip: int = 0
+) -> AsyncIterator[List[T]]:
+    """Разбивает поток элементов (синхронный или асинхронный) на списки размером не более batch_size"""
+    if isinstance(items, AsyncIterable):
+        source: AsyncIterable[T] = items
+    else:
+        source = _as_async_iterable(items=items)
+
+    batch: List[T] = []
+    async for item in source:
+        if skip:
+            skip -= 1
+            continue
+
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+async def _as_async_iterable(items: Iterable[T]) -> AsyncIterator[T]:
+    for item in items:
+        yield item
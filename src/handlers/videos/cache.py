@@ -0,0 +1,84 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Optional, Tuple, Callable, Any, Dict
+
+from src.handlers.videos.constants import ANALYTICS_CACHE_SIZE, ANALYTICS_CACHE_TTL_SECONDS
+
+# Ключ кеша: имя запроса и значения его параметров
+AnalyticsKey = Tuple[str, Tuple[Any, ...]]
+
+
+class AnalyticsCache:
+    """
+    Кеш результатов аналитических запросов: (имя запроса, параметры) -> число. Данные меняются только при загрузке
+    файла, поэтому кеш привязан к версии данных: UploadRepository увеличивает ее после коммита каждой пачки,
+    и все результаты прежней версии сбрасываются. Вытесняется давно не использованная запись (LRU),
+    запись старше ttl_seconds считается промахом
+    """
+
+    def __init__(
+            self,
+            max_size: int = ANALYTICS_CACHE_SIZE,
+            ttl_seconds: float = ANALYTICS_CACHE_TTL_SECONDS,
+            clock: Callable[[], float] = monotonic
+    ) -> None:
+        self.max_size: int = max_size
+        self.ttl_seconds: float = ttl_seconds
+        self.version: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self._clock: Callable[[], float] = clock
+        self._entries: OrderedDict[AnalyticsKey, Tuple[float, int]] = OrderedDict()
+
+    def get(self, key: AnalyticsKey) -> Optional[int]:
+        entry: Optional[Tuple[float, int]] = self._entries.get(key)
+
+        if entry is None or entry[0] <= self._clock():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: AnalyticsKey, value: int, version: int) -> None:
+        """
+        version - версия данных на момент начала запроса. Если за время запроса данные загрузились,
+        результат мог их не увидеть и не кешируется
+        """
+        if version != self.version:
+            return
+
+        self._entries[key] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def bump(self) -> None:
+        """Новая версия данных: результаты прежней больше не действительны"""
+        self.version += 1
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        requests: int = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3)
+        }
+
+
+analytics_cache: AnalyticsCache = AnalyticsCache()
@@ -0,0 +1,8 @@
+# Максимум одновременно выполняемых аналитических запросов (LLM + агрегаты в БД), независимо от загрузок файлов
+ANALYTICS_CONCURRENCY: int = 8
+
+# Кеш результатов аналитических запросов: сколько разных запросов (с параметрами) хранится и сколько секунд живет
+# запись. Результаты сбрасываются после каждой загрузки в этом процессе; TTL ограничивает, насколько долго
+# может быть не видна загрузка, выполненная другой репликой бота
+ANALYTICS_CACHE_SIZE: int = 4096
+ANALYTICS_CACHE_TTL_SECONDS: float = 5 * 60
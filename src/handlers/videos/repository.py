@@ -1,9 +1,10 @@
 from datetime import date, datetime, timedelta
-from typing import Any
+from typing import Any, Callable, Optional, Tuple
 
 from sqlalchemy import Executable, Result
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.handlers.videos.cache import analytics_cache, AnalyticsKey
 from src.handlers.videos.queries.select import (
     select_total_videos_count,
     select_videos_count_by_creator_and_date,
@@ -20,10 +21,12 @@ class AnalyticRepository:
             session: AsyncSession
     ) -> int:
         """Получить общее количество видео в системе"""
-        stmt = select_total_videos_count()
-
-        result: Result[Any] = await AnalyticRepository.__execute_scalar(stmt=stmt, session=session)
-        return result or 0  # type: ignore
+        return await AnalyticRepository.__execute_cached(
+            query="total_videos_count",
+            params=(),
+            create_stmt=select_total_videos_count,
+            session=session
+        )
 
     @staticmethod
     async def get_videos_count_by_creator_and_date(
@@ -37,25 +40,29 @@ class AnalyticRepository:
             datetime.combine(date_from, datetime.min.time()),
             datetime.combine(date_to, datetime.max.time())
         )
-        stmt: Executable = select_videos_count_by_creator_and_date(
-            creator_id=creator_id,
-            date_from=dt_from,
-            date_to=dt_to
+        return await AnalyticRepository.__execute_cached(
+            query="videos_count_by_creator_and_date",
+            params=(creator_id, date_from, date_to),
+            create_stmt=lambda: select_videos_count_by_creator_and_date(
+                creator_id=creator_id,
+                date_from=dt_from,
+                date_to=dt_to
+            ),
+            session=session
         )
 
-        result: Result[Any] = await AnalyticRepository.__execute_scalar(stmt=stmt, session=session)
-        return result or 0  # type: ignore
-
     @staticmethod
     async def get_videos_count_with_views_above(
             views: int,
             session: AsyncSession
     ) -> int:
         """Получить количество видео с просмотрами выше заданного порога"""
-        stmt: Executable = select_videos_count_with_views_above(views=views)
-
-        result: Result[Any] = await AnalyticRepository.__execute_scalar(stmt=stmt, session=session)
-        return result or 0  # type: ignore
+        return await AnalyticRepository.__execute_cached(
+            query="videos_count_with_views_above",
+            params=(views,),
+            create_stmt=lambda: select_videos_count_with_views_above(views=views),
+            session=session
+        )
 
     @staticmethod
     async def get_total_views_growth_by_date(
@@ -65,10 +72,12 @@ class AnalyticRepository:
         """Получить суммарный прирост просмотров за конкретную дату"""
         dt_from = datetime.combine(target_date, datetime.min.time())
         dt_to = dt_from + timedelta(days=1)
-        stmt: Executable = select_total_views_growth_by_date(date_from=dt_from, date_to=dt_to)
-
-        result: Result[Any] = await AnalyticRepository.__execute_scalar(stmt=stmt, session=session)
-        return result if result is not None else 0  # type: ignore
+        return await AnalyticRepository.__execute_cached(
+            query="total_views_growth_by_date",
+            params=(target_date,),
+            create_stmt=lambda: select_total_views_growth_by_date(date_from=dt_from, date_to=dt_to),
+            session=session
+        )
 
     @staticmethod
     async def get_unique_videos_with_new_views_by_date(
@@ -78,10 +87,12 @@ class AnalyticRepository:
         """Получить количество уникальных видео, получивших новые просмотры в дату"""
         dt_from = datetime.combine(target_date, datetime.min.time())
         dt_to = dt_from + timedelta(days=1)
-        stmt: Executable = select_unique_videos_with_new_views_by_date(date_from=dt_from, date_to=dt_to)
-
-        result: Result[Any] = await AnalyticRepository.__execute_scalar(stmt=stmt, session=session)
-        return result or 0  # type: ignore
+        return await AnalyticRepository.__execute_cached(
+            query="unique_videos_with_new_views_by_date",
+            params=(target_date,),
+            create_stmt=lambda: select_unique_videos_with_new_views_by_date(date_from=dt_from, date_to=dt_to),
+            session=session
+        )
 
     @staticmethod
     async def get_videos_count_by_creator_above_views(
@@ -90,13 +101,37 @@ class AnalyticRepository:
             session: AsyncSession
     ) -> int:
         """Получить количество видео у креатора с просмотрами выше порога"""
-        stmt: Executable = select_videos_count_by_creator_above_views(
-            creator_id=creator_id,
-            views=views
+        return await AnalyticRepository.__execute_cached(
+            query="videos_count_by_creator_above_views",
+            params=(creator_id, views),
+            create_stmt=lambda: select_videos_count_by_creator_above_views(
+                creator_id=creator_id,
+                views=views
+            ),
+            session=session
         )
 
-        result: Result[Any] = await AnalyticRepository.__execute_scalar(stmt=stmt, session=session)
-        return result or 0  # type: ignore
+    @staticmethod
+    async def __execute_cached(
+            query: str,
+            params: Tuple[Any, ...],
+            create_stmt: Callable[[], Executable],
+            session: AsyncSession
+    ) -> int:
+        """
+        Выполняет скалярный запрос через analytics_cache: тот же вопрос до следующей загрузки данных
+        отвечается из памяти, запрос даже не собирается. Пустой результат агрегата (NULL) - 0
+        """
+        key: AnalyticsKey = (query, params)
+        cached: Optional[int] = analytics_cache.get(key=key)
+        if cached is not None:
+            return cached
+
+        version: int = analytics_cache.version
+        result: Any = await AnalyticRepository.__execute_scalar(stmt=create_stmt(), session=session)
+        value: int = result if result is not None else 0
+        analytics_cache.put(key=key, value=value, version=version)
+        return value
 
     @staticmethod
     async def __execute_scalar(stmt: Executable, session: AsyncSession) -> Result[Any]:
@@ -1,12 +1,16 @@
+from asyncio import Semaphore
+
 from aiogram import Router, F
 from aiogram.types import Message
 from aiogram.enums import ChatAction
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.handlers.sso.text_handler import text_query_handler
+from src.handlers.videos.constants import ANALYTICS_CONCURRENCY
 from src.handlers.videos.schemas import QueryResponse
 
 router: Router = Router(name="text_router")
+analytics_semaphore: Semaphore = Semaphore(ANALYTICS_CONCURRENCY)
 
 
 @router.message(F.text & ~F.command)
@@ -18,10 +22,11 @@ async def handle_text_query(message: Message, db_session: AsyncSession) -> None:
 
     await message.bot.send_chat_action(chat_id=message.chat.id, action=ChatAction.TYPING)  # type: ignore
 
-    result: QueryResponse = await text_query_handler.process_text_query(
-        user_query=user_query,
-        session=db_session
-    )
+    async with analytics_semaphore:
+        result: QueryResponse = await text_query_handler.process_text_query(
+            user_query=user_query,
+            session=db_session
+        )
 
     if not result.status:
         await message.answer(str(result.details))
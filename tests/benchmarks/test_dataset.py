@@ -0,0 +1,52 @@
+from argparse import Namespace
+from asyncio import run
+from json import loads as jsonloads
+from pathlib import Path
+from typing import List, Dict, Any
+
+from benchmarks.dataset import generate_videos, write_dataset
+from benchmarks.ingest import main
+from src.handlers.sso.schemas import UploadJsonSchema
+
+
+def test_written_dataset_is_valid_upload(tmp_path: Path) -> None:
+    path: Path = tmp_path / "videos.json"
+
+    size: int = write_dataset(file_path=path, videos_count=20, snapshots_per_video=3, seed=7)
+
+    data: Dict[str, Any] = jsonloads(path.read_text(encoding="utf-8"))
+    assert size == path.stat().st_size
+    assert data["videos"] == generate_videos(videos_count=20, snapshots_per_video=3, seed=7)
+    assert len(UploadJsonSchema.model_validate(data).videos) == 20
+
+
+def test_dataset_is_reproducible_by_seed() -> None:
+    first: List[Dict[str, Any]] = generate_videos(videos_count=5, snapshots_per_video=2, seed=1)
+
+    assert generate_videos(videos_count=5, snapshots_per_video=2, seed=1) == first
+    assert generate_videos(videos_count=5, snapshots_per_video=2, seed=2) != first
+
+
+def test_creators_count_limits_distinct_creators() -> None:
+    videos: List[Dict[str, Any]] = generate_videos(videos_count=200, snapshots_per_video=0, creators_count=3)
+
+    assert len({video["creator_id"] for video in videos}) == 3
+    assert len({video["creator_id"] for video in generate_videos(videos_count=200, snapshots_per_video=0)}) == 200
+
+
+def test_snapshots_accumulate_views_of_video() -> None:
+    (video,) = generate_videos(videos_count=1, snapshots_per_video=4)
+
+    assert [snapshot["video_id"] for snapshot in video["snapshots"]] == [video["id"]] * 4
+    assert sum(snapshot["delta_views_count"] for snapshot in video["snapshots"]) == video["views_count"]
+
+
+def test_ingest_report_without_database(tmp_path: Path) -> None:
+    report_path: Path = tmp_path / "report.json"
+
+    run(main(arguments=Namespace(videos=10, snapshots=2, creators=None, seed=0, skip_db=True, report=report_path)))
+
+    report: Dict[str, Any] = jsonloads(report_path.read_text(encoding="utf-8"))
+    assert [stage["stage"] for stage in report["stages"]] == ["validate_json_file", "model_validate"]
+    assert all(stage["rows"] == 30 for stage in report["stages"])
+    assert report["dataset"]["rows"] == 30
@@ -0,0 +1 @@
+import src.handlers.videos  # noqa - загружает обработчики до ContextProcessor (циклический импорт)
@@ -0,0 +1,183 @@
+from asyncio import sleep
+from json import dumps as jsondumps
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Union, cast
+
+from aiohttp import ClientResponse, web
+from sqlalchemy import String
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DataError
+
+from src.core.llms.models import IntentCacheEntries
+from tests.handlers.sso.fakes import FakeResult
+
+# Ответ на вопрос: текст или исключение, которое нужно выбросить
+Answer = Union[str, Exception]
+
+
+class FakeLLM:
+    """
+    LLM-клиент без сети: answer(question) задает ответ на вопрос, delay - время ответа.
+    Запоминает все вызовы ask
+    """
+
+    def __init__(self, answer: Callable[[str], Answer], delay: float = 0.0) -> None:
+        self.answer: Callable[[str], Answer] = answer
+        self.delay: float = delay
+        self.calls: List[Dict[str, Any]] = []
+        self.closed: bool = False
+
+    async def ask(self, system: str, question: str, temperature: float = 0.1, max_tokens: int = 500) -> str:
+        self.calls.append({"system": system, "question": question, "max_tokens": max_tokens})
+        if self.delay:
+            await sleep(self.delay)
+
+        answer: Answer = self.answer(question)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+    @staticmethod
+    async def _analyze_errors(response: ClientResponse) -> None:
+        raise NotImplementedError()
+
+    @staticmethod
+    def _validate_response(data: Dict[str, Any]) -> str:
+        raise NotImplementedError()
+
+    @staticmethod
+    def extract_json_from_text(text: str) -> Dict[str, Any]:
+        raise NotImplementedError()
+
+
+def always(text: str) -> Callable[[str], Answer]:
+    return lambda question: text
+
+
+def answers(*texts: Answer) -> Callable[[str], Answer]:
+    """Ответы по очереди; последний повторяется"""
+    queue: List[Answer] = list(texts)
+    return lambda question: queue.pop(0) if len(queue) > 1 else queue[0]
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0) -> None:
+        self.now: float = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def intent(key_context: Optional[str], context: Optional[Union[Dict[str, Any], str]] = None) -> str:
+    """Ответ LLM в формате промпта"""
+    return jsondumps({"key_context": key_context, "context": context}, ensure_ascii=False)
+
+
+class LocalServer:
+    """
+    HTTP-сервер на 127.0.0.1 для LLM-клиентов: handler отвечает на любой POST, peers - адреса клиентских
+    соединений, по одному на запрос (по ним видно, переиспользуется ли соединение)
+    """
+
+    def __init__(self, handler: Callable[[web.Request], Awaitable[web.StreamResponse]]) -> None:
+        self.handler: Callable[[web.Request], Awaitable[web.StreamResponse]] = handler
+        self.peers: List[Any] = []
+        self.payloads: List[Any] = []
+        self.url: str = ""
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        self.peers.append(request.transport.get_extra_info("peername") if request.transport else None)
+        self.payloads.append(await request.json())
+        return await self.handler(request)
+
+    async def __aenter__(self) -> "LocalServer":
+        app: web.Application = web.Application()
+        app.router.add_post("/{path:.*}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site: web.TCPSite = web.TCPSite(self._runner, host="127.0.0.1", port=0)
+        await site.start()
+        port: int = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+class FakeIntentCacheDatabase:
+    """
+    Таблица llm_intent_cache в памяти для SharedIntentCache: одновременно фабрика сессий и сессия.
+    Отвечает на запросы, которые делает кеш; длина ключа проверяется как в PostgreSQL.
+    error - исключение, которое выбрасывает любой запрос
+    """
+
+    def __init__(self) -> None:
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.error: Optional[BaseException] = None
+        self.commits: int = 0
+
+    def __call__(self) -> "FakeIntentCacheDatabase":
+        return self
+
+    async def __aenter__(self) -> "FakeIntentCacheDatabase":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        return None
+
+    async def get(self, model: Any, key: str) -> Optional[IntentCacheEntries]:
+        self._raise_error()
+        values: Optional[Dict[str, Any]] = self.entries.get(key)
+        return IntentCacheEntries(**values) if values is not None else None
+
+    async def execute(self, statement: Any) -> FakeResult:
+        self._raise_error()
+        params: Dict[str, Any] = statement.compile(dialect=postgresql.dialect()).params
+
+        if statement.is_select:
+            alive: List[Dict[str, Any]] = sorted(
+                (entry for entry in self.entries.values() if entry["expires_at"] > params["expires_at_1"]),
+                key=lambda entry: entry["hits"],
+                reverse=True
+            )
+            return FakeResult(rows=[(IntentCacheEntries(**entry),) for entry in alive[:params["param_1"]]])
+        if statement.is_insert:
+            self._insert(params=params)
+        elif statement.is_update:
+            for key, count in zip(params["keys"], params["counts"]):
+                if key in self.entries:
+                    self.entries[key]["hits"] += count
+                    self.entries[key]["last_hit_at"] = params["last_hit_at"]
+        else:
+            self.entries = {
+                key: entry for key, entry in self.entries.items() if entry["expires_at"] > params["expires_at_1"]
+            }
+        return FakeResult(rows=[])
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+    def _insert(self, params: Dict[str, Any]) -> None:
+        """INSERT ... ON CONFLICT (query_key) DO UPDATE: при конфликте обновляются ответ и срок жизни"""
+        key: str = params["query_key"]
+        key_type: String = cast(String, IntentCacheEntries.__table__.c.query_key.type)
+        if key_type.length is not None and len(key) > key_type.length:
+            raise DataError(statement="INSERT", params=None, orig=Exception("value too long for query_key"))
+
+        if key in self.entries:
+            self.entries[key].update(key_context=params["key_context"], context=params["context"],
+                                     expires_at=params["expires_at"])
+        else:
+            self.entries[key] = {column.name: params.get(column.name) for column in IntentCacheEntries.__table__.columns}
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            raise self.error
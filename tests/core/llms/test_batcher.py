@@ -0,0 +1,143 @@
+from asyncio import run, gather, sleep, create_task, Task
+from json import dumps as jsondumps
+from typing import List, Dict, Any, Optional
+
+import pytest
+
+from src.core.llms.batcher import QueryBatcher
+from src.core.llms.context_processor import ContextProcessor
+from src.core.llms.schemas import BaseResponse
+from src.handlers.videos.schemas import TotalCountVideos, CountVideosPerMoreViews
+from tests.core.llms.fakes import FakeLLM, Answer, intent
+
+QUERIES: List[str] = ["Сколько всего видео?", "Сколько видео набрали много просмотров?", "Что-то странное"]
+
+
+class RecordingHandler:
+    def __init__(self, error: Optional[Exception] = None) -> None:
+        self.batches: List[List[str]] = []
+        self.error: Optional[Exception] = error
+
+    async def __call__(self, user_queries: List[str]) -> List[BaseResponse]:
+        self.batches.append(user_queries)
+        if self.error is not None:
+            raise self.error
+        return [BaseResponse(error=user_query) for user_query in user_queries]
+
+
+def test_queries_within_window_are_sent_as_one_batch() -> None:
+    handler: RecordingHandler = RecordingHandler()
+    batcher: QueryBatcher = QueryBatcher(handler=handler, window_seconds=0.01, max_size=10)
+
+    async def submit_all() -> List[BaseResponse]:
+        return list(await gather(*(batcher.submit(user_query=user_query) for user_query in ["a", "b", "c"])))
+
+    results: List[BaseResponse] = run(submit_all())
+
+    assert handler.batches == [["a", "b", "c"]]
+    assert [result.error for result in results] == ["a", "b", "c"]
+    assert (batcher.batches, batcher.queries) == (1, 3)
+
+
+def test_full_batch_is_sent_without_waiting_for_window() -> None:
+    handler: RecordingHandler = RecordingHandler()
+    batcher: QueryBatcher = QueryBatcher(handler=handler, window_seconds=10.0, max_size=2)
+
+    async def submit_all() -> None:
+        await gather(batcher.submit(user_query="a"), batcher.submit(user_query="b"))
+
+    run(submit_all())
+
+    assert handler.batches == [["a", "b"]]
+
+
+def test_handler_error_is_delivered_to_every_caller() -> None:
+    batcher: QueryBatcher = QueryBatcher(handler=RecordingHandler(error=RuntimeError("сбой")), window_seconds=0.01)
+
+    async def submit_all() -> List[Any]:
+        return list(await gather(batcher.submit(user_query="a"), batcher.submit(user_query="b"), return_exceptions=True))
+
+    assert [str(error) for error in run(submit_all())] == ["сбой", "сбой"]
+
+
+def test_cancelled_caller_does_not_break_batch() -> None:
+    batcher: QueryBatcher = QueryBatcher(handler=RecordingHandler(), window_seconds=0.01)
+
+    async def cancel_one() -> BaseResponse:
+        cancelled: Task[BaseResponse] = create_task(batcher.submit(user_query="a"))
+        kept: Task[BaseResponse] = create_task(batcher.submit(user_query="b"))
+        await sleep(0)
+        cancelled.cancel()
+        return await kept
+
+    assert run(cancel_one()).error == "b"
+
+
+def batch_answer(items: List[Any]) -> Answer:
+    return "Ответ:\n```json\n" + jsondumps(items, ensure_ascii=False) + "\n```"
+
+
+def ask_batch(items: List[Any], single: str) -> List[BaseResponse]:
+    """Три одновременных запроса с пакетным ответом items; одиночные повторы получают ответ single"""
+    llm: FakeLLM = FakeLLM(
+        answer=lambda question: batch_answer(items=items) if question.startswith("Запросы") else single
+    )
+    context_processor: ContextProcessor = ContextProcessor(llm_client=llm, local_min_confidence=1.1, batching=True)
+
+    async def ask_all() -> List[BaseResponse]:
+        return list(await gather(*(context_processor.process_query(user_query=query) for query in QUERIES)))
+
+    results: List[BaseResponse] = run(ask_all())
+    ask_batch.calls = llm.calls  # type: ignore[attr-defined]
+    return results
+
+
+def test_concurrent_queries_are_recognized_by_one_llm_call() -> None:
+    results: List[BaseResponse] = ask_batch(
+        items=[
+            {"key_context": "TotalCountVideos", "context": None},
+            {"key_context": "CountVideosPerMoreViews", "context": {"views": 1000}},
+            {"key_context": None, "context": "Запрос не распознан"},
+        ],
+        single=intent(key_context=None)
+    )
+
+    assert results == [TotalCountVideos(), CountVideosPerMoreViews(views=1000), BaseResponse(error="Запрос не распознан")]
+    calls: List[Dict[str, Any]] = ask_batch.calls  # type: ignore[attr-defined]
+    assert len(calls) == 1
+    assert calls[0]["question"].splitlines()[1:] == [f"{number}. {query}" for number, query in enumerate(QUERIES, 1)]
+
+
+def test_only_malformed_items_are_retried_one_by_one() -> None:
+    results: List[BaseResponse] = ask_batch(
+        items=[{"key_context": "TotalCountVideos"}, "не объект", {"key_context": 5}],
+        single=intent(key_context="CountVideosPerMoreViews", context={"views": 7})
+    )
+
+    assert results == [TotalCountVideos(), CountVideosPerMoreViews(views=7), CountVideosPerMoreViews(views=7)]
+    assert len(ask_batch.calls) == 3  # type: ignore[attr-defined]
+
+
+def test_batch_of_wrong_length_falls_back_to_single_queries() -> None:
+    results: List[BaseResponse] = ask_batch(
+        items=[{"key_context": "TotalCountVideos"}],
+        single=intent(key_context="TotalCountVideos")
+    )
+
+    assert results == [TotalCountVideos()] * 3
+    assert len(ask_batch.calls) == 4  # type: ignore[attr-defined]
+
+
+@pytest.mark.parametrize("item", [
+    {"key_context": "CountVideosPerMoreViews", "context": {"views": -5}},
+    {"key_context": "CountVideosPerMoreViews", "context": None},
+    {"key_context": "UnknownIntent", "context": {}},
+    {"key_context": None, "context": "Не понял"},
+    {"key_context": "", "context": None},
+])
+def test_batch_item_is_parsed_like_single_answer(item: Dict[str, Any]) -> None:
+    assert ContextProcessor._schema_from_json(data=item) == ContextProcessor._parse_llm_response(text=jsondumps(item))
+
+
+def test_batching_is_off_by_default() -> None:
+    assert ContextProcessor(llm_client=FakeLLM(answer=lambda question: "")).batcher is None
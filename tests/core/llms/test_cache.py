@@ -0,0 +1,94 @@
+from asyncio import run
+from typing import Optional
+
+from src.core.llms.cache import QueryCache
+from src.core.llms.context_processor import ContextProcessor
+from src.core.llms.schemas import BaseResponse
+from src.handlers.videos.schemas import CountVideosPerMoreViews, TotalCountVideos
+from tests.core.llms.fakes import FakeLLM, FakeClock, always, answers, intent
+
+
+def test_query_is_normalized() -> None:
+    assert QueryCache.normalize(user_query="  Сколько   ВСЕГО видео, ещё?! ") == "сколько всего видео еще"
+    assert QueryCache.normalize(user_query="про_смотры\tвсего") == "про смотры всего"
+
+
+def test_paraphrases_with_same_words_share_entry() -> None:
+    cache: QueryCache = QueryCache()
+    cache.put(user_query="Сколько всего видео?", schema=TotalCountVideos())
+
+    assert cache.get(user_query="сколько  всего  видео") == TotalCountVideos()
+    assert cache.get(user_query="сколько видео") is None
+    assert (cache.hits, cache.misses, cache.hit_rate) == (1, 1, 0.5)
+
+
+def test_entry_expires_after_ttl() -> None:
+    clock: FakeClock = FakeClock()
+    cache: QueryCache = QueryCache(ttl_seconds=60, clock=clock)
+    cache.put(user_query="запрос", schema=TotalCountVideos())
+
+    clock.advance(seconds=59)
+    assert cache.get(user_query="запрос") is not None
+    clock.advance(seconds=1)
+    assert cache.get(user_query="запрос") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    cache: QueryCache = QueryCache(max_size=2)
+    cache.put(user_query="первый", schema=TotalCountVideos())
+    cache.put(user_query="второй", schema=TotalCountVideos())
+    cache.get(user_query="первый")
+
+    cache.put(user_query="третий", schema=TotalCountVideos())
+
+    assert cache.get(user_query="второй") is None
+    assert cache.get(user_query="первый") is not None
+    assert len(cache) == 2
+
+
+def test_cached_schema_cannot_be_changed_by_caller() -> None:
+    cache: QueryCache = QueryCache()
+    schema: CountVideosPerMoreViews = CountVideosPerMoreViews(views=1000)
+    cache.put(user_query="запрос", schema=schema)
+    schema.views = 1
+
+    cached: Optional[BaseResponse] = cache.get(user_query="запрос")
+    assert isinstance(cached, CountVideosPerMoreViews) and cached.views == 1000
+    cached.views = 2
+    assert cache.get(user_query="запрос") == CountVideosPerMoreViews(views=1000)
+
+
+def processor(llm: FakeLLM) -> ContextProcessor:
+    # Локальный разбор отключен: запросы должны доходить до LLM
+    return ContextProcessor(llm_client=llm, local_min_confidence=1.1, batching=False)
+
+
+def test_repeated_query_is_answered_from_cache() -> None:
+    llm: FakeLLM = FakeLLM(answer=always(text=intent(key_context="TotalCountVideos")))
+    context_processor: ContextProcessor = processor(llm=llm)
+
+    async def ask_twice() -> None:
+        assert await context_processor.process_query(user_query="Сколько всего видео?") == TotalCountVideos()
+        assert await context_processor.process_query(user_query="сколько всего видео") == TotalCountVideos()
+
+    run(ask_twice())
+
+    assert (len(llm.calls), context_processor.llm_calls, context_processor.cache.hits) == (1, 1, 1)
+
+
+def test_unrecognized_query_is_not_cached() -> None:
+    llm: FakeLLM = FakeLLM(answer=answers(
+        intent(key_context=None, context="Не понял запрос"),
+        intent(key_context="TotalCountVideos")
+    ))
+    context_processor: ContextProcessor = processor(llm=llm)
+
+    async def ask_twice() -> None:
+        first: BaseResponse = await context_processor.process_query(user_query="Сколько всего видео?")
+        assert first.error == "Не понял запрос"
+        assert await context_processor.process_query(user_query="Сколько всего видео?") == TotalCountVideos()
+
+    run(ask_twice())
+
+    assert len(llm.calls) == 2
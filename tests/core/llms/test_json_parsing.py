@@ -0,0 +1,110 @@
+from datetime import date
+from json import loads, dumps as jsondumps
+from typing import Any, Dict, Optional
+
+import pytest
+
+from src.core.llms import json_stream
+from src.core.llms.context_processor import ContextProcessor
+from src.core.llms.exceptions import JSONParseError
+from src.core.llms.json_stream import extract_json, parse_json
+from src.core.llms.schemas import BaseResponse, LLMResponse
+from src.core.llms.setups.yandexgpt import YandexGPT
+from src.handlers.videos.schemas import (
+    CountVideosPerMoreViews,
+    CountVideosPerCreatorAboveViews,
+    CountDifferentVideosForNewViewsPerDate
+)
+
+CREATOR_ID: str = "aca1061a9d324ecf8c3fa2bb32d7be63"
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    """Прогоняет тест с обоими бэкендами parse_json"""
+    if request.param == "json":
+        monkeypatch.setattr(json_stream, "_backend_loads", loads)
+    return request.param
+
+
+@pytest.mark.parametrize(("text", "expected"), [
+    (
+        '```json\n{"key_context": "TotalCountVideos", "context": null}\n```',
+        {"key_context": "TotalCountVideos", "context": None}
+    ),
+    ('{"key_context": null, "context": "Не про видео"}', {"key_context": None, "context": "Не про видео"}),
+    # Пояснение после JSON со своими скобками: жадное r"\{.*\}" захватило бы и их
+    (
+        '{"key_context": "CountVideosPerMoreViews", "context": {"views": 5}} (формат: {"key_context": ...})',
+        {"key_context": "CountVideosPerMoreViews", "context": {"views": 5}}
+    ),
+    (
+        'Ответ:\n```json\n{"context": {"note": "a}\\"{"}, "key_context": "X"}\n```\nПараметры: {views}.',
+        {"context": {"note": 'a}"{'}, "key_context": "X"}
+    ),
+])
+def test_first_object_is_extracted(backend: str, text: str, expected: Dict[str, Any]) -> None:
+    assert extract_json(text=text) == expected
+    assert YandexGPT.extract_json_from_text(text=text) == expected
+
+
+def test_first_array_is_extracted(backend: str) -> None:
+    text: str = 'Ответы:\n```json\n[{"key_context": "TotalCountVideos"}, null]\n```\nВсего [2] ответа'
+
+    assert extract_json(text=text, brackets="[]") == [{"key_context": "TotalCountVideos"}, None]
+
+
+@pytest.mark.parametrize("text", [
+    "Не могу ответить на этот вопрос",
+    '```json\n{"key_context": "TotalCountVideos", "context": \n```',
+    '{"key_context": "TotalCountVideos", context: null}',
+])
+def test_text_without_json_object_is_rejected(backend: str, text: str) -> None:
+    with pytest.raises(JSONParseError):
+        extract_json(text=text)
+
+
+def test_parse_json_reports_invalid_json_the_same_way_for_both_backends(backend: str) -> None:
+    assert parse_json(text='{"views": 1000, "ratio": 0.5, "name": "ё"}') == {"views": 1000, "ratio": 0.5, "name": "ё"}
+    with pytest.raises(JSONParseError, match="Ошибка парсинга JSON"):
+        parse_json(text='{"views": }')
+
+
+@pytest.mark.parametrize(("data", "expected"), [
+    ({"key_context": "CountVideosPerMoreViews", "context": {"views": 100000}}, CountVideosPerMoreViews(views=100000)),
+    (
+        {"key_context": "CountVideosPerCreatorAboveViews", "context": {"creator_id": CREATOR_ID, "views": 10000}},
+        CountVideosPerCreatorAboveViews(creator_id=CREATOR_ID, views=10000)
+    ),
+    (
+        {"key_context": "CountDifferentVideosForNewViewsPerDate", "context": {"date": "2025-11-27"}},
+        CountDifferentVideosForNewViewsPerDate(date=date(2025, 11, 27))
+    ),
+    ({"key_context": None, "context": "Запрос не про видео"}, BaseResponse(error="Запрос не про видео")),
+    ({"key_context": "", "context": None}, BaseResponse(error="Запрос не распознан")),
+    ({"key_context": "UnknownIntent", "context": {}}, BaseResponse(error="Неизвестный тип запроса: UnknownIntent")),
+])
+def test_llm_answer_is_parsed_into_schema(data: Dict[str, Any], expected: BaseResponse) -> None:
+    text: str = "```json\n" + jsondumps(data, ensure_ascii=False) + "\n```"
+
+    assert ContextProcessor._parse_llm_response(text=text) == expected
+
+
+@pytest.mark.parametrize("context", [
+    {"views": -5},
+    {"creator_id": CREATOR_ID},
+    None,
+    "не объект",
+])
+def test_invalid_parameters_give_the_same_error_as_two_pass_validation(context: Optional[Any]) -> None:
+    data: Dict[str, Any] = {"key_context": "CountVideosPerMoreViews", "context": context}
+
+    parsed: BaseResponse = ContextProcessor._parse_llm_response(text=jsondumps(data, ensure_ascii=False))
+
+    assert parsed.error
+    assert parsed == ContextProcessor._create_request_schema(llm_response=LLMResponse(**data))
+
+
+def test_answer_without_json_raises_parse_error() -> None:
+    with pytest.raises(JSONParseError):
+        ContextProcessor._parse_llm_response(text="Извините, не понял вопрос")
@@ -0,0 +1,159 @@
+from asyncio import run, sleep
+from json import dumps as jsondumps
+from time import perf_counter
+from typing import List, Optional, Callable, Awaitable
+
+import pytest
+from aiohttp import web
+
+from src.core.llms.exceptions import LLMContentError, LLMConnectionError
+from src.core.llms.json_stream import FirstJsonValue
+from src.core.llms.schemas import YandexGPTAuth
+from src.core.llms.setups.yandexgpt import YandexGPT
+from tests.core.llms.fakes import LocalServer
+
+ANSWER: str = '```json\n{"key_context": "CountVideosPerMoreViews", "context": {"views": 1000, "note": "a}\\"{"}}\n```'
+VALUE: str = '{"key_context": "CountVideosPerMoreViews", "context": {"views": 1000, "note": "a}\\"{"}}'
+
+
+def feed(parts: List[str], openers: str = "{[") -> Optional[str]:
+    json_value: FirstJsonValue = FirstJsonValue(openers=openers)
+    for part in parts:
+        completed: Optional[str] = json_value.feed(delta=part)
+        if completed is not None:
+            return completed
+    return None
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_value_is_found_for_any_fragment_size(size: int) -> None:
+    parts: List[str] = [ANSWER[start:start + size] for start in range(0, len(ANSWER), size)]
+
+    assert feed(parts=parts) == VALUE
+
+
+def test_value_is_returned_as_soon_as_it_closes() -> None:
+    json_value: FirstJsonValue = FirstJsonValue()
+
+    assert json_value.feed(delta='Ответ: {"a": [1, ') is None
+    assert json_value.feed(delta='2]}') == '{"a": [1, 2]}'
+    assert json_value.feed(delta=' пояснение {}') == '{"a": [1, 2]}'
+
+
+def test_escaped_backslash_at_fragment_end() -> None:
+    assert feed(parts=['{"path": "C:\\', '\\"}', ' tail']) == '{"path": "C:\\\\"}'
+    assert feed(parts=['{"quote": "\\', '"}"}']) == '{"quote": "\\"}"}'
+
+
+def test_array_and_openers() -> None:
+    assert feed(parts=["[", '{"a": 1}', ", {}]", "..."]) == '[{"a": 1}, {}]'
+    assert feed(parts=['[1] {"a": 1}'], openers="{") == '{"a": 1}'
+
+
+def test_unclosed_value_is_not_returned() -> None:
+    assert feed(parts=['{"a": ', '"}']) is None
+    assert feed(parts=["без JSON"]) is None
+
+
+def stream_line(text: str) -> bytes:
+    return (jsondumps({"result": {"alternatives": [{"message": {"role": "assistant", "text": text}}]}}) + "\n").encode()
+
+
+def stream_handler(
+        fragments: List[str],
+        tail_seconds: float = 0.0
+) -> Callable[[web.Request], Awaitable[web.StreamResponse]]:
+    """Накопительные фрагменты потокового ответа YandexGPT; после них сервер еще долго генерирует пояснение"""
+    async def handler(request: web.Request) -> web.StreamResponse:
+        response: web.StreamResponse = web.StreamResponse()
+        await response.prepare(request)
+        text: str = ""
+        for fragment in fragments:
+            text += fragment
+            await response.write(stream_line(text=text))
+            await sleep(0.005)
+        if tail_seconds:
+            await response.write(stream_line(text=text + " Пояснение"))
+            await sleep(tail_seconds)
+        return response
+
+    return handler
+
+
+def ask_stream(fragments: List[str], tail_seconds: float = 0.0) -> str:
+    async def ask() -> str:
+        async with LocalServer(handler=stream_handler(fragments=fragments, tail_seconds=tail_seconds)) as server:
+            client: YandexGPT = YandexGPT(
+                auth_config=YandexGPTAuth(api_key="key", folder_id="folder"),
+                base_url=server.url,
+                stream=True
+            )
+            try:
+                return await client.ask(system="s", question="q")
+            finally:
+                await client.aclose()
+
+    return run(ask())
+
+
+def test_stream_is_closed_after_first_json_value() -> None:
+    started_at: float = perf_counter()
+
+    text: str = ask_stream(fragments=[ANSWER[:10], ANSWER[10:40], ANSWER[40:]], tail_seconds=5.0)
+
+    assert text == VALUE
+    assert perf_counter() - started_at < 2.0
+
+
+def test_connection_is_reused_after_early_answer() -> None:
+    async def ask() -> List[float]:
+        async with LocalServer(handler=stream_handler(fragments=[ANSWER[:40], ANSWER[40:]], tail_seconds=0.5)) as server:
+            client: YandexGPT = YandexGPT(
+                auth_config=YandexGPTAuth(api_key="key", folder_id="folder"),
+                base_url=server.url,
+                stream=True
+            )
+            durations: List[float] = []
+            try:
+                for _ in range(2):
+                    started_at: float = perf_counter()
+                    assert await client.ask(system="s", question="q") == VALUE
+                    durations.append(perf_counter() - started_at)
+                    # Остаток потока дочитывается в фоне; после него соединение снова свободно
+                    await sleep(1.0)
+            finally:
+                await client.aclose()
+
+            assert len(server.peers) == 2
+            assert server.peers[0] == server.peers[1]
+            return durations
+
+    assert max(run(ask())) < 0.4
+
+
+def test_stream_without_json_returns_whole_text() -> None:
+    assert ask_stream(fragments=["Запрос ", "не распознан"]) == "Запрос не распознан"
+
+
+def test_empty_stream_is_content_error() -> None:
+    with pytest.raises(LLMContentError, match="пустой ответ"):
+        ask_stream(fragments=[])
+
+
+def test_error_in_stream_is_connection_error() -> None:
+    async def handler(request: web.Request) -> web.StreamResponse:
+        response: web.StreamResponse = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(b'{"error": {"message": "internal"}}\n')
+        return response
+
+    async def ask() -> str:
+        async with LocalServer(handler=handler) as server:
+            client: YandexGPT = YandexGPT(auth_config=YandexGPTAuth(api_key="k", folder_id="f"), base_url=server.url)
+            try:
+                return await client.ask(system="s", question="q")
+            finally:
+                await client.aclose()
+
+    with pytest.raises(LLMConnectionError, match="Ошибка в потоке ответа"):
+        run(ask())
@@ -0,0 +1,131 @@
+from asyncio import run
+from datetime import date
+from typing import Optional, List, Dict, Any
+
+import pytest
+
+from src.core.llms.context_processor import ContextProcessor
+from src.core.llms.schemas import BaseResponse
+from src.core.llms.local_parser import LocalIntentParser, LocalMatch, QueryEntities
+from src.handlers.videos.schemas import CountVideosPerMoreViews
+from tests.core.llms.fakes import FakeLLM, always, intent
+
+CREATOR_ID: str = "aca1061a9d324ecf8c3fa2bb32d7be63"
+
+
+def parse(user_query: str) -> Optional[LocalMatch]:
+    return LocalIntentParser().parse(user_query=user_query)
+
+
+@pytest.mark.parametrize(("user_query", "key_context", "context"), [
+    ("Сколько всего видео в базе?", "TotalCountVideos", None),
+    (
+        f"Сколько видео у креатора с id {CREATOR_ID} вышло с 1 ноября 2025 по 5 ноября 2025 включительно?",
+        "CountVideosPerCreatorByDate",
+        {"creator_id": CREATOR_ID, "date_from": "2025-11-01", "date_to": "2025-11-05"}
+    ),
+    ("Сколько видео набрало больше 100 000 просмотров за все время?", "CountVideosPerMoreViews", {"views": 100000}),
+    (
+        "На сколько просмотров в сумме выросли все видео 28 ноября 2025?",
+        "CountViewsGrewUPPerDate",
+        {"date": "2025-11-28"}
+    ),
+    (
+        "Сколько разных видео получали новые просмотры 27.11.2025?",
+        "CountDifferentVideosForNewViewsPerDate",
+        {"date": "2025-11-27"}
+    ),
+    (
+        f"Сколько видео у автора {CREATOR_ID.upper()} набрали больше 10к просмотров?",
+        "CountVideosPerCreatorAboveViews",
+        {"creator_id": CREATOR_ID, "views": 10000}
+    ),
+])
+def test_supported_queries_are_recognized(
+        user_query: str,
+        key_context: str,
+        context: Optional[Dict[str, Any]]
+) -> None:
+    local_match: Optional[LocalMatch] = parse(user_query=user_query)
+
+    assert local_match is not None
+    assert (local_match.response.key_context, local_match.response.context) == (key_context, context)
+    assert local_match.confidence == 1.0
+
+
+@pytest.mark.parametrize("user_query", [
+    # Порог задан по другой метрике или запрос фильтрует по ней
+    "Сколько видео с жалобами набрали больше 1000 просмотров",
+    "Сколько видео набрали просмотров больше, чем 5000 лайков",
+    "Сколько видео набрали больше 1000 просмотров и 50 комментариев?",
+    f"Сколько видео с лайками у креатора {CREATOR_ID} набрали больше 10 000 просмотров?",
+    "На сколько просмотров и лайков выросли все видео 28 ноября 2025?",
+    # Метрика, по которой считается запрос, не названа
+    "Сколько видео набрали больше 5000?",
+    "На сколько выросли все видео 28 ноября 2025?",
+    # Формулировки, которых нет среди типов запросов
+    "Сколько видео набрали меньше 1000 просмотров?",
+    "Сколько видео не набрали 1000 просмотров?",
+    "Какой средний прирост просмотров 28 ноября 2025?",
+    # Порог за окно времени от публикации, а не по итоговым просмотрам
+    "Сколько видео набрали больше 1000 просмотров в первые сутки?",
+    "Сколько видео набрали больше 10 000 просмотров за первые 3 часа?",
+    "Сколько видео за первый час набрали больше 500 просмотров?",
+    "Сколько видео набрали больше 1000 просмотров в первые 2 дня после публикации?",
+    "Сколько видео набрали больше 5000 просмотров за неделю?",
+    "Сколько видео набрали больше 100 просмотров через 10 минут после публикации?",
+    # Даты и числа, которые нельзя разобрать однозначно
+    "Сколько видео набрали больше 10к просмотров вчера?",
+    "На сколько выросли просмотры 28 ноября?",
+    "Сколько видео набрали больше 1,5 просмотров?",
+    f"Сколько видео у креатора {CREATOR_ID} и {CREATOR_ID[::-1]}?",
+    "Сколько видео вышло с 1 ноября 2025 по 5 ноября 2025?",
+])
+def test_ambiguous_or_unsupported_queries_are_left_to_llm(user_query: str) -> None:
+    assert parse(user_query=user_query) is None
+
+
+@pytest.mark.parametrize(("text", "numbers"), [
+    ("больше 10 000 просмотров", [10000]),
+    ("больше 10 000 просмотров", [10000]),
+    ("больше 1,5 млн просмотров", [1500000]),
+    ("больше 2 миллионов просмотров", [2000000]),
+    ("больше 15 тыс. просмотров", [15000]),
+    ("больше 7k просмотров", [7000]),
+])
+def test_numbers_with_separators_and_multipliers(text: str, numbers: List[int]) -> None:
+    entities: QueryEntities = LocalIntentParser.extract_entities(text=text)[0]
+
+    assert (entities.numbers, entities.unresolved) == (numbers, False)
+
+
+@pytest.mark.parametrize("text", ["с 2025-11-01 по 05.11.2025", "с 1 ноября 2025 года по 5 ноября 2025 г."])
+def test_dates_in_any_format_are_extracted_in_order(text: str) -> None:
+    entities: QueryEntities = LocalIntentParser.extract_entities(text=text)[0]
+
+    assert entities.dates == [date(2025, 11, 1), date(2025, 11, 5)]
+
+
+def test_impossible_date_is_unresolved() -> None:
+    assert LocalIntentParser.extract_entities(text="просмотры 31.02.2025")[0].unresolved
+
+
+def test_recognized_query_does_not_reach_llm() -> None:
+    llm: FakeLLM = FakeLLM(answer=always(text=intent(key_context="TotalCountVideos")))
+    context_processor: ContextProcessor = ContextProcessor(llm_client=llm, batching=False)
+
+    schema: BaseResponse = run(context_processor.process_query(
+        user_query="Сколько видео набрало больше 100 000 просмотров?"
+    ))
+
+    assert schema == CountVideosPerMoreViews(views=100000)
+    assert (llm.calls, context_processor.local_hits) == ([], 1)
+
+
+def test_query_with_other_metric_reaches_llm() -> None:
+    llm: FakeLLM = FakeLLM(answer=always(text=intent(key_context=None, context="Такой запрос не поддерживается")))
+    context_processor: ContextProcessor = ContextProcessor(llm_client=llm, batching=False)
+
+    run(context_processor.process_query(user_query="Сколько видео набрали просмотров больше, чем 5000 лайков"))
+
+    assert (len(llm.calls), context_processor.local_hits) == (1, 0)
@@ -0,0 +1,71 @@
+from asyncio import run
+from typing import List, Tuple
+
+import pytest
+
+from src.core.llms.context_processor import ContextProcessor
+from src.core.llms.enums import PromptMode
+from src.core.llms.prompter import LLMPrompter
+from src.core.llms.retriever import IntentRetriever, char_ngrams
+from tests.core.llms.fakes import FakeLLM, always, intent
+
+RETRIEVER: IntentRetriever = IntentRetriever(descriptions=LLMPrompter.CONTEXT_DESCRIPTIONS)
+EXAMPLES: List[Tuple[str, str]] = [
+    (key, example)
+    for key, info in LLMPrompter.CONTEXT_DESCRIPTIONS.items()
+    for example in info["examples"]
+]
+
+
+def test_ngrams_ignore_case_punctuation_and_digits() -> None:
+    assert char_ngrams(text="Видео, 2025!") == char_ngrams(text="видео 1999")
+    assert char_ngrams(text="ёж") == char_ngrams(text="еж")
+
+
+@pytest.mark.parametrize(("key_context", "example"), EXAMPLES)
+def test_prompt_example_ranks_its_intent_first(key_context: str, example: str) -> None:
+    assert RETRIEVER.top_k(user_query=example, k=1) == [key_context]
+
+
+@pytest.mark.parametrize(("user_query", "key_context"), [
+    ("Сколько роликов набрали больше 100к просмотров?", "CountVideosPerMoreViews"),
+    ("Какой прирост просмотров был 3 декабря 2025?", "CountViewsGrewUPPerDate"),
+    ("Сколько всего роликов загружено?", "TotalCountVideos"),
+])
+def test_synonyms_missing_from_examples_are_matched_by_keywords(user_query: str, key_context: str) -> None:
+    assert key_context in RETRIEVER.top_k(user_query=user_query, k=3)
+
+
+def test_unrelated_query_has_low_score() -> None:
+    assert RETRIEVER.rank(user_query="Какая погода в Москве?")[0][1] < 0.3
+
+
+def test_compact_prompt_contains_only_selected_intents() -> None:
+    prompt: str = LLMPrompter.create_compact_system_prompt(intent_keys=["TotalCountVideos", "CountVideosPerMoreViews"])
+
+    assert "TotalCountVideos:" in prompt and "CountVideosPerMoreViews:" in prompt
+    assert "CountViewsGrewUPPerDate" not in prompt
+    assert len(prompt) < len(LLMPrompter.create_system_prompt()) / 2
+
+
+def processor(llm: FakeLLM, prompt_mode: PromptMode) -> ContextProcessor:
+    return ContextProcessor(llm_client=llm, local_min_confidence=1.1, batching=False, prompt_mode=prompt_mode)
+
+
+def test_compact_mode_sends_top_candidates_to_llm() -> None:
+    llm: FakeLLM = FakeLLM(answer=always(text=intent(key_context="TotalCountVideos")))
+
+    run(processor(llm=llm, prompt_mode=PromptMode.compact).process_query(user_query="Сколько всего видео?"))
+
+    system: str = llm.calls[0]["system"]
+    assert "TotalCountVideos:" in system
+    assert sum(f"{key}:" in system for key in LLMPrompter.CONTEXT_DESCRIPTIONS) == 3
+
+
+def test_full_prompt_is_sent_when_nothing_is_similar_or_mode_is_full() -> None:
+    llm: FakeLLM = FakeLLM(answer=always(text=intent(key_context=None, context="Запрос не распознан")))
+
+    run(processor(llm=llm, prompt_mode=PromptMode.compact).process_query(user_query="Какая погода в Москве?"))
+    run(processor(llm=llm, prompt_mode=PromptMode.full).process_query(user_query="Сколько всего видео?"))
+
+    assert [call["system"] for call in llm.calls] == [LLMPrompter.create_system_prompt()] * 2
@@ -0,0 +1,135 @@
+from asyncio import run
+from time import perf_counter
+from typing import Dict, Optional
+
+import pytest
+
+from src.core.llms.constants import LLM_HEDGE_MIN_SAMPLES
+from src.core.llms.exceptions import LLMConnectionError, LLMContentError
+from src.core.llms.interface import LLMInterface
+from src.core.llms.router import LLMRouter, BackendStats
+from src.core.llms.scheduler import TokenBucket
+from tests.core.llms.fakes import FakeLLM, always, answers
+
+
+def router(default_hedge_delay: float = 0.02, bucket: Optional[TokenBucket] = None, **backends: FakeLLM) -> LLMRouter:
+    clients: Dict[str, LLMInterface] = dict(backends)
+    return LLMRouter(backends=clients, default_hedge_delay=default_hedge_delay, bucket=bucket)
+
+
+def test_fastest_backend_by_ewma_is_asked_first() -> None:
+    slow: FakeLLM = FakeLLM(answer=always(text="slow"))
+    fast: FakeLLM = FakeLLM(answer=always(text="fast"))
+    llm_router: LLMRouter = router(slow=slow, fast=fast)
+    llm_router.stats["slow"].ewma = 2.0
+    llm_router.stats["fast"].ewma = 0.5
+
+    assert run(llm_router.ask(system="s", question="q")) == "fast"
+    assert (len(fast.calls), len(slow.calls), llm_router.hedged) == (1, 0, 0)
+
+
+def test_slow_request_is_hedged_to_next_backend() -> None:
+    stuck: FakeLLM = FakeLLM(answer=always(text="stuck"), delay=5.0)
+    spare: FakeLLM = FakeLLM(answer=always(text="spare"), delay=0.01)
+    llm_router: LLMRouter = router(stuck=stuck, spare=spare)
+    started_at: float = perf_counter()
+
+    assert run(llm_router.ask(system="s", question="q")) == "spare"
+
+    assert perf_counter() - started_at < 1.0
+    assert llm_router.hedged == 1
+    assert (llm_router.stats["spare"].wins, llm_router.stats["stuck"].wins) == (1, 0)
+    # Отмененный запрос не дает замера: время обрыва не задержка ответа
+    assert llm_router.stats["stuck"].ewma is None
+    assert list(llm_router.stats["spare"].latencies) == [pytest.approx(0.01, abs=0.05)]
+
+
+def test_hedge_is_paid_with_token_of_shared_bucket() -> None:
+    bucket: TokenBucket = TokenBucket(rate=0.001, capacity=1)
+    stuck: FakeLLM = FakeLLM(answer=always(text="stuck"), delay=5.0)
+    spare: FakeLLM = FakeLLM(answer=always(text="spare"))
+    llm_router: LLMRouter = router(bucket=bucket, stuck=stuck, spare=spare)
+
+    assert run(llm_router.ask(system="s", question="q")) == "spare"
+    assert bucket.tokens < 1
+    assert (llm_router.hedged, llm_router.hedges_skipped) == (1, 0)
+
+
+def test_no_hedge_without_token() -> None:
+    bucket: TokenBucket = TokenBucket(rate=0.001, capacity=1)
+    bucket.drain()
+    slow: FakeLLM = FakeLLM(answer=always(text="slow"), delay=0.1)
+    spare: FakeLLM = FakeLLM(answer=always(text="spare"))
+    llm_router: LLMRouter = router(bucket=bucket, slow=slow, spare=spare)
+
+    assert run(llm_router.ask(system="s", question="q")) == "slow"
+    assert (llm_router.hedged, llm_router.hedges_skipped, len(spare.calls)) == (0, 1, 0)
+    assert llm_router.metrics()["hedges_skipped"] == 1
+
+
+def test_failover_waits_for_token() -> None:
+    bucket: TokenBucket = TokenBucket(rate=20.0, capacity=1)
+    bucket.drain()
+    broken: FakeLLM = FakeLLM(answer=answers(LLMConnectionError("503")))
+    working: FakeLLM = FakeLLM(answer=always(text="ответ"))
+    llm_router: LLMRouter = router(default_hedge_delay=10.0, bucket=bucket, broken=broken, working=working)
+    started_at: float = perf_counter()
+
+    assert run(llm_router.ask(system="s", question="q")) == "ответ"
+
+    # Переход на следующий бэкенд дождался токена: при пустом ведре это 1 / rate
+    assert perf_counter() - started_at >= 0.04
+    assert bucket.tokens < 1
+
+
+def test_error_fails_over_without_waiting_for_hedge_delay() -> None:
+    broken: FakeLLM = FakeLLM(answer=answers(LLMConnectionError("503")))
+    working: FakeLLM = FakeLLM(answer=always(text="ответ"))
+    llm_router: LLMRouter = router(default_hedge_delay=10.0, broken=broken, working=working)
+    started_at: float = perf_counter()
+
+    assert run(llm_router.ask(system="s", question="q")) == "ответ"
+
+    assert perf_counter() - started_at < 1.0
+    assert (llm_router.stats["broken"].errors, llm_router.hedged) == (1, 0)
+    # Бэкенд с ошибкой подряд опускается в конец очереди
+    assert llm_router.ranked() == ["working", "broken"]
+
+
+def test_last_error_is_raised_when_all_backends_fail() -> None:
+    llm_router: LLMRouter = router(
+        first=FakeLLM(answer=answers(LLMConnectionError("503"))),
+        second=FakeLLM(answer=answers(LLMContentError("400")))
+    )
+
+    with pytest.raises(LLMContentError):
+        run(llm_router.ask(system="s", question="q"))
+
+
+def test_hedge_delay_is_p95_once_enough_samples() -> None:
+    llm_router: LLMRouter = router(default_hedge_delay=3.0, only=FakeLLM(answer=always(text="ответ")))
+    stats: BackendStats = llm_router.stats["only"]
+
+    for _ in range(LLM_HEDGE_MIN_SAMPLES - 1):
+        stats.observe(latency=0.1, alpha=0.2)
+    assert llm_router.hedge_delay(name="only") == 3.0
+
+    stats.observe(latency=1.0, alpha=0.2)
+    assert llm_router.hedge_delay(name="only") == 1.0
+
+
+def test_metrics_and_aclose() -> None:
+    first: FakeLLM = FakeLLM(answer=always(text="ответ"))
+    second: FakeLLM = FakeLLM(answer=always(text="ответ"))
+    llm_router: LLMRouter = router(first=first, second=second)
+    run(llm_router.ask(system="s", question="q"))
+
+    run(llm_router.aclose())
+
+    assert llm_router.metrics()["backends"]["first"]["requests"] == 1
+    assert first.closed and second.closed
+
+
+def test_router_needs_backend() -> None:
+    with pytest.raises(ValueError):
+        LLMRouter(backends={})
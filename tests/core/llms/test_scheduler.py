@@ -0,0 +1,162 @@
+from asyncio import run, gather, create_task, sleep, Task
+from typing import List, Any, cast
+
+import pytest
+from aiogram.filters import CommandObject
+from aiogram.types import Message
+
+from src.core.llms.exceptions import LLMRateLimitError, LLMConnectionError, LLMContentError, LLMDeadlineError
+from src.core.llms.scheduler import LLMScheduler, TokenBucket
+from src.handlers.sso.jobs import IngestionQueue
+from src.handlers.sso.routes import handle_job_status
+from tests.core.llms.fakes import FakeLLM, FakeClock, Answer, always, answers
+from tests.handlers.sso.fakes import FakeMessage
+
+
+def scheduler(llm: FakeLLM, **options: Any) -> LLMScheduler:
+    return LLMScheduler(llm_client=llm, retry_base_delay=0.001, retry_max_delay=0.001, **options)
+
+
+def test_bucket_refills_at_rate_up_to_capacity() -> None:
+    clock: FakeClock = FakeClock()
+    bucket: TokenBucket = TokenBucket(rate=2.0, capacity=2, clock=clock)
+
+    assert [bucket.take(), bucket.take()] == [0.0, 0.0]
+    assert bucket.take() == 0.5
+    clock.advance(seconds=10)
+    assert [bucket.take(), bucket.take()] == [0.0, 0.0]
+    assert bucket.take() > 0
+
+
+def test_drained_bucket_gives_no_burst() -> None:
+    clock: FakeClock = FakeClock()
+    bucket: TokenBucket = TokenBucket(rate=1.0, capacity=5, clock=clock)
+
+    bucket.drain()
+
+    assert bucket.take() == 1.0
+
+
+def test_requests_get_tokens_in_arrival_order() -> None:
+    llm: FakeLLM = FakeLLM(answer=lambda question: question)
+    llm_scheduler: LLMScheduler = scheduler(llm=llm, rate_per_second=200.0, burst=1)
+
+    async def ask_all() -> List[str]:
+        return list(await gather(*(llm_scheduler.ask(system="s", question=str(index)) for index in range(5))))
+
+    assert run(ask_all()) == ["0", "1", "2", "3", "4"]
+    assert [call["question"] for call in llm.calls] == ["0", "1", "2", "3", "4"]
+    assert llm_scheduler.metrics()["mean_wait_seconds"] > 0
+
+
+def test_retry_overtakes_waiting_new_requests() -> None:
+    failed: List[str] = []
+
+    def answer(question: str) -> Answer:
+        if question == "0" and not failed:
+            failed.append(question)
+            return LLMConnectionError("503")
+        return question
+
+    llm: FakeLLM = FakeLLM(answer=answer)
+    llm_scheduler: LLMScheduler = scheduler(llm=llm, rate_per_second=50.0, burst=1)
+
+    async def ask_all() -> List[str]:
+        return list(await gather(*(llm_scheduler.ask(system="s", question=str(index)) for index in range(4))))
+
+    assert run(ask_all()) == ["0", "1", "2", "3"]
+    # Повтор первого запроса получает токен раньше новых, которые ждали в очереди с начала всплеска
+    assert [call["question"] for call in llm.calls] == ["0", "0", "1", "2", "3"]
+
+
+def test_rate_limited_and_network_errors_are_retried() -> None:
+    llm: FakeLLM = FakeLLM(answer=answers(LLMRateLimitError("429"), LLMConnectionError("503"), "ответ"))
+    llm_scheduler: LLMScheduler = scheduler(llm=llm)
+
+    assert run(llm_scheduler.ask(system="s", question="q")) == "ответ"
+    assert (llm_scheduler.retries, llm_scheduler.failures, len(llm.calls)) == (2, 0, 3)
+
+
+def test_error_is_raised_after_last_attempt() -> None:
+    llm: FakeLLM = FakeLLM(answer=answers(LLMConnectionError("503")))
+    llm_scheduler: LLMScheduler = scheduler(llm=llm, retry_attempts=3)
+
+    with pytest.raises(LLMConnectionError):
+        run(llm_scheduler.ask(system="s", question="q"))
+    assert (llm_scheduler.retries, llm_scheduler.failures, len(llm.calls)) == (2, 1, 3)
+
+
+def test_content_errors_are_not_retried() -> None:
+    llm: FakeLLM = FakeLLM(answer=answers(LLMContentError("400")))
+    llm_scheduler: LLMScheduler = scheduler(llm=llm)
+
+    with pytest.raises(LLMContentError):
+        run(llm_scheduler.ask(system="s", question="q"))
+    assert len(llm.calls) == 1
+
+
+def test_request_fails_when_deadline_expires_in_queue() -> None:
+    llm: FakeLLM = FakeLLM(answer=always(text="ответ"))
+    llm_scheduler: LLMScheduler = scheduler(llm=llm, rate_per_second=0.1, burst=1)
+
+    async def ask_twice() -> None:
+        assert await llm_scheduler.ask(system="s", question="first") == "ответ"
+        await llm_scheduler.ask(system="s", question="second", deadline_seconds=0.05)
+
+    with pytest.raises(LLMDeadlineError):
+        run(ask_twice())
+    assert llm_scheduler.deadline_exceeded == 1
+    assert len(llm.calls) == 1
+
+
+def test_slow_answer_fails_at_deadline() -> None:
+    llm: FakeLLM = FakeLLM(answer=always(text="ответ"), delay=1.0)
+    llm_scheduler: LLMScheduler = scheduler(llm=llm)
+
+    with pytest.raises(LLMDeadlineError):
+        run(llm_scheduler.ask(system="s", question="q", deadline_seconds=0.05))
+
+
+def test_aclose_cancels_waiters_and_closes_client() -> None:
+    llm: FakeLLM = FakeLLM(answer=always(text="ответ"))
+    llm_scheduler: LLMScheduler = scheduler(llm=llm, rate_per_second=0.1, burst=0)
+
+    async def close_with_waiter() -> int:
+        waiter: Task[str] = create_task(llm_scheduler.ask(system="s", question="q"))
+        await sleep(0.01)
+        depth: int = llm_scheduler.queue_depth
+        await llm_scheduler.aclose()
+        await gather(waiter, return_exceptions=True)
+        return depth
+
+    assert run(close_with_waiter()) == 1
+    assert llm.closed and llm.calls == []
+
+
+def test_status_without_job_id_shows_llm_queue() -> None:
+    llm_scheduler: LLMScheduler = scheduler(llm=FakeLLM(answer=always(text="ответ")))
+    run(llm_scheduler.ask(system="s", question="q"))
+    message: FakeMessage = FakeMessage()
+
+    run(handle_job_status(
+        message=cast(Message, message),
+        command=CommandObject(command="status"),
+        ingest_queue=IngestionQueue(session_factory=cast(Any, None)),
+        llm_scheduler=llm_scheduler
+    ))
+
+    assert "Загрузок в очереди: 0" in message.answers[0]
+    assert "Всего: 1, повторов: 0, ошибок: 0" in message.answers[0]
+
+
+def test_status_with_unknown_job_id() -> None:
+    message: FakeMessage = FakeMessage()
+
+    run(handle_job_status(
+        message=cast(Message, message),
+        command=CommandObject(command="status", args="missing"),
+        ingest_queue=IngestionQueue(session_factory=cast(Any, None)),
+        llm_scheduler=scheduler(llm=FakeLLM(answer=always(text="ответ")))
+    ))
+
+    assert message.answers[0].startswith("❌ Задача не найдена")
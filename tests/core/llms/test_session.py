@@ -0,0 +1,142 @@
+from asyncio import run
+from typing import List, Dict, Any
+
+import pytest
+from aiohttp import web, ClientSession, TCPConnector
+
+from src.core.llms.constants import LLM_CONNECTIONS_PER_HOST, LLM_REQUEST_TIMEOUT_SECONDS
+from src.core.llms.exceptions import LLMAuthenticationError, LLMRateLimitError, LLMContentError, LLMConnectionError
+from src.core.llms.schemas import YandexGPTAuth, OpenAICompatibleAuth
+from src.core.llms.setups.openai_compatible import OpenAICompatible
+from src.core.llms.setups.session import create_pooled_session
+from src.core.llms.setups.yandexgpt import YandexGPT
+from tests.core.llms.fakes import LocalServer
+
+
+def yandex_answer(text: str) -> Dict[str, Any]:
+    return {"result": {"alternatives": [{"message": {"role": "assistant", "text": text}}]}}
+
+
+async def yandex_ok(request: web.Request) -> web.Response:
+    return web.json_response(yandex_answer(text='{"key_context": "TotalCountVideos"}'))
+
+
+def yandex_client(server: LocalServer) -> YandexGPT:
+    return YandexGPT(
+        auth_config=YandexGPTAuth(api_key="key", folder_id="folder"),
+        base_url=f"{server.url}/completion",
+        stream=False
+    )
+
+
+def test_pooled_session_limits_connections_and_request_time() -> None:
+    async def check() -> None:
+        session: ClientSession = create_pooled_session()
+        try:
+            assert isinstance(session.connector, TCPConnector)
+            assert session.connector.limit_per_host == LLM_CONNECTIONS_PER_HOST
+            assert session.timeout.total == LLM_REQUEST_TIMEOUT_SECONDS
+        finally:
+            await session.close()
+
+    run(check())
+
+
+def test_requests_reuse_one_keep_alive_connection() -> None:
+    async def ask_three_times() -> List[Any]:
+        async with LocalServer(handler=yandex_ok) as server:
+            client: YandexGPT = yandex_client(server=server)
+            for _ in range(3):
+                assert await client.ask(system="s", question="q") == '{"key_context": "TotalCountVideos"}'
+            await client.aclose()
+            return server.peers
+
+    peers: List[Any] = run(ask_three_times())
+
+    assert len(peers) == 3 and len(set(peers)) == 1
+
+
+def test_closed_client_opens_new_session_on_next_request() -> None:
+    async def ask_close_ask() -> List[Any]:
+        async with LocalServer(handler=yandex_ok) as server:
+            client: YandexGPT = yandex_client(server=server)
+            await client.ask(system="s", question="q")
+            await client.aclose()
+            await client.ask(system="s", question="q")
+            await client.aclose()
+            return server.peers
+
+    peers: List[Any] = run(ask_close_ask())
+
+    assert len(set(peers)) == 2
+
+
+def test_request_payload() -> None:
+    async def ask() -> Dict[str, Any]:
+        async with LocalServer(handler=yandex_ok) as server:
+            client: YandexGPT = yandex_client(server=server)
+            await client.ask(system="system", question="question", temperature=1.5, max_tokens=200)
+            await client.aclose()
+            return server.payloads[0]
+
+    payload: Dict[str, Any] = run(ask())
+
+    assert payload["modelUri"] == "gpt://folder/yandexgpt/latest"
+    assert payload["completionOptions"] == {"stream": False, "temperature": 1.0, "maxTokens": 200}
+    assert [message["text"] for message in payload["messages"]] == ["system", "question"]
+
+
+@pytest.mark.parametrize(("status", "error"), [
+    (401, LLMAuthenticationError),
+    (429, LLMRateLimitError),
+    (400, LLMContentError),
+    (503, LLMConnectionError),
+])
+def test_http_errors_are_mapped_to_llm_errors(status: int, error: type) -> None:
+    async def reply_with_error(request: web.Request) -> web.Response:
+        return web.json_response({"message": "ошибка"}, status=status)
+
+    async def ask() -> None:
+        async with LocalServer(handler=reply_with_error) as server:
+            client: YandexGPT = yandex_client(server=server)
+            try:
+                await client.ask(system="s", question="q")
+            finally:
+                await client.aclose()
+
+    with pytest.raises(error, match="ошибка"):
+        run(ask())
+
+
+def test_unreachable_server_is_connection_error() -> None:
+    async def ask() -> None:
+        async with LocalServer(handler=yandex_ok) as server:
+            url: str = server.url
+        client: YandexGPT = YandexGPT(auth_config=YandexGPTAuth(api_key="key", folder_id="folder"), base_url=url)
+        try:
+            await client.ask(system="s", question="q")
+        finally:
+            await client.aclose()
+
+    with pytest.raises(LLMConnectionError, match="Сетевая ошибка"):
+        run(ask())
+
+
+def test_openai_compatible_client_shares_pooled_connection() -> None:
+    async def completion(request: web.Request) -> web.Response:
+        return web.json_response({"choices": [{"message": {"role": "assistant", "content": "{}"}}]})
+
+    async def ask_twice() -> LocalServer:
+        async with LocalServer(handler=completion) as server:
+            client: OpenAICompatible = OpenAICompatible(
+                auth_config=OpenAICompatibleAuth(base_url=f"{server.url}/v1/", model="local", api_key="secret")
+            )
+            assert await client.ask(system="s", question="q") == "{}"
+            assert await client.ask(system="s", question="q") == "{}"
+            await client.aclose()
+            return server
+
+    server: LocalServer = run(ask_twice())
+
+    assert len(set(server.peers)) == 1
+    assert server.payloads[0]["model"] == "local"
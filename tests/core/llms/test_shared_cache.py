@@ -0,0 +1,164 @@
+from asyncio import run, sleep
+from datetime import datetime, timezone, timedelta
+from typing import Optional, List, Tuple, cast
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.llms.context_processor import ContextProcessor
+from src.core.llms.schemas import LLMResponse
+from src.core.llms.shared_cache import SharedIntentCache
+from src.handlers.videos.schemas import CountVideosPerMoreViews
+from tests.core.llms.fakes import FakeIntentCacheDatabase, FakeLLM, always
+
+VIEWS: LLMResponse = LLMResponse(key_context="CountVideosPerMoreViews", context={"views": 1000})
+QUERY: str = "Сколько видео набрали больше 1000 просмотров?"
+
+
+class Moment:
+    """Часы SharedIntentCache, которые двигает тест"""
+
+    def __init__(self) -> None:
+        self.now: datetime = datetime(2025, 11, 1, tzinfo=timezone.utc)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def make_cache(
+        database: FakeIntentCacheDatabase,
+        clock: Optional[Moment] = None,
+        flush_seconds: float = 60.0
+) -> SharedIntentCache:
+    return SharedIntentCache(
+        session_factory=cast(async_sessionmaker[AsyncSession], database),
+        ttl_seconds=3600,
+        flush_seconds=flush_seconds,
+        clock=clock or Moment()
+    )
+
+
+def test_entry_is_stored_by_hash_of_normalized_query() -> None:
+    database: FakeIntentCacheDatabase = FakeIntentCacheDatabase()
+    cache: SharedIntentCache = make_cache(database=database)
+
+    run(cache.put(user_query=QUERY, llm_response=VIEWS))
+
+    ((key, entry),) = database.entries.items()
+    assert len(key) == 64
+    assert key == SharedIntentCache.query_key(user_query="сколько  видео набрали больше 1000 просмотров")
+    assert entry["query_text"] == "сколько видео набрали больше 1000 просмотров"
+    assert run(cache.get(user_query="СКОЛЬКО видео набрали больше 1000 просмотров")) == VIEWS
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_long_query_fits_fixed_length_key() -> None:
+    database: FakeIntentCacheDatabase = FakeIntentCacheDatabase()
+    cache: SharedIntentCache = make_cache(database=database)
+    long_query: str = QUERY + " очень подробно" * 500
+
+    run(cache.put(user_query=long_query, llm_response=VIEWS))
+
+    assert cache.errors == 0
+    assert run(cache.get(user_query=long_query)) == VIEWS
+
+
+def test_expired_entry_misses_and_is_purged() -> None:
+    database: FakeIntentCacheDatabase = FakeIntentCacheDatabase()
+    clock: Moment = Moment()
+    cache: SharedIntentCache = make_cache(database=database, clock=clock)
+    run(cache.put(user_query=QUERY, llm_response=VIEWS))
+
+    clock.now += timedelta(hours=1)
+
+    assert run(cache.get(user_query=QUERY)) is None
+    run(cache.purge())
+    assert database.entries == {}
+
+
+def test_query_with_relative_date_is_not_stored() -> None:
+    database: FakeIntentCacheDatabase = FakeIntentCacheDatabase()
+
+    run(make_cache(database=database).put(user_query="Сколько видео набрали больше 1000 просмотров вчера?",
+                                          llm_response=VIEWS))
+
+    assert database.entries == {}
+
+
+def test_hits_are_flushed_in_one_update_and_kept_on_error() -> None:
+    database: FakeIntentCacheDatabase = FakeIntentCacheDatabase()
+    cache: SharedIntentCache = make_cache(database=database)
+    run(cache.put(user_query=QUERY, llm_response=VIEWS))
+    cache.touch(user_query=QUERY)
+    cache.touch(user_query=QUERY.upper())
+
+    database.error = OperationalError(statement="UPDATE", params=None, orig=Exception("нет соединения"))
+    run(cache.flush())
+    assert cache.metrics()["pending_hits"] == 2
+
+    database.error = None
+    run(cache.flush())
+    assert database.entries[SharedIntentCache.query_key(user_query=QUERY)]["hits"] == 2
+    assert cache.metrics()["pending_hits"] == 0
+
+
+def test_database_error_is_a_miss() -> None:
+    database: FakeIntentCacheDatabase = FakeIntentCacheDatabase()
+    database.error = OperationalError(statement="SELECT", params=None, orig=Exception("нет соединения"))
+    cache: SharedIntentCache = make_cache(database=database)
+
+    assert run(cache.get(user_query=QUERY)) is None
+    assert run(cache.warm_up(limit=10)) == []
+    assert cache.errors == 2
+
+
+def test_warm_up_returns_most_hit_queries_as_text() -> None:
+    database: FakeIntentCacheDatabase = FakeIntentCacheDatabase()
+    cache: SharedIntentCache = make_cache(database=database)
+    run(cache.put(user_query="Сколько всего видео?", llm_response=LLMResponse(key_context="TotalCountVideos")))
+    run(cache.put(user_query=QUERY, llm_response=VIEWS))
+    cache.touch(user_query=QUERY)
+    run(cache.flush())
+
+    warmed: List[Tuple[str, LLMResponse]] = run(cache.warm_up(limit=1))
+
+    assert warmed == [("сколько видео набрали больше 1000 просмотров", VIEWS)]
+
+
+def test_attached_cache_warms_up_memory_cache() -> None:
+    database: FakeIntentCacheDatabase = FakeIntentCacheDatabase()
+    cache: SharedIntentCache = make_cache(database=database)
+    run(cache.put(user_query=QUERY, llm_response=VIEWS))
+    context_processor: ContextProcessor = ContextProcessor(llm_client=FakeLLM(answer=always(text="")), batching=False)
+
+    async def attach() -> None:
+        await context_processor.attach_shared_cache(shared_cache=cache)
+        await context_processor.aclose()
+
+    run(attach())
+
+    assert context_processor.cache.get(user_query=QUERY) == CountVideosPerMoreViews(views=1000)
+
+
+def test_maintenance_survives_unexpected_error(caplog: pytest.LogCaptureFixture) -> None:
+    database: FakeIntentCacheDatabase = FakeIntentCacheDatabase()
+    cache: SharedIntentCache = make_cache(database=database, flush_seconds=0.01)
+    run(cache.put(user_query=QUERY, llm_response=VIEWS))
+
+    async def maintain() -> None:
+        await cache.start()
+        database.error = RuntimeError("неожиданная ошибка")
+        await sleep(0.05)
+        database.error = None
+        cache.touch(user_query=QUERY)
+        await sleep(0.05)
+        assert cache._task is not None and not cache._task.done()
+        await cache.stop()
+
+    run(maintain())
+
+    assert cache.errors >= 1
+    assert "неожиданная ошибка" in caplog.text
+    # После ошибки фоновая задача продолжила работу и записала попадание
+    assert database.entries[SharedIntentCache.query_key(user_query=QUERY)]["hits"] == 1
@@ -0,0 +1,130 @@
+from asyncio import run, sleep, gather, create_task, Event, CancelledError, Task
+from typing import List, Union
+
+import pytest
+
+from src.core.llms.context_processor import ContextProcessor
+from src.core.llms.schemas import BaseResponse
+from src.core.llms.singleflight import SingleFlight
+from src.handlers.videos.schemas import CountVideosPerMoreViews, TotalCountVideos
+from tests.core.llms.fakes import FakeLLM, always, intent
+
+
+def test_concurrent_calls_with_same_key_share_one_call() -> None:
+    single_flight: SingleFlight = SingleFlight()
+    started: List[str] = []
+
+    async def call() -> BaseResponse:
+        started.append("call")
+        await sleep(0.01)
+        return CountVideosPerMoreViews(views=1000)
+
+    async def run_concurrently() -> List[BaseResponse]:
+        return list(await gather(*(single_flight.run(key="key", call=call) for _ in range(5))))
+
+    results: List[BaseResponse] = run(run_concurrently())
+
+    assert started == ["call"]
+    assert results == [CountVideosPerMoreViews(views=1000)] * 5
+    assert (single_flight.calls, single_flight.coalesced, len(single_flight)) == (1, 4, 0)
+
+
+def test_each_caller_gets_own_copy() -> None:
+    single_flight: SingleFlight = SingleFlight()
+
+    async def call() -> BaseResponse:
+        await sleep(0)
+        return CountVideosPerMoreViews(views=1000)
+
+    async def run_concurrently() -> List[BaseResponse]:
+        return list(await gather(single_flight.run(key="key", call=call), single_flight.run(key="key", call=call)))
+
+    first, second = run(run_concurrently())
+
+    assert first is not second
+
+
+def test_key_is_released_after_completion() -> None:
+    single_flight: SingleFlight = SingleFlight()
+
+    async def call() -> BaseResponse:
+        return TotalCountVideos()
+
+    async def run_sequentially() -> None:
+        await single_flight.run(key="key", call=call)
+        await single_flight.run(key="key", call=call)
+
+    run(run_sequentially())
+
+    assert (single_flight.calls, single_flight.coalesced) == (2, 0)
+
+
+def test_different_keys_run_separately() -> None:
+    single_flight: SingleFlight = SingleFlight()
+
+    async def call() -> BaseResponse:
+        await sleep(0.01)
+        return TotalCountVideos()
+
+    async def run_concurrently() -> None:
+        await gather(single_flight.run(key="a", call=call), single_flight.run(key="b", call=call))
+
+    run(run_concurrently())
+
+    assert single_flight.calls == 2
+
+
+def test_error_is_delivered_to_every_caller() -> None:
+    single_flight: SingleFlight = SingleFlight()
+
+    async def call() -> BaseResponse:
+        await sleep(0.01)
+        raise RuntimeError("LLM недоступна")
+
+    async def run_concurrently() -> List[Union[BaseResponse, BaseException]]:
+        return list(await gather(
+            single_flight.run(key="key", call=call),
+            single_flight.run(key="key", call=call),
+            return_exceptions=True
+        ))
+
+    errors: List[Union[BaseResponse, BaseException]] = run(run_concurrently())
+
+    assert [str(error) for error in errors] == ["LLM недоступна"] * 2
+    assert len(single_flight) == 0
+
+
+def test_cancelled_caller_does_not_cancel_shared_call() -> None:
+    single_flight: SingleFlight = SingleFlight()
+    release: Event = Event()
+
+    async def call() -> BaseResponse:
+        await release.wait()
+        return TotalCountVideos()
+
+    async def cancel_first() -> BaseResponse:
+        first: Task[BaseResponse] = create_task(single_flight.run(key="key", call=call))
+        second: Task[BaseResponse] = create_task(single_flight.run(key="key", call=call))
+        await sleep(0)
+        first.cancel()
+        with pytest.raises(CancelledError):
+            await first
+        release.set()
+        return await second
+
+    assert run(cancel_first()) == TotalCountVideos()
+
+
+def test_identical_concurrent_queries_reach_llm_once() -> None:
+    llm: FakeLLM = FakeLLM(answer=always(text=intent(key_context="TotalCountVideos")), delay=0.01)
+    context_processor: ContextProcessor = ContextProcessor(llm_client=llm, local_min_confidence=1.1, batching=False)
+
+    async def ask_concurrently() -> List[BaseResponse]:
+        return list(await gather(
+            context_processor.process_query(user_query="Сколько всего видео?"),
+            context_processor.process_query(user_query="сколько всего видео!"),
+            context_processor.process_query(user_query="Сколько ВСЕГО видео")
+        ))
+
+    assert run(ask_concurrently()) == [TotalCountVideos()] * 3
+    assert len(llm.calls) == 1
@@ -0,0 +1,86 @@
+from asyncio import run
+from typing import Optional
+
+import pytest
+
+from src.core.llms.context_processor import ContextProcessor
+from src.core.llms.schemas import LLMResponse
+from src.core.llms.template_cache import TemplateCache
+from src.handlers.videos.schemas import CountVideosPerMoreViews
+from tests.core.llms.fakes import FakeLLM, always, intent
+
+RESOLVED: str = "Сколько клипов набрали больше 1000 просмотров?"
+CREATOR_ID: str = "aca1061a9d324ecf8c3fa2bb32d7be63"
+
+
+def views_cache() -> TemplateCache:
+    """Кеш, в котором LLM уже распознала запрос с непривычным словом "клипов" (локальный разбор его не знает)"""
+    cache: TemplateCache = TemplateCache()
+    cache.put(user_query=RESOLVED, key_context="CountVideosPerMoreViews")
+    return cache
+
+
+def test_paraphrase_with_new_parameters_hits() -> None:
+    cache: TemplateCache = views_cache()
+
+    response: Optional[LLMResponse] = cache.get(user_query="Сколько клипов набрали больше 5000 просмотров?")
+
+    assert response == LLMResponse(key_context="CountVideosPerMoreViews", context={"views": 5000})
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+@pytest.mark.parametrize("user_query", [
+    # Похожи на шаблон больше порога сходства, но порог задан по другой метрике
+    "Сколько клипов набрали больше 5000 лайков?",
+    "Сколько клипов набрали больше 5000 комментариев?",
+    "Сколько клипов набрали больше 5000 жалоб?",
+    "Сколько клипов набрали больше 5000 просмотров и лайков?",
+    # Метрика не названа - какая имеется в виду, неизвестно
+    "Сколько клипов набрали больше 5000?",
+    "Сколько клипов набрали больше 5000 репостов?",
+    # Параметры не те, что нужны типу запроса
+    f"Сколько клипов креатора {CREATOR_ID} набрали больше 5000 просмотров?",
+    "Сколько клипов набрали больше 5000 просмотров 1 ноября 2025?",
+])
+def test_near_miss_paraphrase_misses(user_query: str) -> None:
+    cache: TemplateCache = views_cache()
+
+    assert cache.get(user_query=user_query) is None
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_response_for_checks_metric() -> None:
+    cache: TemplateCache = TemplateCache()
+
+    assert cache.response_for(user_query="Сколько клипов набрали больше 5000 лайков?",
+                              key_context="CountVideosPerMoreViews") is None
+    assert cache.response_for(user_query=RESOLVED, key_context="CountVideosPerMoreViews") == LLMResponse(
+        key_context="CountVideosPerMoreViews",
+        context={"views": 1000}
+    )
+
+
+def test_least_recently_used_template_is_evicted() -> None:
+    cache: TemplateCache = TemplateCache(max_size=1)
+    cache.put(user_query=RESOLVED, key_context="CountVideosPerMoreViews")
+    cache.put(user_query="Сколько клипов в базе?", key_context="TotalCountVideos")
+
+    assert len(cache) == 1
+    assert cache.get(user_query="Сколько клипов набрали больше 5000 просмотров?") is None
+
+
+def test_context_processor_asks_llm_for_paraphrase_about_other_metric() -> None:
+    llm: FakeLLM = FakeLLM(answer=always(text=intent(key_context="CountVideosPerMoreViews", context={"views": 1000})))
+    context_processor: ContextProcessor = ContextProcessor(llm_client=llm, batching=False)
+
+    async def ask_both() -> None:
+        await context_processor.process_query(user_query=RESOLVED)
+        await context_processor.process_query(user_query="Сколько клипов набрали больше 5000 лайков?")
+        assert await context_processor.process_query(
+            user_query="Сколько клипов набрали больше 7000 просмотров?"
+        ) == CountVideosPerMoreViews(views=7000)
+
+    run(ask_both())
+
+    assert len(llm.calls) == 2
+    assert context_processor.template_hits == 1
@@ -0,0 +1,64 @@
+from json import dumps as jsondumps
+from typing import Dict, Any, List
+
+from src.handlers.sso.columnar import ColumnarValidator
+from src.handlers.sso.records import VideoRecord
+
+CREATOR_ID: str = "aca1061a9d324ecf8c3fa2bb32d7be63"
+
+
+def make_snapshot(video_id: str, index: int = 0, **overrides: Any) -> Dict[str, Any]:
+    """Снапшот видео в формате загружаемого файла"""
+    snapshot: Dict[str, Any] = {
+        "id": f"{video_id}-s{index}",
+        "video_id": video_id,
+        "views_count": 100 * (index + 1),
+        "likes_count": 10 * (index + 1),
+        "comments_count": index + 1,
+        "reports_count": 0,
+        "delta_views_count": 100,
+        "delta_likes_count": 10,
+        "delta_comments_count": 1,
+        "delta_reports_count": 0,
+        "created_at": f"2025-11-{index + 1:02d}T10:00:00+00:00",
+        "updated_at": f"2025-11-{index + 1:02d}T10:00:00+00:00"
+    }
+    snapshot.update(overrides)
+    return snapshot
+
+
+def make_video(video_id: str, snapshots: int = 2, **overrides: Any) -> Dict[str, Any]:
+    """Видео с snapshots снапшотами в формате загружаемого файла"""
+    video: Dict[str, Any] = {
+        "id": video_id,
+        "creator_id": CREATOR_ID,
+        "video_created_at": "2025-10-30T08:00:00+00:00",
+        "views_count": 100 * snapshots,
+        "likes_count": 10 * snapshots,
+        "comments_count": snapshots,
+        "reports_count": 0,
+        "created_at": "2025-10-30T08:00:00+00:00",
+        "updated_at": "2025-11-30T08:00:00+00:00",
+        "snapshots": [make_snapshot(video_id=video_id, index=index) for index in range(snapshots)]
+    }
+    video.update(overrides)
+    return video
+
+
+def make_videos(count: int, snapshots: int = 2) -> List[Dict[str, Any]]:
+    return [make_video(video_id=f"video-{index}", snapshots=snapshots) for index in range(count)]
+
+
+def make_document(videos: List[Dict[str, Any]]) -> str:
+    """Файл загрузки {"videos": [...]}"""
+    return jsondumps({"videos": videos}, ensure_ascii=False)
+
+
+def make_ndjson(videos: List[Dict[str, Any]]) -> str:
+    """Файл загрузки в формате NDJSON: одно видео на строку"""
+    return "".join(jsondumps(video, ensure_ascii=False) + "\n" for video in videos)
+
+
+def make_records(count: int, snapshots: int = 2) -> List[VideoRecord]:
+    """Провалидированные видео - строки для записи в БД"""
+    return ColumnarValidator.validate_reference(items=make_videos(count=count, snapshots=snapshots))
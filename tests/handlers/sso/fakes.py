@@ -0,0 +1,232 @@
+from types import SimpleNamespace
+from typing import List, Tuple, Any, Dict, Optional
+
+from psycopg import sql
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from src.handlers.sso.models import IngestCheckpoints, IngestLog
+from src.handlers.videos.models import Videos
+
+
+class FakeCopy:
+    def __init__(self, rows: List[Tuple[Any, ...]]) -> None:
+        self.rows: List[Tuple[Any, ...]] = rows
+
+    async def write_row(self, row: Tuple[Any, ...]) -> None:
+        self.rows.append(row)
+
+    async def __aenter__(self) -> "FakeCopy":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        return None
+
+
+class FakeCursor:
+    """Курсор psycopg в памяти: запоминает COPY-строки по тексту запроса и выполненные запросы"""
+
+    def __init__(self, connection: "FakeConnection") -> None:
+        self.connection: FakeConnection = connection
+        self.rowcount: int = -1
+
+    def copy(self, statement: sql.Composable) -> FakeCopy:
+        return FakeCopy(rows=self.connection.copied.setdefault(statement.as_string(None), []))
+
+    async def execute(self, statement: sql.Composable) -> None:
+        query: str = statement.as_string(None)
+        self.connection.executed.append(query)
+        self.rowcount = self.connection.rowcounts.get(query, -1)
+
+    async def fetchall(self) -> List[Tuple[Any, ...]]:
+        return self.connection.results.get(self.connection.executed[-1], [])
+
+    async def __aenter__(self) -> "FakeCursor":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        return None
+
+
+class FakeConnection:
+    """
+    Соединение psycopg без БД для CopyBulkLoader. results и rowcounts задают ответ на запрос по его тексту
+    """
+
+    def __init__(
+            self,
+            results: Optional[Dict[str, List[Tuple[Any, ...]]]] = None,
+            rowcounts: Optional[Dict[str, int]] = None
+    ) -> None:
+        self.results: Dict[str, List[Tuple[Any, ...]]] = results or {}
+        self.rowcounts: Dict[str, int] = rowcounts or {}
+        self.copied: Dict[str, List[Tuple[Any, ...]]] = {}
+        self.executed: List[str] = []
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(connection=self)
+
+
+class FakeResult:
+    def __init__(self, rows: List[Tuple[Any, ...]]) -> None:
+        self.rows: List[Tuple[Any, ...]] = rows
+
+    def scalars(self) -> List[Any]:
+        return [row[0] for row in self.rows]
+
+    def all(self) -> List[Tuple[Any, ...]]:
+        return self.rows
+
+    def fetchall(self) -> List[Tuple[Any, ...]]:
+        return self.rows
+
+    def scalar_one(self) -> Any:
+        (row,) = self.rows
+        return row[0]
+
+    def scalar_one_or_none(self) -> Any:
+        return self.rows[0][0] if self.rows else None
+
+
+class FakeUploadSession:
+    """
+    AsyncSession в памяти для UploadRepository с загрузчиком UploadLoader.orm: хранит видео, снапшоты
+    и контрольные точки и отвечает на запросы, которые делает репозиторий. Записи видны сразу, без транзакций
+    """
+
+    CHECKPOINT_COLUMNS: Tuple[str, ...] = ("upload_key", "batches_committed", "videos_committed", "snapshots_committed")
+
+    def __init__(self, videos: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        self.videos: Dict[str, Dict[str, Any]] = videos or {}
+        self.snapshots: Dict[str, Dict[str, Any]] = {}
+        self.checkpoints: Dict[str, Dict[str, Any]] = {}
+        # Значения контрольных точек в порядке записи
+        self.checkpoint_history: List[Dict[str, Any]] = []
+        # Выполненные запросы и их параметры (список строк для executemany)
+        self.statements: List[Tuple[Any, Any]] = []
+        self.commits: int = 0
+        self.rollbacks: int = 0
+
+    async def execute(self, statement: Any, params: Any = None) -> FakeResult:
+        self.statements.append((statement, params))
+        if statement.is_dml:
+            table: str = statement.table.name
+        else:
+            table = statement.column_descriptions[0]["entity"].__tablename__
+        compiled: Dict[str, Any] = statement.compile(dialect=postgresql.dialect()).params
+
+        if statement.is_select:
+            stored: Dict[str, Any] = self.videos if table == Videos.__tablename__ else self.snapshots
+            return FakeResult(rows=[(key,) for key in compiled["ids"] if key in stored])
+        if table == IngestCheckpoints.__tablename__:
+            if statement.is_delete:
+                self.checkpoints.pop(compiled["upload_key_1"], None)
+            else:
+                values: Dict[str, Any] = {column: compiled[column] for column in self.CHECKPOINT_COLUMNS}
+                self.checkpoints[values["upload_key"]] = values
+                self.checkpoint_history.append(values)
+            return FakeResult(rows=[])
+        if table == Videos.__tablename__:
+            return FakeResult(rows=[(inserted,) for inserted in map(self._upsert_video, params)
+                                    if inserted is not None])
+        new_snapshots: List[Dict[str, Any]] = [row for row in params if row["id"] not in self.snapshots]
+        self.snapshots.update((row["id"], row) for row in new_snapshots)
+        return FakeResult(rows=[(row["id"],) for row in new_snapshots])
+
+    async def get(self, model: Any, key: str) -> Optional[IngestCheckpoints]:
+        values: Optional[Dict[str, Any]] = self.checkpoints.get(key)
+        return IngestCheckpoints(**values) if values is not None else None
+
+    def add_all(self, objects: List[Any]) -> None:
+        for item in objects:
+            row: Dict[str, Any] = {column.name: getattr(item, column.name) for column in item.__table__.columns}
+            stored: Dict[str, Dict[str, Any]] = self.videos if isinstance(item, Videos) else self.snapshots
+            if row["id"] in stored:
+                raise IntegrityError(statement="INSERT", params=None, orig=Exception(f"duplicate key {row['id']}"))
+            stored[row["id"]] = row
+
+    async def flush(self) -> None:
+        return None
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+    async def rollback(self) -> None:
+        self.rollbacks += 1
+
+    def expunge_all(self) -> None:
+        return None
+
+    def _upsert_video(self, row: Dict[str, Any]) -> Optional[bool]:
+        """INSERT ... ON CONFLICT DO UPDATE WHERE updated_at новее: True - вставка, False - обновление"""
+        existing: Optional[Dict[str, Any]] = self.videos.get(row["id"])
+        if existing is not None and existing["updated_at"] >= row["updated_at"]:
+            return None
+        self.videos[row["id"]] = row
+        return existing is None
+
+
+class FakeCopySession(FakeUploadSession):
+    """
+    FakeUploadSession с psycopg-соединением для COPY. Как и соединение из пула, после коммита оно
+    возвращается в пул, и следующая транзакция получает другое: connections[-1] - текущее
+    """
+
+    def __init__(self, videos: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        super().__init__(videos=videos)
+        self.connections: List[FakeConnection] = [FakeConnection()]
+
+    async def connection(self) -> SimpleNamespace:
+        driver_connection: FakeConnection = self.connections[-1]
+
+        async def get_raw_connection() -> SimpleNamespace:
+            return SimpleNamespace(driver_connection=driver_connection)
+
+        return SimpleNamespace(get_raw_connection=get_raw_connection)
+
+    async def commit(self) -> None:
+        await super().commit()
+        self.connections.append(FakeConnection())
+
+
+class FakeIngestLogSession:
+    """AsyncSession в памяти для записей ingest_log: поиск по file_unique_id и по хешу, upsert записи"""
+
+    def __init__(self, entries: Optional[List[Dict[str, Any]]] = None) -> None:
+        self.entries: Dict[str, Dict[str, Any]] = {entry["file_unique_id"]: entry for entry in entries or []}
+        self.commits: int = 0
+
+    async def get(self, model: Any, key: str) -> Optional[IngestLog]:
+        values: Optional[Dict[str, Any]] = self.entries.get(key)
+        return IngestLog(**values) if values is not None else None
+
+    async def execute(self, statement: Any) -> FakeResult:
+        compiled: Dict[str, Any] = statement.compile(dialect=postgresql.dialect()).params
+        if statement.is_select:
+            found: List[Dict[str, Any]] = sorted(
+                (entry for entry in self.entries.values() if entry["content_hash"] == compiled["content_hash_1"]),
+                key=lambda entry: entry["imported_at"]
+            )
+            return FakeResult(rows=[(IngestLog(**entry),) for entry in found[:1]])
+
+        values: Dict[str, Any] = {column.name: compiled[column.name] for column in IngestLog.__table__.columns}
+        self.entries[values["file_unique_id"]] = values
+        return FakeResult(rows=[])
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+
+class FakeMessage:
+    """Сообщение в чате chat_id: запоминает тексты редактирований и ответов"""
+
+    def __init__(self, chat_id: int = 1) -> None:
+        self.chat: SimpleNamespace = SimpleNamespace(id=chat_id)
+        self.edits: List[str] = []
+        self.answers: List[str] = []
+
+    async def edit_text(self, text: str) -> None:
+        self.edits.append(text)
+
+    async def answer(self, text: str) -> None:
+        self.answers.append(text)
@@ -0,0 +1,131 @@
+from pathlib import Path
+from re import escape
+from typing import List, Dict, Any, Callable
+
+import pytest
+
+from src.handlers.sso.columnar import ColumnarValidator, ColumnarFallback
+from src.handlers.sso.enums import ValidationMode
+from src.handlers.sso.records import VideoRecord
+from src.handlers.sso.utils import FileValidator
+from tests.handlers.sso.factories import make_videos, make_document
+
+Mutation = Callable[[List[Dict[str, Any]]], None]
+
+
+def set_video(index: int, **values: Any) -> Mutation:
+    return lambda videos: videos[index].update(values)
+
+
+def set_snapshot(index: int, snapshot: int, **values: Any) -> Mutation:
+    return lambda videos: videos[index]["snapshots"][snapshot].update(values)
+
+
+def drop_video_field(index: int, name: str) -> Mutation:
+    return lambda videos: videos[index].pop(name)
+
+
+VALID: Dict[str, Mutation] = {
+    "as_is": lambda videos: None,
+    "without_snapshots": set_video(1, snapshots=[]),
+    "counter_as_string": set_video(1, views_count="15"),
+    "counter_as_float": set_snapshot(2, 1, delta_likes_count=3.0),
+    "date_as_timestamp": set_video(0, created_at=1764489600),
+    "date_without_offset": set_snapshot(0, 0, created_at="2025-11-01T10:00:00"),
+    "zero_counters": set_video(3, views_count=0, likes_count=0, comments_count=0, reports_count=0),
+}
+
+INVALID: Dict[str, Mutation] = {
+    "negative_video_counter": set_video(2, likes_count=-1),
+    "negative_snapshot_counter": set_snapshot(3, 1, reports_count=-5),
+    "short_creator_id": set_video(1, creator_id="a" * 31),
+    "long_creator_id": set_video(1, creator_id="a" * 33),
+    "missing_field": drop_video_field(2, "updated_at"),
+    "bad_date": set_video(3, video_created_at="вчера"),
+    "counter_as_text": set_snapshot(0, 0, views_count="много"),
+    "id_as_number": set_video(2, id=42),
+    "snapshot_of_other_video": set_snapshot(2, 1, video_id="video-0"),
+    "video_id_of_snapshots_not_renamed": set_video(3, id="video-renamed"),
+}
+
+
+def videos_with(mutation: Mutation) -> List[Dict[str, Any]]:
+    videos: List[Dict[str, Any]] = make_videos(count=4, snapshots=2)
+    mutation(videos)
+    return videos
+
+
+def read_file(path: Path, validation: ValidationMode) -> List[VideoRecord]:
+    return list(FileValidator.iter_videos(file_path=path, chunk_size=256, validation=validation))
+
+
+@pytest.mark.parametrize("mutation", VALID.values(), ids=VALID.keys())
+def test_columnar_accepts_what_video_schema_accepts(mutation: Mutation) -> None:
+    videos: List[Dict[str, Any]] = videos_with(mutation=mutation)
+
+    assert ColumnarValidator.validate_records(items=videos) == ColumnarValidator.validate_reference(items=videos)
+
+
+@pytest.mark.parametrize("mutation", INVALID.values(), ids=INVALID.keys())
+def test_columnar_rejects_what_video_schema_rejects(mutation: Mutation) -> None:
+    videos: List[Dict[str, Any]] = videos_with(mutation=mutation)
+
+    with pytest.raises(ValueError) as reference:
+        ColumnarValidator.validate_reference(items=videos, first_index=10)
+    with pytest.raises(ValueError) as columnar:
+        ColumnarValidator.validate_records(items=videos, first_index=10)
+
+    # Оба пути указывают на одно и то же видео в файле
+    failed: str = str(reference.value).split(":")[0]
+    assert failed in str(columnar.value)
+
+
+@pytest.mark.parametrize("mutation", [*VALID.values(), *INVALID.values()], ids=[*VALID.keys(), *INVALID.keys()])
+def test_validation_modes_give_same_result_for_file(tmp_path: Path, mutation: Mutation) -> None:
+    path: Path = tmp_path / "videos.json"
+    path.write_text(make_document(videos=videos_with(mutation=mutation)), encoding="utf-8")
+
+    try:
+        expected: List[VideoRecord] = read_file(path=path, validation=ValidationMode.pydantic)
+    except ValueError:
+        with pytest.raises(ValueError):
+            read_file(path=path, validation=ValidationMode.columnar)
+        return
+
+    assert read_file(path=path, validation=ValidationMode.columnar) == expected
+
+
+def test_values_only_pydantic_understands_fall_back_to_reference() -> None:
+    with pytest.raises(ColumnarFallback):
+        ColumnarValidator.to_columns(items=videos_with(mutation=VALID["date_as_timestamp"]))
+
+
+def test_check_reports_every_error_with_its_position() -> None:
+    videos: List[Dict[str, Any]] = videos_with(mutation=set_video(1, creator_id="short", views_count=-1))
+    set_snapshot(3, 1, likes_count=-2)(videos)
+    set_snapshot(2, 1, video_id="video-0")(videos)
+
+    errors: List[str] = ColumnarValidator.check(columns=ColumnarValidator.to_columns(items=videos), first_index=100)
+
+    assert errors == [
+        "videos[101].views_count: значение должно быть >= 0",
+        "videos[101].creator_id: длина должна быть 32 символа",
+        "videos[103].snapshots[1].likes_count: значение должно быть >= 0",
+        "videos[102].snapshots[1].video_id: не совпадает с id видео, в которое вложен снапшот",
+    ]
+    with pytest.raises(ValueError, match=escape("Ошибки валидации (4):")):
+        ColumnarValidator.validate_records(items=videos, first_index=100)
+
+
+@pytest.mark.parametrize(("video", "snapshot"), [(0, 0), (2, 1), (3, 0)])
+def test_foreign_snapshot_is_reported_at_same_position_by_both_paths(video: int, snapshot: int) -> None:
+    videos: List[Dict[str, Any]] = videos_with(mutation=set_snapshot(video, snapshot, video_id="video-1"))
+
+    with pytest.raises(ValueError) as reference:
+        ColumnarValidator.validate_reference(items=videos, first_index=10)
+    with pytest.raises(ValueError) as columnar:
+        ColumnarValidator.validate_records(items=videos, first_index=10)
+
+    assert f"videos[{10 + video}]" in str(reference.value)
+    assert f"snapshots[{snapshot}].video_id" in str(reference.value)
+    assert f"videos[{10 + video}].snapshots[{snapshot}].video_id" in str(columnar.value)
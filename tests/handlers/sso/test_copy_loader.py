@@ -0,0 +1,39 @@
+from asyncio import run
+from typing import List, Tuple, Any, cast
+
+from psycopg import AsyncConnection
+
+from src.handlers.sso.copy_loader import CopyBulkLoader
+from src.handlers.sso.records import VIDEO_COLUMNS, SNAPSHOT_COLUMNS, VideoRecord
+from tests.handlers.sso.factories import make_records
+from tests.handlers.sso.fakes import FakeConnection
+
+VIDEOS_COPY: str = CopyBulkLoader._copy_statement("videos", VIDEO_COLUMNS).as_string(None)
+SNAPSHOTS_COPY: str = CopyBulkLoader._copy_statement("video_snapshots", SNAPSHOT_COLUMNS).as_string(None)
+
+
+def copy_batch(connection: FakeConnection, batch: List[VideoRecord]) -> Tuple[int, int]:
+    return run(CopyBulkLoader.copy_batch(connection=cast(AsyncConnection, connection), batch=batch))
+
+
+def test_copy_statement_lists_columns_in_row_order() -> None:
+    assert VIDEOS_COPY == 'COPY "videos" (' + ", ".join(f'"{column}"' for column in VIDEO_COLUMNS) + ") FROM STDIN"
+
+
+def test_copy_batch_writes_videos_then_snapshots() -> None:
+    connection: FakeConnection = FakeConnection()
+    batch: List[VideoRecord] = make_records(count=3, snapshots=2)
+
+    assert copy_batch(connection=connection, batch=batch) == (3, 6)
+    assert list(connection.copied) == [VIDEOS_COPY, SNAPSHOTS_COPY]
+    assert connection.copied[VIDEOS_COPY] == [video for video, _ in batch]
+    snapshot_rows: List[Tuple[Any, ...]] = connection.copied[SNAPSHOTS_COPY]
+    assert snapshot_rows == [snapshot for _, snapshots in batch for snapshot in snapshots]
+    assert all(len(row) == len(SNAPSHOT_COLUMNS) for row in snapshot_rows)
+
+
+def test_copy_batch_without_snapshots() -> None:
+    connection: FakeConnection = FakeConnection()
+
+    assert copy_batch(connection=connection, batch=make_records(count=2, snapshots=0)) == (2, 0)
+    assert connection.copied[SNAPSHOTS_COPY] == []
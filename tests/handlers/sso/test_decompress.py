@@ -0,0 +1,76 @@
+from gzip import compress as gzip_compress
+from typing import List
+
+import pytest
+from zstandard import ZstdCompressor
+
+from src.handlers.sso.decompress import StreamDecompressor
+from src.handlers.sso.enums import Compression
+
+DATA: bytes = b"".join(b'{"id": "video-%d"}\n' % index for index in range(20000))
+
+
+def compress(compression: Compression, data: bytes) -> bytes:
+    if compression == Compression.gzip:
+        return gzip_compress(data)
+    return ZstdCompressor().compress(data)
+
+
+def decompress(decompressor: StreamDecompressor, data: bytes, chunk_size: int) -> bytes:
+    output: List[bytes] = []
+    for start in range(0, len(data), chunk_size):
+        output.extend(decompressor.decompress(data[start:start + chunk_size]))
+    decompressor.close()
+    return b"".join(output)
+
+
+@pytest.mark.parametrize("compression", [Compression.gzip, Compression.zstd])
+@pytest.mark.parametrize("chunk_size", [1000, 1024 * 1024])
+def test_chunks_are_decompressed_in_bounded_parts(compression: Compression, chunk_size: int) -> None:
+    decompressor: StreamDecompressor = StreamDecompressor(compression=compression, chunk_size=4096)
+    compressed: bytes = compress(compression=compression, data=DATA)
+    parts: List[bytes] = []
+
+    for start in range(0, len(compressed), chunk_size):
+        parts.extend(decompressor.decompress(compressed[start:start + chunk_size]))
+    decompressor.close()
+
+    assert b"".join(parts) == DATA
+    if compression == Compression.gzip:
+        assert max(map(len, parts)) <= 4096
+
+
+@pytest.mark.parametrize("compression", [Compression.gzip, Compression.zstd])
+def test_concatenated_frames_are_decompressed(compression: Compression) -> None:
+    compressed: bytes = compress(compression=compression, data=b"first\n") + compress(compression, data=b"second\n")
+
+    output: bytes = decompress(decompressor=StreamDecompressor(compression=compression), data=compressed, chunk_size=7)
+
+    assert output == b"first\nsecond\n"
+
+
+@pytest.mark.parametrize("compression", [Compression.gzip, Compression.zstd])
+def test_output_size_is_limited(compression: Compression) -> None:
+    decompressor: StreamDecompressor = StreamDecompressor(compression=compression, max_output_size=len(DATA) - 1)
+
+    with pytest.raises(ValueError, match="Распакованный файл слишком большой"):
+        decompress(decompressor=decompressor, data=compress(compression=compression, data=DATA), chunk_size=65536)
+
+
+@pytest.mark.parametrize("compression", [Compression.gzip, Compression.zstd])
+def test_truncated_archive_is_rejected(compression: Compression) -> None:
+    compressed: bytes = compress(compression=compression, data=DATA)
+
+    with pytest.raises(ValueError, match="архив поврежден или обрезан"):
+        decompress(decompressor=StreamDecompressor(compression=compression), data=compressed[:-10], chunk_size=65536)
+
+
+@pytest.mark.parametrize("compression", [Compression.gzip, Compression.zstd])
+def test_corrupted_archive_is_rejected(compression: Compression) -> None:
+    with pytest.raises(ValueError, match="Ошибка распаковки файла"):
+        decompress(decompressor=StreamDecompressor(compression=compression), data=b"not an archive", chunk_size=4)
+
+
+def test_uncompressed_file_has_no_decompressor() -> None:
+    with pytest.raises(ValueError):
+        StreamDecompressor(compression=Compression.none)
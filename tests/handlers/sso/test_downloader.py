@@ -0,0 +1,97 @@
+from asyncio import run
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Dict, Any, AsyncIterator, TypeVar, cast
+
+import pytest
+from aiogram import Bot
+
+from src.handlers.sso import utils
+from src.handlers.sso.downloader import TelegramFileStream
+from src.handlers.sso.progress import UploadProgress
+from src.handlers.sso.records import VideoRecord
+from src.handlers.sso.utils import FileValidator
+from tests.handlers.sso.factories import make_videos, make_document
+
+T = TypeVar("T")
+
+
+async def as_chunks(data: bytes, chunk_size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+async def collect(items: AsyncIterator[T]) -> List[T]:
+    return [item async for item in items]
+
+
+def test_aiter_videos_matches_file_reader(tmp_path: Path) -> None:
+    document: bytes = make_document(videos=make_videos(count=4, snapshots=3)).encode("utf-8")
+    path: Path = tmp_path / "videos.json"
+    path.write_bytes(document)
+    progress: UploadProgress = UploadProgress(total_bytes=len(document))
+
+    streamed: List[VideoRecord] = run(collect(items=FileValidator.aiter_videos(
+        chunks=as_chunks(data=document, chunk_size=100),
+        progress=progress
+    )))
+
+    assert streamed == list(FileValidator.iter_videos(file_path=path))
+    assert progress.bytes_read == len(document)
+
+
+def test_aiter_videos_stops_when_size_limit_is_exceeded(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(utils, "MAX_FILE_SIZE_MB", 1)
+    document: bytes = make_document(videos=make_videos(count=2500, snapshots=1)).encode("utf-8")
+    assert len(document) > 1024 * 1024
+
+    with pytest.raises(ValueError, match="Файл слишком большой"):
+        run(collect(items=FileValidator.aiter_videos(chunks=as_chunks(data=document, chunk_size=64 * 1024))))
+
+
+def fake_bot(is_local: bool, requests: List[Dict[str, Any]], chunks: List[bytes], local_path: str = "") -> Bot:
+    async def stream_content(**kwargs: Any) -> AsyncIterator[bytes]:
+        requests.append(kwargs)
+        for chunk in chunks:
+            yield chunk
+
+    api: SimpleNamespace = SimpleNamespace(
+        is_local=is_local,
+        file_url=lambda token, path: f"https://files/{token}/{path}",
+        wrap_local_file=SimpleNamespace(to_local=lambda path: local_path)
+    )
+    return cast(Bot, SimpleNamespace(token="token", session=SimpleNamespace(api=api, stream_content=stream_content)))
+
+
+def test_remote_file_is_streamed_without_temp_file() -> None:
+    requests: List[Dict[str, Any]] = []
+    bot: Bot = fake_bot(is_local=False, requests=requests, chunks=[b"ab", b"cd"])
+
+    chunks: List[bytes] = run(collect(items=TelegramFileStream.iter_chunks(
+        bot=bot,
+        file_path="documents/file.json",
+        chunk_size=2,
+        timeout=10
+    )))
+
+    assert chunks == [b"ab", b"cd"]
+    assert requests == [{
+        "url": "https://files/token/documents/file.json",
+        "timeout": 10,
+        "chunk_size": 2,
+        "raise_for_status": True
+    }]
+
+
+def test_local_bot_api_file_is_read_from_disk(tmp_path: Path) -> None:
+    path: Path = tmp_path / "file.json"
+    path.write_bytes(b"0123456789")
+    bot: Bot = fake_bot(is_local=True, requests=[], chunks=[], local_path=str(path))
+
+    chunks: List[bytes] = run(collect(items=TelegramFileStream.iter_chunks(
+        bot=bot,
+        file_path="documents/file.json",
+        chunk_size=4
+    )))
+
+    assert chunks == [b"0123", b"4567", b"89"]
@@ -0,0 +1,138 @@
+from asyncio import run
+from datetime import datetime, timezone
+from gzip import compress as gzip_compress
+from hashlib import sha256
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Dict, Any, Optional, AsyncIterator, cast
+
+from aiogram.types import Document, Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.handlers.sso.models import IngestLog
+from src.handlers.sso.processor import UploadRepository
+from src.handlers.sso.routes import _reply_if_duplicate
+from src.handlers.sso.utils import ContentHasher, FileValidator
+from tests.handlers.sso.fakes import FakeIngestLogSession, FakeMessage
+
+IMPORTED_AT: datetime = datetime(2025, 12, 1, tzinfo=timezone.utc)
+
+
+def log_entry(file_unique_id: str, content_hash: str, imported_at: datetime = IMPORTED_AT) -> Dict[str, Any]:
+    return {
+        "file_unique_id": file_unique_id,
+        "content_hash": content_hash,
+        "file_name": "videos.json",
+        "videos_created": 10,
+        "videos_updated": 2,
+        "snapshots_created": 30,
+        "imported_at": imported_at
+    }
+
+
+def test_hash_file_matches_hash_of_streamed_chunks(tmp_path: Path) -> None:
+    data: bytes = gzip_compress(b'{"videos": []}' * 100000)
+    path: Path = tmp_path / "videos.json.gz"
+    path.write_bytes(data)
+    hasher: ContentHasher = ContentHasher()
+
+    async def stream() -> List[bytes]:
+        return [chunk async for chunk in hasher.wrap(chunks=FileValidator.aread_file(file_path=path, chunk_size=4096))]
+
+    chunks: List[bytes] = run(stream())
+
+    assert b"".join(chunks) == data
+    assert hasher.hexdigest() == sha256(data).hexdigest()
+    assert run(ContentHasher.hash_file(file_path=path)) == sha256(data).hexdigest()
+
+
+def test_aread_file_reads_in_chunks(tmp_path: Path) -> None:
+    path: Path = tmp_path / "videos.json"
+    path.write_bytes(b"0123456789")
+
+    async def read() -> List[bytes]:
+        chunks: AsyncIterator[bytes] = FileValidator.aread_file(file_path=path, chunk_size=4)
+        return [chunk async for chunk in chunks]
+
+    assert run(read()) == [b"0123", b"4567", b"89"]
+
+
+def find(session: FakeIngestLogSession, **keys: Optional[str]) -> Optional[IngestLog]:
+    return run(UploadRepository.find_ingest_log(session=cast(AsyncSession, session), **keys))
+
+
+def test_ingest_log_is_found_by_file_id_or_content_hash() -> None:
+    session: FakeIngestLogSession = FakeIngestLogSession(entries=[
+        log_entry(file_unique_id="copy", content_hash="hash", imported_at=datetime(2025, 12, 5, tzinfo=timezone.utc)),
+        log_entry(file_unique_id="original", content_hash="hash"),
+    ])
+
+    by_file_id: Optional[IngestLog] = find(session=session, file_unique_id="copy")
+    by_hash: Optional[IngestLog] = find(session=session, file_unique_id="new", content_hash="hash")
+
+    assert by_file_id is not None and by_file_id.file_unique_id == "copy"
+    # Среди копий с тем же хешем возвращается самая ранняя загрузка
+    assert by_hash is not None and by_hash.file_unique_id == "original"
+    assert find(session=session, file_unique_id="new") is None
+    assert find(session=session, file_unique_id="new", content_hash="other") is None
+
+
+def test_save_ingest_log_overwrites_entry_of_same_file() -> None:
+    session: FakeIngestLogSession = FakeIngestLogSession()
+    stats: Dict[str, Any] = {'videos_created': 1, 'videos_updated': 0, 'snapshots_created': 5}
+
+    for content_hash in ("first", "second"):
+        run(UploadRepository.save_ingest_log(
+            session=cast(AsyncSession, session),
+            file_unique_id="file",
+            content_hash=content_hash,
+            file_name="x" * 300,
+            stats=stats
+        ))
+
+    assert list(session.entries) == ["file"]
+    assert session.entries["file"]["content_hash"] == "second"
+    assert len(session.entries["file"]["file_name"]) == 255
+    assert session.commits == 2
+
+
+def reply_if_duplicate(
+        session: FakeIngestLogSession,
+        message: FakeMessage,
+        file_unique_id: str,
+        content_hash: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    document: Document = cast(Document, SimpleNamespace(file_unique_id=file_unique_id, file_name="copy.json"))
+    return run(_reply_if_duplicate(
+        session=cast(AsyncSession, session),
+        document=document,
+        processing_msg=cast(Message, message),
+        content_hash=content_hash
+    ))
+
+
+def test_copy_of_loaded_file_is_reported_and_remembered() -> None:
+    session: FakeIngestLogSession = FakeIngestLogSession(entries=[log_entry(file_unique_id="original", content_hash="h")])
+    message: FakeMessage = FakeMessage()
+
+    stats: Optional[Dict[str, Any]] = reply_if_duplicate(
+        session=session,
+        message=message,
+        file_unique_id="copy",
+        content_hash="h"
+    )
+
+    assert stats is not None and (stats['videos_created'], stats['snapshots_created']) == (10, 30)
+    assert "уже загружен 01.12.2025" in message.edits[0]
+    # Копия записана с исходными статистикой и временем: в следующий раз ее отсечет file_unique_id
+    assert session.entries["copy"]["imported_at"] == IMPORTED_AT
+    assert session.entries["copy"]["file_name"] == "copy.json"
+
+
+def test_new_file_is_not_reported_as_duplicate() -> None:
+    session: FakeIngestLogSession = FakeIngestLogSession(entries=[log_entry(file_unique_id="original", content_hash="h")])
+    message: FakeMessage = FakeMessage()
+
+    assert reply_if_duplicate(session=session, message=message, file_unique_id="new", content_hash="other") is None
+    assert message.edits == []
+    assert list(session.entries) == ["original"]
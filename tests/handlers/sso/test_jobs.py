@@ -0,0 +1,96 @@
+from asyncio import run, wait_for
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, cast
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.handlers.sso import jobs
+from src.handlers.sso.enums import JobStatus
+from src.handlers.sso.jobs import IngestJob, IngestionQueue
+
+
+class FakeSessionFactory:
+    def __init__(self) -> None:
+        self.opened: int = 0
+
+    def __call__(self) -> "FakeSessionFactory":
+        self.opened += 1
+        return self
+
+    async def __aenter__(self) -> AsyncSession:
+        return cast(AsyncSession, object())
+
+    async def __aexit__(self, *args: Any) -> None:
+        return None
+
+
+async def succeed(job: IngestJob, session: AsyncSession, pool: ProcessPoolExecutor) -> Dict[str, Any]:
+    return {'videos_processed': 1}
+
+
+async def fail(job: IngestJob, session: AsyncSession, pool: ProcessPoolExecutor) -> Dict[str, Any]:
+    raise ValueError("videos[0]: ошибка валидации")
+
+
+def make_queue(factory: FakeSessionFactory, max_queued: int = 20) -> IngestionQueue:
+    return IngestionQueue(
+        session_factory=cast(async_sessionmaker[AsyncSession], factory),
+        workers=1,
+        max_queued=max_queued,
+        process_workers=1
+    )
+
+
+def test_submitted_jobs_are_queued_and_found_by_id() -> None:
+    queue: IngestionQueue = make_queue(factory=FakeSessionFactory())
+    job: IngestJob = IngestJob(run=succeed, chat_id=1, file_name="videos.json")
+
+    queue.submit(job=job)
+
+    assert queue.get(job_id=job.id) is job
+    assert queue.get(job_id="missing") is None
+    assert (job.status, queue.queued) == (JobStatus.queued, 1)
+
+
+def test_full_queue_rejects_job() -> None:
+    queue: IngestionQueue = make_queue(factory=FakeSessionFactory(), max_queued=1)
+    queue.submit(job=IngestJob(run=succeed, chat_id=1, file_name="first.json"))
+    rejected: IngestJob = IngestJob(run=succeed, chat_id=1, file_name="second.json")
+
+    with pytest.raises(ValueError, match="Очередь загрузки заполнена"):
+        queue.submit(job=rejected)
+    assert queue.get(job_id=rejected.id) is None
+
+
+def test_job_history_keeps_latest_jobs(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(jobs, "INGEST_JOBS_HISTORY", 2)
+    queue: IngestionQueue = make_queue(factory=FakeSessionFactory())
+    submitted: List[IngestJob] = [IngestJob(run=succeed, chat_id=1, file_name=f"{i}.json") for i in range(3)]
+
+    for job in submitted:
+        queue.submit(job=job)
+
+    assert [queue.get(job_id=job.id) for job in submitted] == [None, submitted[1], submitted[2]]
+
+
+def test_worker_runs_jobs_with_own_session_and_records_result() -> None:
+    factory: FakeSessionFactory = FakeSessionFactory()
+    done: IngestJob = IngestJob(run=succeed, chat_id=1, file_name="ok.json")
+    failed: IngestJob = IngestJob(run=fail, chat_id=1, file_name="bad.json")
+
+    async def process() -> None:
+        queue: IngestionQueue = make_queue(factory=factory)
+        await queue.start()
+        try:
+            queue.submit(job=done)
+            queue.submit(job=failed)
+            await wait_for(queue._queue.join(), timeout=5)
+        finally:
+            await queue.stop()
+
+    run(process())
+
+    assert (done.status, done.stats) == (JobStatus.done, {'videos_processed': 1})
+    assert (failed.status, failed.error) == (JobStatus.failed, "videos[0]: ошибка валидации")
+    assert factory.opened == 2
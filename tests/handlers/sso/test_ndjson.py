@@ -0,0 +1,97 @@
+from gzip import compress as gzip_compress
+from json import loads as jsonloads
+from pathlib import Path
+from re import escape
+from typing import List, Dict, Any, Optional, Tuple
+
+import pytest
+from zstandard import ZstdCompressor
+
+from src.handlers.sso.enums import DocumentFormat, Compression
+from src.handlers.sso.records import VideoRecord
+from src.handlers.sso.stream_parser import VideosLinesParser
+from src.handlers.sso.utils import FileValidator
+from tests.handlers.sso.factories import make_videos, make_document, make_ndjson
+
+
+def parse(parser: VideosLinesParser, data: bytes, chunk_size: int) -> List[Any]:
+    items: List[Any] = []
+    for start in range(0, len(data), chunk_size):
+        items.extend(parser.feed_bytes(data[start:start + chunk_size]))
+    return items + parser.close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 100, 10 ** 6])
+def test_lines_are_parsed_for_any_chunk_size(chunk_size: int) -> None:
+    videos: List[Dict[str, Any]] = make_videos(count=5)
+    data: bytes = make_ndjson(videos=videos).encode("utf-8")
+
+    assert parse(parser=VideosLinesParser(), data=data, chunk_size=chunk_size) == videos
+
+
+def test_blank_lines_crlf_and_missing_final_newline_are_accepted() -> None:
+    data: bytes = b'\r\n{"id": "a"}\r\n\n  \n{"id": "\xd1\x91"}'
+    parser: VideosLinesParser = VideosLinesParser()
+
+    assert parse(parser=parser, data=data, chunk_size=3) == [{"id": "a"}, {"id": "ё"}]
+    assert parser.items_parsed == 2
+
+
+def test_raw_items_are_returned_as_line_text() -> None:
+    data: bytes = make_ndjson(videos=make_videos(count=2)).encode("utf-8")
+
+    raw_items: List[Any] = parse(parser=VideosLinesParser(raw_items=True), data=data, chunk_size=50)
+
+    assert [jsonloads(item) for item in raw_items] == make_videos(count=2)
+
+
+@pytest.mark.parametrize(("data", "message"), [
+    (b'{"id": "a"}\n[1, 2]\n', "Элемент videos[1] должен быть объектом"),
+    (b'{"id": "a"}\n{"id": }\n', "Некорректный JSON в videos[1]"),
+    (b'{"id": "\xff"}\n', "Ошибка кодировки файла"),
+])
+def test_invalid_lines_are_rejected(data: bytes, message: str) -> None:
+    with pytest.raises(ValueError, match=escape(message)):
+        parse(parser=VideosLinesParser(), data=data, chunk_size=1024)
+
+
+@pytest.mark.parametrize(("file_name", "expected"), [
+    ("videos.json", (DocumentFormat.json, Compression.none)),
+    ("VIDEOS.JSON.GZ", (DocumentFormat.json, Compression.gzip)),
+    ("videos.json.zst", (DocumentFormat.json, Compression.zstd)),
+    ("videos.ndjson", (DocumentFormat.ndjson, Compression.none)),
+    ("videos.ndjson.gz", (DocumentFormat.ndjson, Compression.gzip)),
+    ("videos.ndjson.zst", (DocumentFormat.ndjson, Compression.zstd)),
+    ("videos.csv", None),
+    ("videos.gz", None),
+])
+def test_format_is_detected_by_extension(
+        file_name: str,
+        expected: Optional[Tuple[DocumentFormat, Compression]]
+) -> None:
+    assert FileValidator.detect_format(file_name=file_name) == expected
+
+
+@pytest.mark.parametrize("file_name", [
+    "videos.ndjson",
+    "videos.ndjson.gz",
+    "videos.ndjson.zst",
+    "videos.json.gz",
+    "videos.json.zst",
+])
+def test_every_upload_format_gives_same_videos(tmp_path: Path, file_name: str) -> None:
+    videos: List[Dict[str, Any]] = make_videos(count=30, snapshots=3)
+    reference: Path = tmp_path / "videos.json"
+    reference.write_text(make_document(videos=videos), encoding="utf-8")
+
+    data: bytes = (make_ndjson(videos=videos) if ".ndjson" in file_name else make_document(videos=videos)).encode()
+    if file_name.endswith(".gz"):
+        data = gzip_compress(data)
+    elif file_name.endswith(".zst"):
+        data = ZstdCompressor().compress(data)
+    path: Path = tmp_path / file_name
+    path.write_bytes(data)
+
+    records: List[VideoRecord] = list(FileValidator.iter_videos(file_path=path, chunk_size=512))
+
+    assert records == list(FileValidator.iter_videos(file_path=reference))
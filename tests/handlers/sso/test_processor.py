@@ -0,0 +1,120 @@
+from asyncio import run
+from typing import List, Dict, Any, Iterator, cast
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.handlers.sso import copy_loader
+from src.handlers.sso.copy_loader import CopyBulkLoader
+from src.handlers.sso.enums import UploadLoader, IngestMode
+from src.handlers.sso.processor import UploadRepository
+from src.handlers.sso.records import VideoRecord, VIDEO_COLUMNS
+from tests.handlers.sso.factories import make_records
+from tests.handlers.sso.fakes import FakeUploadSession, FakeCopySession, FakeConnection
+
+
+def save(
+        session: FakeUploadSession,
+        videos: Any,
+        mode: IngestMode = IngestMode.strict,
+        upload_key: str = "file-1",
+        on_batch_committed: Any = None,
+        loader: UploadLoader = UploadLoader.orm
+) -> Dict[str, Any]:
+    return run(UploadRepository.save_upload_stream(
+        session=cast(AsyncSession, session),
+        videos=videos,
+        batch_size=2,
+        loader=loader,
+        upload_key=upload_key,
+        mode=mode,
+        on_batch_committed=on_batch_committed
+    ))
+
+
+def failing_after(records: List[VideoRecord], count: int) -> Iterator[VideoRecord]:
+    """Поток видео, который обрывается ошибкой валидации после count видео"""
+    yield from records[:count]
+    raise ValueError("videos[5]: ошибка валидации")
+
+
+def test_batches_are_committed_with_checkpoints() -> None:
+    session: FakeUploadSession = FakeUploadSession()
+
+    stats: Dict[str, Any] = save(session=session, videos=make_records(count=5, snapshots=2))
+
+    assert (stats['videos_created'], stats['snapshots_created'], stats['videos_processed']) == (5, 10, 5)
+    assert [checkpoint['videos_committed'] for checkpoint in session.checkpoint_history] == [2, 4, 5]
+    assert [checkpoint['batches_committed'] for checkpoint in session.checkpoint_history] == [1, 2, 3]
+    # Три пачки и удаление контрольной точки после успешной загрузки
+    assert session.commits == 4
+    assert session.checkpoints == {}
+
+
+def test_resent_file_resumes_after_last_committed_batch() -> None:
+    session: FakeUploadSession = FakeUploadSession()
+    records: List[VideoRecord] = make_records(count=7, snapshots=1)
+
+    with pytest.raises(ValueError):
+        save(session=session, videos=failing_after(records=records, count=5))
+    assert session.checkpoints["file-1"]['videos_committed'] == 4
+
+    stats: Dict[str, Any] = save(session=session, videos=records)
+
+    assert stats['videos_skipped'] == 4
+    assert stats['videos_created'] == 3
+    assert len(session.videos) == 7
+
+
+def test_upsert_checkpoint_counts_updated_and_unchanged_videos() -> None:
+    records: List[VideoRecord] = make_records(count=5, snapshots=1)
+    session: FakeUploadSession = FakeUploadSession()
+    save(session=session, videos=records, upload_key="first")
+
+    with pytest.raises(ValueError):
+        save(session=session, videos=failing_after(records=records, count=5), mode=IngestMode.upsert)
+
+    # Ни одно видео не создано, но все четыре из закоммиченных пачек уже обработаны
+    assert session.checkpoints["file-1"]['videos_committed'] == 4
+    stats: Dict[str, Any] = save(session=session, videos=records, mode=IngestMode.upsert)
+    assert (stats['videos_skipped'], stats['videos_processed']) == (4, 1)
+
+
+def test_strict_mode_rejects_videos_already_in_database() -> None:
+    records: List[VideoRecord] = make_records(count=3, snapshots=1)
+    session: FakeUploadSession = FakeUploadSession()
+    save(session=session, videos=records[:1], upload_key="first")
+
+    with pytest.raises(ValueError, match="video-0"):
+        save(session=session, videos=records)
+
+
+def test_progress_callback_receives_stats_after_each_batch() -> None:
+    processed: List[int] = []
+
+    async def on_batch_committed(stats: Dict[str, Any]) -> None:
+        processed.append(stats['videos_processed'])
+
+    save(session=FakeUploadSession(), videos=make_records(count=5), on_batch_committed=on_batch_committed)
+
+    assert processed == [2, 4, 5]
+
+
+@pytest.mark.parametrize("mode", [IngestMode.strict, IngestMode.upsert])
+def test_each_batch_is_copied_over_connection_of_its_transaction(
+        mode: IngestMode,
+        monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(copy_loader, "AsyncConnection", FakeConnection)
+    session: FakeCopySession = FakeCopySession()
+    records: List[VideoRecord] = make_records(count=5, snapshots=1)
+
+    save(session=session, videos=records, mode=mode, loader=UploadLoader.copy)
+
+    # В режиме upsert видео идут через COPY в staging-таблицу
+    table: str = copy_loader.VIDEOS_STAGE if mode == IngestMode.upsert else "videos"
+    statement: str = CopyBulkLoader._copy_statement(table, VIDEO_COLUMNS).as_string(None)
+    copied: List[List[str]] = [[row[0] for row in connection.copied.get(statement, [])]
+                               for connection in session.connections]
+    # Пачка записана в соединение своей транзакции - той же, в которой коммитится ее контрольная точка
+    assert copied == [["video-0", "video-1"], ["video-2", "video-3"], ["video-4"], [], []]
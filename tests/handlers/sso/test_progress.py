@@ -0,0 +1,48 @@
+from asyncio import run
+from typing import Dict, Any, cast
+
+from aiogram.types import Message
+
+from src.handlers.sso.progress import UploadProgress, ProgressMessage
+from tests.handlers.sso.fakes import FakeMessage
+
+
+def batch_stats(processed: int, created: int, snapshots: int) -> Dict[str, Any]:
+    return {
+        'videos_processed': processed,
+        'videos_created': created,
+        'videos_updated': processed - created,
+        'snapshots_created': snapshots,
+        'videos_skipped': 0,
+        'errors': []
+    }
+
+
+def test_rows_committed_counts_processed_videos_in_upsert_mode() -> None:
+    progress: UploadProgress = UploadProgress(total_bytes=1000, bytes_read=250)
+    message: FakeMessage = FakeMessage()
+
+    run(ProgressMessage(message=cast(Message, message), progress=progress).update(
+        stats=batch_stats(processed=500, created=0, snapshots=100)
+    ))
+
+    assert progress.rows_committed == 600
+    assert progress.percent == 25.0
+    assert "Видео: 500" in message.edits[0]
+
+
+def test_message_edits_are_throttled() -> None:
+    message: FakeMessage = FakeMessage()
+    progress_message: ProgressMessage = ProgressMessage(
+        message=cast(Message, message),
+        progress=UploadProgress(),
+        min_interval=60.0
+    )
+
+    async def commit_batches() -> None:
+        for batch in range(1, 4):
+            await progress_message.update(stats=batch_stats(processed=batch, created=batch, snapshots=0))
+
+    run(commit_batches())
+
+    assert len(message.edits) == 1
@@ -0,0 +1,50 @@
+from asyncio import run
+from typing import List, Set, cast
+
+import pytest
+from sqlalchemy import Executable
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.compiler import SQLCompiler
+
+from src.handlers.sso.processor import UploadRepository
+from src.handlers.sso.queries.select import select_existing_video_ids, select_existing_snapshot_ids
+from tests.handlers.sso.fakes import FakeUploadSession
+
+
+def compile_query(statement: Executable) -> SQLCompiler:
+    return statement.compile(dialect=postgresql.dialect())  # type: ignore
+
+
+@pytest.mark.parametrize("count", [1, 10, 100_000])
+def test_ids_are_sent_as_one_array_parameter(count: int) -> None:
+    ids: List[str] = [f"video-{index}" for index in range(count)]
+
+    compiled: SQLCompiler = compile_query(statement=select_existing_video_ids(video_ids=ids))
+
+    assert compiled.params == {"ids": ids}
+    assert "JOIN unnest(%(ids)s::VARCHAR[]) AS incoming ON videos.id = incoming.id" in str(compiled)
+
+
+def test_snapshot_ids_join_snapshots_table() -> None:
+    compiled: SQLCompiler = compile_query(statement=select_existing_snapshot_ids(snapshot_ids=["s"]))
+
+    assert "FROM video_snapshots JOIN unnest" in str(compiled)
+
+
+def test_existing_ids_are_returned_as_set() -> None:
+    session: FakeUploadSession = FakeUploadSession(videos={"a": {"id": "a"}, "c": {"id": "c"}})
+
+    existing: Set[str] = run(UploadRepository.check_existing_videos(
+        session=cast(AsyncSession, session),
+        video_ids=["a", "b", "c"]
+    ))
+
+    assert existing == {"a", "c"}
+
+
+def test_empty_id_list_does_not_query_database() -> None:
+    session: FakeUploadSession = FakeUploadSession()
+
+    assert run(UploadRepository.check_existing_snapshots(session=cast(AsyncSession, session), snapshot_ids=[])) == set()
+    assert session.statements == []
@@ -0,0 +1,27 @@
+from typing import Dict, Any
+
+from src.handlers.sso.routes import _committed_note
+
+
+def stats(skipped: int, processed: int) -> Dict[str, Any]:
+    return {
+        'videos_processed': processed,
+        'videos_created': processed,
+        'videos_updated': 0,
+        'snapshots_created': 0,
+        'videos_skipped': skipped,
+        'errors': []
+    }
+
+
+def test_error_before_first_commit_adds_nothing() -> None:
+    assert _committed_note(stats=None) == ""
+
+
+def test_error_after_committed_batches_explains_recovery() -> None:
+    note: str = _committed_note(stats=stats(skipped=1000, processed=500))
+
+    assert "сохранено видео: 1500" in note
+    # Повторная отправка не продолжит загрузку, а снова упадет: нужен исправленный файл в режиме upsert
+    assert "остановится на той же ошибке" in note
+    assert "с подписью upsert" in note
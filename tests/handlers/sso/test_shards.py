@@ -0,0 +1,144 @@
+from asyncio import run
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from json import dumps as jsondumps
+from re import escape
+from time import sleep
+from typing import List, Dict, Any, AsyncIterator
+
+import pytest
+
+from src.handlers.sso.enums import ValidationMode, DocumentFormat
+from src.handlers.sso.records import VideoRecord
+from src.handlers.sso.shards import ShardPipeline
+from src.handlers.sso.utils import FileValidator
+from tests.handlers.sso.factories import make_videos, make_video, make_document, make_ndjson, make_records
+
+
+def slow_first(raw_items: List[str], first_index: int, validation: ValidationMode) -> List[VideoRecord]:
+    """Первый шард валидируется дольше остальных, поэтому завершается последним"""
+    sleep(0.05 if first_index == 0 else 0)
+    return FileValidator.validate_raw_videos(raw_items=raw_items, first_index=first_index, validation=validation)
+
+
+def raw_videos(*video_ids: str) -> List[str]:
+    return [jsondumps(make_video(video_id=video_id, snapshots=0)) for video_id in video_ids]
+
+
+def video_ids(results: List[List[VideoRecord]]) -> List[List[str]]:
+    return [[video[0] for video, _ in videos] for videos in results]
+
+
+async def collect(pipeline: ShardPipeline, shards: List[List[str]]) -> List[List[VideoRecord]]:
+    results: List[List[VideoRecord]] = []
+    for raw_items in shards:
+        pipeline.add(raw_items=raw_items)
+        results.extend([videos async for videos in pipeline.completed()])
+    pipeline.flush()
+    return results + [videos async for videos in pipeline.completed(wait_all=True)]
+
+
+def test_shards_are_returned_in_file_order() -> None:
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pipeline: ShardPipeline = ShardPipeline(executor=executor, validator=slow_first, shard_size=1)
+        results: List[List[VideoRecord]] = run(collect(
+            pipeline=pipeline,
+            shards=[raw_videos("a", "b"), raw_videos("c"), raw_videos("d", "e")]
+        ))
+
+    assert video_ids(results=results) == [["a", "b"], ["c"], ["d", "e"]]
+
+
+def test_small_items_are_collected_into_one_shard() -> None:
+    shard_size: int = len("".join(raw_videos("a", "b", "c")))
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pipeline: ShardPipeline = ShardPipeline(executor=executor, validator=slow_first, shard_size=shard_size)
+        results: List[List[VideoRecord]] = run(collect(
+            pipeline=pipeline,
+            shards=[raw_videos("a"), raw_videos("b"), raw_videos("c"), raw_videos("d")]
+        ))
+
+    assert video_ids(results=results) == [["a", "b", "c"], ["d"]]
+
+
+def test_pipeline_waits_for_oldest_shard_when_too_many_are_in_flight() -> None:
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pipeline: ShardPipeline = ShardPipeline(executor=executor, validator=slow_first, shard_size=1, max_in_flight=1)
+
+        async def add_two_shards() -> List[List[VideoRecord]]:
+            pipeline.add(raw_items=raw_videos("first"))
+            pipeline.add(raw_items=raw_videos("second"))
+            return [videos async for videos in pipeline.completed()]
+
+        ready: List[List[VideoRecord]] = run(add_two_shards())
+
+    # Первый шард еще валидируется, но в пуле их два при max_in_flight=1 - его результат дожидаются
+    assert video_ids(results=ready)[0] == ["first"]
+
+
+def test_cancel_drops_pending_and_unsent_shards() -> None:
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pipeline: ShardPipeline = ShardPipeline(executor=executor, validator=slow_first, shard_size=10 ** 6)
+
+        async def add_and_cancel() -> List[List[VideoRecord]]:
+            pipeline.add(raw_items=raw_videos("a"))
+            pipeline.add(raw_items=raw_videos("b"))
+            pipeline.cancel()
+            pipeline.flush()
+            return [videos async for videos in pipeline.completed(wait_all=True)]
+
+        assert run(add_and_cancel()) == []
+
+
+@pytest.mark.parametrize("validation", list(ValidationMode))
+def test_raw_videos_are_validated_like_parsed_ones(validation: ValidationMode) -> None:
+    raw_items: List[str] = [jsondumps(video) for video in make_videos(count=3)]
+
+    assert FileValidator.validate_raw_videos(raw_items=raw_items, first_index=0, validation=validation) == \
+        make_records(count=3)
+
+
+@pytest.mark.parametrize(("raw_item", "message"), [
+    (jsondumps(make_video(video_id="bad", likes_count=-1)), "videos[7]"),
+    ('{"id": ', "videos[7]"),
+])
+@pytest.mark.parametrize("validation", list(ValidationMode))
+def test_raw_video_errors_point_to_position_in_file(raw_item: str, message: str, validation: ValidationMode) -> None:
+    raw_items: List[str] = [jsondumps(make_video(video_id="ok")), raw_item]
+
+    with pytest.raises(ValueError, match=escape(message)):
+        FileValidator.validate_raw_videos(raw_items=raw_items, first_index=6, validation=validation)
+
+
+async def as_chunks(data: bytes, chunk_size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+def read(data: bytes, document_format: DocumentFormat, executor: Executor | None) -> List[VideoRecord]:
+    async def collect_videos() -> List[VideoRecord]:
+        return [video async for video in FileValidator.aiter_videos(
+            chunks=as_chunks(data=data, chunk_size=4096),
+            executor=executor,
+            document_format=document_format,
+            shards_in_flight=2
+        )]
+
+    return run(collect_videos())
+
+
+@pytest.mark.parametrize(("document_format", "data"), [
+    (DocumentFormat.json, make_document(videos=make_videos(count=200, snapshots=3)).encode()),
+    (DocumentFormat.ndjson, make_ndjson(videos=make_videos(count=200, snapshots=3)).encode()),
+])
+def test_process_pool_gives_same_videos_as_inline_validation(document_format: DocumentFormat, data: bytes) -> None:
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        pooled: List[VideoRecord] = read(data=data, document_format=document_format, executor=executor)
+
+    assert pooled == read(data=data, document_format=document_format, executor=None)
+
+
+def test_process_pool_reports_validation_error() -> None:
+    videos: List[Dict[str, Any]] = make_videos(count=50)
+    videos[42]["creator_id"] = "short"
+    with ProcessPoolExecutor(max_workers=2) as executor, pytest.raises(ValueError, match=escape("videos[42]")):
+        read(data=make_document(videos=videos).encode(), document_format=DocumentFormat.json, executor=executor)
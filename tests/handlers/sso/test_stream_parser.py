@@ -0,0 +1,85 @@
+from json import loads as jsonloads
+from re import escape
+from typing import List, Any, Dict
+
+import pytest
+
+from src.handlers.sso.stream_parser import VideosStreamParser
+from tests.handlers.sso.factories import make_videos, make_video, make_document
+
+
+def parse_chunks(text: str, chunk_size: int, raw_items: bool = False) -> List[Any]:
+    """Подает документ в парсер байтовыми чанками по chunk_size"""
+    parser: VideosStreamParser = VideosStreamParser(raw_items=raw_items)
+    data: bytes = text.encode("utf-8")
+    items: List[Any] = []
+    for start in range(0, len(data), chunk_size):
+        items.extend(parser.feed_bytes(data[start:start + chunk_size]))
+    items.extend(parser.close())
+    return items
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1000, 10 ** 6])
+def test_items_match_json_loads_for_any_chunk_size(chunk_size: int) -> None:
+    videos: List[Dict[str, Any]] = make_videos(count=5)
+    videos[2]["creator_id"] = "строка с \"кавычками\", {скобками} и [массивом] \\"
+
+    assert parse_chunks(text=make_document(videos=videos), chunk_size=chunk_size) == videos
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1000])
+def test_raw_items_are_source_json_of_each_video(chunk_size: int) -> None:
+    videos: List[Dict[str, Any]] = make_videos(count=4)
+    videos[1]["id"] = "экранированная \\\" кавычка и } скобка"
+
+    items: List[Any] = parse_chunks(text=make_document(videos=videos), chunk_size=chunk_size, raw_items=True)
+
+    assert all(isinstance(item, str) for item in items)
+    assert [jsonloads(item) for item in items] == videos
+
+
+def test_multibyte_character_split_between_chunks() -> None:
+    video: Dict[str, Any] = make_video(video_id="видео-ё")
+
+    assert parse_chunks(text=make_document(videos=[video]), chunk_size=1) == [video]
+
+
+def test_other_root_keys_are_skipped() -> None:
+    videos: List[Dict[str, Any]] = make_videos(count=2)
+    text: str = '{"meta": {"videos": [1, 2]}, "videos": ' + make_document(videos=videos)[11:-1] + ', "tail": "}"}'
+
+    assert parse_chunks(text=text, chunk_size=3) == videos
+
+
+def test_items_are_returned_before_document_ends() -> None:
+    parser: VideosStreamParser = VideosStreamParser()
+    text: str = make_document(videos=make_videos(count=3))
+
+    items: List[Any] = parser.feed(text[:len(text) // 2])
+
+    assert items and parser.items_parsed == len(items)
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("", "файл пуст"),
+        ("[]", "Корневой элемент JSON должен быть объектом"),
+        ('{"items": []}', "Отсутствует обязательный ключ 'videos'"),
+        ('{"videos": {}}', "'videos' должен быть списком"),
+        ('{"videos": [1]}', "Элемент videos[0] должен быть объектом"),
+        ('{"videos": [{"id": 1}', "неожиданный конец файла"),
+        ('{"videos": []} {}', "лишние данные после корневого объекта"),
+        ('{"videos": [{"id": 1} {"id": 2}]}', "ожидалось ',' или ']'"),
+    ]
+)
+def test_invalid_documents_are_rejected(text: str, message: str) -> None:
+    with pytest.raises(ValueError, match=escape(message)):
+        parse_chunks(text=text, chunk_size=4)
+
+
+def test_invalid_utf8_is_rejected() -> None:
+    parser: VideosStreamParser = VideosStreamParser()
+
+    with pytest.raises(ValueError, match="Ошибка кодировки файла"):
+        parser.feed_bytes(b'{"videos": ["\xff"]}')
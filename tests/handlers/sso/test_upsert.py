@@ -0,0 +1,112 @@
+from asyncio import run
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Tuple, cast
+
+from psycopg import AsyncConnection
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.handlers.sso.columnar import ColumnarValidator
+from src.handlers.sso.copy_loader import CopyBulkLoader, VIDEOS_STAGE, SNAPSHOTS_STAGE
+from src.handlers.sso.processor import UploadRepository
+from src.handlers.sso.records import VIDEO_COLUMNS, SNAPSHOT_COLUMNS, VideoRecord
+from tests.handlers.sso.factories import make_video
+from tests.handlers.sso.fakes import FakeUploadSession, FakeConnection
+
+NOVEMBER: datetime = datetime(2025, 11, 1, tzinfo=timezone.utc)
+DECEMBER: datetime = datetime(2025, 12, 1, tzinfo=timezone.utc)
+
+
+def records(*videos: Dict[str, Any]) -> List[VideoRecord]:
+    return ColumnarValidator.validate_reference(items=list(videos))
+
+
+def empty_stats() -> Dict[str, Any]:
+    return {'videos_processed': 0, 'videos_created': 0, 'videos_updated': 0, 'snapshots_created': 0}
+
+
+def upsert_orm(session: FakeUploadSession, batch: List[VideoRecord]) -> Dict[str, Any]:
+    stats: Dict[str, Any] = empty_stats()
+    run(UploadRepository._upsert_batch_orm(session=cast(AsyncSession, session), batch=batch, stats=stats))
+    return stats
+
+
+def test_orm_upsert_updates_only_videos_with_newer_updated_at() -> None:
+    session: FakeUploadSession = FakeUploadSession(videos={
+        "stale": {"id": "stale", "updated_at": NOVEMBER, "views_count": 1},
+        "fresh": {"id": "fresh", "updated_at": DECEMBER, "views_count": 1},
+    })
+    batch: List[VideoRecord] = records(
+        make_video(video_id="new", snapshots=2),
+        make_video(video_id="stale", snapshots=1, views_count=500, updated_at="2025-11-15T00:00:00+00:00"),
+        make_video(video_id="fresh", snapshots=1, views_count=500, updated_at="2025-11-15T00:00:00+00:00"),
+    )
+
+    stats: Dict[str, Any] = upsert_orm(session=session, batch=batch)
+
+    assert stats == {'videos_processed': 3, 'videos_created': 1, 'videos_updated': 1, 'snapshots_created': 4}
+    assert session.videos["stale"]["views_count"] == 500
+    assert session.videos["fresh"]["views_count"] == 1
+
+
+def test_orm_upsert_skips_existing_snapshots() -> None:
+    session: FakeUploadSession = FakeUploadSession()
+    batch: List[VideoRecord] = records(make_video(video_id="video", snapshots=2))
+    upsert_orm(session=session, batch=batch)
+
+    stats: Dict[str, Any] = upsert_orm(session=session, batch=batch)
+
+    assert (stats['videos_created'], stats['videos_updated'], stats['snapshots_created']) == (0, 0, 0)
+
+
+def test_orm_upsert_keeps_latest_duplicate_of_batch() -> None:
+    session: FakeUploadSession = FakeUploadSession()
+    batch: List[VideoRecord] = records(
+        make_video(video_id="video", snapshots=0, views_count=2, updated_at="2025-12-01T00:00:00+00:00"),
+        make_video(video_id="video", snapshots=0, views_count=1, updated_at="2025-11-01T00:00:00+00:00"),
+    )
+
+    upsert_orm(session=session, batch=batch)
+
+    # Один ON CONFLICT DO UPDATE не может затронуть строку дважды - в запрос уходит только последняя версия
+    _, video_rows = session.statements[0]
+    assert [row["views_count"] for row in video_rows] == [2]
+    assert session.videos["video"]["views_count"] == 2
+
+
+def test_orm_upsert_statement_updates_on_newer_updated_at() -> None:
+    session: FakeUploadSession = FakeUploadSession()
+    upsert_orm(session=session, batch=records(make_video(video_id="video", snapshots=0)))
+
+    query: str = str(session.statements[0][0].compile(dialect=postgresql.dialect()))
+
+    assert "ON CONFLICT (id) DO UPDATE" in query
+    assert "WHERE videos.updated_at < excluded.updated_at" in query
+    assert "RETURNING (xmax = 0)" in query
+
+
+def test_copy_upsert_stages_rows_and_counts_results() -> None:
+    connection: FakeConnection = FakeConnection(
+        results={CopyBulkLoader._upsert_videos_statement().as_string(None): [(True,), (False,)]},
+        rowcounts={CopyBulkLoader._insert_new_snapshots_statement().as_string(None): 3}
+    )
+    batch: List[VideoRecord] = records(make_video(video_id="a", snapshots=2), make_video(video_id="b", snapshots=2))
+
+    counts: Tuple[int, int, int] = run(CopyBulkLoader.upsert_batch(
+        connection=cast(AsyncConnection, connection),
+        batch=batch
+    ))
+
+    assert counts == (1, 1, 3)
+    assert connection.copied[CopyBulkLoader._copy_statement(VIDEOS_STAGE, VIDEO_COLUMNS).as_string(None)] == [
+        video for video, _ in batch
+    ]
+    assert len(connection.copied[CopyBulkLoader._copy_statement(SNAPSHOTS_STAGE, SNAPSHOT_COLUMNS).as_string(None)]) == 4
+    # Staging-таблицы создаются и очищаются до COPY в них
+    assert connection.executed[:4] == [
+        'CREATE TEMP TABLE IF NOT EXISTS "videos_stage" (LIKE "videos" INCLUDING DEFAULTS) ON COMMIT DELETE ROWS',
+        'TRUNCATE "videos_stage"',
+        'CREATE TEMP TABLE IF NOT EXISTS "video_snapshots_stage" (LIKE "video_snapshots" INCLUDING DEFAULTS) '
+        'ON COMMIT DELETE ROWS',
+        'TRUNCATE "video_snapshots_stage"',
+    ]
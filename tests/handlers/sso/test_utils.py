@@ -0,0 +1,62 @@
+from asyncio import run
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Dict, Any, AsyncIterator
+
+import pytest
+
+from src.handlers.sso.records import VideoRecord
+from src.handlers.sso.utils import FileValidator, aiter_batches
+from tests.handlers.sso.factories import make_videos, make_document
+
+
+def write_upload(directory: Path, videos: List[Dict[str, Any]], name: str = "videos.json") -> Path:
+    path: Path = directory / name
+    path.write_text(make_document(videos=videos), encoding="utf-8")
+    return path
+
+
+def test_iter_videos_yields_rows_in_column_order(tmp_path: Path) -> None:
+    path: Path = write_upload(directory=tmp_path, videos=make_videos(count=3, snapshots=2))
+
+    records: List[VideoRecord] = list(FileValidator.iter_videos(file_path=path, chunk_size=50))
+
+    assert [video[0] for video, _ in records] == ["video-0", "video-1", "video-2"]
+    video, snapshots = records[0]
+    assert video[2] == datetime(2025, 10, 30, 8, tzinfo=timezone.utc)
+    assert [snapshot[0] for snapshot in snapshots] == ["video-0-s0", "video-0-s1"]
+
+
+def test_iter_videos_reports_position_of_invalid_video(tmp_path: Path) -> None:
+    videos: List[Dict[str, Any]] = make_videos(count=5)
+    videos[3]["views_count"] = -1
+    path: Path = write_upload(directory=tmp_path, videos=videos)
+
+    with pytest.raises(ValueError, match=r"videos\[3\]"):
+        list(FileValidator.iter_videos(file_path=path, chunk_size=64))
+
+
+def test_iter_videos_missing_file() -> None:
+    with pytest.raises(FileNotFoundError):
+        list(FileValidator.iter_videos(file_path="/nonexistent/videos.json"))
+
+
+async def collect_batches(items: Any, batch_size: int, skip: int = 0) -> List[List[int]]:
+    return [batch async for batch in aiter_batches(items=items, batch_size=batch_size, skip=skip)]
+
+
+async def numbers(count: int) -> AsyncIterator[int]:
+    for number in range(count):
+        yield number
+
+
+def test_aiter_batches_splits_sync_and_async_sources() -> None:
+    expected: List[List[int]] = [[0, 1, 2], [3, 4, 5], [6]]
+
+    assert run(collect_batches(items=range(7), batch_size=3)) == expected
+    assert run(collect_batches(items=numbers(count=7), batch_size=3)) == expected
+    assert run(collect_batches(items=[], batch_size=3)) == []
+
+
+def test_aiter_batches_skips_already_committed_items() -> None:
+    assert run(collect_batches(items=numbers(count=7), batch_size=3, skip=4)) == [[4, 5, 6]]
@@ -0,0 +1,158 @@
+from asyncio import run
+from datetime import date
+from typing import List, Any, Dict, Optional, Callable, cast
+
+import pytest
+from aiogram.filters import CommandObject
+from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.llms.scheduler import LLMScheduler
+from src.handlers.sso import processor, routes
+from src.handlers.sso.enums import UploadLoader, IngestMode
+from src.handlers.sso.jobs import IngestionQueue
+from src.handlers.sso.processor import UploadRepository
+from src.handlers.sso.routes import handle_job_status
+from src.handlers.videos import repository
+from src.handlers.videos.cache import AnalyticsCache
+from src.handlers.videos.repository import AnalyticRepository
+from tests.core.llms.fakes import FakeClock, FakeLLM, always
+from tests.handlers.sso.factories import make_records
+from tests.handlers.sso.fakes import FakeResult, FakeUploadSession, FakeMessage
+
+
+class FakeAnalyticsSession:
+    """Сессия, которая на любой запрос отвечает следующим из results; on_execute вызывается во время запроса"""
+
+    def __init__(self, *results: Optional[int], on_execute: Optional[Callable[[], None]] = None) -> None:
+        self.results: List[Optional[int]] = list(results)
+        self.on_execute: Optional[Callable[[], None]] = on_execute
+        self.executed: int = 0
+
+    async def execute(self, statement: Any) -> FakeResult:
+        self.executed += 1
+        if self.on_execute is not None:
+            self.on_execute()
+        return FakeResult(rows=[(self.results.pop(0),)])
+
+
+@pytest.fixture
+def cache(monkeypatch: pytest.MonkeyPatch) -> AnalyticsCache:
+    """Свежий analytics_cache вместо общего для процесса - у репозитория, загрузки и /status"""
+    fresh: AnalyticsCache = AnalyticsCache()
+    monkeypatch.setattr(repository, "analytics_cache", fresh)
+    monkeypatch.setattr(processor, "analytics_cache", fresh)
+    monkeypatch.setattr(routes, "analytics_cache", fresh)
+    return fresh
+
+
+def views_above(session: FakeAnalyticsSession, views: int) -> int:
+    return run(AnalyticRepository.get_videos_count_with_views_above(views=views, session=cast(AsyncSession, session)))
+
+
+def test_entry_is_evicted_by_size_and_expires_by_ttl() -> None:
+    clock: FakeClock = FakeClock()
+    analytics_cache: AnalyticsCache = AnalyticsCache(max_size=2, ttl_seconds=60, clock=clock)
+    analytics_cache.put(key=("a", ()), value=1, version=0)
+    analytics_cache.put(key=("b", ()), value=2, version=0)
+    assert analytics_cache.get(key=("a", ())) == 1
+
+    analytics_cache.put(key=("c", ()), value=3, version=0)
+    assert analytics_cache.get(key=("b", ())) is None
+    clock.advance(seconds=60)
+    assert analytics_cache.get(key=("a", ())) is None
+    assert analytics_cache.metrics() == {"version": 0, "size": 1, "hits": 1, "misses": 2, "hit_rate": 0.333}
+
+
+def test_result_of_previous_data_version_is_not_stored() -> None:
+    analytics_cache: AnalyticsCache = AnalyticsCache()
+    analytics_cache.put(key=("a", ()), value=1, version=0)
+
+    analytics_cache.bump()
+    analytics_cache.put(key=("b", ()), value=2, version=0)
+
+    assert len(analytics_cache) == 0
+    assert analytics_cache.version == 1
+
+
+def test_repeated_question_is_answered_without_database(cache: AnalyticsCache) -> None:
+    session: FakeAnalyticsSession = FakeAnalyticsSession(10, 20)
+
+    assert [views_above(session=session, views=1000) for _ in range(3)] == [10, 10, 10]
+    assert views_above(session=session, views=5000) == 20
+    assert session.executed == 2
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_parameters_of_each_query_are_part_of_key(cache: AnalyticsCache) -> None:
+    session: FakeAnalyticsSession = FakeAnalyticsSession(1, 2, 3)
+    creator_id: str = "aca1061a9d324ecf8c3fa2bb32d7be63"
+
+    async def ask() -> List[int]:
+        db: AsyncSession = cast(AsyncSession, session)
+        return [
+            await AnalyticRepository.get_total_views_growth_by_date(target_date=date(2025, 11, 28), session=db),
+            await AnalyticRepository.get_unique_videos_with_new_views_by_date(target_date=date(2025, 11, 28),
+                                                                              session=db),
+            await AnalyticRepository.get_videos_count_by_creator_above_views(creator_id=creator_id, views=1000,
+                                                                             session=db),
+            await AnalyticRepository.get_total_views_growth_by_date(target_date=date(2025, 11, 28), session=db),
+        ]
+
+    assert run(ask()) == [1, 2, 3, 1]
+    assert session.executed == 3
+
+
+def test_empty_aggregate_is_cached_as_zero(cache: AnalyticsCache) -> None:
+    session: FakeAnalyticsSession = FakeAnalyticsSession(None)
+
+    assert views_above(session=session, views=1000) == 0
+    assert views_above(session=session, views=1000) == 0
+    assert session.executed == 1
+
+
+def test_result_computed_during_upload_is_not_cached(cache: AnalyticsCache) -> None:
+    session: FakeAnalyticsSession = FakeAnalyticsSession(10, 11, on_execute=cache.bump)
+
+    assert views_above(session=session, views=1000) == 10
+    assert views_above(session=session, views=1000) == 11
+
+
+def test_committed_upload_batches_invalidate_cache(cache: AnalyticsCache) -> None:
+    session: FakeAnalyticsSession = FakeAnalyticsSession(10, 15)
+    views_above(session=session, views=1000)
+    upload_session: FakeUploadSession = FakeUploadSession()
+
+    stats: Dict[str, Any] = run(UploadRepository.save_upload_stream(
+        session=cast(AsyncSession, upload_session),
+        videos=make_records(count=5),
+        batch_size=2,
+        loader=UploadLoader.orm,
+        upload_key="file-1",
+        mode=IngestMode.strict
+    ))
+
+    assert stats['videos_created'] == 5
+    # Версия увеличивается после коммита каждой из трех пачек
+    assert cache.version == 3
+    assert views_above(session=session, views=1000) == 15
+
+
+def test_status_shows_cache_metrics(cache: AnalyticsCache) -> None:
+    session: FakeAnalyticsSession = FakeAnalyticsSession(10, 20)
+    views_above(session=session, views=1000)
+    views_above(session=session, views=1000)
+    cache.bump()
+    views_above(session=session, views=1000)
+    message: FakeMessage = FakeMessage()
+
+    run(handle_job_status(
+        message=cast(Message, message),
+        command=CommandObject(command="status"),
+        ingest_queue=IngestionQueue(session_factory=cast(Any, None)),
+        llm_scheduler=LLMScheduler(llm_client=FakeLLM(answer=always(text="ответ")))
+    ))
+
+    assert cache.metrics() == {"version": 1, "size": 1, "hits": 1, "misses": 2, "hit_rate": 0.333}
+    assert "Версия данных: 1, записей: 1" in message.answers[0]
+    assert "Попаданий: 1, промахов: 2 (доля попаданий 0.333)" in message.answers[0]